@@ -0,0 +1,7 @@
+"""
+Benchmarks package for Event Action Agent.
+
+Contains offline benchmarks that run without a live LLM provider or network access.
+"""
+
+__version__ = "1.0.0"
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Agent loop overhead benchmark.
+
+Runs the LangChain agent against a ScriptedChatModel with zero latency and
+offline search, so the measured time is the cost of the framework itself:
+prompt construction, tool dispatch and the executor's per-iteration work.
+
+Usage:
+    python benchmarks/bench_agent_loop.py [--iterations N] [--repeat N] [--json PATH]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fakes import offline_tools
+from src.agent.agent import LangChainAgent
+from src.agent.callbacks import TimingCallbackHandler
+from src.agent.fake_llm import ScriptedChatModel
+from src.agent.instrumentation import trace_run
+from src.agent.tools import search_web, checkIsMailneedtoSend
+
+
+def _time_calls(func: Callable, repeat: int) -> List[float]:
+    """Call func repeatedly, returning each call's wall time in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def _summarize(samples: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples)
+    return {
+        "n": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered), 4),
+        "p50_ms": round(ordered[len(ordered) // 2], 4),
+        "p99_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))], 4)
+    }
+
+
+def bench_prompt_construction(agent: LangChainAgent, repeat: int) -> Dict[str, float]:
+    """Time formatting the agent prompt for a query."""
+    return _summarize(_time_calls(
+        lambda: agent.prompt.format_messages(input="tax policy updates", agent_scratchpad=[]), repeat
+    ))
+
+
+def bench_tool_dispatch(repeat: int) -> Dict[str, Dict[str, float]]:
+    """Time each tool through LangChain's tool interface against a direct function call."""
+    results = {}
+    cases = {
+        "search_web": (search_web, {"query": "tax policy updates", "max_results": 5}),
+        "checkIsMailneedtoSend": (checkIsMailneedtoSend, {"event_data": '{"topic": "tax policy"}'})
+    }
+    for name, (tool, args) in cases.items():
+        direct = _summarize(_time_calls(lambda: tool.func(**args), repeat))
+        dispatched = _summarize(_time_calls(lambda: tool.invoke(args), repeat))
+        results[name] = {
+            "direct": direct,
+            "invoke": dispatched,
+            "overhead_mean_ms": round(dispatched["mean_ms"] - direct["mean_ms"], 4)
+        }
+    return results
+
+
+def bench_loop_overhead(iterations: int, repeat: int) -> Dict[str, float]:
+    """Time full executor runs and subtract LLM and tool time to get per-iteration overhead."""
+    script = [[{"name": "search_web", "args": {"query": f"tax policy step {i}", "max_results": 5}}]
+              for i in range(iterations)]
+    script.append("Done.")
+    agent = LangChainAgent(llm=ScriptedChatModel(script=script))
+    agent.executor.verbose = False
+    agent.executor.max_iterations = iterations + 1
+
+    per_iteration = []
+    for _ in range(repeat):
+        with trace_run("bench", registry=None) as trace:
+            agent.executor.invoke({"input": "tax policy updates"},
+                                  config={"callbacks": [TimingCallbackHandler(trace)]})
+        accounted = sum(entry["total_ms"] for stage, entry in trace.stage_totals().items()
+                        if stage == "llm" or stage.startswith("tool."))
+        per_iteration.append((trace.duration_ms - accounted) / (iterations + 1))
+    return _summarize(per_iteration)
+
+
+def main():
+    """Run the agent loop benchmarks."""
+    parser = argparse.ArgumentParser(description="Benchmark agent loop overhead with the LLM cost removed")
+    parser.add_argument("--iterations", type=int, default=5, help="Tool-calling iterations per agent run")
+    parser.add_argument("--repeat", type=int, default=50, help="Measurements per benchmark")
+    parser.add_argument("--json", dest="json_path", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    with offline_tools():
+        agent = LangChainAgent(llm=ScriptedChatModel(script=["Done."]))
+        results = {
+            "prompt_construction": bench_prompt_construction(agent, args.repeat),
+            "tool_dispatch": bench_tool_dispatch(args.repeat),
+            "loop_overhead_per_iteration": bench_loop_overhead(args.iterations, args.repeat)
+        }
+
+    print("🏁 Agent Loop Overhead Benchmark")
+    print("=" * 50)
+    print(f"Prompt construction:        {results['prompt_construction']['mean_ms']:.3f} ms mean")
+    for name, entry in results["tool_dispatch"].items():
+        print(f"Tool dispatch ({name}): {entry['overhead_mean_ms']:.3f} ms overhead "
+              f"({entry['invoke']['mean_ms']:.3f} ms via invoke)")
+    loop = results["loop_overhead_per_iteration"]
+    print(f"Loop overhead / iteration:  {loop['mean_ms']:.3f} ms mean, {loop['p99_ms']:.3f} ms p99")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
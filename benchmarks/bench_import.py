@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+CLI startup (import time) benchmark.
+
+Imports a module in a fresh interpreter with ``python -X importtime`` and
+reports the cumulative import time, the most expensive modules and whether
+any heavy dependency (LangChain, the OpenAI client, ddgs) was loaded. Light
+commands such as ``--status`` and ``--memory`` must not load them; they are
+imported lazily when an agent or a search is actually used.
+
+Usage:
+    python benchmarks/bench_import.py [--module NAME] [--repeat N] [--top N] [--max-ms MS] [--json PATH]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Top-level packages that only the agent and web search need
+HEAVY_MODULES = ("langchain", "langchain_openai", "langchain_core", "langchain_community", "openai", "ddgs")
+
+
+def measure_import(module: str) -> Dict:
+    """Import module in a fresh interpreter and parse its -X importtime report.
+
+    Returns:
+        Dictionary with total_ms, per-module cumulative times (modules) and the
+        heavy modules that were loaded
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+    )
+    modules: Dict[str, float] = {}
+    for line in result.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = int(cumulative) / 1000
+    top_level = module.split(".")[0]
+    return {
+        "total_ms": round(modules.get(module, modules.get(top_level, 0.0)), 3),
+        "modules": modules,
+        "heavy_modules": sorted(name for name in modules if name in HEAVY_MODULES)
+    }
+
+
+def main():
+    """Run the import time benchmark."""
+    parser = argparse.ArgumentParser(description="Benchmark CLI startup by measuring import time")
+    parser.add_argument("--module", default="src.cli", help="Module to import (default: src.cli)")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters to measure")
+    parser.add_argument("--top", type=int, default=10, help="Most expensive modules to list")
+    parser.add_argument("--max-ms", type=float, help="Fail if the median import time exceeds this budget")
+    parser.add_argument("--json", dest="json_path", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    runs = [measure_import(args.module) for _ in range(args.repeat)]
+    samples: List[float] = sorted(run["total_ms"] for run in runs)
+    last = runs[-1]
+    # Top-level entries only; nested modules are already included in their parent's time
+    top = sorted(((name, ms) for name, ms in last["modules"].items() if "." not in name),
+                 key=lambda item: item[1], reverse=True)[:args.top]
+    results = {
+        "module": args.module,
+        "median_ms": round(statistics.median(samples), 3),
+        "min_ms": samples[0],
+        "max_ms": samples[-1],
+        "heavy_modules": last["heavy_modules"],
+        "top_modules": [{"module": name, "cumulative_ms": ms} for name, ms in top]
+    }
+
+    print("🏁 Import Time Benchmark")
+    print("=" * 50)
+    print(f"import {args.module}: {results['median_ms']:.1f} ms median "
+          f"({results['min_ms']:.1f}-{results['max_ms']:.1f} ms over {len(samples)} runs)")
+    print(f"Heavy modules loaded: {', '.join(results['heavy_modules']) or 'none'}")
+    print("Most expensive top-level imports:")
+    for entry in results["top_modules"]:
+        print(f"  {entry['cumulative_ms']:9.1f} ms  {entry['module']}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.json_path}")
+
+    if args.max_ms is not None and results["median_ms"] > args.max_ms:
+        print(f"\n❌ Import time {results['median_ms']:.1f} ms exceeds the {args.max_ms:.1f} ms budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+NotificationMemory benchmark at production scale.
+
+Seeds a fresh SQLite store with synthetic history (10^4, 10^5 and 10^6 sent
+updates by default, spread over many topics, recipients and the last
+``--days`` days) and measures throughput and latency percentiles of the
+memory operations the agent and the scheduler depend on:
+
+    filter_new_updates         half of the checked updates already sent
+    mark_notification_sent     a notification with new updates
+    get_recent_notifications   one topic, last 7 days
+    get_notification_stats     whole-table aggregates
+    cleanup_old_notifications  the first call deletes everything older than
+                               30 days; later calls find nothing to delete
+
+Results are written as JSON (``--json``) together with the git commit, Python
+and SQLite versions, so runs on different commits can be compared
+(``--compare baseline.json``).
+
+Usage:
+    python benchmarks/bench_memory.py [--sizes 10000 100000 1000000] [--topics N] [--repeat N]
+                                      [--json PATH] [--compare PATH]
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.agent.notification_memory import NotificationMemory
+from src.agent.topics import canonical_topic
+
+UPDATES_PER_NOTIFICATION = 5
+OPERATIONS = ["filter_new_updates", "mark_notification_sent", "get_recent_notifications",
+              "get_notification_stats", "cleanup_old_notifications"]
+
+
+def topic_name(index: int) -> str:
+    return f"benchmark topic {index:05d}"
+
+
+def make_update(topic_index: int, update_index: int) -> Dict[str, str]:
+    """Build the synthetic update number update_index of a topic."""
+    return {
+        "title": f"{topic_name(topic_index)} update {update_index}",
+        "url": f"https://news.example.com/{topic_index}/{update_index}",
+        "snippet": "Synthetic update used by the notification memory benchmark."
+    }
+
+
+def seed(memory: NotificationMemory, updates: int, topics: int, recipients: int, days: int,
+         rng: random.Random) -> Dict[str, float]:
+    """Fill the memory database with synthetic notifications.
+
+    Every notification carries UPDATES_PER_NOTIFICATION updates of one topic,
+    goes to one of the recipients and is dated uniformly over the last days.
+    Rows are written directly (as mark_notification_sent would) in one
+    transaction so that 10^6 updates seed in seconds.
+
+    Returns:
+        Seeding time and database size
+    """
+    start = time.perf_counter()
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    canonical = [canonical_topic(topic_name(t)) for t in range(topics)]
+    next_update = [0] * topics
+    history_rows, notification_rows, update_rows = [], [], []
+    for n in range(updates // UPDATES_PER_NOTIFICATION):
+        t = n % topics
+        topic = canonical[t]
+        recipient = f"user{n % recipients}@example.com"
+        sent_at = (now - timedelta(seconds=rng.uniform(0, days * 86400))).strftime("%Y-%m-%d %H:%M:%S")
+        batch = [make_update(t, next_update[t] + i) for i in range(UPDATES_PER_NOTIFICATION)]
+        next_update[t] += UPDATES_PER_NOTIFICATION
+        data = {"should_send_email": True, "topic_searched": topic, "relevant_updates": batch,
+                "reasoning": f"Found {len(batch)} new updates"}
+        notification_hash = memory._generate_notification_hash(data)
+        encoded = json.dumps(data)
+        history_rows.append((topic, notification_hash, sent_at, encoded, recipient))
+        notification_rows.append((memory._generate_idempotency_key(topic, data), topic, notification_hash,
+                                  sent_at, encoded, recipient))
+        for update in batch:
+            update_rows.append((memory._generate_update_hash(update), topic, update["title"], update["url"],
+                                sent_at, recipient, json.dumps(update)))
+
+    with sqlite3.connect(memory.db_path) as conn:
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.executemany('''
+            INSERT INTO notification_history (topic, notification_hash, sent_at, notification_data, recipient)
+            VALUES (?, ?, ?, ?, ?)
+        ''', history_rows)
+        conn.executemany('''
+            INSERT OR IGNORE INTO sent_notifications
+            (idempotency_key, topic, notification_hash, sent_at, notification_data, recipient)
+            VALUES (?, ?, ?, ?, ?, ?)
+        ''', notification_rows)
+        conn.executemany('''
+            INSERT OR IGNORE INTO sent_updates (update_hash, topic, title, url, sent_at, recipient, full_content)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', update_rows)
+        conn.commit()
+    return {
+        "seed_seconds": round(time.perf_counter() - start, 3),
+        "db_bytes": os.path.getsize(memory.db_path),
+        "notifications": len(history_rows),
+        "updates": len(update_rows),
+        "_next_update": next_update
+    }
+
+
+def _summarize(samples: List[float]) -> Dict[str, float]:
+    """Summarize per-call wall times (milliseconds) as throughput and percentiles."""
+    ordered = sorted(samples)
+    total_ms = sum(ordered)
+
+    def percentile(p: float) -> float:
+        return round(ordered[min(len(ordered) - 1, int(len(ordered) * p))], 4)
+
+    return {
+        "n": len(ordered),
+        "ops_per_sec": round(len(ordered) / (total_ms / 1000), 2) if total_ms else None,
+        "mean_ms": round(total_ms / len(ordered), 4),
+        "p50_ms": percentile(0.50),
+        "p99_ms": percentile(0.99),
+        "max_ms": round(ordered[-1], 4)
+    }
+
+
+def _time_calls(func: Callable[[int], object], repeat: int) -> List[float]:
+    """Call func(i) for i in range(repeat), returning each call's wall time in milliseconds."""
+    samples = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        func(i)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def bench_size(db_path: str, updates: int, topics: int, recipients: int, days: int, repeat: int,
+               scan_repeat: int, seed_value: int) -> Dict:
+    """Seed a database with the given number of updates and benchmark every operation on it."""
+    rng = random.Random(seed_value)
+    memory = NotificationMemory(db_path)
+    seeded = seed(memory, updates, topics, recipients, days, rng)
+    next_update = seeded.pop("_next_update")
+    topics = min(topics, max(1, updates // UPDATES_PER_NOTIFICATION))
+
+    def filter_call(i: int):
+        t = rng.randrange(topics)
+        known = [make_update(t, rng.randrange(max(1, next_update[t]))) for _ in range(5)]
+        fresh = [make_update(t, next_update[t] + 1_000_000 + i * 10 + j) for j in range(5)]
+        memory.filter_new_updates(topic_name(t), known + fresh)
+
+    def mark_call(i: int):
+        t = rng.randrange(topics)
+        batch = [make_update(t, next_update[t] + 2_000_000 + i * 10 + j) for j in range(UPDATES_PER_NOTIFICATION)]
+        memory.mark_notification_sent(topic_name(t), {"should_send_email": True, "relevant_updates": batch},
+                                      recipient=f"user{i % recipients}@example.com")
+
+    def recent_call(i: int):
+        memory.get_recent_notifications(topic_name(rng.randrange(topics)), 7)
+
+    results = {
+        "filter_new_updates": _summarize(_time_calls(filter_call, repeat)),
+        "mark_notification_sent": _summarize(_time_calls(mark_call, repeat)),
+        "get_recent_notifications": _summarize(_time_calls(recent_call, repeat)),
+        "get_notification_stats": _summarize(_time_calls(lambda i: memory.get_notification_stats(), scan_repeat))
+    }
+    with sqlite3.connect(db_path) as conn:
+        before = conn.execute("SELECT COUNT(*) FROM sent_updates").fetchone()[0]
+    cleanup_samples = _time_calls(lambda i: memory.cleanup_old_notifications(30), scan_repeat)
+    with sqlite3.connect(db_path) as conn:
+        after = conn.execute("SELECT COUNT(*) FROM sent_updates").fetchone()[0]
+    results["cleanup_old_notifications"] = {
+        **_summarize(cleanup_samples),
+        "first_ms": round(cleanup_samples[0], 4),
+        "updates_deleted": before - after
+    }
+    return {"seed": seeded, "operations": results}
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: Dict, baseline: Dict):
+    """Print p50/p99 changes against a baseline results file."""
+    print(f"\n📊 Compared with {baseline['meta'].get('commit') or 'baseline'} (negative is faster):")
+    common = [size for size in results["sizes"] if size in baseline.get("sizes", {})]
+    if not common:
+        print("   No sizes in common with the baseline.")
+    for size in common:
+        entry, base_entry = results["sizes"][size], baseline["sizes"][size]
+        for operation in OPERATIONS:
+            current = entry["operations"][operation]
+            base = base_entry["operations"].get(operation)
+            if not base:
+                continue
+            changes = []
+            for key in ("p50_ms", "p99_ms"):
+                if base[key]:
+                    changes.append(f"{key[:3]} {(current[key] - base[key]) / base[key] * 100:+.1f}%")
+            print(f"   {int(size):>9,} {operation:<28} {', '.join(changes)}")
+
+
+def main():
+    """Run the notification memory benchmarks."""
+    parser = argparse.ArgumentParser(description="Benchmark NotificationMemory on large synthetic stores")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000],
+                        help="Numbers of sent updates to seed (one fresh database each)")
+    parser.add_argument("--topics", type=int, default=1000, help="Distinct topics in the seeded history")
+    parser.add_argument("--recipients", type=int, default=50, help="Distinct recipients in the seeded history")
+    parser.add_argument("--days", type=int, default=60, help="Seeded history is spread over this many days")
+    parser.add_argument("--repeat", type=int, default=200, help="Calls per point operation")
+    parser.add_argument("--scan-repeat", type=int, default=5,
+                        help="Calls of the whole-table operations (stats, cleanup)")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed for the synthetic data")
+    parser.add_argument("--db-dir", help="Directory for the databases (default: a temporary directory)")
+    parser.add_argument("--json", dest="json_path", help="Write results as JSON to this file")
+    parser.add_argument("--compare", dest="compare_path", help="Compare with results from an earlier --json run")
+    args = parser.parse_args()
+
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "topics": args.topics,
+            "recipients": args.recipients,
+            "days": args.days,
+            "repeat": args.repeat,
+            "scan_repeat": args.scan_repeat
+        },
+        "sizes": {}
+    }
+
+    print("🏁 Notification Memory Benchmark")
+    print("=" * 50)
+    with tempfile.TemporaryDirectory(dir=args.db_dir) as tmp_dir:
+        for size in args.sizes:
+            db_path = os.path.join(tmp_dir, f"memory_{size}.db")
+            entry = bench_size(db_path, size, args.topics, args.recipients, args.days, args.repeat,
+                               args.scan_repeat, args.seed)
+            results["sizes"][str(size)] = entry
+            seeded = entry["seed"]
+            print(f"\n{size:,} updates ({seeded['notifications']:,} notifications, "
+                  f"{seeded['db_bytes'] / 1e6:.1f} MB, seeded in {seeded['seed_seconds']:.1f}s)")
+            print(f"   {'Operation':<28}{'ops/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+            for operation in OPERATIONS:
+                stats = entry["operations"][operation]
+                print(f"   {operation:<28}{stats['ops_per_sec'] or 0:>10.1f}{stats['p50_ms']:>10.3f}"
+                      f"{stats['p99_ms']:>10.3f}")
+            cleanup = entry["operations"]["cleanup_old_notifications"]
+            print(f"   (first cleanup deleted {cleanup['updates_deleted']:,} updates in {cleanup['first_ms']:.1f} ms)")
+            os.remove(db_path)
+
+    if args.compare_path:
+        with open(args.compare_path) as f:
+            compare(results, json.load(f))
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
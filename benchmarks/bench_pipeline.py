@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+End-to-end pipeline throughput benchmark.
+
+Drives ``LangChainAgent.run`` with a ScriptedChatModel and a fake DDGS client
+that sleep for realistic, configurable latencies, so the measured time is the
+injected network time plus this repository's orchestration: agent loop, tool
+dispatch, search cache, notification memory claims and email rendering.
+Every query watches its own topic, so each one finds new updates, claims
+them and records a notification.
+
+Two workloads are run at every concurrency level (one agent per worker thread):
+
+    agent    the LLM calls search_web and checkIsMailneedtoSend, then answers
+    update   an update query: both tools are called directly, no LLM
+
+For each level it reports queries/sec, p50/p99 query latency, the mean time
+per query in every traced stage and the peak memory allocated by Python
+(tracemalloc). With --smtp, emails are also delivered to a LocalSMTPSink and
+the run only ends once they have been accepted.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--concurrency 1 2 4 8] [--queries N]
+                                        [--llm-latency S] [--search-latency S] [--smtp] [--json PATH]
+"""
+
+import argparse
+import json
+import os
+import queue
+import resource
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack
+from typing import Dict, List, Optional
+from unittest.mock import patch
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_memory import git_commit
+from benchmarks.fakes import FakeDDGS, offline_tools
+from src.agent.agent import LangChainAgent
+from src.agent.config import Config
+from src.agent.delivery import DeliveryService, SMTPPool
+from src.agent.fake_llm import ScriptedChatModel, update_flow_script
+from src.agent.instrumentation import RunTrace
+from src.agent.smtp_sink import LocalSMTPSink
+
+WORKLOADS = ["agent", "update"]
+
+
+def _query(workload: str, index: int) -> str:
+    topic = f"benchmark topic {index}"
+    return f"summarize {topic}" if workload == "agent" else f"any updates on {topic}?"
+
+
+def _percentile(ordered: List[float], p: float) -> float:
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * p))], 3)
+
+
+def _stage_breakdown(traces: List[RunTrace]) -> Dict[str, Dict[str, float]]:
+    """Mean calls and milliseconds per query for every stage, slowest first."""
+    totals: Dict[str, Dict[str, float]] = {}
+    for trace in traces:
+        for stage, entry in trace.stage_totals().items():
+            total = totals.setdefault(stage, {"calls": 0, "total_ms": 0.0})
+            total["calls"] += entry["count"]
+            total["total_ms"] += entry["total_ms"]
+    count = max(1, len(traces))
+    breakdown = {stage: {"calls_per_query": round(entry["calls"] / count, 2),
+                         "ms_per_query": round(entry["total_ms"] / count, 3)}
+                 for stage, entry in totals.items()}
+    return dict(sorted(breakdown.items(), key=lambda item: item[1]["ms_per_query"], reverse=True))
+
+
+def run_level(workload: str, concurrency: int, queries: int, llm_latency: float, search_latency: float,
+              smtp: bool = False, trace_memory: bool = True) -> Dict:
+    """Run queries through fresh agents on concurrency worker threads and measure them."""
+    ddgs = FakeDDGS(search_latency)
+    with ExitStack() as stack:
+        memory = stack.enter_context(offline_tools(ddgs=ddgs))
+        delivery: Optional[DeliveryService] = None
+        sink: Optional[LocalSMTPSink] = None
+        if smtp:
+            sink = stack.enter_context(LocalSMTPSink())
+            delivery = DeliveryService(SMTPPool(host=sink.host, port=sink.port, username=""), memory=memory)
+            stack.enter_context(patch("src.agent.tools.get_delivery_service", lambda: delivery))
+            stack.enter_context(patch("src.agent.tools.get_digest_buffer", lambda: None))
+            stack.enter_context(patch("src.agent.config.Config.EMAIL_DEFAULT_TO", "bench@example.com"))
+
+        # One agent per worker, built before the clock starts; a worker's agent
+        # is only used by that worker, so its model's script can be swapped per query
+        agents: "queue.Queue[LangChainAgent]" = queue.Queue()
+        for _ in range(concurrency):
+            agent = LangChainAgent(llm=ScriptedChatModel(script=["Done."], latency=llm_latency))
+            agent.executor.verbose = False
+            agents.put(agent)
+
+        def run_one(index: int):
+            agent = agents.get()
+            try:
+                query = _query(workload, index)
+                agent.llm.script = update_flow_script(f"benchmark topic {index}")
+                start = time.perf_counter()
+                agent.run(query)
+                return (time.perf_counter() - start) * 1000, agent.last_trace
+            finally:
+                agents.put(agent)
+
+        if trace_memory:
+            tracemalloc.start()
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="bench") as pool:
+            outcomes = list(pool.map(run_one, range(queries)))
+        if delivery is not None:
+            delivery.flush(timeout=60)
+        wall = time.perf_counter() - start
+        peak_mb = None
+        if trace_memory:
+            peak_mb = round(tracemalloc.get_traced_memory()[1] / 1e6, 2)
+            tracemalloc.stop()
+        if delivery is not None:
+            delivery.shutdown()
+
+        latencies = sorted(latency for latency, _ in outcomes)
+        traces = [trace for _, trace in outcomes if trace is not None]
+        result = {
+            "workload": workload,
+            "concurrency": concurrency,
+            "queries": queries,
+            "wall_seconds": round(wall, 3),
+            "queries_per_sec": round(queries / wall, 2),
+            "p50_ms": _percentile(latencies, 0.50),
+            "p99_ms": _percentile(latencies, 0.99),
+            "searches_per_query": round(ddgs.calls / queries, 2),
+            "notifications": memory.get_notification_stats()["total_notifications"],
+            "peak_traced_mb": peak_mb,
+            "stages": _stage_breakdown(traces)
+        }
+        if sink is not None:
+            result["emails_delivered"] = len(sink.messages)
+        return result
+
+
+def main():
+    """Run the pipeline throughput benchmarks."""
+    parser = argparse.ArgumentParser(description="Benchmark end-to-end query throughput with fake LLM and search")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8],
+                        help="Worker thread counts to measure")
+    parser.add_argument("--queries", type=int, default=32, help="Queries per workload and concurrency level")
+    parser.add_argument("--workloads", nargs="+", choices=WORKLOADS, default=WORKLOADS)
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Seconds per fake LLM call")
+    parser.add_argument("--search-latency", type=float, default=0.3, help="Seconds per fake search")
+    parser.add_argument("--smtp", action="store_true", help="Deliver emails to a local SMTP sink")
+    parser.add_argument("--no-tracemalloc", action="store_true",
+                        help="Skip peak memory tracking (it slows down allocation-heavy code)")
+    parser.add_argument("--top", type=int, default=6, help="Stages to list per run")
+    parser.add_argument("--json", dest="json_path", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = {
+        "meta": {
+            "commit": git_commit(),
+            "llm_latency": args.llm_latency,
+            "search_latency": args.search_latency,
+            "smtp": args.smtp,
+            "limits": {"search": Config.SEARCH_CONCURRENCY, "llm": Config.LLM_CONCURRENCY,
+                       "db": Config.DB_CONCURRENCY, "tool_workers": Config.TOOL_MAX_WORKERS}
+        },
+        "runs": []
+    }
+
+    print("🏁 Pipeline Throughput Benchmark")
+    print("=" * 50)
+    print(f"LLM {args.llm_latency * 1000:.0f} ms/call, search {args.search_latency * 1000:.0f} ms/call, "
+          f"{args.queries} queries per run")
+    for workload in args.workloads:
+        for concurrency in args.concurrency:
+            run = run_level(workload, concurrency, args.queries, args.llm_latency, args.search_latency,
+                            smtp=args.smtp, trace_memory=not args.no_tracemalloc)
+            results["runs"].append(run)
+            peak = f", peak {run['peak_traced_mb']:.1f} MB" if run["peak_traced_mb"] is not None else ""
+            print(f"\n{workload} x{concurrency}: {run['queries_per_sec']:.2f} queries/s, "
+                  f"p50 {run['p50_ms']:.0f} ms, p99 {run['p99_ms']:.0f} ms{peak}")
+            if "emails_delivered" in run:
+                print(f"   {run['emails_delivered']} emails delivered")
+            for stage, entry in list(run["stages"].items())[:args.top]:
+                print(f"   {stage:<36}{entry['calls_per_query']:>6.1f} calls {entry['ms_per_query']:>9.1f} ms/query")
+    results["meta"]["max_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
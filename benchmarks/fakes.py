@@ -0,0 +1,83 @@
+"""
+Offline stand-ins shared by the benchmarks.
+
+Provides a fake DDGS search client with injectable latency and a context
+manager that points the agent tools at it and at a throwaway notification
+memory database.
+"""
+
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+from unittest.mock import patch
+
+from src.agent.notification_memory import NotificationMemory
+from src.agent.search_cache import SearchCache
+
+
+def fixture_results(query: str, max_results: int = 5) -> List[Dict[str, str]]:
+    """Build deterministic DDGS-style search results for a query."""
+    digest = hashlib.md5(query.encode()).hexdigest()[:8]
+    return [
+        {
+            "title": f"Latest {query} update {i + 1} ({digest})",
+            "href": f"https://news.example.com/{digest}/{i + 1}",
+            "body": f"New announcement on {query} published today, October 2025."
+        }
+        for i in range(max_results)
+    ]
+
+
+class FakeDDGS:
+    """DDGS replacement returning fixture results after a fixed delay."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, *args, **kwargs) -> "FakeDDGS":
+        # Used in place of the DDGS class: DDGS() returns this instance
+        return self
+
+    def __enter__(self) -> "FakeDDGS":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+    def text(self, query: str, max_results: int = 5) -> List[Dict[str, str]]:
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+        return fixture_results(query, max_results)
+
+
+@contextmanager
+def offline_tools(search_latency: float = 0.0, cache_ttl: float = 0.0,
+                  ddgs: Optional[FakeDDGS] = None) -> Iterator[NotificationMemory]:
+    """Patch the agent tools to use FakeDDGS and a temporary notification memory.
+
+    Args:
+        search_latency: Seconds every fake search takes
+        cache_ttl: TTL of the search cache used meanwhile (0 disables caching)
+        ddgs: Fake search client to use (e.g. to count its calls); overrides search_latency
+
+    Yields:
+        The temporary NotificationMemory used by the tools
+    """
+    tmp_dir = tempfile.mkdtemp(prefix="eaa-bench-")
+    memory = NotificationMemory(os.path.join(tmp_dir, "notification_memory.db"))
+    try:
+        with patch("src.agent.tools.DDGS", ddgs or FakeDDGS(search_latency)), \
+                patch("src.agent.tools.notification_memory", memory), \
+                patch("src.agent.tools.search_cache", SearchCache(ttl=cache_ttl)):
+            yield memory
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
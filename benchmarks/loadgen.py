@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Synthetic load generator for the scheduler and the update pipeline.
+
+Creates N monitoring events over a set of synthetic topics and replays
+scheduler ticks through the production path: EventScheduler fires due
+events, group_by_topic batches them, and an EventExecutor runs
+BatchPlanner.run_topic for every batch. Each batch does a search, a relevance
+pass, claims in notification memory, email rendering and commits. Searches
+are answered offline by ChurningSearch, which adds new results every tick.
+Time runs on a virtual clock, so a tick costs only the work it causes.
+
+The workload is shaped to look like production:
+
+    overlap     topic popularity follows a Zipf distribution, and events
+                phrase their topic in several ways that canonicalize to the
+                same key, so popular topics collect many events
+    recipients  every topic has its own set of recipients (--recipients), who
+                are subscribed to it and named in its events
+    schedules   events run every 15 minutes, 30 minutes or hour; one tick is
+                15 virtual minutes
+    churn       --updates-per-tick new results are spread over the topics each
+                tick (popular topics churn more), pushing older results out
+                of the top 5
+
+Each run reports events and topic checks per second, tick latency and
+executor queue lag. It also reports how the workers' time split between
+search, notification memory (SQLite), email rendering and the rest, which
+shows what saturates first as events or workers grow.
+
+Usage:
+    python benchmarks/loadgen.py [--events 1000 10000] [--topics N] [--recipients N]
+                                 [--updates-per-tick N] [--ticks N] [--workers 4 16] [--json PATH]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional
+
+# Add project root to Python path
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_memory import git_commit
+from benchmarks.fakes import offline_tools
+from src.agent.batch_planner import BatchPlanner, TopicBatch, group_by_topic
+from src.agent.config import Config
+from src.agent.event_executor import EventExecutor
+from src.agent.event_store import EventStore
+from src.agent.instrumentation import RunTrace, trace_run
+from src.agent.limits import stage_limits
+from src.agent.scheduler import EventScheduler
+from src.agent.topics import canonical_topic
+
+# Seconds of virtual time per scheduler tick
+TICK_SECONDS = 15 * 60
+
+# (schedule, weight): most events run every tick, some every second or fourth
+SCHEDULES = [("Every 15 minutes", 0.5), ("Every 30 minutes", 0.3), ("Every hour", 0.2)]
+
+# Phrasings of the same watch; all compile to the topic's canonical key
+ACTION_TEMPLATES = [
+    "If any update in {topic} then send email to {recipient}",
+    "When there is news on {topic} then email {recipient}",
+    "Whenever {topic} changes, then notify {recipient}",
+    "Email {recipient} about {topic} updates",
+]
+
+SUBJECTS = ["solar", "tariff", "vaccine", "rail", "chip", "housing", "pension", "drone", "wheat", "copper",
+            "lithium", "visa", "carbon", "broadband", "insurance", "fintech", "metro", "monsoon", "startup", "patent"]
+ASPECTS = ["subsidy", "regulation", "export", "pricing", "merger", "lawsuit", "funding", "shortage", "strike",
+           "approval", "recall", "auction", "quota", "deadline", "reform", "outage", "license", "census", "rating",
+           "summit"]
+
+# Stage groups reported per run: (name, traced stage prefixes, stage_limits stage whose wait counts too)
+STAGE_GROUPS = [("search", ("planner.search",), "search"), ("sqlite", ("memory.",), "db"),
+                ("rendering", ("email.",), None)]
+
+
+def topic_names(count: int) -> List[str]:
+    """Get count distinct synthetic topics ("solar subsidy", "tariff regulation", ...)."""
+    names = [f"{subject} {aspect}" for aspect in ASPECTS for subject in SUBJECTS]
+    rounds = (count + len(names) - 1) // len(names)
+    return [f"{name} {i + 1}" if i else name for i in range(rounds) for name in names][:count]
+
+
+def zipf_weights(count: int, exponent: float = 1.0) -> List[float]:
+    """Get Zipf popularity weights for count ranked items."""
+    return [1.0 / (rank ** exponent) for rank in range(1, count + 1)]
+
+
+def recipients_for(topic_index: int, count: int) -> List[str]:
+    """Get the recipients of a topic."""
+    return [f"user{topic_index}-{i}@load.test" for i in range(count)]
+
+
+def make_events(count: int, topics: List[str], recipients: int, rng: random.Random) -> List[Dict]:
+    """Build event definitions over topics with Zipf-distributed popularity.
+
+    Returns:
+        Event dicts with name, action and cron_job, ready for EventStore.create_many
+    """
+    weights = zipf_weights(len(topics))
+    schedules, schedule_weights = zip(*SCHEDULES)
+    events = []
+    for i, topic_index in enumerate(rng.choices(range(len(topics)), weights=weights, k=count)):
+        recipient = recipients_for(topic_index, recipients)[i % recipients]
+        template = ACTION_TEMPLATES[i % len(ACTION_TEMPLATES)]
+        events.append({
+            "name": f"load event {i}",
+            "action": template.format(topic=topics[topic_index], recipient=recipient),
+            "cron_job": rng.choices(schedules, weights=schedule_weights)[0]
+        })
+    return events
+
+
+class ChurningSearch:
+    """Offline search whose results change as new updates arrive on each topic."""
+
+    def __init__(self, topics: List[str], rng: random.Random, latency: float = 0.0, max_results: int = 5,
+                 relevant_fraction: float = 0.8):
+        """Create the search with max_results initial results per topic.
+
+        Args:
+            topics: Topics that can be searched
+            rng: Random source deciding where churn lands and what is relevant
+            latency: Seconds every search takes
+            max_results: Results returned per search
+            relevant_fraction: Share of new results that look like recent updates
+        """
+        self.rng = rng
+        self.latency = latency
+        self.max_results = max_results
+        self.relevant_fraction = relevant_fraction
+        self.keys = [canonical_topic(topic) for topic in topics]
+        self.weights = zipf_weights(len(topics))
+        self._results: Dict[str, Deque[Dict[str, str]]] = {key: deque(maxlen=max_results) for key in self.keys}
+        self._sequence = 0
+        self._lock = threading.Lock()
+        self.calls = 0
+        for key in self.keys:
+            for _ in range(max_results):
+                self._add(key)
+
+    def _add(self, key: str):
+        self._sequence += 1
+        digest = hashlib.md5(f"{key}:{self._sequence}".encode()).hexdigest()[:10]
+        if self.rng.random() < self.relevant_fraction:
+            title, snippet = f"{key.title()} update {self._sequence}", f"New {key} announcement published today."
+        else:
+            title, snippet = f"{key.title()} explainer {self._sequence}", f"Background reading on {key}."
+        self._results[key].appendleft({"title": title, "url": f"https://load.test/{digest}", "snippet": snippet})
+
+    def advance(self, updates: int):
+        """Publish updates new results, spread over topics by popularity."""
+        with self._lock:
+            for key in self.rng.choices(self.keys, weights=self.weights, k=updates):
+                self._add(key)
+
+    def search(self, query: str, topic: str) -> List[Dict[str, str]]:
+        """Get the current results for a topic (BatchPlanner search signature)."""
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.calls += 1
+            return [dict(result) for result in self._results.get(canonical_topic(topic), ())]
+
+
+def _percentile(ordered: List[float], p: float) -> Optional[float]:
+    if not ordered:
+        return None
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * p))], 3)
+
+
+def _limit_waits() -> Dict[str, float]:
+    return {stage: entry["wait_seconds"] for stage, entry in stage_limits.snapshot().items()}
+
+
+def _stage_shares(traces: List[RunTrace], busy_ms: float, waits: Dict[str, float]) -> Dict[str, Dict[str, float]]:
+    """Total time per stage group and its share of the workers' busy time.
+
+    Time spent waiting for a stage limit slot (e.g. the DB_CONCURRENCY limit
+    around notification memory calls) counts towards that stage's group.
+    """
+    totals = {name: waits.get(limit, 0.0) * 1000 if limit else 0.0 for name, _, limit in STAGE_GROUPS}
+    for trace in traces:
+        for stage, entry in trace.stage_totals().items():
+            for name, prefixes, _ in STAGE_GROUPS:
+                if stage.startswith(prefixes):
+                    totals[name] += entry["total_ms"]
+                    break
+    totals["other"] = max(0.0, busy_ms - sum(totals.values()))
+    return {name: {"total_ms": round(total, 1), "share": round(total / busy_ms, 3) if busy_ms else 0.0}
+            for name, total in totals.items()}
+
+
+def run_load(events: int, topics: int, recipients: int, updates_per_tick: int, ticks: int, workers: int,
+             search_latency: float = 0.0, seed: int = 0, db_dir: Optional[str] = None) -> Dict:
+    """Create a synthetic workload and replay ticks of it through the scheduler.
+
+    Args:
+        events: Number of monitoring events
+        topics: Topic cardinality
+        recipients: Recipients per topic
+        updates_per_tick: New search results published before each tick
+        ticks: Scheduler ticks to replay
+        workers: EventExecutor worker threads
+        search_latency: Seconds every search takes
+        seed: Random seed of the workload
+        db_dir: Directory for the scratch databases (a temporary one by default)
+
+    Returns:
+        Throughput, latency and stage breakdown of the run
+    """
+    rng = random.Random(seed)
+    names = topic_names(topics)
+    tmp_dir = tempfile.mkdtemp(prefix="eaa-loadgen-", dir=db_dir)
+    try:
+        with offline_tools() as memory:
+            for index, name in enumerate(names):
+                memory.subscribe(name, recipients_for(index, recipients))
+            store = EventStore(os.path.join(tmp_dir, "events.db"))
+            start = time.perf_counter()
+            for offset in range(0, events, 1000):
+                store.create_many(make_events(min(1000, events - offset), names, recipients, rng))
+            setup_seconds = time.perf_counter() - start
+
+            search = ChurningSearch(names, rng, latency=search_latency)
+            planner = BatchPlanner(search=search.search)
+            traces: List[RunTrace] = []
+            outcome = {"notifications": 0, "new_updates": 0}
+            lock = threading.Lock()
+
+            def handle(batch: TopicBatch) -> List[Dict]:
+                with trace_run("loadgen.topic", registry=None) as trace:
+                    decisions = planner.run_topic(batch)
+                with lock:
+                    traces.append(trace)
+                return decisions
+
+            def on_result(batch: TopicBatch, decisions: List[Dict]):
+                sent = [decision for decision in decisions if decision.get("should_send_email")]
+                with lock:
+                    outcome["notifications"] += len(sent)
+                    outcome["new_updates"] += sum(len(decision["relevant_updates"]) for decision in sent)
+
+            executor = EventExecutor(handle, workers=workers, mode="thread", on_result=on_result)
+            clock = [time.time()]
+            scheduler = EventScheduler(store, run_batch=lambda due: executor.submit_many(group_by_topic(due)),
+                                       jitter=0, catch_up=True, clock=lambda: clock[0])
+            tick_ms: List[float] = []
+            scheduler_ms = 0.0
+            fired = 0
+            waits_before = _limit_waits()
+            wall_start = time.perf_counter()
+            for _ in range(ticks):
+                clock[0] += TICK_SECONDS
+                search.advance(updates_per_tick)
+                tick_start = time.perf_counter()
+                fired += scheduler.tick()
+                scheduler_ms += (time.perf_counter() - tick_start) * 1000
+                executor.join()
+                tick_ms.append((time.perf_counter() - tick_start) * 1000)
+            wall = time.perf_counter() - wall_start
+            waits = {stage: seconds - waits_before.get(stage, 0.0) for stage, seconds in _limit_waits().items()}
+            executor.shutdown()
+            executor_metrics = executor.metrics()
+            store.close()
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+    busy_ms = sum(trace.duration_ms or 0.0 for trace in traces)
+    ordered = sorted(tick_ms)
+    return {
+        "events": events,
+        "topics": topics,
+        "recipients": recipients,
+        "updates_per_tick": updates_per_tick,
+        "workers": workers,
+        "ticks": ticks,
+        "setup_seconds": round(setup_seconds, 3),
+        "wall_seconds": round(wall, 3),
+        "events_fired": fired,
+        "topic_checks": len(traces),
+        "searches": search.calls,
+        "events_per_sec": round(fired / wall, 1) if wall else None,
+        "topic_checks_per_sec": round(len(traces) / wall, 1) if wall else None,
+        "tick_p50_ms": _percentile(ordered, 0.50),
+        "tick_max_ms": round(ordered[-1], 3) if ordered else None,
+        # Firing, batching and recording runs, excluding time blocked on a full executor queue
+        "scheduler_ms_per_tick": round((scheduler_ms - executor_metrics["producer_blocked_seconds"] * 1000)
+                                       / max(1, ticks), 3),
+        "queue_lag_p99_ms": executor_metrics["lag_ms"]["p99_ms"],
+        "worker_utilization": round(busy_ms / (wall * 1000 * workers), 3) if wall else None,
+        "notifications": outcome["notifications"],
+        "new_updates": outcome["new_updates"],
+        "limit_wait_seconds": {stage: round(seconds, 3) for stage, seconds in waits.items()},
+        "stages": _stage_shares(traces, busy_ms, waits)
+    }
+
+
+def bottleneck(run: Dict) -> str:
+    """Name the resource that limits a run, judging by where the workers spent their time."""
+    if run["worker_utilization"] is not None and run["worker_utilization"] < 0.5:
+        return "scheduler (workers mostly idle)"
+    return max(run["stages"].items(), key=lambda item: item[1]["share"])[0]
+
+
+def main():
+    """Replay synthetic load at every requested size and worker count."""
+    parser = argparse.ArgumentParser(description="Replay synthetic events through the scheduler and update pipeline")
+    parser.add_argument("--events", type=int, nargs="+", default=[1000, 10000], help="Event counts to replay")
+    parser.add_argument("--topics", type=int, default=200, help="Topic cardinality")
+    parser.add_argument("--recipients", type=int, default=3, help="Recipients per topic")
+    parser.add_argument("--updates-per-tick", type=int, default=50, help="New search results per tick")
+    parser.add_argument("--ticks", type=int, default=4, help="Scheduler ticks to replay (15 virtual minutes each)")
+    parser.add_argument("--workers", type=int, nargs="+", default=[Config.EXECUTOR_WORKERS],
+                        help="EventExecutor worker counts to measure")
+    parser.add_argument("--search-latency", type=float, default=0.02, help="Seconds per offline search")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--db-dir", help="Directory for the scratch databases")
+    parser.add_argument("--json", dest="json_path", help="Write results as JSON to this file")
+    args = parser.parse_args()
+
+    results = {"meta": {"commit": git_commit(), "search_latency": args.search_latency, "seed": args.seed},
+               "runs": []}
+    print("📈 Synthetic Load")
+    print("=" * 50)
+    print(f"{args.topics} topics, {args.recipients} recipients per topic, {args.updates_per_tick} updates per tick, "
+          f"{args.ticks} ticks, search {args.search_latency * 1000:.0f} ms")
+    for events in args.events:
+        for workers in args.workers:
+            run = run_load(events, args.topics, args.recipients, args.updates_per_tick, args.ticks, workers,
+                           search_latency=args.search_latency, seed=args.seed, db_dir=args.db_dir)
+            run["bottleneck"] = bottleneck(run)
+            results["runs"].append(run)
+            print(f"\n{events} events x{workers} workers: {run['events_per_sec']:.0f} events/s, "
+                  f"{run['topic_checks_per_sec']:.0f} topic checks/s, tick p50 {run['tick_p50_ms']:.0f} ms, "
+                  f"max {run['tick_max_ms']:.0f} ms")
+            print(f"   {run['notifications']} notifications, {run['new_updates']} new updates; "
+                  f"scheduler {run['scheduler_ms_per_tick']:.0f} ms/tick, queue lag p99 {run['queue_lag_p99_ms'] or 0:.0f} ms, "
+                  f"workers {run['worker_utilization'] * 100:.0f}% busy")
+            print("   " + ", ".join(f"{name} {entry['share'] * 100:.0f}%" for name, entry in run["stages"].items())
+                  + f" -> bottleneck: {run['bottleneck']}")
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nResults written to {args.json_path}")
+
+
+if __name__ == "__main__":
+    main()
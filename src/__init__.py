@@ -4,7 +4,7 @@ Event Action Agent Source Package.
 Contains all the core functionality of the Event Action Agent.
 """
 
-from .agent import LangChainAgent, search_web, checkIsMailneedtoSend, notification_memory, Config
+from .agent import notification_memory, Config
 from .cli import CLI
 
 __version__ = "1.0.0"
@@ -18,3 +18,11 @@ __all__ = [
     "Config",
     "CLI"
 ]
+
+
+def __getattr__(name):
+    # LangChainAgent and the tools are loaded lazily by the agent package
+    if name in ("LangChainAgent", "search_web", "checkIsMailneedtoSend"):
+        from . import agent
+        return getattr(agent, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
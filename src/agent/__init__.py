@@ -4,11 +4,20 @@ Event Action Agent Package
 A modular LangChain-based AI agent with web search capabilities and intelligent notification memory.
 """
 
-from .agent import LangChainAgent
-from .tools import search_web, checkIsMailneedtoSend
+import importlib
+
 from .notification_memory import notification_memory
 from .config import Config
 
+# The agent and the tools import LangChain (and ddgs), which takes most of the
+# CLI's startup time; they are imported on first access instead (PEP 562), so
+# commands such as --status or --memory never load them.
+_LAZY_ATTRIBUTES = {
+    "LangChainAgent": ".agent",
+    "search_web": ".tools",
+    "checkIsMailneedtoSend": ".tools"
+}
+
 __version__ = "1.0.0"
 __author__ = "Event Action Agent Team"
 
@@ -19,3 +28,12 @@ __all__ = [
     "notification_memory",
     "Config"
 ]
+
+
+def __getattr__(name):
+    module = _LAZY_ATTRIBUTES.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
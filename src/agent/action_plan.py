@@ -0,0 +1,258 @@
+"""
+Action plans for the Event Action Agent.
+
+An event's ``action`` text ("If any update in tax policy then send email to
+the user") is compiled once into a structured plan:
+
+    {"version": 1, "topic": "tax policy", "topic_key": "policy tax",
+     "condition": "any_update", "channel": "email", "recipients": ["default"],
+     "source": "rules"}
+
+Plans are built by simple rules first. Only actions the rules cannot read
+are sent to the LLM, and the result is cached by action text and stored
+with the event, so the LLM is called at most once per event definition
+rather than once per scheduled run.
+"""
+
+import json
+import re
+import threading
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
+
+from .config import Config
+from .limits import stage_limits
+from .prompts import SystemPrompts
+from .topics import canonical_topic, topic_canonicalizer
+
+if TYPE_CHECKING:
+    # LangChain is only imported when an action actually needs the LLM, so that
+    # the event store (and the CLI and API built on it) start quickly
+    from langchain_core.language_models.chat_models import BaseChatModel
+
+
+# Bumped when the rules change so stored rule-based plans are rebuilt
+PLAN_VERSION = 1
+
+# Conditions the pipeline can evaluate
+CONDITIONS = ("any_update",)
+
+# Channels the pipeline can deliver to (see delivery.py)
+CHANNELS = ("email",)
+
+# Words in the action part mapped to a delivery channel
+CHANNEL_WORDS = {
+    "email": "email", "e-mail": "email", "mail": "email", "notify": "email", "alert": "email",
+    "sms": "sms", "text": "sms", "slack": "slack"
+}
+
+# Recipient words meaning "whoever owns the event"
+DEFAULT_RECIPIENT_WORDS = ("me", "user", "the user", "us")
+DEFAULT_RECIPIENT = "default"
+
+# Trailing words of a condition that describe the trigger rather than the topic
+TRIGGER_WORDS = frozenset([
+    "announced", "are", "been", "change", "changed", "changes", "happen", "happens", "has", "have", "is",
+    "occur", "occurs", "published", "released", "updated"
+])
+
+_IF_THEN_RE = re.compile(r"^\s*(?:if|when|whenever)\s+(?P<condition>.+?)\s*,?\s+then\s+(?P<action>.+)$",
+                         re.IGNORECASE | re.DOTALL)
+_ACTION_FIRST_RE = re.compile(r"^\s*(?P<action>.+?)\s+(?:whenever|when|if|about|on)\s+(?P<condition>.+)$",
+                              re.IGNORECASE | re.DOTALL)
+_EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+
+
+def _topic_from_condition(condition: str) -> str:
+    """Get the watched topic from a condition ("any update in tax policy" -> "tax policy")."""
+    words = topic_canonicalizer.extract_topic(condition.strip(" .!?")).split()
+    while words and words[-1] in TRIGGER_WORDS:
+        words.pop()
+    topic = " ".join(words)
+    return "" if topic in ("", "general") else topic
+
+
+def _channel(action: str) -> Optional[str]:
+    words = re.findall(r"[a-z-]+", action.lower())
+    for word in words:
+        if word in CHANNEL_WORDS:
+            return CHANNEL_WORDS[word]
+    return None
+
+
+def _recipients(action: str) -> List[str]:
+    emails = _EMAIL_RE.findall(action)
+    return [email.lower() for email in emails] if emails else [DEFAULT_RECIPIENT]
+
+
+def make_plan(topic: str, condition: str = "any_update", channel: str = "email",
+              recipients: Optional[List[str]] = None, source: str = "rules") -> Dict:
+    """Build a normalized plan dictionary.
+
+    Conditions and channels are kept even when the pipeline cannot carry them
+    out, so such events are skipped (see unsupported_reason) rather than
+    emailed on any update.
+    """
+    return {
+        "version": PLAN_VERSION,
+        "topic": topic,
+        "topic_key": canonical_topic(topic) if topic else "",
+        "condition": "_".join(str(condition or "").lower().split()) or "any_update",
+        "channel": str(channel or "").strip().lower() or "email",
+        "recipients": list(recipients) if recipients else [DEFAULT_RECIPIENT],
+        "source": source
+    }
+
+
+def unsupported_reason(plan: Dict) -> Optional[str]:
+    """Get why a plan cannot be carried out, or None if it can."""
+    if plan.get("channel", "email") not in CHANNELS:
+        return f"Channel '{plan['channel']}' is not supported (only {', '.join(CHANNELS)})"
+    if plan.get("condition", "any_update") not in CONDITIONS:
+        return f"Condition '{plan['condition']}' is not supported (only {', '.join(CONDITIONS)})"
+    return None
+
+
+def parse_action(action: str) -> Optional[Dict]:
+    """Compile action text with rules only.
+
+    Returns:
+        The plan, or None if the action does not follow a known form
+    """
+    match = _IF_THEN_RE.match(action)
+    if not match:
+        match = _ACTION_FIRST_RE.match(action)
+        # "Email me when ..." only counts if the first part delivers something
+        if match and _channel(match.group("action")) is None:
+            match = None
+    if not match:
+        return None
+    topic = _topic_from_condition(match.group("condition"))
+    channel = _channel(match.group("action"))
+    if not topic or channel is None:
+        return None
+    return make_plan(topic, channel=channel, recipients=_recipients(match.group("action")))
+
+
+def _default_llm() -> Optional["BaseChatModel"]:
+    """Create the configured chat model, or None if no token is set."""
+    if not Config.HF_TOKEN:
+        return None
+    from langchain_openai import ChatOpenAI
+    from .http_pool import get_async_http_client, get_http_client
+    return ChatOpenAI(api_key=Config.HF_TOKEN, model=Config.HF_MODEL, base_url=Config.HF_BASE_URL, temperature=0,
+                      http_client=get_http_client(), http_async_client=get_async_http_client())
+
+
+class ActionCompiler:
+    """Compiles action text into plans, caching results by text."""
+
+    CACHE_SIZE = 4096
+
+    def __init__(self, llm: Optional["BaseChatModel"] = None,
+                 llm_factory: Optional[Callable[[], Optional["BaseChatModel"]]] = None):
+        """Initialize the compiler.
+
+        Args:
+            llm: Chat model used for actions the rules cannot read
+            llm_factory: Creates the chat model on first use when llm is not given
+                (defaults to the configured Hugging Face model when
+                Config.ACTION_PLAN_USE_LLM is set)
+        """
+        self._llm = llm
+        if llm_factory is None and Config.ACTION_PLAN_USE_LLM:
+            llm_factory = _default_llm
+        self._llm_factory = llm_factory
+        self._cache: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self.llm_calls = 0
+
+    def _get_llm(self) -> Optional["BaseChatModel"]:
+        if self._llm is None and self._llm_factory is not None:
+            self._llm = self._llm_factory()
+            self._llm_factory = None
+        return self._llm
+
+    def compile(self, action: str) -> Dict:
+        """Get the plan for an action, compiling it on first use.
+
+        Never raises: actions neither the rules nor the LLM can read get a
+        best-effort plan with source "fallback". When that is because the LLM
+        call failed, the plan is not cached, so the next compile asks again.
+        """
+        key = " ".join(action.split()).lower()
+        cached = self._cache.get(key)
+        if cached is not None:
+            return dict(cached)
+        plan = parse_action(action)
+        cacheable = True
+        if plan is None:
+            try:
+                plan = self._compile_with_llm(action)
+            except Exception as e:
+                print(f"Could not compile action with the LLM: {e}")
+                cacheable = False
+            plan = plan or self._fallback(action)
+        if cacheable:
+            with self._lock:
+                if len(self._cache) >= self.CACHE_SIZE:
+                    self._cache.clear()
+                self._cache[key] = plan
+        return dict(plan)
+
+    def is_current(self, plan: Optional[Dict]) -> bool:
+        """Check whether a stored plan can be reused as is.
+
+        Fallback plans never are: they may stand in for a failed LLM call, so
+        they are compiled again (e.g. when the event store loads).
+        """
+        if not plan or plan.get("source") == "fallback":
+            return False
+        # LLM plans are kept across rule changes so the LLM is not called again
+        return plan.get("source") == "llm" or plan.get("version") == PLAN_VERSION
+
+    def _compile_with_llm(self, action: str) -> Optional[Dict]:
+        """Ask the LLM for a plan (None if there is no LLM or its answer is unusable).
+
+        Raises:
+            Exception: Whatever the LLM call raised
+        """
+        llm = self._get_llm()
+        if llm is None:
+            return None
+        from langchain_core.messages import HumanMessage, SystemMessage
+        from .callbacks import MetricsCallbackHandler
+        self.llm_calls += 1
+        with stage_limits.limit("llm"):
+            response = llm.invoke([
+                SystemMessage(content=SystemPrompts.get_action_plan_prompt()),
+                HumanMessage(content=action)
+            ], config={"callbacks": [MetricsCallbackHandler()]})
+        content = response.content if isinstance(response.content, str) else str(response.content)
+        match = re.search(r"\{.*\}", content, re.DOTALL)
+        try:
+            data = json.loads(match.group(0)) if match else {}
+        except ValueError:
+            return None
+        if not isinstance(data, dict):
+            return None
+        topic = data.get("topic")
+        if not isinstance(topic, str) or not topic.strip():
+            return None
+        recipients = data.get("recipients")
+        if not isinstance(recipients, list) or not all(isinstance(r, str) for r in recipients):
+            recipients = None
+        return make_plan(topic.strip(), condition=str(data.get("condition", "any_update")),
+                         channel=str(data.get("channel") or "email"), recipients=recipients, source="llm")
+
+    @staticmethod
+    def _fallback(action: str) -> Dict:
+        # Same heuristic the scheduler used before plans existed: the text before "then"
+        condition = re.split(r"\bthen\b", action, maxsplit=1, flags=re.IGNORECASE)[0]
+        condition = re.sub(r"^\s*(if|when|whenever)\b", "", condition, flags=re.IGNORECASE)
+        topic = _topic_from_condition(condition)
+        return make_plan(topic or topic_canonicalizer.extract_topic(action), channel=_channel(action) or "email",
+                         recipients=_recipients(action), source="fallback")
+
+
+# Global instance for easy access
+action_compiler = ActionCompiler()
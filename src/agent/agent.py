@@ -1,36 +1,71 @@
-from langchain.agents import AgentExecutor, create_tool_calling_agent
+from langchain.agents import AgentExecutor
+from langchain.agents.format_scratchpad.tools import format_to_tool_messages
+from langchain.agents.output_parsers.tools import ToolsAgentOutputParser
 from langchain_openai import ChatOpenAI
+from langchain_core.language_models.chat_models import BaseChatModel
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.messages import HumanMessage, SystemMessage
-from typing import List
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda, RunnablePassthrough
+from concurrent.futures import wait
+from typing import List, Optional
+import contextvars
 import json
 
 from .config import Config
+from .http_pool import get_async_http_client, get_http_client
 from .tools import search_web, checkIsMailneedtoSend, create_email_content
 from .prompts import SystemPrompts
+from .callbacks import MetricsCallbackHandler, TimingCallbackHandler
+from .parallel_executor import ParallelAgentExecutor, get_tool_pool
+from .instrumentation import RunTrace, trace_run, loads
+from .limits import stage_limits
+from .metrics import QUERIES, QUERIES_IN_FLIGHT, QUERY_SECONDS
+from .topics import topic_canonicalizer
+
+
+def _stage_limited(runnable: Runnable, stage: str) -> Runnable:
+    """Wrap a runnable so each call holds one of a stage's slots (see limits.py)."""
+    def invoke(input, config: RunnableConfig):
+        with stage_limits.limit(stage):
+            return runnable.invoke(input, config)
+    return RunnableLambda(invoke, name=f"{stage}_limited")
 
 
 class LangChainAgent:
     """LangChain agent manager class."""
     
-    def __init__(self):
+    def __init__(self, llm: Optional[BaseChatModel] = None):
+        """Initialize the agent.
+        
+        Args:
+            llm: Chat model to use instead of the configured Hugging Face model
+                (e.g. a ScriptedChatModel for offline tests and benchmarks)
+        """
         self.config = Config()
-        self.config.validate_config()
-        self.llm = self._create_llm()
+        if llm is None:
+            self.config.validate_config()
+        self.llm = llm if llm is not None else self._create_llm()
         self.prompt = self._create_prompt()
         # Expose only tool-callable functions (LangChain @tool decorated)
         # create_email_content is a helper, not a tool, so we keep tools consistent
         self.tools = [search_web, checkIsMailneedtoSend]
         self.agent = self._create_agent()
         self.executor = self._create_executor()
+        # Timings of the most recent run (see instrumentation.RunTrace)
+        self.last_trace: Optional[RunTrace] = None
     
     def _create_llm(self) -> ChatOpenAI:
-        """Create the language model instance."""
+        """Create the language model instance.
+        
+        All agents share the process-wide keep-alive HTTP clients (see http_pool).
+        """
         return ChatOpenAI(
             api_key=self.config.HF_TOKEN,
             model=self.config.HF_MODEL,
             base_url=self.config.HF_BASE_URL,
-            temperature=0.1  # Lower temperature for more consistent tool usage
+            temperature=0.1,  # Lower temperature for more consistent tool usage
+            http_client=get_http_client(),
+            http_async_client=get_async_http_client()
         )
     
     def _create_prompt(self) -> ChatPromptTemplate:
@@ -46,12 +81,26 @@ class LangChainAgent:
         return SystemPrompts.get_agent_system_prompt(self.config.HF_MODEL)
     
     def _create_agent(self):
-        """Create the agent instance."""
-        return create_tool_calling_agent(self.llm, self.tools, self.prompt)
+        """Create the agent instance.
+        
+        Same chain as LangChain's create_tool_calling_agent, except that each
+        model call holds a slot of the "llm" stage limit.
+        """
+        llm_with_tools = _stage_limited(self.llm.bind_tools(self.tools), "llm")
+        return (
+            RunnablePassthrough.assign(agent_scratchpad=lambda x: format_to_tool_messages(x["intermediate_steps"]))
+            | self.prompt
+            | llm_with_tools
+            | ToolsAgentOutputParser()
+        )
     
     def _create_executor(self) -> AgentExecutor:
-        """Create the agent executor."""
-        return AgentExecutor(
+        """Create the agent executor.
+        
+        With PARALLEL_TOOL_CALLS enabled, tool calls emitted together in one
+        step (e.g. search_web and checkIsMailneedtoSend) run concurrently.
+        """
+        executor_kwargs = dict(
             agent=self.agent,
             tools=self.tools,
             verbose=self.config.VERBOSE,
@@ -59,16 +108,37 @@ class LangChainAgent:
             max_iterations=self.config.MAX_ITERATIONS,
             return_intermediate_steps=True  # Enable intermediate steps for debugging
         )
+        if self.config.PARALLEL_TOOL_CALLS:
+            return ParallelAgentExecutor(max_workers=self.config.TOOL_MAX_WORKERS, **executor_kwargs)
+        return AgentExecutor(**executor_kwargs)
     
     def run(self, query: str) -> str:
         """Run the agent with a given query."""
+        QUERIES.inc()
+        QUERIES_IN_FLIGHT.inc()
+        try:
+            with trace_run("agent", query=query) as trace, QUERY_SECONDS.time():
+                self.last_trace = trace
+                callbacks = [TimingCallbackHandler(trace), MetricsCallbackHandler()]
+                result = self._run(query, callbacks)
+        finally:
+            QUERIES_IN_FLIGHT.dec()
+        if self.config.TIMINGS_LOG_PATH:
+            try:
+                trace.write_jsonl(self.config.TIMINGS_LOG_PATH)
+            except OSError as e:
+                print(f"Could not write timings: {e}")
+        return result
+    
+    def _run(self, query: str, callbacks: list) -> str:
+        """Run the query, reporting LLM and tool timings to the given callbacks."""
         try:
             # Check if this is an update query - if so, handle it directly
             if self._is_update_query(query):
-                return self._handle_update_query(query)
+                return self._handle_update_query(query, callbacks)
             
             # For other queries, use the normal agent flow
-            result = self.executor.invoke({"input": query})
+            result = self.executor.invoke({"input": query}, config={"callbacks": callbacks})
             
             if result.get("intermediate_steps"):
                 print(f"Agent used {len(result['intermediate_steps'])} tools")
@@ -77,27 +147,54 @@ class LangChainAgent:
         except Exception as e:
             print(f"Agent execution error: {e}")
             try:
-                response = self.llm.invoke(query)
+                with stage_limits.limit("llm"):
+                    response = self.llm.invoke(query, config={"callbacks": callbacks})
                 return response.content
             except Exception as e2:
                 print(f"LLM fallback error: {e2}")
                 return f"Error: {str(e)}"
     
-    def _handle_update_query(self, query: str) -> str:
-        """Handle update queries by calling both tools directly."""
+    def _handle_update_query(self, query: str, callbacks: Optional[list] = None) -> str:
+        """Handle update queries by calling both tools directly.
+        
+        Both tools block on their own web search, so they run concurrently on
+        a pool of their own. Whatever has not finished by UPDATE_QUERY_DEADLINE
+        seconds is reported as pending and the partial response is returned.
+        Calls that have not started yet are cancelled; calls already running
+        cannot be interrupted and keep their worker of the "agent-update" pool
+        until they return, and interpreter exit waits for them. Using a separate
+        pool keeps such stragglers from starving the agent's tool calls.
+        """
         try:
             # Extract topic from query
             topic = self._extract_topic(query)
             
-            # Call search_web tool
-            search_result = search_web.invoke({"query": f"{topic} updates", "max_results": 5})
+            # Call search_web and checkIsMailneedtoSend concurrently, each in a
+            # copy of the current context so the active trace follows them
+            config = {"callbacks": callbacks}
+            pool = get_tool_pool(self.config.TOOL_MAX_WORKERS, name="agent-update")
+            search_future = pool.submit(
+                contextvars.copy_context().run, search_web.invoke,
+                {"query": f"{topic} updates", "max_results": 5}, config
+            )
+            email_future = pool.submit(
+                contextvars.copy_context().run, checkIsMailneedtoSend.invoke,
+                {"event_data": json.dumps({"topic": topic})}, config
+            )
+            done, not_done = wait([search_future, email_future], timeout=self.config.UPDATE_QUERY_DEADLINE)
+            # Calls still queued behind stragglers of earlier queries never start
+            cancelled = {future for future in not_done if future.cancel()}
             
-            # Call checkIsMailneedtoSend tool
-            email_result = checkIsMailneedtoSend.invoke({"event_data": json.dumps({"topic": topic})})
+            if search_future in done:
+                search_result = search_future.result()
+            else:
+                search_result = f"Search did not finish within {self.config.UPDATE_QUERY_DEADLINE:g}s; results omitted"
             
             # Parse email decision
             try:
-                email_data = json.loads(email_result)
+                if email_future not in done:
+                    raise TimeoutError
+                email_data = loads(email_future.result())
                 should_send = email_data.get("should_send_email", False)
                 reasoning = email_data.get("reasoning", "No reasoning provided")
                 email_content = email_data.get("email_content") or None
@@ -106,6 +203,15 @@ class LangChainAgent:
                     email_status = "Will send email"
                 else:
                     email_status = "Email already sent" if "already sent" in reasoning.lower() else "No need to send email"
+            except TimeoutError:
+                email_status = "Email decision pending"
+                if email_future in cancelled:
+                    reasoning = (f"Update check did not start within {self.config.UPDATE_QUERY_DEADLINE:g}s; "
+                                 "it was skipped")
+                else:
+                    reasoning = (f"Update check did not finish within {self.config.UPDATE_QUERY_DEADLINE:g}s; "
+                                 "it keeps running in the background")
+                email_content = None
             except:
                 email_status = "Email decision unavailable"
                 reasoning = "Could not parse email decision"
@@ -142,16 +248,11 @@ class LangChainAgent:
     
     def _extract_topic(self, query: str) -> str:
         """Extract topic from update query."""
-        # Simple extraction - remove common words
-        words_to_remove = ["there", "is", "any", "update", "updates", "in", "on", "about", "latest", "recent", "new"]
-        words = query.lower().split()
-        topic_words = [word for word in words if word not in words_to_remove]
-        return " ".join(topic_words) if topic_words else "general"
+        return topic_canonicalizer.extract_topic(query)
     
     def _is_update_query(self, query: str) -> bool:
         """Check if the query is asking for updates."""
-        update_keywords = ["update", "updates", "latest", "recent", "new", "changes"]
-        return any(keyword in query.lower() for keyword in update_keywords)
+        return topic_canonicalizer.is_update_query(query)
     
     def _should_add_email_decision(self, result: dict) -> bool:
         """Check if we should add email decision to the response."""
@@ -196,6 +297,6 @@ class LangChainAgent:
         
         return current_output
     
-    def get_llm(self) -> ChatOpenAI:
+    def get_llm(self) -> BaseChatModel:
         """Get the language model instance."""
         return self.llm
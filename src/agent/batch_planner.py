@@ -0,0 +1,170 @@
+"""
+Batch Planner
+
+Runs the update check for every event due in one scheduler tick while
+searching each topic only once. Due events are grouped by the canonical
+topic of their plan; each group gets one web search and one relevance pass,
+and the result is then fanned out to the group's recipients and the topic's
+subscribers, each with its own notification-memory dedup (done for all of
+them in a few set-based queries). Outbound searches therefore scale with the
+number of unique topics, not with the number of events. Events whose plan
+asks for a channel or condition the pipeline cannot carry out (see
+action_plan.unsupported_reason) are left out rather than emailed.
+"""
+
+import contextvars
+import hashlib
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .action_plan import action_compiler, unsupported_reason
+from .config import Config
+from .instrumentation import timed
+from .metrics import SKIPPED_EVENTS
+from .parallel_executor import get_tool_pool
+from .tools import cached_search, check_topic, update_search_query
+
+
+class TopicBatch:
+    """Due events that watch the same canonical topic."""
+
+    def __init__(self, topic_key: str, topic: str):
+        self.topic_key = topic_key
+        # Human-readable topic of the first event, used for the search and the email
+        self.topic = topic
+        self.events: List[Dict] = []
+
+    def recipients(self) -> Dict[str, List[int]]:
+        """Get each recipient of the batch with the ids of the events notifying them."""
+        recipients: Dict[str, List[int]] = {}
+        for event in self.events:
+            for recipient in event["plan"]["recipients"]:
+                recipients.setdefault(recipient, []).append(event["id"])
+        return recipients
+
+    def to_payload(self) -> Dict:
+        """Get a JSON-serializable form of the batch (for the job queue)."""
+        return {
+            "topic_key": self.topic_key,
+            "topic": self.topic,
+            "events": [{"id": e["id"], "name": e.get("name", ""), "next_run_at": e.get("next_run_at"),
+                        "plan": e["plan"]} for e in self.events]
+        }
+
+    @classmethod
+    def from_payload(cls, payload: Dict) -> "TopicBatch":
+        """Rebuild a batch from to_payload() output."""
+        batch = cls(payload["topic_key"], payload["topic"])
+        batch.events = list(payload["events"])
+        return batch
+
+    def dedup_key(self) -> str:
+        """Get a key identifying this batch's firing of its events.
+
+        A scheduler that crashes before recording the runs fires the same
+        events with the same run times again, producing the same key.
+        """
+        runs = ",".join(f"{e['id']}@{e.get('next_run_at')}" for e in sorted(self.events, key=lambda e: e["id"]))
+        return f"topic:{self.topic_key}:" + hashlib.sha1(runs.encode()).hexdigest()
+
+
+def group_by_topic(events: List[Dict]) -> List[TopicBatch]:
+    """Group events by the canonical topic of their plan, in first-seen order.
+
+    Events whose plan cannot be carried out are skipped (and counted in SKIPPED_EVENTS).
+    """
+    batches: Dict[str, TopicBatch] = {}
+    for event in events:
+        if not event.get("plan"):
+            event = {**event, "plan": action_compiler.compile(event["action"])}
+        plan = event["plan"]
+        if unsupported_reason(plan) is not None:
+            SKIPPED_EVENTS.inc()
+            continue
+        key = plan["topic_key"] or plan["topic"]
+        batch = batches.get(key)
+        if batch is None:
+            batch = batches[key] = TopicBatch(key, plan["topic"])
+        batch.events.append(event)
+    return list(batches.values())
+
+
+def _default_search(query: str, topic: str) -> List[Dict]:
+    return cached_search(query, Config.DEFAULT_MAX_RESULTS, topic=topic)
+
+
+class BatchPlanner:
+    """Checks a tick's due events for updates with one search per unique topic."""
+
+    def __init__(self, search: Optional[Callable[[str, str], List[Dict]]] = None,
+                 max_workers: Optional[int] = None):
+        """Initialize the planner.
+
+        Args:
+            search: Called with (query, topic) to get search results (defaults to the
+                shared cached web search)
+            max_workers: Topics searched at the same time (defaults to Config.TOOL_MAX_WORKERS)
+        """
+        # A module-level default keeps the planner picklable for process workers
+        self.search = search or _default_search
+        self.max_workers = max_workers or Config.TOOL_MAX_WORKERS
+        self.searches = 0
+
+    def run(self, events: List[Dict]) -> List[Dict]:
+        """Check every event for updates and notify each recipient at most once per topic.
+
+        Returns:
+            One notification result per (topic, recipient), with the ids of the
+            events it covers in "event_ids" and the recipient in "recipient"
+        """
+        batches = group_by_topic(events)
+        if not batches:
+            return []
+        self.searches += len(batches)
+        # Searches block on the network, so unique topics are searched concurrently
+        pool = get_tool_pool(self.max_workers)
+        futures = [pool.submit(contextvars.copy_context().run, self._search_topic, batch) for batch in batches]
+        results = []
+        for batch, future in zip(batches, futures):
+            results.extend(self._fan_out(batch, *future.result()))
+        return results
+
+    def run_topic(self, batch: TopicBatch) -> List[Dict]:
+        """Check one topic batch: search it, then notify its recipients.
+
+        This is the unit of work EventExecutor jobs run (see group_by_topic).
+        """
+        self.searches += 1
+        return self._fan_out(batch, *self._search_topic(batch))
+
+    def run_job(self, payload: Dict) -> List[Dict]:
+        """Run a "check_topic" job from the job queue (payload from TopicBatch.to_payload)."""
+        return self.run_topic(TopicBatch.from_payload(payload))
+
+    def _search_topic(self, batch: TopicBatch) -> Tuple[str, List[Dict], Optional[str]]:
+        """Search a topic once, returning (query, results, error)."""
+        query = update_search_query(batch.topic)
+        try:
+            with timed("planner.search", topic=batch.topic_key, events=len(batch.events)):
+                return query, self.search(query, batch.topic), None
+        except Exception as e:
+            return query, [], str(e)
+
+    def _fan_out(self, batch: TopicBatch, query: str, search_results: List[Dict],
+                 error: Optional[str]) -> List[Dict]:
+        """Deliver one topic's search results to each of its recipients.
+
+        Recipients are the batch's events' recipients plus the topic's
+        subscribers; all of them are checked against memory together, and
+        results they were all checked against before are skipped (see check_topic).
+        """
+        recipients = batch.recipients()
+        events = {recipient: {"topic": batch.topic, "event_ids": event_ids, "recipient": recipient}
+                  for recipient, event_ids in recipients.items()}
+        if error is not None:
+            decisions = {recipient: {"should_send_email": False, "reasoning": f"Web search failed: {error}",
+                                     "event_analyzed": event} for recipient, event in events.items()}
+        else:
+            with timed("planner.notify", topic=batch.topic_key, recipients=len(events)):
+                decisions = check_topic(batch.topic, events, query, search_results, include_subscribers=True)
+        return [{**decision, "event_ids": recipients.get(recipient, []), "recipient": recipient}
+                for recipient, decision in decisions.items()]
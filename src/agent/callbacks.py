@@ -0,0 +1,113 @@
+"""
+LangChain callbacks for the Event Action Agent.
+
+Bridges LangChain's callback events into the instrumentation traces so
+LLM and tool calls made by the agent executor show up as timed stages, and
+into the LLM call, latency and token metrics.
+"""
+
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from .instrumentation import RunTrace
+from .metrics import LLM_CALLS, LLM_SECONDS, LLM_TOKENS
+
+
+class TimingCallbackHandler(BaseCallbackHandler):
+    """Records the wall time of every LLM and tool call into a RunTrace."""
+
+    def __init__(self, trace: RunTrace):
+        """Initialize the handler.
+
+        Args:
+            trace: Trace the timings are recorded into
+        """
+        self.trace = trace
+        self._starts: Dict[UUID, Tuple[str, float]] = {}
+
+    def _start(self, run_id: UUID, stage: str):
+        self._starts[run_id] = (stage, time.perf_counter())
+
+    def _end(self, run_id: UUID, **attrs):
+        started = self._starts.pop(run_id, None)
+        if started is None:
+            return
+        stage, start = started
+        self.trace.add_span(stage, start, (time.perf_counter() - start) * 1000, **attrs)
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], *, run_id: UUID, **kwargs: Any):
+        self._start(run_id, "llm")
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[Any]], *, run_id: UUID, **kwargs: Any):
+        self._start(run_id, "llm")
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any):
+        attrs = {}
+        token_usage = (getattr(response, "llm_output", None) or {}).get("token_usage")
+        if isinstance(token_usage, dict):
+            attrs["total_tokens"] = token_usage.get("total_tokens")
+        self._end(run_id, **attrs)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._end(run_id, error=str(error))
+
+    def on_tool_start(self, serialized: Dict[str, Any], input_str: str, *, run_id: UUID,
+                      parent_run_id: Optional[UUID] = None, **kwargs: Any):
+        name = (serialized or {}).get("name") or kwargs.get("name") or "unknown"
+        self._start(run_id, f"tool.{name}")
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any):
+        self._end(run_id)
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._end(run_id, error=str(error))
+
+
+def _token_usage(response: Any) -> Dict[str, int]:
+    """Get prompt and completion token counts from an LLMResult."""
+    usage = {"prompt": 0, "completion": 0}
+    found = False
+    for generations in getattr(response, "generations", None) or []:
+        for generation in generations:
+            metadata = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if metadata:
+                usage["prompt"] += metadata.get("input_tokens") or 0
+                usage["completion"] += metadata.get("output_tokens") or 0
+                found = True
+    if not found:
+        token_usage = (getattr(response, "llm_output", None) or {}).get("token_usage")
+        if isinstance(token_usage, dict):
+            usage["prompt"] = token_usage.get("prompt_tokens") or 0
+            usage["completion"] = token_usage.get("completion_tokens") or 0
+    return usage
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """Counts LLM calls and tokens and records their latency in the metrics registry."""
+
+    def __init__(self):
+        self._starts: Dict[UUID, float] = {}
+
+    def on_llm_start(self, serialized: Dict[str, Any], prompts: List[str], *, run_id: UUID, **kwargs: Any):
+        self._starts[run_id] = time.perf_counter()
+
+    def on_chat_model_start(self, serialized: Dict[str, Any], messages: List[List[Any]], *, run_id: UUID, **kwargs: Any):
+        self._starts[run_id] = time.perf_counter()
+
+    def _end(self, run_id: UUID, status: str):
+        start = self._starts.pop(run_id, None)
+        if start is not None:
+            LLM_SECONDS.observe(time.perf_counter() - start)
+        LLM_CALLS.labels(status=status).inc()
+
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any):
+        self._end(run_id, "ok")
+        for kind, count in _token_usage(response).items():
+            if count:
+                LLM_TOKENS.labels(type=kind).inc(count)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any):
+        self._end(run_id, "error")
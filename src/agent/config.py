@@ -17,12 +17,131 @@ class Config:
     HF_BASE_URL: str = "https://router.huggingface.co/v1"
     HF_MODEL: str = "openai/gpt-oss-20b:together"
     
+    # LLM HTTP Client Configuration (one keep-alive pool shared by every agent in the process)
+    # Cap on concurrent connections (and so on in-flight LLM requests) to HF_BASE_URL
+    LLM_HTTP_MAX_CONNECTIONS: int = int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "10"))
+    LLM_HTTP_MAX_KEEPALIVE: int = int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "10"))
+    # Seconds an idle connection is kept open for reuse
+    LLM_HTTP_KEEPALIVE_EXPIRY: float = float(os.getenv("LLM_HTTP_KEEPALIVE_EXPIRY", "60"))
+    LLM_HTTP_TIMEOUT: float = float(os.getenv("LLM_HTTP_TIMEOUT", "120"))
+    LLM_HTTP_CONNECT_TIMEOUT: float = float(os.getenv("LLM_HTTP_CONNECT_TIMEOUT", "10"))
+    # Use HTTP/2 when the h2 package is installed
+    LLM_HTTP2: bool = os.getenv("LLM_HTTP2", "true").lower() in ("1", "true", "yes")
+    
+    # Notification Memory Configuration
+    # Seconds after which an uncommitted claim on updates is considered abandoned
+    CLAIM_TTL_SECONDS: float = float(os.getenv("CLAIM_TTL_SECONDS", "900"))
+    # Seconds a topic's last result set is trusted to skip unchanged checks (0 disables)
+    RESULT_FINGERPRINT_TTL_SECONDS: float = float(os.getenv("RESULT_FINGERPRINT_TTL_SECONDS", "3600"))
+    
     # Search Configuration
     DEFAULT_MAX_RESULTS: int = 5
+    # Seconds search results are reused for the same canonical topic (0 disables)
+    SEARCH_CACHE_TTL: float = float(os.getenv("SEARCH_CACHE_TTL", "300"))
+    SEARCH_CACHE_SIZE: int = int(os.getenv("SEARCH_CACHE_SIZE", "256"))
+    
+    # Topic Configuration
+    # Optional JSON file mapping phrases to canonical phrases, e.g. {"taxation": "tax"}
+    TOPIC_SYNONYMS_PATH: Optional[str] = os.getenv("TOPIC_SYNONYMS_PATH")
     
     # Agent Configuration
     MAX_ITERATIONS: int = 20
     VERBOSE: bool = True
+    # Run independent tool calls from one agent step concurrently
+    PARALLEL_TOOL_CALLS: bool = os.getenv("PARALLEL_TOOL_CALLS", "true").lower() in ("1", "true", "yes")
+    TOOL_MAX_WORKERS: int = int(os.getenv("TOOL_MAX_WORKERS", "4"))
+    # Seconds an update query waits for its searches before returning partial output
+    UPDATE_QUERY_DEADLINE: float = float(os.getenv("UPDATE_QUERY_DEADLINE", "30"))
+    
+    # Instrumentation Configuration
+    # When set, every agent run appends its timing trace (JSON lines) to this file
+    TIMINGS_LOG_PATH: Optional[str] = os.getenv("TIMINGS_LOG_PATH")
+    
+    # Event Configuration
+    EVENTS_DB_PATH: str = os.getenv("EVENTS_DB_PATH", "events.db")
+    # Ask the LLM (once per action text) to plan actions the built-in rules cannot read
+    ACTION_PLAN_USE_LLM: bool = os.getenv("ACTION_PLAN_USE_LLM", "true").lower() in ("1", "true", "yes")
+    
+    # Scheduler Configuration
+    # Events sharing a run time are spread over this many seconds
+    SCHEDULER_JITTER_SECONDS: float = float(os.getenv("SCHEDULER_JITTER_SECONDS", "30"))
+    # Fire events whose run time passed while the scheduler was down
+    SCHEDULER_CATCH_UP: bool = os.getenv("SCHEDULER_CATCH_UP", "true").lower() in ("1", "true", "yes")
+    # Upper bound on how long the scheduler sleeps between checks
+    SCHEDULER_MAX_SLEEP: float = 60.0
+    
+    # Executor Configuration
+    # Workers running due-event jobs and how many jobs may queue before the scheduler blocks
+    EXECUTOR_WORKERS: int = int(os.getenv("EXECUTOR_WORKERS", "4"))
+    EXECUTOR_QUEUE_SIZE: int = int(os.getenv("EXECUTOR_QUEUE_SIZE", "1000"))
+    # "thread" or "process"
+    EXECUTOR_MODE: str = os.getenv("EXECUTOR_MODE", "thread")
+    # Concurrent operations allowed per stage in one process (0 = unlimited)
+    SEARCH_CONCURRENCY: int = int(os.getenv("SEARCH_CONCURRENCY", "4"))
+    LLM_CONCURRENCY: int = int(os.getenv("LLM_CONCURRENCY", "2"))
+    DB_CONCURRENCY: int = int(os.getenv("DB_CONCURRENCY", "4"))
+    
+    # Job Queue Configuration
+    # Shared by worker processes; lives next to notification memory by default
+    JOBS_DB_PATH: str = os.getenv("JOBS_DB_PATH", "notification_memory.db")
+    JOB_LEASE_SECONDS: float = float(os.getenv("JOB_LEASE_SECONDS", "300"))
+    JOB_MAX_ATTEMPTS: int = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+    # Retry delay doubles from JOB_BACKOFF_BASE up to JOB_BACKOFF_MAX seconds
+    JOB_BACKOFF_BASE: float = float(os.getenv("JOB_BACKOFF_BASE", "30"))
+    JOB_BACKOFF_MAX: float = float(os.getenv("JOB_BACKOFF_MAX", "3600"))
+    JOB_POLL_INTERVAL: float = float(os.getenv("JOB_POLL_INTERVAL", "5"))
+    
+    # Email Delivery Configuration
+    # Notifications are only delivered when SMTP_HOST is set
+    SMTP_HOST: Optional[str] = os.getenv("SMTP_HOST")
+    SMTP_PORT: int = int(os.getenv("SMTP_PORT", "25"))
+    SMTP_USERNAME: Optional[str] = os.getenv("SMTP_USERNAME")
+    SMTP_PASSWORD: Optional[str] = os.getenv("SMTP_PASSWORD")
+    SMTP_STARTTLS: bool = os.getenv("SMTP_STARTTLS", "false").lower() in ("1", "true", "yes")
+    SMTP_FROM: str = os.getenv("SMTP_FROM", "event-agent@localhost")
+    SMTP_TIMEOUT: float = float(os.getenv("SMTP_TIMEOUT", "30"))
+    # Address used for the "default" recipient (events that say "send email to the user")
+    EMAIL_DEFAULT_TO: Optional[str] = os.getenv("EMAIL_DEFAULT_TO")
+    # Persistent connections, messages sent per connection checkout, and messages before reconnecting
+    SMTP_POOL_SIZE: int = int(os.getenv("SMTP_POOL_SIZE", "4"))
+    SMTP_BATCH_SIZE: int = int(os.getenv("SMTP_BATCH_SIZE", "50"))
+    SMTP_MAX_MESSAGES_PER_CONNECTION: int = int(os.getenv("SMTP_MAX_MESSAGES_PER_CONNECTION", "1000"))
+    # Retry delay doubles from DELIVERY_BACKOFF_BASE up to DELIVERY_BACKOFF_MAX seconds
+    DELIVERY_MAX_ATTEMPTS: int = int(os.getenv("DELIVERY_MAX_ATTEMPTS", "5"))
+    DELIVERY_BACKOFF_BASE: float = float(os.getenv("DELIVERY_BACKOFF_BASE", "10"))
+    DELIVERY_BACKOFF_MAX: float = float(os.getenv("DELIVERY_BACKOFF_MAX", "600"))
+    
+    # Digest Configuration
+    # A recipient's notifications are collected for this many seconds and sent as one email (0 disables)
+    DIGEST_WINDOW_SECONDS: float = float(os.getenv("DIGEST_WINDOW_SECONDS", "300"))
+    # Durable buffer of pending digest items; lives next to notification memory by default
+    DIGEST_DB_PATH: str = os.getenv("DIGEST_DB_PATH", "notification_memory.db")
+    
+    # API Server Configuration
+    API_HOST: str = os.getenv("API_HOST", "127.0.0.1")
+    API_PORT: int = int(os.getenv("API_PORT", "8080"))
+    API_MAX_PAGE_SIZE: int = 1000
+    API_MAX_BODY_BYTES: int = 10 * 1024 * 1024
+    
+    # Daemon Configuration (python main.py --serve)
+    # Unix socket the daemon listens on; CLI commands are forwarded to it while it is running
+    DAEMON_SOCKET: str = os.getenv("DAEMON_SOCKET", "event_agent.sock")
+    # Also serve the daemon over HTTP on this port (unset: Unix socket only)
+    DAEMON_PORT: Optional[int] = int(os.environ["DAEMON_PORT"]) if os.getenv("DAEMON_PORT") else None
+    # How long the CLI waits for the daemon to answer a query
+    DAEMON_TIMEOUT: float = float(os.getenv("DAEMON_TIMEOUT", "300"))
+    
+    # Profiling Configuration (python main.py --profile)
+    # Directory for profile output when --profile-out is not given
+    PROFILE_DIR: str = os.getenv("PROFILE_DIR", "profiles")
+    # Milliseconds between wall-clock stack samples
+    PROFILE_SAMPLE_INTERVAL_MS: float = float(os.getenv("PROFILE_SAMPLE_INTERVAL_MS", "5"))
+    
+    # Metrics Configuration (also served at GET /metrics by --api and --serve)
+    # Prometheus text file the CLI writes its metrics to (empty: disabled)
+    METRICS_TEXTFILE: str = os.getenv("METRICS_TEXTFILE", "")
+    # Seconds between rewrites of the file by long-running commands
+    METRICS_TEXTFILE_INTERVAL: float = float(os.getenv("METRICS_TEXTFILE_INTERVAL", "15"))
     
     @classmethod
     def validate_config(cls) -> bool:
@@ -0,0 +1,599 @@
+"""
+Email delivery for the Event Action Agent.
+
+Notifications decided by ``decide_notification`` are delivered over SMTP by
+a ``DeliveryService``:
+
+- Connections come from an ``SMTPPool`` of persistent, already-authenticated
+  connections, so the connect/EHLO/STARTTLS/AUTH handshake is paid once per
+  connection rather than once per message.
+- Each worker takes a batch of queued messages and sends them over one
+  connection. When the server advertises PIPELINING (RFC 2920) the envelope
+  commands of a message are sent together with the end of the previous
+  message, which costs one round trip per message instead of four.
+- Temporary failures (4xx replies, dropped connections) are retried with
+  exponential backoff by a timer thread, so workers never sleep on a retry.
+- A notification's claimed updates (see NotificationMemory.claim_new_updates)
+  are committed only once the server accepted the message; permanent
+  failures and exhausted retries release the claim so a later check can
+  notify again. Notifications for a recipient without an email address are
+  dropped for good instead (see NotificationMemory.drop_claim), since
+  retrying them cannot succeed.
+
+Delivery is enabled by setting SMTP_HOST. ``smtp_sink.LocalSMTPSink`` is a
+local server for tests and benchmarks.
+"""
+
+import heapq
+import itertools
+import queue
+import re
+import smtplib
+import ssl
+import threading
+import time
+from contextlib import contextmanager
+from email.message import EmailMessage
+from email.policy import SMTP as SMTP_POLICY
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from .config import Config
+from .limits import stage_limits
+from .metrics import EMAILS_UNDELIVERABLE
+from .notification_memory import NotificationMemory, notification_memory
+
+
+# Sentinel telling a worker thread to exit
+_STOP = object()
+
+# (accepted, reply code, reply text) for one message
+SendResult = Tuple[bool, int, str]
+
+
+class PooledConnection:
+    """An open SMTP connection owned by an SMTPPool."""
+
+    def __init__(self, smtp: smtplib.SMTP):
+        self.smtp = smtp
+        self.last_used = time.monotonic()
+        self.messages_sent = 0
+
+
+class SMTPPool:
+    """Pool of persistent SMTP connections."""
+
+    def __init__(self, host: Optional[str] = None, port: Optional[int] = None,
+                 username: Optional[str] = None, password: Optional[str] = None,
+                 starttls: Optional[bool] = None, size: Optional[int] = None,
+                 timeout: Optional[float] = None, max_messages_per_connection: Optional[int] = None,
+                 idle_check_seconds: float = 30.0):
+        """Initialize the pool; connections are opened on first use.
+
+        Args:
+            host: SMTP server (defaults to Config.SMTP_HOST)
+            port: SMTP port (defaults to Config.SMTP_PORT)
+            username: Login user, or None to skip AUTH (defaults to Config.SMTP_USERNAME)
+            password: Login password (defaults to Config.SMTP_PASSWORD)
+            starttls: Upgrade connections with STARTTLS (defaults to Config.SMTP_STARTTLS)
+            size: Maximum open connections (defaults to Config.SMTP_POOL_SIZE)
+            timeout: Socket timeout in seconds (defaults to Config.SMTP_TIMEOUT)
+            max_messages_per_connection: Reconnect after this many messages, since servers
+                cap messages per session (defaults to Config.SMTP_MAX_MESSAGES_PER_CONNECTION)
+            idle_check_seconds: Connections idle longer than this are checked with NOOP
+                before reuse
+        """
+        self.host = host or Config.SMTP_HOST
+        if not self.host:
+            raise ValueError("No SMTP host configured. Set SMTP_HOST to enable email delivery.")
+        self.port = port or Config.SMTP_PORT
+        self.username = username if username is not None else Config.SMTP_USERNAME
+        self.password = password if password is not None else Config.SMTP_PASSWORD
+        self.starttls = Config.SMTP_STARTTLS if starttls is None else starttls
+        self.size = size or Config.SMTP_POOL_SIZE
+        self.timeout = timeout or Config.SMTP_TIMEOUT
+        self.max_messages_per_connection = max_messages_per_connection or Config.SMTP_MAX_MESSAGES_PER_CONNECTION
+        self.idle_check_seconds = idle_check_seconds
+        self._idle: List[PooledConnection] = []
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._lock = threading.Lock()
+        self._closed = False
+        self.connects = 0
+        self.reuses = 0
+
+    def _connect(self) -> PooledConnection:
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            smtp.ehlo()
+            if self.starttls:
+                smtp.starttls(context=ssl.create_default_context())
+                smtp.ehlo()
+            if self.username:
+                smtp.login(self.username, self.password or "")
+        except Exception:
+            smtp.close()
+            raise
+        with self._lock:
+            self.connects += 1
+        return PooledConnection(smtp)
+
+    def _is_usable(self, connection: PooledConnection) -> bool:
+        if connection.messages_sent >= self.max_messages_per_connection:
+            return False
+        if time.monotonic() - connection.last_used < self.idle_check_seconds:
+            return True
+        try:
+            return connection.smtp.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    def acquire(self) -> PooledConnection:
+        """Take a connection, reusing an idle one when possible; blocks while all are in use."""
+        self._slots.acquire()
+        try:
+            while True:
+                with self._lock:
+                    connection = self._idle.pop() if self._idle else None
+                if connection is None:
+                    return self._connect()
+                if self._is_usable(connection):
+                    with self._lock:
+                        self.reuses += 1
+                    return connection
+                self._discard(connection)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, connection: PooledConnection, broken: bool = False):
+        """Return a connection to the pool (closing it if it is broken or the pool is closed)."""
+        connection.last_used = time.monotonic()
+        with self._lock:
+            keep = not broken and not self._closed
+            if keep:
+                self._idle.append(connection)
+        if not keep:
+            self._discard(connection)
+        self._slots.release()
+
+    @contextmanager
+    def connection(self) -> Iterator[PooledConnection]:
+        """Hold a connection for the duration of the block.
+
+        The connection is dropped instead of reused if the block raises.
+        """
+        connection = self.acquire()
+        try:
+            yield connection
+        except BaseException:
+            self.release(connection, broken=True)
+            raise
+        self.release(connection)
+
+    @staticmethod
+    def _discard(connection: PooledConnection):
+        try:
+            connection.smtp.quit()
+        except (smtplib.SMTPException, OSError):
+            connection.smtp.close()
+
+    def close(self):
+        """Close idle connections; connections in use are closed when released."""
+        with self._lock:
+            self._closed = True
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            self._discard(connection)
+
+
+def _message_data(message: EmailMessage) -> bytes:
+    """Get a message as dot-stuffed SMTP DATA ending with the terminating dot."""
+    data = message.as_bytes(policy=SMTP_POLICY)
+    data = re.sub(rb"(?m)^\.", b"..", data)
+    if not data.endswith(b"\r\n"):
+        data += b"\r\n"
+    return data + b".\r\n"
+
+
+def _envelope(message: EmailMessage) -> bytes:
+    sender = message["From"].addresses[0].addr_spec
+    commands = [f"MAIL FROM:<{sender}>"]
+    commands.extend(f"RCPT TO:<{address.addr_spec}>" for address in message["To"].addresses)
+    commands.append("DATA")
+    return ("\r\n".join(commands) + "\r\n").encode()
+
+
+def send_pipelined(smtp: smtplib.SMTP, messages: List[EmailMessage],
+                   results: Optional[List[SendResult]] = None) -> List[SendResult]:
+    """Send messages over one connection, pipelining commands if the server allows it.
+
+    Each message's MAIL/RCPT/DATA commands are written together with the end
+    of the previous message's content, then the replies are read. Messages
+    are sent one by one with smtplib when PIPELINING is not advertised.
+
+    Args:
+        smtp: Connection that has already sent EHLO
+        messages: Messages to send, in order
+        results: List the results are appended to as they arrive (so the
+            caller knows which messages were settled if this raises)
+
+    Returns:
+        One (accepted, code, reply) per message
+
+    Raises:
+        smtplib.SMTPServerDisconnected: The connection dropped; messages without a
+            result were not (known to be) sent
+    """
+    results = [] if results is None else results
+    if not smtp.has_extn("pipelining"):
+        for message in messages:
+            results.append(_send_one(smtp, message))
+        return results
+    # Content of the message whose DATA was accepted, written with the next group
+    pending_data = b""
+    needs_reset = False
+    for message in messages:
+        smtp.send((b"RSET\r\n" if needs_reset else b"") + pending_data + _envelope(message))
+        if pending_data:
+            results.append(_data_result(smtp.getreply()))
+        if needs_reset:
+            smtp.getreply()
+        replies = [smtp.getreply() for _ in range(len(message["To"].addresses) + 2)]
+        pending_data, needs_reset = b"", False
+        if replies[-1][0] == 354:
+            pending_data = _message_data(message)
+            continue
+        # MAIL or every RCPT was refused, so DATA was too; report the first refusal
+        code, reply = next((r for r in replies if r[0] not in (250, 251)), replies[-1])
+        results.append((False, code, reply.decode("utf-8", "replace")))
+        needs_reset = True
+    if pending_data:
+        smtp.send(pending_data)
+        results.append(_data_result(smtp.getreply()))
+    if needs_reset:
+        smtp.rset()
+    return results
+
+
+def _data_result(reply: Tuple[int, bytes]) -> SendResult:
+    code, text = reply
+    return code == 250, code, text.decode("utf-8", "replace")
+
+
+def _send_one(smtp: smtplib.SMTP, message: EmailMessage) -> SendResult:
+    try:
+        refused = smtp.send_message(message)
+    except smtplib.SMTPRecipientsRefused as e:
+        code, reply = next(iter(e.recipients.values()))
+        return False, code, reply.decode("utf-8", "replace")
+    except smtplib.SMTPResponseException as e:
+        # smtplib has already reset the transaction
+        return False, e.smtp_code, e.smtp_error.decode("utf-8", "replace")
+    if refused:
+        # Accepted for some recipients only; the rest are reported but not retried
+        print(f"Email to {message['To']} refused for: {', '.join(refused)}")
+    return True, 250, "OK"
+
+
+def recipient_address(recipient: str) -> Optional[str]:
+    """Map a plan recipient to an email address ("default" is Config.EMAIL_DEFAULT_TO)."""
+    if "@" in recipient:
+        return recipient
+    return Config.EMAIL_DEFAULT_TO
+
+
+def build_email(notification: Dict, to: str, sender: Optional[str] = None) -> EmailMessage:
+    """Build the email for a notification from its email_content."""
+    content = notification["email_content"]
+    message = EmailMessage()
+    message["From"] = sender or Config.SMTP_FROM
+    message["To"] = to
+    message["Subject"] = content["subject"]
+    message.set_content(content["body"])
+    return message
+
+
+class OutgoingEmail:
+    """A message waiting for delivery, with the claim it settles."""
+
+    def __init__(self, message: EmailMessage, claim_ids: List[str], topic: str):
+        self.message = message
+        self.claim_ids = claim_ids
+        self.topic = topic
+        self.attempts = 0
+        self.last_error: Optional[str] = None
+        # Whether the current attempt was finished or scheduled for a retry
+        self.handled = False
+
+
+class DeliveryService:
+    """Sends notification emails in batches over pooled connections, retrying in the background."""
+
+    def __init__(self, pool: Optional[SMTPPool] = None, memory: Optional[NotificationMemory] = None,
+                 workers: Optional[int] = None, batch_size: Optional[int] = None,
+                 max_attempts: Optional[int] = None, backoff_base: Optional[float] = None,
+                 backoff_max: Optional[float] = None, sender: Optional[str] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """Initialize the service and start its workers.
+
+        Args:
+            pool: Connection pool (defaults to one built from Config.SMTP_*)
+            memory: Notification memory whose claims are committed or released
+                (defaults to the global notification_memory)
+            workers: Concurrent batches (defaults to the pool size)
+            batch_size: Messages sent per connection checkout (defaults to Config.SMTP_BATCH_SIZE)
+            max_attempts: Attempts before a message is given up (defaults to Config.DELIVERY_MAX_ATTEMPTS)
+            backoff_base: Seconds before the first retry, doubling per attempt
+                (defaults to Config.DELIVERY_BACKOFF_BASE)
+            backoff_max: Longest retry delay (defaults to Config.DELIVERY_BACKOFF_MAX)
+            sender: From address (defaults to Config.SMTP_FROM)
+            clock: Monotonic time source for retry scheduling
+        """
+        self.pool = pool or SMTPPool()
+        self.memory = memory or notification_memory
+        self.workers = workers or self.pool.size
+        self.batch_size = batch_size or Config.SMTP_BATCH_SIZE
+        self.max_attempts = max_attempts or Config.DELIVERY_MAX_ATTEMPTS
+        self.backoff_base = Config.DELIVERY_BACKOFF_BASE if backoff_base is None else backoff_base
+        self.backoff_max = Config.DELIVERY_BACKOFF_MAX if backoff_max is None else backoff_max
+        self.sender = sender or Config.SMTP_FROM
+        self.clock = clock
+        self._queue: "queue.Queue" = queue.Queue()
+        # Heap of (due, sequence, email) waiting for a retry
+        self._retries: List[Tuple[float, int, OutgoingEmail]] = []
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._stopping = False
+        self.pending = 0
+        self.submitted = 0
+        self.delivered = 0
+        self.retried = 0
+        self.failed = 0
+        self.undeliverable = 0
+        self.batches = 0
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"delivery-worker-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        self._threads.append(threading.Thread(target=self._retry_loop, name="delivery-retry", daemon=True))
+        for thread in self._threads:
+            thread.start()
+
+    # Producing
+
+    def submit(self, notification: Dict, recipient: str = "default") -> bool:
+        """Queue a notification's email for delivery.
+
+        The notification's claim (claim_id) is committed once the email is
+        accepted, or released if it cannot be delivered.
+
+        Returns:
+            True if queued, False if there is nothing to send or no address for the recipient
+        """
+        if not notification.get("should_send_email") or not notification.get("email_content"):
+            return False
+        claim_id = notification.get("claim_id")
+        return self.submit_content(notification["email_content"], recipient, [claim_id] if claim_id else [],
+                                   notification.get("topic_searched", ""))
+
+    def submit_content(self, content: Dict[str, str], recipient: str, claim_ids: List[str],
+                       topic: str = "") -> bool:
+        """Queue a rendered email (subject and body) that settles the given claims.
+
+        When the recipient has no address (no "@" and EMAIL_DEFAULT_TO unset)
+        the claims are dropped rather than released, so the same updates are
+        not claimed and given up again on every check.
+
+        Returns:
+            True if queued, False if there is no address for the recipient
+        """
+        address = recipient_address(recipient)
+        if address is None:
+            with self._lock:
+                self.undeliverable += 1
+            EMAILS_UNDELIVERABLE.inc()
+            with stage_limits.limit("db"):
+                for claim_id in claim_ids:
+                    self.memory.drop_claim(claim_id)
+            return False
+        email = OutgoingEmail(build_email({"email_content": content}, address, self.sender), claim_ids, topic)
+        with self._lock:
+            self.pending += 1
+            self.submitted += 1
+        self._queue.put(email)
+        return True
+
+    # Sending
+
+    def _worker(self):
+        while True:
+            email = self._queue.get()
+            if email is _STOP:
+                return
+            batch = [email]
+            # Take whatever else is already queued, up to a batch
+            while len(batch) < self.batch_size:
+                try:
+                    email = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if email is _STOP:
+                    self._queue.put(_STOP)
+                    break
+                batch.append(email)
+            try:
+                self._send_batch(batch)
+            except Exception as e:
+                # An unexpected error must not stop the worker: give up the batch's
+                # emails that were not handled yet, releasing their claims
+                error = f"{type(e).__name__}: {e}"
+                print(f"Email worker error: {error}")
+                for email in batch:
+                    if email.handled:
+                        continue
+                    email.last_error = error
+                    try:
+                        self._finish(email, delivered=False)
+                    except Exception:
+                        # Counted as failed; its claims expire after CLAIM_TTL_SECONDS
+                        pass
+
+    def _send_batch(self, batch: List[OutgoingEmail]):
+        for email in batch:
+            email.handled = False
+        with self._lock:
+            self.batches += 1
+        results: List[SendResult] = []
+        error = None
+        try:
+            with self.pool.connection() as connection:
+                try:
+                    send_pipelined(connection.smtp, [email.message for email in batch], results)
+                finally:
+                    connection.messages_sent += len(results)
+        except (smtplib.SMTPException, OSError) as e:
+            # Messages without a result were not sent (connect failed or the connection dropped)
+            error = f"{type(e).__name__}: {e}"
+        for email, (accepted, code, reply) in zip(batch, results):
+            email.attempts += 1
+            if accepted:
+                self._finish(email, delivered=True)
+            else:
+                self._failed(email, f"{code} {reply}", permanent=code >= 500)
+        for email in batch[len(results):]:
+            email.attempts += 1
+            self._failed(email, error or "not sent", permanent=False)
+
+    def _failed(self, email: OutgoingEmail, error: str, permanent: bool):
+        email.last_error = error
+        if permanent or email.attempts >= self.max_attempts:
+            print(f"Email about '{email.topic}' to {email.message['To']} failed after "
+                  f"{email.attempts} attempt(s): {error}")
+            self._finish(email, delivered=False)
+            return
+        delay = min(self.backoff_base * (2 ** (email.attempts - 1)), self.backoff_max)
+        with self._changed:
+            self.retried += 1
+            heapq.heappush(self._retries, (self.clock() + delay, next(self._sequence), email))
+            email.handled = True
+            self._changed.notify_all()
+
+    def _finish(self, email: OutgoingEmail, delivered: bool):
+        try:
+            self._settle_claims(email.claim_ids, committed=delivered)
+        finally:
+            email.handled = True
+            with self._changed:
+                if delivered:
+                    self.delivered += 1
+                else:
+                    self.failed += 1
+                self.pending -= 1
+                self._changed.notify_all()
+
+    def _settle_claims(self, claim_ids: List[str], committed: bool):
+        if not claim_ids:
+            return
+        with stage_limits.limit("db"):
+            for claim_id in claim_ids:
+                if committed:
+                    self.memory.commit_claim(claim_id)
+                else:
+                    self.memory.release_claim(claim_id)
+
+    def _retry_loop(self):
+        with self._changed:
+            while not self._stopping:
+                if not self._retries:
+                    self._changed.wait()
+                    continue
+                wait = self._retries[0][0] - self.clock()
+                if wait > 0:
+                    self._changed.wait(wait)
+                    continue
+                _, _, email = heapq.heappop(self._retries)
+                self._queue.put(email)
+
+    # Metrics and lifecycle
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every submitted email was delivered or given up.
+
+        Returns:
+            True if nothing is pending, False if the timeout passed first
+        """
+        with self._changed:
+            return self._changed.wait_for(lambda: self.pending == 0, timeout)
+
+    def metrics(self) -> Dict:
+        """Get delivery counters and connection reuse."""
+        with self._lock:
+            return {
+                "pending": self.pending,
+                "queued": self._queue.qsize(),
+                "waiting_retry": len(self._retries),
+                "submitted": self.submitted,
+                "delivered": self.delivered,
+                "retried": self.retried,
+                "failed": self.failed,
+                "undeliverable": self.undeliverable,
+                "batches": self.batches,
+                "connections_opened": self.pool.connects,
+                "connections_reused": self.pool.reuses
+            }
+
+    def shutdown(self, timeout: Optional[float] = None):
+        """Deliver what is pending (waiting up to timeout), then stop.
+
+        Emails still unsent afterwards have their claims released, so the next
+        check notifies about those updates again.
+        """
+        self.flush(timeout)
+        with self._changed:
+            self._stopping = True
+            unsent = [email for _, _, email in self._retries]
+            self._retries = []
+            self._changed.notify_all()
+        for _ in range(self.workers):
+            self._queue.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+        while True:
+            try:
+                email = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if email is not _STOP:
+                unsent.append(email)
+        for email in unsent:
+            self._finish(email, delivered=False)
+        self.pool.close()
+
+
+_delivery_service: Optional[DeliveryService] = None
+_delivery_lock = threading.Lock()
+
+
+def get_delivery_service() -> Optional[DeliveryService]:
+    """Get the process-wide delivery service, or None when SMTP_HOST is not set."""
+    global _delivery_service
+    if _delivery_service is None and Config.SMTP_HOST:
+        with _delivery_lock:
+            if _delivery_service is None:
+                _delivery_service = DeliveryService()
+    return _delivery_service
+
+
+def shutdown_delivery_service(timeout: Optional[float] = None) -> Optional[Dict]:
+    """Flush and stop the process-wide delivery service if it was started.
+
+    Returns:
+        Its final metrics, or None if it was never started
+    """
+    global _delivery_service
+    with _delivery_lock:
+        service, _delivery_service = _delivery_service, None
+    if service is None:
+        return None
+    service.shutdown(timeout)
+    return service.metrics()
@@ -0,0 +1,226 @@
+"""
+Digest Buffer
+
+Coalesces a recipient's notifications into one email. Instead of sending an
+email per topic check, new updates are buffered per recipient for
+``DIGEST_WINDOW_SECONDS`` after the first one arrives; when the window
+closes, everything buffered for the recipient is rendered into a single
+digest (``email_content.create_digest_content``) and handed to the delivery
+service. A user watching 30 topics gets one email per window instead of 30.
+
+The buffer is a ``digest_items`` table (in the notification memory database
+by default), so buffered items survive a restart and are delivered by the
+next process. While an item is buffered its updates stay claimed (see
+NotificationMemory.claim_new_updates); the claim is extended to the end of
+the window and committed once the digest is delivered. Items are removed
+from the buffer when their digest is handed to delivery: if the process dies
+before the email is accepted, the claims expire and the updates are
+notified again, so nothing is lost.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from .config import Config
+from .delivery import DeliveryService, get_delivery_service
+from .email_content import create_digest_content
+from .limits import stage_limits
+from .notification_memory import NotificationMemory, notification_memory
+
+
+class DigestBuffer:
+    """Durable per-recipient buffer of notifications awaiting a digest."""
+
+    def __init__(self, db_path: Optional[str] = None, window_seconds: Optional[float] = None,
+                 memory: Optional[NotificationMemory] = None, clock: Callable[[], float] = time.time):
+        """Initialize the buffer.
+
+        Args:
+            db_path: Path to SQLite database file (defaults to Config.DIGEST_DB_PATH)
+            window_seconds: How long a recipient's first buffered item waits for others
+                (defaults to Config.DIGEST_WINDOW_SECONDS)
+            memory: Notification memory holding the items' claims (defaults to the
+                global notification_memory)
+            clock: Returns the current time as a Unix timestamp
+        """
+        self.db_path = db_path or Config.DIGEST_DB_PATH
+        self.window_seconds = Config.DIGEST_WINDOW_SECONDS if window_seconds is None else window_seconds
+        self.memory = memory or notification_memory
+        self.clock = clock
+        self.digests_sent = 0
+        self.items_sent = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # Autocommit mode; multi-statement writes use explicit BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._init_database()
+
+    def _init_database(self):
+        """Initialize the database with required tables."""
+        with self._lock:
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS digest_items (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    recipient TEXT NOT NULL,
+                    topic TEXT NOT NULL,
+                    updates TEXT NOT NULL,
+                    claim_id TEXT,
+                    created_at REAL NOT NULL,
+                    due_at REAL NOT NULL
+                )
+            ''')
+            # due_at finds closed windows; recipient finds the window an item joins
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_digest_items_due_at ON digest_items (due_at)')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_digest_items_recipient ON digest_items (recipient)')
+
+    def add(self, recipient: str, topic: str, updates: List[Dict], claim_id: Optional[str] = None) -> float:
+        """Buffer a topic's new updates for a recipient.
+
+        The item joins the recipient's open window, or opens one.
+
+        Returns:
+            When the recipient's digest is due (Unix timestamp)
+        """
+        now = self.clock()
+        with self._lock:
+            due_at = self._conn.execute('''
+                INSERT INTO digest_items (recipient, topic, updates, claim_id, created_at, due_at)
+                VALUES (?, ?, ?, ?, ?, COALESCE((SELECT MIN(due_at) FROM digest_items WHERE recipient = ?), ?))
+                RETURNING due_at
+            ''', (recipient, topic, json.dumps(updates), claim_id, now, recipient,
+                  now + self.window_seconds)).fetchone()[0]
+        if claim_id is not None:
+            # Keep the claim from looking abandoned while it waits in the buffer
+            with stage_limits.limit("db"):
+                self.memory.extend_claim(claim_id, due_at - now)
+        self._wake.set()
+        return due_at
+
+    def take_due(self, limit: int = 1000) -> List[Dict]:
+        """Remove and return the digests of recipients whose window has closed.
+
+        Returns:
+            Digests as dicts with recipient, sections ((topic, updates) pairs in
+            arrival order) and claim_ids
+        """
+        now = self.clock()
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                recipients = [row[0] for row in self._conn.execute(
+                    'SELECT DISTINCT recipient FROM digest_items WHERE due_at <= ? LIMIT ?', (now, limit))]
+                rows = []
+                if recipients:
+                    placeholders = ", ".join("?" * len(recipients))
+                    rows = self._conn.execute(f'''
+                        DELETE FROM digest_items WHERE recipient IN ({placeholders})
+                        RETURNING id, recipient, topic, updates, claim_id
+                    ''', recipients).fetchall()
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+        digests: Dict[str, Dict] = {}
+        for _, recipient, topic, updates, claim_id in sorted(rows):
+            digest = digests.setdefault(recipient, {"recipient": recipient, "sections": [], "claim_ids": []})
+            digest["sections"].append((topic, json.loads(updates)))
+            if claim_id is not None:
+                digest["claim_ids"].append(claim_id)
+        return list(digests.values())
+
+    def next_due_at(self) -> Optional[float]:
+        """Get when the next digest is due, or None if the buffer is empty."""
+        with self._lock:
+            return self._conn.execute('SELECT MIN(due_at) FROM digest_items').fetchone()[0]
+
+    def pending(self) -> Dict[str, int]:
+        """Get the number of buffered items per recipient."""
+        with self._lock:
+            return dict(self._conn.execute('SELECT recipient, COUNT(*) FROM digest_items GROUP BY recipient'))
+
+    def flush_due(self, delivery: DeliveryService) -> int:
+        """Render and hand every due digest to delivery.
+
+        Returns:
+            Number of digests handed over
+        """
+        digests = self.take_due()
+        for digest in digests:
+            content = create_digest_content(digest["sections"])
+            topics = ", ".join(dict.fromkeys(topic for topic, _ in digest["sections"]))
+            delivery.submit_content(content, digest["recipient"], digest["claim_ids"], topic=topics)
+            self.items_sent += len(digest["sections"])
+        self.digests_sent += len(digests)
+        return len(digests)
+
+    # Background flushing
+
+    def run_forever(self, delivery: DeliveryService, max_sleep: float = 60.0):
+        """Flush due digests as their windows close until stop() is called."""
+        while not self._stop.is_set():
+            try:
+                self.flush_due(delivery)
+            except Exception as e:
+                print(f"Digest flush failed: {e}")
+            next_due = self.next_due_at()
+            wait = max_sleep if next_due is None else min(max(next_due - self.clock(), 0.01), max_sleep)
+            self._wake.wait(wait)
+            self._wake.clear()
+
+    def start(self, delivery: DeliveryService) -> "DigestBuffer":
+        """Flush digests on a background thread."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run_forever, args=(delivery,), name="digest-flusher",
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the background thread; items not yet due stay buffered for the next process."""
+        self._stop.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def close(self):
+        """Stop flushing and close the database connection."""
+        self.stop()
+        with self._lock:
+            self._conn.close()
+
+
+_digest_buffer: Optional[DigestBuffer] = None
+_digest_lock = threading.Lock()
+
+
+def get_digest_buffer() -> Optional[DigestBuffer]:
+    """Get the process-wide digest buffer, flushing into the delivery service.
+
+    Returns None when delivery is not configured or DIGEST_WINDOW_SECONDS is 0.
+    Starting it also delivers digests buffered by a previous process.
+    """
+    global _digest_buffer
+    if _digest_buffer is None and Config.DIGEST_WINDOW_SECONDS > 0:
+        delivery = get_delivery_service()
+        if delivery is None:
+            return None
+        with _digest_lock:
+            if _digest_buffer is None:
+                _digest_buffer = DigestBuffer().start(delivery)
+    return _digest_buffer
+
+
+def shutdown_digest_buffer():
+    """Stop the process-wide digest buffer if it was started."""
+    global _digest_buffer
+    with _digest_lock:
+        buffer, _digest_buffer = _digest_buffer, None
+    if buffer is not None:
+        buffer.close()
@@ -0,0 +1,133 @@
+"""
+Email rendering for the Event Action Agent.
+
+Builds the subject and body of notification emails: one email per topic
+(``create_email_content``) or one digest covering several topics for the
+same recipient (``create_digest_content``).
+"""
+
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+from .instrumentation import traced
+from .metrics import EMAILS_RENDERED
+
+
+FOOTER = [
+    "---",
+    "",
+    "This is an automated notification from Event Action Agent.",
+    "",
+    "Best regards,",
+    "Event Action Agent"
+]
+
+
+def _plural(count: int, word: str) -> str:
+    return f"{count} {word}{'s' if count > 1 else ''}"
+
+
+def _update_lines(updates: List[Dict]) -> List[str]:
+    """Format numbered update entries with link and (truncated) summary."""
+    lines: List[str] = []
+    for i, update in enumerate(updates, 1):
+        title = update.get('title', 'No title available')
+        url = update.get('url', 'No URL available')
+        snippet = update.get('snippet', 'No description available')
+        if len(snippet) > 200:
+            snippet = snippet[:200] + "..."
+        lines.extend([
+            f"{i}. {title}",
+            f"   Link: {url}",
+            f"   Summary: {snippet}",
+            ""
+        ])
+    return lines
+
+
+@traced("email.render")
+def create_email_content(topic: str, updates: List[Dict], recipient: str = "User") -> Dict[str, str]:
+    """Create email subject and body content for notifications.
+
+    Args:
+        topic: The topic of the updates
+        updates: List of update dictionaries with title, url, snippet
+        recipient: Name of the email recipient
+
+    Returns:
+        Dictionary with 'subject' and 'body' keys containing email content
+    """
+    if not updates:
+        return {
+            "subject": f"No new updates found for {topic}",
+            "body": f"Hello {recipient},\n\nNo new updates were found for the topic '{topic}' at this time.\n\nBest regards,\nEvent Action Agent"
+        }
+
+    subject = f"🔔 {len(updates)} New Update{'s' if len(updates) > 1 else ''} on {topic.title()}"
+    current_date = datetime.now().strftime("%B %d, %Y at %I:%M %p")
+
+    body_parts: List[str] = [
+        f"Hello {recipient},",
+        "",
+        f"We found {len(updates)} new update{'s' if len(updates) > 1 else ''} on '{topic}' as of {current_date}:",
+        "",
+        "📋 Updates Summary:",
+        ""
+    ]
+    body_parts.extend(_update_lines(updates))
+    body_parts.extend(FOOTER)
+
+    EMAILS_RENDERED.labels(kind="topic").inc()
+    return {
+        "subject": subject,
+        "body": "\n".join(body_parts)
+    }
+
+
+@traced("email.render_digest")
+def create_digest_content(sections: List[Tuple[str, List[Dict]]], recipient: str = "User") -> Dict[str, str]:
+    """Create one email covering the updates of several topics.
+
+    Args:
+        sections: (topic, updates) pairs in the order they should appear; updates
+            of a topic listed more than once are merged (duplicates by url dropped)
+        recipient: Name of the email recipient
+
+    Returns:
+        Dictionary with 'subject' and 'body' keys containing email content
+    """
+    merged: Dict[str, List[Dict]] = {}
+    seen_urls: Dict[str, set] = {}
+    for topic, updates in sections:
+        topic_updates = merged.setdefault(topic, [])
+        urls = seen_urls.setdefault(topic, set())
+        for update in updates:
+            key = update.get('url') or update.get('title')
+            if key not in urls:
+                urls.add(key)
+                topic_updates.append(update)
+    merged = {topic: updates for topic, updates in merged.items() if updates}
+    if len(merged) <= 1:
+        topic, updates = next(iter(merged.items()), ("your topics", []))
+        return create_email_content(topic, updates, recipient)
+
+    total = sum(len(updates) for updates in merged.values())
+    subject = f"🔔 {_plural(total, 'New Update')} on {_plural(len(merged), 'Topic')}"
+    current_date = datetime.now().strftime("%B %d, %Y at %I:%M %p")
+
+    body_parts: List[str] = [
+        f"Hello {recipient},",
+        "",
+        f"We found {_plural(total, 'new update')} on {_plural(len(merged), 'topic')} as of {current_date}:",
+        ""
+    ]
+    for topic, updates in merged.items():
+        body_parts.extend([f"📋 {topic.title()} ({_plural(len(updates), 'update')}):", ""])
+        body_parts.extend(_update_lines(updates))
+    body_parts.extend(FOOTER)
+
+    EMAILS_RENDERED.labels(kind="digest").inc()
+    return {
+        "subject": subject,
+        "body": "\n".join(body_parts)
+    }
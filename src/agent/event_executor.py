@@ -0,0 +1,195 @@
+"""
+Event Executor
+
+Runs due-event jobs on a bounded pool of workers. Jobs wait in a bounded
+queue; when it is full, ``submit`` blocks the producer (the scheduler) until
+a worker frees a slot. A tick too large to finish before the next one
+therefore slows the scheduler down instead of piling jobs up in memory.
+
+Workers are threads by default. In process mode each worker thread hands
+its job to a process pool, so CPU-heavy handlers run in parallel; the
+handler and jobs must then be picklable. Per-stage limits (search, LLM, DB)
+are applied inside the handler by ``limits.stage_limits``.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional
+
+from .config import Config
+from .instrumentation import LatencyHistogram
+
+
+# Sentinel telling a worker thread to exit
+_STOP = object()
+
+
+class EventExecutor:
+    """Bounded-queue worker pool with backpressure and queue metrics."""
+
+    def __init__(self, handler: Callable[[Any], Any], workers: Optional[int] = None,
+                 queue_size: Optional[int] = None, mode: Optional[str] = None,
+                 on_result: Optional[Callable[[Any, Any], None]] = None):
+        """Initialize the executor and start its workers.
+
+        Args:
+            handler: Called with each job
+            workers: Number of concurrent jobs (defaults to Config.EXECUTOR_WORKERS)
+            queue_size: Jobs that may wait for a worker before submit blocks
+                (defaults to Config.EXECUTOR_QUEUE_SIZE)
+            mode: "thread" or "process" (defaults to Config.EXECUTOR_MODE)
+            on_result: Called with (job, result) after each successful job
+        """
+        self.handler = handler
+        self.workers = workers or Config.EXECUTOR_WORKERS
+        self.queue_size = queue_size or Config.EXECUTOR_QUEUE_SIZE
+        self.mode = mode or Config.EXECUTOR_MODE
+        if self.mode not in ("thread", "process"):
+            raise ValueError(f"Unknown executor mode: {self.mode}")
+        self.on_result = on_result
+        # Items are (enqueued_at, job)
+        self._queue: "queue.Queue" = queue.Queue(maxsize=self.queue_size)
+        self._lock = threading.Lock()
+        self._lag = LatencyHistogram()
+        self._run_time = LatencyHistogram()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self.blocked_seconds = 0.0
+        self._process_pool = ProcessPoolExecutor(max_workers=self.workers) if self.mode == "process" else None
+        self._threads = [
+            threading.Thread(target=self._worker, name=f"event-worker-{i}", daemon=True)
+            for i in range(self.workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    # Producing
+
+    def submit(self, job: Any, timeout: Optional[float] = None) -> bool:
+        """Queue a job, blocking while the queue is full.
+
+        Args:
+            job: The job passed to the handler
+            timeout: Seconds to wait for room (None waits indefinitely)
+
+        Returns:
+            True if queued, False if the queue stayed full for the whole timeout
+        """
+        start = time.perf_counter()
+        try:
+            self._queue.put_nowait((time.perf_counter(), job))
+        except queue.Full:
+            try:
+                self._queue.put((time.perf_counter(), job), timeout=timeout)
+            except queue.Full:
+                with self._lock:
+                    self.rejected += 1
+                    self.blocked_seconds += time.perf_counter() - start
+                return False
+            with self._lock:
+                self.blocked_seconds += time.perf_counter() - start
+        with self._lock:
+            self.submitted += 1
+        return True
+
+    def try_submit(self, job: Any) -> bool:
+        """Queue a job only if there is room right now."""
+        return self.submit(job, timeout=0)
+
+    def submit_many(self, jobs: Iterable[Any]) -> int:
+        """Queue jobs in order, blocking as needed.
+
+        Returns:
+            Number of jobs queued
+        """
+        return sum(1 for job in jobs if self.submit(job))
+
+    # Consuming
+
+    def _worker(self):
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                self._queue.task_done()
+                return
+            enqueued_at, job = item
+            started = time.perf_counter()
+            with self._lock:
+                self.in_flight += 1
+                self._lag.observe((started - enqueued_at) * 1000)
+            try:
+                if self._process_pool is not None:
+                    result = self._process_pool.submit(self.handler, job).result()
+                else:
+                    result = self.handler(job)
+                if self.on_result is not None:
+                    self.on_result(job, result)
+                succeeded = True
+            except Exception as e:
+                succeeded = False
+                print(f"Event job failed: {e}")
+            with self._lock:
+                self.in_flight -= 1
+                self._run_time.observe((time.perf_counter() - started) * 1000)
+                if succeeded:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+            self._queue.task_done()
+
+    # Metrics and lifecycle
+
+    def queue_depth(self) -> int:
+        """Get the number of jobs waiting for a worker."""
+        return self._queue.qsize()
+
+    def oldest_wait(self) -> float:
+        """Get how long (seconds) the oldest queued job has been waiting."""
+        with self._queue.mutex:
+            if not self._queue.queue or self._queue.queue[0] is _STOP:
+                return 0.0
+            return time.perf_counter() - self._queue.queue[0][0]
+
+    def metrics(self) -> Dict[str, Any]:
+        """Get queue depth, lag and throughput counters."""
+        with self._lock:
+            lag = self._lag.to_dict()
+            run_time = self._run_time.to_dict()
+            return {
+                "mode": self.mode,
+                "workers": self.workers,
+                "queue_depth": self.queue_depth(),
+                "queue_capacity": self.queue_size,
+                "oldest_wait_seconds": round(self.oldest_wait(), 3),
+                "in_flight": self.in_flight,
+                "submitted": self.submitted,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "producer_blocked_seconds": round(self.blocked_seconds, 3),
+                "lag_ms": {key: lag[key] for key in ("count", "mean_ms", "p50_ms", "p99_ms", "max_ms")},
+                "run_ms": {key: run_time[key] for key in ("count", "mean_ms", "p50_ms", "p99_ms", "max_ms")}
+            }
+
+    def join(self):
+        """Wait until every queued job has finished."""
+        self._queue.join()
+
+    def shutdown(self, wait: bool = True):
+        """Stop the workers after the jobs already queued.
+
+        Args:
+            wait: Block until the workers have exited
+        """
+        for _ in self._threads:
+            self._queue.put(_STOP)
+        if wait:
+            for thread in self._threads:
+                thread.join()
+        if self._process_pool is not None:
+            self._process_pool.shutdown(wait=wait)
@@ -0,0 +1,369 @@
+"""
+Event Store
+
+Persists monitoring events (name, action, cron_job) in SQLite and keeps an
+in-memory index of every event by id and by next run time, so reads and
+"what is due" lookups never touch the database. Each event's action is
+compiled into a plan (see action_plan.py) when it is created or changed,
+and the plan is stored with the event.
+"""
+
+import bisect
+import itertools
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .action_plan import ActionCompiler, action_compiler
+from .config import Config
+from .schedule import next_run_time
+
+
+EVENT_FIELDS = ("name", "action", "cron_job")
+
+
+class EventNotFoundError(KeyError):
+    """Raised when an event id does not exist."""
+
+
+class EventConflictError(Exception):
+    """Raised when an event changed since the version an update was based on."""
+
+
+class EventStore:
+    """SQLite-backed store of monitoring events with in-memory indexes."""
+
+    def __init__(self, db_path: Optional[str] = None,
+                 next_run_fn: Callable[[str, datetime], Optional[datetime]] = next_run_time,
+                 compiler: Optional[ActionCompiler] = None):
+        """Initialize the store and load every event into memory.
+
+        Args:
+            db_path: Path to SQLite database file (defaults to Config.EVENTS_DB_PATH)
+            next_run_fn: Computes an event's next run time from its cron_job text
+            compiler: Compiles action text into plans (defaults to the global action_compiler)
+        """
+        self.db_path = db_path or Config.EVENTS_DB_PATH
+        self.next_run_fn = next_run_fn
+        self.compiler = compiler or action_compiler
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._events: Dict[int, Dict] = {}
+        # Sorted (next_run_at, event_id) pairs; events without a schedule are left out
+        self._by_next_run: List[Tuple[float, int]] = []
+        # Incremented on every write; used for collection ETags. Seeded from the
+        # clock so revisions are not reused after a restart.
+        self.revision = int(time.time() * 1000)
+        self._listeners: List[Callable[[str, Dict], None]] = []
+        self._init_database()
+        self._load()
+
+    def _init_database(self):
+        """Initialize the database with required tables."""
+        with self._lock, self._conn:
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS events (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    name TEXT NOT NULL,
+                    action TEXT NOT NULL,
+                    cron_job TEXT NOT NULL,
+                    version INTEGER NOT NULL DEFAULT 1,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    next_run_at REAL,
+                    last_run_at REAL,
+                    plan TEXT
+                )
+            ''')
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_events_next_run ON events (next_run_at)')
+            self._migrate()
+
+    def _migrate(self):
+        """Bring an existing database up to the current schema version."""
+        version = self._conn.execute('PRAGMA user_version').fetchone()[0]
+        if version < 1:
+            # Version 1: compiled action plans are stored with each event
+            columns = [row[1] for row in self._conn.execute('PRAGMA table_info(events)')]
+            if 'plan' not in columns:
+                self._conn.execute('ALTER TABLE events ADD COLUMN plan TEXT')
+            self._conn.execute('PRAGMA user_version = 1')
+
+    def _load(self):
+        """Load all events into the in-memory indexes, compiling missing or outdated plans."""
+        with self._lock:
+            cursor = self._conn.execute('''
+                SELECT id, name, action, cron_job, version, created_at, updated_at, next_run_at, last_run_at, plan
+                FROM events ORDER BY id
+            ''')
+            columns = [d[0] for d in cursor.description]
+            stale = []
+            for row in cursor:
+                event = dict(zip(columns, row))
+                event["plan"] = json.loads(event["plan"]) if event["plan"] else None
+                if not self.compiler.is_current(event["plan"]):
+                    event["plan"] = self.compiler.compile(event["action"])
+                    stale.append(event)
+                self._events[event["id"]] = event
+            if stale:
+                with self._conn:
+                    self._conn.executemany('UPDATE events SET plan = ? WHERE id = ?',
+                                           [(json.dumps(event["plan"]), event["id"]) for event in stale])
+            self._rebuild_index()
+
+    # Change notification
+
+    def add_listener(self, listener: Callable[[str, Dict], None]):
+        """Register a callback run with ("created" | "updated" | "deleted", event) after every change."""
+        self._listeners.append(listener)
+
+    def _notify(self, kind: str, events: List[Dict]):
+        # Called outside the store lock so listeners may call back into the store
+        for listener in self._listeners:
+            for event in events:
+                listener(kind, dict(event))
+
+    # Index maintenance
+
+    # Batches larger than this re-sort the whole index instead of bisecting per event
+    _BULK_INDEX_THRESHOLD = 256
+
+    def _rebuild_index(self):
+        self._by_next_run = sorted(
+            (event["next_run_at"], event_id) for event_id, event in self._events.items()
+            if event["next_run_at"] is not None
+        )
+
+    def _index_remove(self, event: Dict):
+        if event.get("next_run_at") is None:
+            return
+        entry = (event["next_run_at"], event["id"])
+        i = bisect.bisect_left(self._by_next_run, entry)
+        if i < len(self._by_next_run) and self._by_next_run[i] == entry:
+            del self._by_next_run[i]
+
+    def _index_add(self, event: Dict):
+        if event.get("next_run_at") is not None:
+            bisect.insort(self._by_next_run, (event["next_run_at"], event["id"]))
+
+    def _compute_next_run(self, cron_job: str, after: Optional[float] = None,
+                          memo: Optional[Dict[Tuple[str, float], Optional[float]]] = None) -> Optional[float]:
+        """Get the next run time of a schedule after a timestamp.
+
+        Args:
+            cron_job: The schedule text
+            after: Timestamp to search from (defaults to now)
+            memo: Optional dict reused across one batch; events sharing a schedule
+                and start time are then computed once
+        """
+        after = after if after is not None else time.time()
+        if memo is not None and (cron_job, after) in memo:
+            return memo[(cron_job, after)]
+        next_run = self.next_run_fn(cron_job, datetime.fromtimestamp(after))
+        result = next_run.timestamp() if next_run else None
+        if memo is not None:
+            memo[(cron_job, after)] = result
+        return result
+
+    @staticmethod
+    def _validate(data: Dict, partial: bool = False) -> Dict[str, str]:
+        """Validate event fields, returning the cleaned values."""
+        if not isinstance(data, dict):
+            raise ValueError("Event must be a JSON object")
+        cleaned = {}
+        for field in EVENT_FIELDS:
+            if field not in data:
+                if partial:
+                    continue
+                raise ValueError(f"Missing required field: {field}")
+            value = data[field]
+            if not isinstance(value, str) or not value.strip():
+                raise ValueError(f"Field '{field}' must be a non-empty string")
+            cleaned[field] = value.strip()
+        return cleaned
+
+    # Public API
+
+    @staticmethod
+    def to_public(event: Dict) -> Dict:
+        """Get the API representation of an event."""
+        return {
+            "id": event["id"],
+            "name": event["name"],
+            "action": event["action"],
+            "cron_job": event["cron_job"],
+            "plan": event.get("plan"),
+            "next_run_at": datetime.fromtimestamp(event["next_run_at"]).isoformat()
+            if event.get("next_run_at") is not None else None
+        }
+
+    def create(self, data: Dict) -> Dict:
+        """Create a single event."""
+        return self.create_many([data])[0]
+
+    def create_many(self, items: List[Dict]) -> List[Dict]:
+        """Create several events in one transaction (all or nothing).
+
+        Raises:
+            ValueError: If any item is invalid; the error names the item index
+        """
+        cleaned = []
+        for i, item in enumerate(items):
+            try:
+                cleaned.append(self._validate(item))
+            except ValueError as e:
+                raise ValueError(f"events[{i}]: {e}") if len(items) > 1 else e
+        # Compiled before taking the lock: an unfamiliar action may need an LLM call
+        plans = [self.compiler.compile(values["action"]) for values in cleaned]
+        now = time.time()
+        created = []
+        memo: Dict[Tuple[str, float], Optional[float]] = {}
+        with self._lock:
+            with self._conn:
+                for values, plan in zip(cleaned, plans):
+                    next_run_at = self._compute_next_run(values["cron_job"], now, memo)
+                    cursor = self._conn.execute('''
+                        INSERT INTO events (name, action, cron_job, created_at, updated_at, next_run_at, plan)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ''', (values["name"], values["action"], values["cron_job"], now, now, next_run_at,
+                          json.dumps(plan)))
+                    created.append({
+                        "id": cursor.lastrowid, **values, "version": 1, "created_at": now,
+                        "updated_at": now, "next_run_at": next_run_at, "last_run_at": None, "plan": plan
+                    })
+            for event in created:
+                self._events[event["id"]] = event
+            if len(created) > self._BULK_INDEX_THRESHOLD:
+                self._rebuild_index()
+            else:
+                for event in created:
+                    self._index_add(event)
+            self.revision += 1
+        self._notify("created", created)
+        return [dict(event) for event in created]
+
+    def get(self, event_id: int) -> Dict:
+        """Get an event by id."""
+        event = self._events.get(event_id)
+        if event is None:
+            raise EventNotFoundError(event_id)
+        return dict(event)
+
+    def list_events(self, offset: int = 0, limit: int = 100) -> Tuple[List[Dict], int]:
+        """Get a page of events ordered by id, plus the total count."""
+        with self._lock:
+            # Ids only ever grow and are loaded in order, so the dict is id-ordered
+            page = [dict(event) for event in itertools.islice(self._events.values(), offset, offset + limit)]
+            return page, len(self._events)
+
+    def update(self, event_id: int, data: Dict, partial: bool = False,
+               precondition: Optional[Callable[[Dict], bool]] = None) -> Dict:
+        """Update an event's fields and recompute its next run time.
+
+        Args:
+            event_id: The event to update
+            data: New field values
+            partial: Only validate and change the fields present in data
+            precondition: Called with the current event under the store lock; the
+                update is refused with EventConflictError unless it returns True
+                (e.g. an If-Match check against the event's version)
+        """
+        values = self._validate(data, partial=partial)
+        plan = self.compiler.compile(values["action"]) if "action" in values else None
+        with self._lock:
+            current = self.get(event_id)
+            if precondition is not None and not precondition(current):
+                raise EventConflictError(event_id)
+            updated = {**current, **values, "version": current["version"] + 1, "updated_at": time.time()}
+            if updated["cron_job"] != current["cron_job"]:
+                updated["next_run_at"] = self._compute_next_run(updated["cron_job"])
+            if plan is not None:
+                updated["plan"] = plan
+            with self._conn:
+                self._conn.execute('''
+                    UPDATE events SET name = ?, action = ?, cron_job = ?, version = ?, updated_at = ?, next_run_at = ?,
+                        plan = ?
+                    WHERE id = ?
+                ''', (updated["name"], updated["action"], updated["cron_job"], updated["version"],
+                      updated["updated_at"], updated["next_run_at"], json.dumps(updated["plan"]), event_id))
+            self._index_remove(current)
+            self._events[event_id] = updated
+            self._index_add(updated)
+            self.revision += 1
+        self._notify("updated", [updated])
+        return dict(updated)
+
+    def delete(self, event_id: int) -> Dict:
+        """Delete an event, returning it."""
+        with self._lock:
+            event = self.get(event_id)
+            with self._conn:
+                self._conn.execute('DELETE FROM events WHERE id = ?', (event_id,))
+            self._index_remove(event)
+            del self._events[event_id]
+            self.revision += 1
+        self._notify("deleted", [event])
+        return event
+
+    def due_events(self, now: Optional[float] = None, limit: Optional[int] = None) -> List[Dict]:
+        """Get the events whose next run time has passed, earliest first."""
+        now = time.time() if now is None else now
+        with self._lock:
+            end = bisect.bisect_right(self._by_next_run, (now, float("inf")))
+            if limit is not None:
+                end = min(end, limit)
+            return [dict(self._events[event_id]) for _, event_id in self._by_next_run[:end]]
+
+    def mark_run(self, event_id: int, run_at: Optional[float] = None, next_run_at: Optional[float] = None) -> Dict:
+        """Record that an event ran and advance its next run time."""
+        return self.mark_runs([(event_id, run_at, next_run_at)])[0]
+
+    def mark_runs(self, runs: List[Tuple[int, Optional[float], Optional[float]]]) -> List[Dict]:
+        """Record several runs in one transaction.
+
+        Args:
+            runs: (event_id, run_at, next_run_at) tuples; run_at defaults to now and
+                next_run_at to the first scheduled time after both run_at and the
+                previous next run time (so missed intervals are skipped)
+
+        Returns:
+            The updated events (events deleted meanwhile are skipped)
+        """
+        now = time.time()
+        updated_events = []
+        memo: Dict[Tuple[str, float], Optional[float]] = {}
+        with self._lock:
+            for event_id, run_at, next_run_at in runs:
+                current = self._events.get(event_id)
+                if current is None:
+                    continue
+                run_at = now if run_at is None else run_at
+                if next_run_at is None:
+                    next_run_at = self._compute_next_run(current["cron_job"],
+                                                          max(run_at, current["next_run_at"] or 0), memo)
+                updated_events.append({**current, "last_run_at": run_at, "next_run_at": next_run_at})
+            with self._conn:
+                self._conn.executemany('UPDATE events SET last_run_at = ?, next_run_at = ? WHERE id = ?',
+                                       [(e["last_run_at"], e["next_run_at"], e["id"]) for e in updated_events])
+            bulk = len(updated_events) > self._BULK_INDEX_THRESHOLD
+            for updated in updated_events:
+                if not bulk:
+                    self._index_remove(self._events[updated["id"]])
+                    self._index_add(updated)
+                self._events[updated["id"]] = updated
+            if bulk:
+                self._rebuild_index()
+        return [dict(event) for event in updated_events]
+
+    def count(self) -> int:
+        """Get the number of stored events."""
+        return len(self._events)
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,101 @@
+"""
+Offline chat model for the Event Action Agent.
+
+Provides a scriptable stand-in for ``ChatOpenAI`` that replays predetermined
+tool calls and answers with a configurable latency, so the agent loop can be
+tested and benchmarked without a live provider or ``HF_TOKEN``.
+"""
+
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Sequence, Union
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+
+# A script turn is either a final answer or a list of tool calls ({"name": ..., "args": {...}})
+ScriptTurn = Union[str, List[Dict[str, Any]]]
+
+
+def update_flow_script(topic: str, answer: Optional[str] = None) -> List[ScriptTurn]:
+    """Get the script of the standard update flow for a topic.
+
+    The model calls ``search_web`` and ``checkIsMailneedtoSend`` in a single
+    turn, as the system prompt asks, and then answers.
+
+    Args:
+        topic: The topic to check for updates
+        answer: Final answer text (a generic summary by default)
+
+    Returns:
+        Script usable with ScriptedChatModel
+    """
+    return [
+        [
+            {"name": "search_web", "args": {"query": f"{topic} updates", "max_results": 5}},
+            {"name": "checkIsMailneedtoSend", "args": {"event_data": f'{{"topic": "{topic}"}}'}}
+        ],
+        answer or f"Here is a summary of the latest {topic} updates."
+    ]
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Chat model that replays a fixed script of tool calls and answers.
+
+    The turn is chosen from the number of AI messages already in the
+    conversation, so one instance can serve many concurrent runs. Once the
+    script is exhausted, the last turn is repeated.
+    """
+
+    script: List[ScriptTurn]
+    """Turns to replay, in order."""
+
+    latency: float = 0.0
+    """Seconds to sleep before every response, simulating provider latency."""
+
+    model_name: str = "scripted"
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any) -> "ScriptedChatModel":
+        """Accept tool bindings; the script already names the tools to call."""
+        return self
+
+    def _next_message(self, messages: List[BaseMessage]) -> AIMessage:
+        """Build the scripted response for the conversation so far."""
+        turn_index = sum(1 for message in messages if isinstance(message, AIMessage))
+        turn = self.script[min(turn_index, len(self.script) - 1)]
+        if isinstance(turn, str):
+            return AIMessage(content=turn)
+        tool_calls = [
+            {"name": call["name"], "args": call.get("args", {}), "id": f"call_{turn_index}_{i}", "type": "tool_call"}
+            for i, call in enumerate(turn)
+        ]
+        return AIMessage(content="", tool_calls=tool_calls)
+
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._next_message(messages))])
+
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return ChatResult(generations=[ChatGeneration(message=self._next_message(messages))])
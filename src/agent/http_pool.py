@@ -0,0 +1,98 @@
+"""
+Shared HTTP clients for LLM calls.
+
+``ChatOpenAI`` creates its own HTTP client by default, so every agent (and
+every action compiler) opened its own connections to ``HF_BASE_URL`` and paid
+a new TCP and TLS handshake. This module keeps one keep-alive connection pool
+per process, used by every LangChainAgent. There is one sync client for
+invoke() and one async client for ainvoke().
+
+The pool size and timeouts come from the ``LLM_HTTP_*`` settings. The
+connection limit is an explicit cap on concurrent LLM requests from this
+process. HTTP/2 is used when ``LLM_HTTP2`` is on and the ``h2`` package is
+installed (``pip install httpx[http2]``); otherwise connections are
+HTTP/1.1 keep-alive.
+
+A child process started with fork gets fresh clients instead of sharing its
+parent's sockets (see ``EXECUTOR_MODE=process``).
+"""
+
+import importlib.util
+import os
+import threading
+from typing import Optional
+
+import httpx
+
+from .config import Config
+
+
+def http2_available() -> bool:
+    """Check whether HTTP/2 support (the h2 package) is installed."""
+    return importlib.util.find_spec("h2") is not None
+
+
+def _client_options() -> dict:
+    return {
+        "limits": httpx.Limits(
+            max_connections=Config.LLM_HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=Config.LLM_HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=Config.LLM_HTTP_KEEPALIVE_EXPIRY
+        ),
+        "timeout": httpx.Timeout(Config.LLM_HTTP_TIMEOUT, connect=Config.LLM_HTTP_CONNECT_TIMEOUT),
+        "http2": Config.LLM_HTTP2 and http2_available()
+    }
+
+
+_http_client: Optional[httpx.Client] = None
+_async_http_client: Optional[httpx.AsyncClient] = None
+_clients_lock = threading.Lock()
+
+
+def get_http_client() -> httpx.Client:
+    """Get the process-wide HTTP client for synchronous LLM calls."""
+    global _http_client
+    if _http_client is None:
+        with _clients_lock:
+            if _http_client is None:
+                _http_client = httpx.Client(**_client_options())
+    return _http_client
+
+
+def get_async_http_client() -> httpx.AsyncClient:
+    """Get the process-wide HTTP client for asynchronous LLM calls.
+
+    Its connections belong to the event loop that first uses them, so it is
+    meant for a single long-lived loop (such as the daemon's).
+    """
+    global _async_http_client
+    if _async_http_client is None:
+        with _clients_lock:
+            if _async_http_client is None:
+                _async_http_client = httpx.AsyncClient(**_client_options())
+    return _async_http_client
+
+
+def close_http_clients():
+    """Close the sync client's connections and forget both clients.
+
+    The async client is dropped without closing because closing it needs its
+    own event loop; its connections go away with that loop.
+    """
+    global _http_client, _async_http_client
+    with _clients_lock:
+        client, _http_client, _async_http_client = _http_client, None, None
+    if client is not None:
+        client.close()
+
+
+def _reset_after_fork():
+    # The child must not share its parent's sockets or locks
+    global _http_client, _async_http_client, _clients_lock
+    _http_client = None
+    _async_http_client = None
+    _clients_lock = threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,284 @@
+"""
+Instrumentation module for the Event Action Agent.
+
+Records wall-clock timings for the stages of an agent run (LLM calls, tool
+calls, notification memory operations, JSON encode/decode) into a per-run
+trace, and aggregates finished traces into latency histograms.
+
+Timing is only recorded while a trace is active (see ``trace_run``), so the
+instrumented code paths cost a single context-variable lookup otherwise.
+"""
+
+import bisect
+import contextvars
+import functools
+import json
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+
+_current_trace: contextvars.ContextVar = contextvars.ContextVar("current_trace", default=None)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with values in milliseconds."""
+
+    DEFAULT_BUCKETS = (1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000)
+
+    def __init__(self, buckets: Optional[Sequence[float]] = None):
+        """Initialize an empty histogram.
+
+        Args:
+            buckets: Sorted upper bounds (ms) of the histogram buckets
+        """
+        self.buckets = tuple(buckets or self.DEFAULT_BUCKETS)
+        # One extra slot for values above the last bound
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def observe(self, value_ms: float):
+        """Record a single observation."""
+        self.counts[bisect.bisect_left(self.buckets, value_ms)] += 1
+        self.count += 1
+        self.total += value_ms
+        self.min = value_ms if self.min is None else min(self.min, value_ms)
+        self.max = value_ms if self.max is None else max(self.max, value_ms)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Estimate the q-th percentile (0-100) by interpolating within buckets."""
+        if not self.count:
+            return None
+        rank = q / 100.0 * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if bucket_count and seen + bucket_count >= rank:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                estimate = lower + (upper - lower) * ((rank - seen) / bucket_count)
+                return max(self.min, min(self.max, estimate))
+            seen += bucket_count
+        return self.max
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return a JSON-serializable summary of the histogram."""
+        return {
+            "count": self.count,
+            "total_ms": round(self.total, 3),
+            "mean_ms": round(self.total / self.count, 3) if self.count else None,
+            "min_ms": self.min,
+            "max_ms": self.max,
+            "p50_ms": self.percentile(50),
+            "p90_ms": self.percentile(90),
+            "p99_ms": self.percentile(99),
+            "buckets": {
+                **{str(bound): count for bound, count in zip(self.buckets, self.counts)},
+                "+Inf": self.counts[-1]
+            }
+        }
+
+
+class RunTrace:
+    """Timings collected during a single agent run."""
+
+    def __init__(self, name: str = "run", **attrs):
+        """Initialize an empty trace.
+
+        Args:
+            name: Name of the run (e.g. the query type)
+            **attrs: Extra attributes stored with the trace
+        """
+        self.run_id = uuid.uuid4().hex
+        self.name = name
+        self.attrs = attrs
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.spans: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def add_span(self, stage: str, start: float, duration_ms: float, **attrs):
+        """Record a finished span.
+
+        Args:
+            stage: Stage name, e.g. ``llm``, ``tool.search_web`` or ``memory.filter_new_updates``
+            start: ``time.perf_counter()`` value at which the span started
+            duration_ms: Wall time of the span in milliseconds
+            **attrs: Extra attributes stored with the span
+        """
+        span = {
+            "stage": stage,
+            "start_offset_ms": round((start - self._start) * 1000, 3),
+            "duration_ms": round(duration_ms, 3),
+            "thread": threading.current_thread().name
+        }
+        if attrs:
+            span["attrs"] = attrs
+        with self._lock:
+            self.spans.append(span)
+
+    def finish(self):
+        """Mark the trace as finished and record its total duration."""
+        if self.duration_ms is None:
+            self.duration_ms = (time.perf_counter() - self._start) * 1000
+
+    def stage_totals(self) -> Dict[str, Dict[str, float]]:
+        """Get the call count and total time per stage."""
+        totals: Dict[str, Dict[str, float]] = {}
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            entry = totals.setdefault(span["stage"], {"count": 0, "total_ms": 0.0})
+            entry["count"] += 1
+            entry["total_ms"] = round(entry["total_ms"] + span["duration_ms"], 3)
+        return totals
+
+    def to_records(self) -> List[Dict[str, Any]]:
+        """Get the trace as a list of records: one per span plus a run summary."""
+        with self._lock:
+            spans = list(self.spans)
+        records = [{"type": "span", "run_id": self.run_id, "run": self.name, **span} for span in spans]
+        records.append({
+            "type": "run",
+            "run_id": self.run_id,
+            "run": self.name,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration_ms, 3) if self.duration_ms is not None else None,
+            "attrs": self.attrs,
+            "stages": self.stage_totals()
+        })
+        return records
+
+    @classmethod
+    def from_records(cls, records: List[Dict[str, Any]]) -> "RunTrace":
+        """Rebuild a finished trace from to_records() output, e.g. one run by the daemon."""
+        trace = cls()
+        for record in records:
+            if record.get("type") == "span":
+                trace.spans.append({key: value for key, value in record.items()
+                                    if key not in ("type", "run_id", "run")})
+            elif record.get("type") == "run":
+                trace.run_id = record["run_id"]
+                trace.name = record["run"]
+                trace.started_at = record["started_at"]
+                trace.duration_ms = record["duration_ms"]
+                trace.attrs = record.get("attrs") or {}
+        return trace
+
+    def to_jsonl(self) -> str:
+        """Serialize the trace as JSON lines."""
+        return "\n".join(json.dumps(record, ensure_ascii=False, default=str) for record in self.to_records()) + "\n"
+
+    def write_jsonl(self, path: str):
+        """Append the trace to a JSON lines file."""
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(self.to_jsonl())
+
+
+class TimingRegistry:
+    """Aggregates stage timings of finished traces into latency histograms."""
+
+    def __init__(self):
+        self._histograms: Dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, duration_ms: float):
+        """Record a single stage duration."""
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = LatencyHistogram()
+            histogram.observe(duration_ms)
+
+    def record_trace(self, trace: RunTrace):
+        """Fold every span of a finished trace, and the run itself, into the histograms."""
+        for span in list(trace.spans):
+            self.observe(span["stage"], span["duration_ms"])
+        if trace.duration_ms is not None:
+            self.observe(f"run.{trace.name}", trace.duration_ms)
+
+    def get_histograms(self) -> Dict[str, Dict[str, Any]]:
+        """Get a summary of every stage histogram, keyed by stage name."""
+        with self._lock:
+            return {stage: histogram.to_dict() for stage, histogram in sorted(self._histograms.items())}
+
+    def reset(self):
+        """Drop all recorded histograms."""
+        with self._lock:
+            self._histograms.clear()
+
+
+# Global registry for easy access
+timing_registry = TimingRegistry()
+
+
+def current_trace() -> Optional[RunTrace]:
+    """Get the trace active in the current context, if any."""
+    return _current_trace.get()
+
+
+@contextmanager
+def trace_run(name: str = "run", registry: Optional[TimingRegistry] = timing_registry, **attrs) -> Iterator[RunTrace]:
+    """Activate a new trace for the duration of the block.
+
+    Args:
+        name: Name of the run
+        registry: Registry the finished trace is aggregated into (None to skip)
+        **attrs: Extra attributes stored with the trace
+
+    Yields:
+        The active RunTrace
+    """
+    trace = RunTrace(name, **attrs)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+        trace.finish()
+        if registry is not None:
+            registry.record_trace(trace)
+
+
+@contextmanager
+def timed(stage: str, **attrs) -> Iterator[None]:
+    """Time the block as a span of the active trace (no-op without a trace)."""
+    trace = _current_trace.get()
+    if trace is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add_span(stage, start, (time.perf_counter() - start) * 1000, **attrs)
+
+
+def traced(stage: str) -> Callable:
+    """Decorator that times every call of the wrapped function as ``stage``."""
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current_trace.get() is None:
+                return func(*args, **kwargs)
+            with timed(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def dumps(obj: Any, **kwargs) -> str:
+    """``json.dumps`` timed as the ``json.encode`` stage."""
+    with timed("json.encode"):
+        return json.dumps(obj, **kwargs)
+
+
+def loads(data: str, **kwargs) -> Any:
+    """``json.loads`` timed as the ``json.decode`` stage."""
+    with timed("json.decode"):
+        return json.loads(data, **kwargs)
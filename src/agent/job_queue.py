@@ -0,0 +1,321 @@
+"""
+Durable Job Queue
+
+SQLite-backed queue of scheduled checks that several worker processes can
+share. A worker claims jobs by taking a lease that expires; jobs whose
+worker dies are claimed again once the lease runs out. Finished jobs are
+acked, failed jobs are retried with exponential backoff, and jobs that keep
+failing are moved to a dead-letter state for inspection.
+
+The queue lives in the notification memory database by default. Every claim
+is a single indexed ``UPDATE ... RETURNING`` on ``(state, run_at)``: a leased
+job's ``run_at`` holds its lease expiry, so "queued and due" and "lease
+expired" are the same range scan.
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+from .config import Config
+
+
+QUEUED = "queued"
+LEASED = "leased"
+DONE = "done"
+DEAD = "dead"
+
+
+def default_worker_id() -> str:
+    """Get an id unique to this process (host, pid and a random suffix)."""
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+
+
+class JobQueue:
+    """Persistent job queue with leases, retries and dead-lettering."""
+
+    def __init__(self, db_path: Optional[str] = None, lease_seconds: Optional[float] = None,
+                 max_attempts: Optional[int] = None, backoff_base: Optional[float] = None,
+                 backoff_max: Optional[float] = None, clock: Callable[[], float] = time.time):
+        """Initialize the queue.
+
+        Args:
+            db_path: Path to SQLite database file (defaults to Config.JOBS_DB_PATH)
+            lease_seconds: How long a claim lasts before another worker may take the job
+            max_attempts: Attempts before a job is dead-lettered
+            backoff_base: Delay (seconds) before the first retry; doubled on every retry
+            backoff_max: Upper bound on the retry delay
+            clock: Returns the current time as a Unix timestamp
+        """
+        self.db_path = db_path or Config.JOBS_DB_PATH
+        self.lease_seconds = lease_seconds or Config.JOB_LEASE_SECONDS
+        self.max_attempts = max_attempts or Config.JOB_MAX_ATTEMPTS
+        self.backoff_base = Config.JOB_BACKOFF_BASE if backoff_base is None else backoff_base
+        self.backoff_max = Config.JOB_BACKOFF_MAX if backoff_max is None else backoff_max
+        self.clock = clock
+        self._lock = threading.Lock()
+        # Autocommit mode; multi-statement writes use explicit BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._init_database()
+
+    def _init_database(self):
+        """Initialize the database with required tables."""
+        with self._lock:
+            self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    kind TEXT NOT NULL,
+                    payload TEXT NOT NULL,
+                    state TEXT NOT NULL DEFAULT 'queued',
+                    run_at REAL NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    max_attempts INTEGER NOT NULL,
+                    lease_owner TEXT,
+                    last_error TEXT,
+                    dedup_key TEXT UNIQUE,
+                    created_at REAL NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+            ''')
+            # Serves claims, idle polling and per-state counts
+            self._conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_state_run_at ON jobs (state, run_at)')
+
+    # Producing
+
+    def enqueue(self, kind: str, payload: Any, run_at: Optional[float] = None, dedup_key: Optional[str] = None,
+                max_attempts: Optional[int] = None) -> Optional[int]:
+        """Add a job.
+
+        Args:
+            kind: Handler name the job is dispatched to
+            payload: JSON-serializable job data
+            run_at: Earliest time the job may run (defaults to now)
+            dedup_key: Jobs with the same key are only ever enqueued once, so a
+                producer restarted after a crash can safely enqueue again
+            max_attempts: Overrides the queue's attempt limit for this job
+
+        Returns:
+            The job id, or None if a job with the same dedup_key already exists
+        """
+        now = self.clock()
+        with self._lock:
+            cursor = self._conn.execute('''
+                INSERT INTO jobs (kind, payload, run_at, max_attempts, dedup_key, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (dedup_key) DO NOTHING
+                RETURNING id
+            ''', (kind, json.dumps(payload), now if run_at is None else run_at,
+                  max_attempts or self.max_attempts, dedup_key, now, now))
+            row = cursor.fetchone()
+        return row[0] if row else None
+
+    # Consuming
+
+    def claim(self, worker_id: str, limit: int = 1, lease_seconds: Optional[float] = None) -> List[Dict]:
+        """Lease up to ``limit`` due jobs, earliest first.
+
+        Jobs whose lease expired are claimed again, unless they have used up
+        their attempts, in which case they are dead-lettered.
+
+        Returns:
+            Jobs as dicts with id, kind, payload and attempts (the current attempt number)
+        """
+        now = self.clock()
+        expires_at = now + (lease_seconds or self.lease_seconds)
+        with self._lock:
+            self._conn.execute('BEGIN IMMEDIATE')
+            try:
+                self._conn.execute('''
+                    UPDATE jobs SET state = 'dead', lease_owner = NULL, updated_at = ?,
+                        last_error = COALESCE(last_error, 'lease expired')
+                    WHERE state = 'leased' AND run_at <= ? AND attempts >= max_attempts
+                ''', (now, now))
+                rows = self._conn.execute('''
+                    UPDATE jobs SET state = 'leased', lease_owner = ?, run_at = ?, attempts = attempts + 1,
+                        updated_at = ?
+                    WHERE id IN (
+                        SELECT id FROM jobs WHERE state IN ('queued', 'leased') AND run_at <= ?
+                        ORDER BY run_at LIMIT ?
+                    )
+                    RETURNING id, kind, payload, attempts
+                ''', (worker_id, expires_at, now, now, limit)).fetchall()
+                self._conn.execute('COMMIT')
+            except Exception:
+                self._conn.execute('ROLLBACK')
+                raise
+        jobs = [{"id": row[0], "kind": row[1], "payload": json.loads(row[2]), "attempts": row[3]} for row in rows]
+        jobs.sort(key=lambda job: job["id"])
+        return jobs
+
+    def ack(self, job_id: int, worker_id: str) -> bool:
+        """Mark a leased job done.
+
+        Returns:
+            False if the lease was lost (expired and taken by another worker)
+        """
+        with self._lock:
+            cursor = self._conn.execute('''
+                UPDATE jobs SET state = 'done', lease_owner = NULL, updated_at = ?
+                WHERE id = ? AND state = 'leased' AND lease_owner = ?
+            ''', (self.clock(), job_id, worker_id))
+        return cursor.rowcount == 1
+
+    def fail(self, job_id: int, worker_id: str, error: str) -> Optional[str]:
+        """Record a failed attempt: retry later with backoff, or dead-letter.
+
+        Returns:
+            The job's new state ("queued" or "dead"), or None if the lease was lost
+        """
+        now = self.clock()
+        with self._lock:
+            row = self._conn.execute('''
+                UPDATE jobs SET
+                    state = CASE WHEN attempts >= max_attempts THEN 'dead' ELSE 'queued' END,
+                    run_at = ? + MIN(? * (1 << MAX(attempts - 1, 0)), ?),
+                    lease_owner = NULL, last_error = ?, updated_at = ?
+                WHERE id = ? AND state = 'leased' AND lease_owner = ?
+                RETURNING state
+            ''', (now, self.backoff_base, self.backoff_max, error[:2000], now, job_id, worker_id)).fetchone()
+        return row[0] if row else None
+
+    def extend_lease(self, job_id: int, worker_id: str, lease_seconds: Optional[float] = None) -> bool:
+        """Extend the lease of a job that is taking long."""
+        with self._lock:
+            cursor = self._conn.execute('''
+                UPDATE jobs SET run_at = ?, updated_at = ?
+                WHERE id = ? AND state = 'leased' AND lease_owner = ?
+            ''', (self.clock() + (lease_seconds or self.lease_seconds), self.clock(), job_id, worker_id))
+        return cursor.rowcount == 1
+
+    # Inspection and maintenance
+
+    def next_run_at(self) -> Optional[float]:
+        """Get the time the next job becomes claimable (an index lookup)."""
+        with self._lock:
+            row = self._conn.execute('''
+                SELECT MIN(run_at) FROM (
+                    SELECT MIN(run_at) AS run_at FROM jobs WHERE state = 'queued'
+                    UNION ALL
+                    SELECT MIN(run_at) FROM jobs WHERE state = 'leased'
+                )
+            ''').fetchone()
+        return row[0]
+
+    def stats(self) -> Dict[str, int]:
+        """Get the number of jobs in each state."""
+        with self._lock:
+            rows = self._conn.execute('SELECT state, COUNT(*) FROM jobs GROUP BY state').fetchall()
+        counts = {QUEUED: 0, LEASED: 0, DONE: 0, DEAD: 0}
+        counts.update(dict(rows))
+        return counts
+
+    def get(self, job_id: int) -> Optional[Dict]:
+        """Get a job by id."""
+        with self._lock:
+            cursor = self._conn.execute('SELECT * FROM jobs WHERE id = ?', (job_id,))
+            row = cursor.fetchone()
+            columns = [d[0] for d in cursor.description]
+        if row is None:
+            return None
+        job = dict(zip(columns, row))
+        job["payload"] = json.loads(job["payload"])
+        return job
+
+    def dead_letters(self, limit: int = 100) -> List[Dict]:
+        """Get dead-lettered jobs, most recent first."""
+        with self._lock:
+            rows = self._conn.execute('''
+                SELECT id, kind, payload, attempts, last_error, updated_at FROM jobs
+                WHERE state = 'dead' ORDER BY updated_at DESC LIMIT ?
+            ''', (limit,)).fetchall()
+        return [{"id": r[0], "kind": r[1], "payload": json.loads(r[2]), "attempts": r[3],
+                 "last_error": r[4], "failed_at": r[5]} for r in rows]
+
+    def requeue_dead(self, job_id: int) -> bool:
+        """Give a dead-lettered job a fresh set of attempts."""
+        with self._lock:
+            cursor = self._conn.execute('''
+                UPDATE jobs SET state = 'queued', attempts = 0, run_at = ?, updated_at = ?
+                WHERE id = ? AND state = 'dead'
+            ''', (self.clock(), self.clock(), job_id))
+        return cursor.rowcount == 1
+
+    def purge_done(self, older_than_seconds: float = 7 * 24 * 3600) -> int:
+        """Delete finished jobs older than the given age, returning how many were removed."""
+        with self._lock:
+            cursor = self._conn.execute('''
+                DELETE FROM jobs WHERE state = 'done' AND updated_at < ?
+            ''', (self.clock() - older_than_seconds,))
+        return cursor.rowcount
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+
+class JobWorker:
+    """Claims jobs from a JobQueue and dispatches them to handlers by kind."""
+
+    def __init__(self, queue: JobQueue, handlers: Dict[str, Callable[[Any], Any]],
+                 worker_id: Optional[str] = None, batch_size: int = 1, poll_interval: Optional[float] = None):
+        """Initialize the worker.
+
+        Args:
+            queue: Queue to take jobs from
+            handlers: Job kind to handler; handlers receive the job payload
+            worker_id: Lease owner name (defaults to host:pid:random)
+            batch_size: Jobs claimed per poll
+            poll_interval: Longest sleep between polls when idle (defaults to Config.JOB_POLL_INTERVAL)
+        """
+        self.queue = queue
+        self.handlers = handlers
+        self.worker_id = worker_id or default_worker_id()
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval or Config.JOB_POLL_INTERVAL
+        self._stop = threading.Event()
+        self.processed = 0
+        self.failed = 0
+
+    def run_once(self) -> int:
+        """Claim and run one batch of due jobs.
+
+        Returns:
+            Number of jobs claimed
+        """
+        jobs = self.queue.claim(self.worker_id, limit=self.batch_size)
+        for job in jobs:
+            handler = self.handlers.get(job["kind"])
+            try:
+                if handler is None:
+                    raise KeyError(f"No handler for job kind '{job['kind']}'")
+                handler(job["payload"])
+            except Exception as e:
+                self.failed += 1
+                self.queue.fail(job["id"], self.worker_id, f"{type(e).__name__}: {e}")
+                continue
+            self.processed += 1
+            self.queue.ack(job["id"], self.worker_id)
+        return len(jobs)
+
+    def run_forever(self):
+        """Process jobs until stop() is called, sleeping until the next job is due when idle."""
+        while not self._stop.is_set():
+            if self.run_once():
+                continue
+            next_run = self.queue.next_run_at()
+            delay = self.poll_interval
+            if next_run is not None:
+                delay = min(delay, max(0.0, next_run - self.queue.clock()))
+            self._stop.wait(delay)
+
+    def stop(self):
+        """Ask run_forever to return after the current batch."""
+        self._stop.set()
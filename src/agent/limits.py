@@ -0,0 +1,93 @@
+"""
+Stage concurrency limits for the Event Action Agent.
+
+Caps how many web searches, LLM calls and notification-memory database
+operations run at the same time in this process, whatever is driving them
+(the agent and its tools, the batch planner, event executor workers). Callers wrap a
+stage in ``stage_limits.limit("search")``; extra callers wait for a slot.
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from .config import Config
+
+
+class StageLimits:
+    """Named semaphores limiting concurrent work per pipeline stage."""
+
+    def __init__(self, limits: Optional[Dict[str, int]] = None):
+        """Initialize the limits.
+
+        Args:
+            limits: Maximum concurrent operations per stage name (defaults to
+                Config.SEARCH_CONCURRENCY, LLM_CONCURRENCY and DB_CONCURRENCY);
+                stages not listed are unlimited
+        """
+        if limits is None:
+            limits = {"search": Config.SEARCH_CONCURRENCY, "llm": Config.LLM_CONCURRENCY,
+                      "db": Config.DB_CONCURRENCY}
+        self._lock = threading.Lock()
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self.limits: Dict[str, int] = {}
+        self.active: Dict[str, int] = {}
+        self.waiting: Dict[str, int] = {}
+        self.wait_seconds: Dict[str, float] = {}
+        for stage, limit in limits.items():
+            self.set_limit(stage, limit)
+
+    def set_limit(self, stage: str, limit: int):
+        """Set (or replace) a stage's limit; 0 or less removes it."""
+        with self._lock:
+            if limit <= 0:
+                self._semaphores.pop(stage, None)
+                self.limits.pop(stage, None)
+                return
+            self._semaphores[stage] = threading.BoundedSemaphore(limit)
+            self.limits[stage] = limit
+            for counter in (self.active, self.waiting, self.wait_seconds):
+                counter.setdefault(stage, 0)
+
+    @contextmanager
+    def limit(self, stage: str) -> Iterator[None]:
+        """Hold one of a stage's slots for the duration of the block."""
+        semaphore = self._semaphores.get(stage)
+        if semaphore is None:
+            yield
+            return
+        # Uncontended fast path: no bookkeeping beyond the active count
+        if not semaphore.acquire(blocking=False):
+            start = time.perf_counter()
+            with self._lock:
+                self.waiting[stage] += 1
+            semaphore.acquire()
+            with self._lock:
+                self.waiting[stage] -= 1
+                self.wait_seconds[stage] += time.perf_counter() - start
+        with self._lock:
+            self.active[stage] += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.active[stage] -= 1
+            semaphore.release()
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """Get each limited stage's limit, active and waiting counts and total wait time."""
+        with self._lock:
+            return {
+                stage: {
+                    "limit": self.limits[stage],
+                    "active": self.active[stage],
+                    "waiting": self.waiting[stage],
+                    "wait_seconds": round(self.wait_seconds[stage], 3)
+                }
+                for stage in self.limits
+            }
+
+
+# Global instance for easy access
+stage_limits = StageLimits()
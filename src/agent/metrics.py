@@ -0,0 +1,459 @@
+"""
+Metrics module for the Event Action Agent.
+
+A small in-process metrics registry (counters, gauges and histograms, with
+optional labels) that renders the Prometheus text exposition format. Unlike
+the traces in ``instrumentation``, metrics are always recorded and accumulate
+for the life of the process. They are exposed at ``GET /metrics`` by the API
+server and the daemon, and written to ``METRICS_TEXTFILE`` by the CLI (for the
+node_exporter textfile collector).
+
+The metrics of the hot paths are defined at the bottom of this module so every
+name is listed in one place.
+"""
+
+import bisect
+import functools
+import math
+import os
+import tempfile
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Content type of the Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Histogram bucket upper bounds in seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label(value)}"' for key, value in labels.items()) + "}"
+
+
+class _Timer:
+    """Observes the wall time of a block or of every call of a function into a histogram."""
+
+    def __init__(self, histogram: "_HistogramValue"):
+        self.histogram = histogram
+        self._start = 0.0
+
+    def __enter__(self) -> "_Timer":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.histogram.observe(time.perf_counter() - self._start)
+        return False
+
+    def __call__(self, func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.histogram.observe(time.perf_counter() - start)
+        return wrapper
+
+
+class _CounterValue:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        """Increase the counter (amount must not be negative)."""
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        with self._lock:
+            self.value += amount
+
+    def reset(self):
+        with self._lock:
+            self.value = 0.0
+
+    def samples(self) -> List[Sample]:
+        return [("_total", {}, self.value)]
+
+
+class _GaugeValue:
+    def __init__(self):
+        self.value = 0.0
+        self._function: Optional[Callable[[], float]] = None
+        self._lock = threading.Lock()
+
+    def set(self, value: float):
+        with self._lock:
+            self.value = float(value)
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1):
+        with self._lock:
+            self.value -= amount
+
+    def set_function(self, function: Callable[[], float]):
+        """Read the gauge's value from function whenever the metrics are rendered."""
+        self._function = function
+
+    def reset(self):
+        with self._lock:
+            self.value = 0.0
+
+    def samples(self) -> List[Sample]:
+        value = self.value
+        if self._function is not None:
+            try:
+                value = float(self._function())
+            except Exception:
+                value = math.nan
+        return [("", {}, value)]
+
+
+class _HistogramValue:
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        # Per-bucket (not cumulative) counts, plus one slot for +Inf
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        """Record one observation (in seconds for latency histograms)."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def reset(self):
+        with self._lock:
+            self.counts = [0] * (len(self.buckets) + 1)
+            self.count = 0
+            self.sum = 0.0
+
+    def time(self) -> _Timer:
+        """Time a block (``with``) or every call of a function (decorator)."""
+        return _Timer(self)
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            counts, count, total = list(self.counts), self.count, self.sum
+        samples = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+            cumulative += bucket_count
+            samples.append(("_bucket", {"le": _format_value(bound)}, cumulative))
+        samples.append(("_sum", {}, total))
+        samples.append(("_count", {}, count))
+        return samples
+
+
+class Metric(ABC):
+    """A named metric with optional labels; each label combination has its own value."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        """Create a metric.
+
+        Args:
+            name: Metric name (without the ``_total`` suffix for counters)
+            documentation: Help text shown in the exposition
+            labelnames: Names of the metric's labels
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        if not self.labelnames:
+            # Unlabeled metrics are exposed (as zero) before their first use
+            self.labels()
+
+    @abstractmethod
+    def _new_value(self):
+        """Create the value held for one label combination."""
+
+    def labels(self, *values: str, **labels: str):
+        """Get the value for one combination of label values."""
+        if labels:
+            values = tuple(str(labels[name]) for name in self.labelnames)
+        else:
+            values = tuple(str(value) for value in values)
+        if len(values) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}")
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_value())
+        return child
+
+    def _unlabeled(self):
+        if self.labelnames:
+            raise ValueError(f"{self.name} has labels {self.labelnames}; use labels()")
+        return self.labels()
+
+    def samples(self) -> Iterator[Sample]:
+        """Yield (name, labels, value) for every sample of the metric."""
+        with self._lock:
+            children = sorted(self._children.items())
+        for values, child in children:
+            labels = dict(zip(self.labelnames, values))
+            for suffix, extra, value in child.samples():
+                yield self.name + suffix, {**labels, **extra}, value
+
+    def reset(self):
+        """Zero the values of every label combination.
+
+        Values are reset in place because callers may hold on to them (see
+        ``labels().time()`` used as a decorator).
+        """
+        with self._lock:
+            children = list(self._children.values())
+        for child in children:
+            child.reset()
+
+
+class Counter(Metric):
+    """A monotonically increasing count, exposed as ``<name>_total``."""
+
+    kind = "counter"
+
+    def _new_value(self) -> _CounterValue:
+        return _CounterValue()
+
+    def inc(self, amount: float = 1):
+        """Increase the (unlabeled) counter."""
+        self._unlabeled().inc(amount)
+
+
+class Gauge(Metric):
+    """A value that can go up and down."""
+
+    kind = "gauge"
+
+    def _new_value(self) -> _GaugeValue:
+        return _GaugeValue()
+
+    def set(self, value: float):
+        self._unlabeled().set(value)
+
+    def inc(self, amount: float = 1):
+        self._unlabeled().inc(amount)
+
+    def dec(self, amount: float = 1):
+        self._unlabeled().dec(amount)
+
+    def set_function(self, function: Callable[[], float]):
+        """Read the (unlabeled) gauge from function whenever the metrics are rendered."""
+        self._unlabeled().set_function(function)
+
+
+class Histogram(Metric):
+    """Observations counted into cumulative buckets, with their sum and count."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_value(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        self._unlabeled().observe(value)
+
+    def time(self) -> _Timer:
+        """Time a block or every call of a function into the (unlabeled) histogram."""
+        return self._unlabeled().time()
+
+
+class MetricsRegistry:
+    """A set of metrics rendered together in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        """Add a metric, or return the already registered metric of the same name and type."""
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                    raise ValueError(f"Metric {metric.name} is already registered differently")
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def get_sample_value(self, name: str, labels: Optional[Dict[str, str]] = None) -> Optional[float]:
+        """Get the value of one sample, e.g. ``("event_agent_searches_total", {"source": "web"})``.
+
+        Returns:
+            The sample's value, or None if it has not been recorded
+        """
+        labels = labels or {}
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            if not name.startswith(metric.name):
+                continue
+            for sample_name, sample_labels, value in metric.samples():
+                if sample_name == name and sample_labels == labels:
+                    return value
+        return None
+
+    def render(self) -> str:
+        """Render every metric in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            documentation = metric.documentation.replace("\\", "\\\\").replace("\n", "\\n")
+            lines.append(f"# HELP {metric.name} {documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: str):
+        """Write the rendered metrics to path atomically (write a temporary file, then rename)."""
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".metrics-")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(self.render())
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def reset(self):
+        """Zero the recorded values of every metric (the metrics stay registered)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.reset()
+
+
+class TextfileWriter:
+    """Rewrites a metrics text file at a fixed interval on a background thread."""
+
+    def __init__(self, path: str, interval: float, registry: Optional[MetricsRegistry] = None):
+        """Create a writer.
+
+        Args:
+            path: File to write
+            interval: Seconds between writes
+            registry: Registry to render (defaults to the global one)
+        """
+        self.path = path
+        self.interval = interval
+        self.registry = registry or metrics
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="metrics-writer", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.write()
+
+    def write(self):
+        try:
+            self.registry.write_textfile(self.path)
+        except OSError as e:
+            print(f"Could not write metrics: {e}")
+
+    def stop(self, write: bool = True):
+        """Stop the thread and, unless write is False, write the file one last time."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if write:
+            self.write()
+
+
+# Global registry for easy access
+metrics = MetricsRegistry()
+
+# Agent queries
+QUERIES = metrics.counter("event_agent_queries", "Queries run by LangChainAgent.run")
+QUERY_SECONDS = metrics.histogram("event_agent_query_seconds", "Wall time of LangChainAgent.run")
+QUERIES_IN_FLIGHT = metrics.gauge("event_agent_queries_in_flight", "Queries currently running")
+
+# LLM
+LLM_CALLS = metrics.counter("event_agent_llm_calls", "LLM calls by outcome", ["status"])
+LLM_SECONDS = metrics.histogram("event_agent_llm_seconds", "Wall time of LLM calls")
+LLM_TOKENS = metrics.counter("event_agent_llm_tokens", "Tokens used by LLM calls", ["type"])
+
+# Web search
+SEARCHES = metrics.counter("event_agent_searches",
+                           "Searches requested by the tools, by whether the web or the search cache answered",
+                           ["source"])
+SEARCH_ERRORS = metrics.counter("event_agent_search_errors", "Web searches that failed")
+SEARCH_SECONDS = metrics.histogram("event_agent_search_seconds", "Wall time of web searches")
+SEARCH_CACHE_ENTRIES = metrics.gauge("event_agent_search_cache_entries", "Results held in the search cache")
+
+# Relevance and deduplication
+RESULT_CHECKS = metrics.counter("event_agent_result_checks",
+                                "Topic checks by how much of the result set changed since the last check",
+                                ["change"])
+SEARCH_RESULTS = metrics.counter("event_agent_search_results", "Search results checked for relevance")
+RELEVANT_RESULTS = metrics.counter("event_agent_relevant_results", "Search results that looked like recent updates")
+UPDATES = metrics.counter("event_agent_updates",
+                          "Relevant updates per recipient, by whether they were new or already sent",
+                          ["status"])
+
+# Scheduled events
+SKIPPED_EVENTS = metrics.counter("event_agent_skipped_events",
+                                 "Fired events not checked because their plan's channel or condition is not supported")
+
+# Notification memory
+DB_QUERY_SECONDS = metrics.histogram("event_agent_db_query_seconds",
+                                     "Wall time of notification memory operations", ["operation"])
+
+# Email
+EMAILS_RENDERED = metrics.counter("event_agent_emails_rendered", "Notification emails rendered", ["kind"])
+EMAILS_UNDELIVERABLE = metrics.counter("event_agent_emails_undeliverable",
+                                       "Notification emails dropped because their recipient has no email address")
@@ -9,13 +9,49 @@ Uses SQLite database to store notification history with idempotency keys.
 import sqlite3
 import json
 import hashlib
+import uuid
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 import os
 
+from .config import Config
+from .instrumentation import traced
+from .metrics import DB_QUERY_SECONDS
+from .topics import canonical_topic
+
+
+SENT_UPDATES_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS {table} (
+        update_hash TEXT NOT NULL,
+        topic TEXT NOT NULL,
+        title TEXT NOT NULL,
+        url TEXT NOT NULL,
+        sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        recipient TEXT NOT NULL DEFAULT 'default',
+        full_content TEXT,
+        state TEXT NOT NULL DEFAULT 'committed',
+        claim_id TEXT,
+        PRIMARY KEY (update_hash, topic, recipient)
+    )
+'''
+
+# Rows per multi-row INSERT when claiming updates (keeps well under SQLite's variable limit)
+CLAIM_CHUNK_SIZE = 100
+
+
+def _operation(name: str):
+    """Trace a memory operation as ``memory.<name>`` and record its latency in DB_QUERY_SECONDS."""
+    def decorator(func):
+        return traced(f"memory.{name}")(DB_QUERY_SECONDS.labels(operation=name).time()(func))
+    return decorator
+
 
 class NotificationMemory:
-    """Memory system for tracking sent notifications to prevent duplicates."""
+    """Memory system for tracking sent notifications to prevent duplicates.
+    
+    Topics are stored under their canonical key (see topics.canonical_topic),
+    so equivalent phrasings of a topic share history and statistics.
+    """
     
     def __init__(self, db_path: str = "notification_memory.db"):
         """Initialize the notification memory system.
@@ -36,7 +72,8 @@ class NotificationMemory:
                     notification_hash TEXT NOT NULL,
                     sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     notification_data TEXT,
-                    recipient TEXT DEFAULT 'default'
+                    recipient TEXT DEFAULT 'default',
+                    claim_id TEXT
                 )
             ''')
             
@@ -47,25 +84,91 @@ class NotificationMemory:
                     notification_hash TEXT NOT NULL,
                     sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     notification_data TEXT,
-                    recipient TEXT DEFAULT 'default'
+                    recipient TEXT DEFAULT 'default',
+                    claim_id TEXT
                 )
             ''')
             
             # Track individual updates that have been sent (prevents partial duplicates)
+            conn.execute(SENT_UPDATES_SCHEMA.format(table='sent_updates'))
+            
+            # Recipients subscribed to a (canonical) topic, notified on every check of it
             conn.execute('''
-                CREATE TABLE IF NOT EXISTS sent_updates (
-                    update_hash TEXT PRIMARY KEY,
+                CREATE TABLE IF NOT EXISTS subscriptions (
                     topic TEXT NOT NULL,
-                    title TEXT NOT NULL,
-                    url TEXT NOT NULL,
-                    sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    recipient TEXT DEFAULT 'default',
-                    full_content TEXT
-                )
+                    recipient TEXT NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (topic, recipient)
+                ) WITHOUT ROWID
             ''')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_subscriptions_recipient ON subscriptions (recipient)')
             
+            # Result set each recipient of a (canonical) topic was last checked against
+            conn.execute('''
+                CREATE TABLE IF NOT EXISTS result_fingerprints (
+                    topic TEXT NOT NULL,
+                    recipient TEXT NOT NULL,
+                    fingerprint TEXT NOT NULL,
+                    result_hashes TEXT NOT NULL,
+                    checked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (topic, recipient)
+                ) WITHOUT ROWID
+            ''')
+            
+            self._migrate(conn)
             conn.commit()
     
+    def _migrate(self, conn: sqlite3.Connection):
+        """Bring an existing database up to the current schema version."""
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        if version < 1:
+            # Version 1: topics are stored under their canonical key
+            for table in ('sent_notifications', 'notification_history', 'sent_updates'):
+                topics = [row[0] for row in conn.execute(f'SELECT DISTINCT topic FROM {table}')]
+                for topic in topics:
+                    canonical = canonical_topic(topic)
+                    if canonical != topic:
+                        conn.execute(f'UPDATE {table} SET topic = ? WHERE topic = ?', (canonical, topic))
+            conn.execute('PRAGMA user_version = 1')
+        if version < 2:
+            # Version 2: an update is recorded once per (topic, recipient) instead of
+            # once overall, so sending it to one recipient no longer hides it from others
+            conn.execute(SENT_UPDATES_SCHEMA.format(table='sent_updates_v2'))
+            conn.execute('''
+                INSERT OR IGNORE INTO sent_updates_v2
+                (update_hash, topic, title, url, sent_at, recipient, full_content)
+                SELECT update_hash, topic, title, url, sent_at, COALESCE(recipient, 'default'), full_content
+                FROM sent_updates
+            ''')
+            conn.execute('DROP TABLE sent_updates')
+            conn.execute('ALTER TABLE sent_updates_v2 RENAME TO sent_updates')
+            conn.execute('PRAGMA user_version = 2')
+        if version < 3:
+            # Version 3: updates can be reserved (pending) by a claim before they are
+            # committed as sent, see claim_new_updates
+            columns = [row[1] for row in conn.execute('PRAGMA table_info(sent_updates)')]
+            if 'state' not in columns:
+                conn.execute("ALTER TABLE sent_updates ADD COLUMN state TEXT NOT NULL DEFAULT 'committed'")
+            if 'claim_id' not in columns:
+                conn.execute('ALTER TABLE sent_updates ADD COLUMN claim_id TEXT')
+            conn.execute('''
+                CREATE INDEX IF NOT EXISTS idx_sent_updates_claim ON sent_updates (claim_id)
+                WHERE claim_id IS NOT NULL
+            ''')
+            conn.execute('PRAGMA user_version = 3')
+        if version < 4:
+            # Version 4: notifications remember the claim they were recorded under, so
+            # releasing the claim (delivery failed) removes them from the history again
+            for table in ('sent_notifications', 'notification_history'):
+                columns = [row[1] for row in conn.execute(f'PRAGMA table_info({table})')]
+                if 'claim_id' not in columns:
+                    conn.execute(f'ALTER TABLE {table} ADD COLUMN claim_id TEXT')
+                conn.execute(f'''
+                    CREATE INDEX IF NOT EXISTS idx_{table}_claim ON {table} (claim_id)
+                    WHERE claim_id IS NOT NULL
+                ''')
+            conn.execute('PRAGMA user_version = 4')
+    
     def _generate_idempotency_key(self, topic: str, notification_data: Dict) -> str:
         """Generate a unique idempotency key for a notification.
         
@@ -126,26 +229,171 @@ class NotificationMemory:
         content_str = f"{title}|{url}"
         return hashlib.sha256(content_str.encode()).hexdigest()
     
-    def filter_new_updates(self, topic: str, updates: List[Dict], time_window_hours: int = 24) -> Tuple[List[Dict], List[Dict]]:
-        """Split updates into new vs already sent within the time window."""
+    @_operation("filter_new_updates")
+    def filter_new_updates(self, topic: str, updates: List[Dict], time_window_hours: int = 24,
+                           recipient: Optional[str] = None) -> Tuple[List[Dict], List[Dict]]:
+        """Split updates into new vs already sent within the time window.
+        
+        Args:
+            topic: The topic of the updates
+            updates: Update dictionaries with title and url
+            time_window_hours: How far back a sent update counts
+            recipient: Only count updates sent to this recipient (None counts any recipient)
+        """
         if not updates:
             return [], []
+        topic = canonical_topic(topic)
+        recipient_clause = 'AND recipient = ?' if recipient is not None else ''
         new_updates: List[Dict] = []
         already_sent_updates: List[Dict] = []
         with sqlite3.connect(self.db_path) as conn:
             for update in updates:
                 update_hash = self._generate_update_hash(update)
+                params = (update_hash, topic, recipient) if recipient is not None else (update_hash, topic)
                 cursor = conn.execute('''
                     SELECT 1 FROM sent_updates 
-                    WHERE update_hash = ? AND topic = ? AND sent_at >= datetime('now', '-{} hours')
+                    WHERE update_hash = ? AND topic = ? {} AND sent_at >= datetime('now', '-{} hours')
                     LIMIT 1
-                '''.format(time_window_hours), (update_hash, topic))
+                '''.format(recipient_clause, time_window_hours), params)
                 if cursor.fetchone() is not None:
                     already_sent_updates.append(update)
                 else:
                     new_updates.append(update)
         return new_updates, already_sent_updates
     
+    @_operation("claim_new_updates")
+    def claim_new_updates(self, topic: str, updates: List[Dict], recipient: str = "default",
+                          time_window_hours: int = 24,
+                          claim_ttl_seconds: Optional[float] = None) -> Tuple[Optional[str], List[Dict], List[Dict]]:
+        """Atomically find the updates not yet sent to a recipient and reserve them.
+        
+        Filtering and reserving happen in one INSERT ... ON CONFLICT ... RETURNING
+        statement, so when several workers check the same topic at once each
+        update is claimed by exactly one of them. Claimed updates are stored as
+        pending; call commit_claim once the notification was delivered, or
+        release_claim to make them available again.
+        
+        Args:
+            topic: The topic of the updates
+            updates: Update dictionaries with title and url
+            recipient: The recipient being notified
+            time_window_hours: How far back a sent update counts
+            claim_ttl_seconds: Pending claims older than this are treated as abandoned
+                (defaults to Config.CLAIM_TTL_SECONDS)
+        
+        Returns:
+            (claim_id, claimed_updates, already_sent_updates); claim_id is None
+            when nothing was claimed
+        """
+        if not updates:
+            return None, [], []
+        topic = canonical_topic(topic)
+        claim_ttl_seconds = Config.CLAIM_TTL_SECONDS if claim_ttl_seconds is None else claim_ttl_seconds
+        claim_id = uuid.uuid4().hex
+        by_hash: Dict[str, Dict] = {}
+        for update in updates:
+            by_hash.setdefault(self._generate_update_hash(update), update)
+        rows = [(update_hash, topic, update.get('title', ''), update.get('url', ''), recipient,
+                 json.dumps(update), claim_id) for update_hash, update in by_hash.items()]
+        claimed_hashes = set()
+        with sqlite3.connect(self.db_path) as conn:
+            for start in range(0, len(rows), CLAIM_CHUNK_SIZE):
+                chunk = rows[start:start + CLAIM_CHUNK_SIZE]
+                placeholders = ", ".join(["(?, ?, ?, ?, ?, ?, 'pending', ?)"] * len(chunk))
+                cursor = conn.execute('''
+                    INSERT INTO sent_updates
+                    (update_hash, topic, title, url, recipient, full_content, state, claim_id)
+                    VALUES {}
+                    ON CONFLICT (update_hash, topic, recipient) DO UPDATE SET
+                        state = 'pending', claim_id = excluded.claim_id, sent_at = CURRENT_TIMESTAMP,
+                        title = excluded.title, url = excluded.url, full_content = excluded.full_content
+                    WHERE sent_updates.sent_at < datetime('now', '-{} hours')
+                       OR (sent_updates.state = 'pending' AND sent_updates.sent_at < datetime('now', '{:+d} seconds'))
+                    RETURNING update_hash
+                '''.format(placeholders, time_window_hours, -int(claim_ttl_seconds)),
+                    [value for row in chunk for value in row])
+                claimed_hashes.update(row[0] for row in cursor.fetchall())
+            conn.commit()
+        claimed = [update for update_hash, update in by_hash.items() if update_hash in claimed_hashes]
+        already_sent = [update for update_hash, update in by_hash.items() if update_hash not in claimed_hashes]
+        return (claim_id if claimed else None), claimed, already_sent
+    
+    @_operation("commit_claim")
+    def commit_claim(self, claim_id: str) -> int:
+        """Mark a claim's updates as sent for good.
+        
+        Returns:
+            Number of updates committed (0 if the claim expired and was taken over)
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.execute('''
+                UPDATE sent_updates SET state = 'committed', sent_at = CURRENT_TIMESTAMP
+                WHERE claim_id = ? AND state = 'pending'
+            ''', (claim_id,))
+            conn.commit()
+            return cursor.rowcount
+    
+    @_operation("extend_claim")
+    def extend_claim(self, claim_id: str, seconds: float) -> int:
+        """Keep a pending claim from being taken over for another ``seconds``.
+        
+        Used when delivery is deliberately deferred (e.g. buffered for a digest):
+        the claim's TTL then counts from the deferred delivery time.
+        
+        Returns:
+            Number of pending updates extended
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.execute('''
+                UPDATE sent_updates SET sent_at = datetime('now', ?)
+                WHERE claim_id = ? AND state = 'pending'
+            ''', (f"{int(seconds):+d} seconds", claim_id))
+            conn.commit()
+            return cursor.rowcount
+    
+    @_operation("release_claim")
+    def release_claim(self, claim_id: str) -> int:
+        """Give up a claim (e.g. delivery failed) so its updates can be claimed again.
+        
+        Notifications recorded under the claim are removed as well, since they
+        were never sent.
+        
+        Returns:
+            Number of updates released
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            rows = conn.execute('''
+                DELETE FROM sent_updates WHERE claim_id = ? AND state = 'pending'
+                RETURNING topic, recipient
+            ''', (claim_id,)).fetchall()
+            conn.execute('DELETE FROM sent_notifications WHERE claim_id = ?', (claim_id,))
+            conn.execute('DELETE FROM notification_history WHERE claim_id = ?', (claim_id,))
+            # The released updates can be sent again, so the next check must not be skipped
+            conn.executemany('DELETE FROM result_fingerprints WHERE topic = ? AND recipient = ?', set(rows))
+            conn.commit()
+        return len(rows)
+    
+    @_operation("drop_claim")
+    def drop_claim(self, claim_id: str) -> int:
+        """Give up a claim for good (e.g. the recipient has no email address).
+        
+        Unlike release_claim the updates stay recorded, as 'dropped', so later
+        checks within the dedup window do not claim them again; notifications
+        recorded under the claim are removed, since they were never sent.
+        
+        Returns:
+            Number of updates dropped
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.execute('''
+                UPDATE sent_updates SET state = 'dropped', sent_at = CURRENT_TIMESTAMP
+                WHERE claim_id = ? AND state = 'pending'
+            ''', (claim_id,))
+            conn.execute('DELETE FROM sent_notifications WHERE claim_id = ?', (claim_id,))
+            conn.execute('DELETE FROM notification_history WHERE claim_id = ?', (claim_id,))
+            conn.commit()
+            return cursor.rowcount
+    
     def is_notification_sent(self, topic: str, notification_data: Dict, time_window_hours: int = 24) -> bool:
         """Return True only if all relevant updates were already sent in the window."""
         relevant_updates = notification_data.get('relevant_updates', [])
@@ -154,6 +402,7 @@ class NotificationMemory:
         new_updates, _ = self.filter_new_updates(topic, relevant_updates, time_window_hours)
         return len(new_updates) == 0
     
+    @_operation("mark_notification_sent")
     def mark_notification_sent(self, topic: str, notification_data: Dict, recipient: str = "default") -> str:
         """Mark a notification as sent.
         
@@ -165,23 +414,25 @@ class NotificationMemory:
         Returns:
             The idempotency key used
         """
+        topic = canonical_topic(topic)
         idempotency_key = self._generate_idempotency_key(topic, notification_data)
         notification_hash = self._generate_notification_hash(notification_data)
+        claim_id = notification_data.get('claim_id')
         
         with sqlite3.connect(self.db_path) as conn:
             # Insert into sent_notifications (for idempotency)
             conn.execute('''
                 INSERT OR IGNORE INTO sent_notifications 
-                (idempotency_key, topic, notification_hash, notification_data, recipient)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (idempotency_key, topic, notification_hash, json.dumps(notification_data), recipient))
+                (idempotency_key, topic, notification_hash, notification_data, recipient, claim_id)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', (idempotency_key, topic, notification_hash, json.dumps(notification_data), recipient, claim_id))
             
             # Insert into notification_history (for tracking)
             conn.execute('''
                 INSERT INTO notification_history 
-                (topic, notification_hash, notification_data, recipient)
-                VALUES (?, ?, ?, ?)
-            ''', (topic, notification_hash, json.dumps(notification_data), recipient))
+                (topic, notification_hash, notification_data, recipient, claim_id)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (topic, notification_hash, json.dumps(notification_data), recipient, claim_id))
             
             # Track individual updates (for partial duplicate prevention)
             relevant_updates = notification_data.get('relevant_updates', [])
@@ -204,23 +455,332 @@ class NotificationMemory:
         
         return idempotency_key
     
-    def get_recent_notifications(self, topic: str, days: int = 7) -> List[Dict]:
+    # Result fingerprints
+    
+    def _generate_result_hash(self, result: Dict) -> str:
+        """Generate a hash of a search result's content (title + url + snippet)."""
+        content_str = f"{result.get('title', '')}|{result.get('url', '')}|{result.get('snippet', '')}"
+        return hashlib.sha256(content_str.encode()).hexdigest()
+    
+    def _fingerprint_results(self, results: List[Dict]) -> Tuple[str, List[str]]:
+        """Get the fingerprint of a result set (independent of order) and each result's hash."""
+        hashes = [self._generate_result_hash(result) for result in results]
+        return hashlib.sha256("\n".join(sorted(hashes)).encode()).hexdigest(), hashes
+    
+    def _load_recipients(self, conn: sqlite3.Connection, recipients: List[str]):
+        """Load recipients into the temp.fanout_recipients table."""
+        conn.execute('CREATE TEMP TABLE IF NOT EXISTS fanout_recipients (recipient TEXT PRIMARY KEY)')
+        conn.execute('DELETE FROM temp.fanout_recipients')
+        conn.executemany('INSERT OR IGNORE INTO temp.fanout_recipients VALUES (?)',
+                         [(recipient,) for recipient in recipients])
+    
+    @_operation("changed_results")
+    def changed_results(self, topic: str, results: List[Dict], recipients: List[str]) -> List[Dict]:
+        """Get the search results that changed since the topic was last checked for the recipients.
+        
+        Each check's result set is remembered (see remember_results) in the
+        result_fingerprints table as a fingerprint plus a hash per result, so
+        every process sharing the database sees it. When every recipient was
+        last checked against the same fingerprint nothing changed and the check
+        can stop here; otherwise only the results some recipient has not been
+        checked against need relevance, dedup and rendering. Remembered sets
+        are trusted for Config.RESULT_FINGERPRINT_TTL_SECONDS (0 disables them),
+        after which one full check runs again, so updates whose dedup window
+        ran out are still noticed.
+        
+        Args:
+            topic: The topic that was searched
+            results: The search results, with title, url and snippet
+            recipients: The recipients the check is for
+            
+        Returns:
+            The changed results in their original order; empty when nothing changed
+        """
+        ttl = Config.RESULT_FINGERPRINT_TTL_SECONDS
+        if ttl <= 0 or not results:
+            return list(results)
+        topic = canonical_topic(topic)
+        fingerprint, hashes = self._fingerprint_results(results)
+        with sqlite3.connect(self.db_path) as conn:
+            self._load_recipients(conn, recipients)
+            # Recipients not checked against this fingerprint, with what they were checked against
+            rows = conn.execute('''
+                SELECT f.fingerprint, f.result_hashes FROM temp.fanout_recipients AS r
+                LEFT JOIN result_fingerprints AS f
+                    ON f.topic = ? AND f.recipient = r.recipient AND f.checked_at >= datetime('now', ?)
+                WHERE f.fingerprint IS NULL OR f.fingerprint != ?
+            ''', (topic, f"-{int(ttl)} seconds", fingerprint)).fetchall()
+        if not rows:
+            return []
+        if any(row[0] is None for row in rows):
+            return list(results)
+        unseen = set()
+        for result_hashes in {row[1] for row in rows}:
+            seen = set(json.loads(result_hashes))
+            unseen.update(result_hash for result_hash in hashes if result_hash not in seen)
+        return [result for result, result_hash in zip(results, hashes) if result_hash in unseen]
+    
+    @_operation("remember_results")
+    def remember_results(self, topic: str, results: List[Dict], recipients: List[str]):
+        """Remember that the recipients were checked against a topic's result set.
+        
+        A recipient's remembered set keeps the time of its last full check, so
+        checks that only processed changed results do not extend it.
+        """
+        ttl = Config.RESULT_FINGERPRINT_TTL_SECONDS
+        if ttl <= 0 or not results or not recipients:
+            return
+        topic = canonical_topic(topic)
+        fingerprint, hashes = self._fingerprint_results(results)
+        result_hashes = json.dumps(sorted(set(hashes)))
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executemany('''
+                INSERT INTO result_fingerprints (topic, recipient, fingerprint, result_hashes)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT (topic, recipient) DO UPDATE SET
+                    fingerprint = excluded.fingerprint, result_hashes = excluded.result_hashes,
+                    checked_at = CASE WHEN result_fingerprints.checked_at >= datetime('now', ?)
+                                      THEN result_fingerprints.checked_at ELSE CURRENT_TIMESTAMP END
+            ''', [(topic, recipient, fingerprint, result_hashes, f"-{int(ttl)} seconds")
+                  for recipient in dict.fromkeys(recipients)])
+            conn.commit()
+    
+    # Subscriptions
+    
+    def subscribe(self, topic: str, recipients: List[str]) -> int:
+        """Subscribe recipients to a topic.
+        
+        Returns:
+            Number of new subscriptions (existing ones are kept)
+        """
+        topic = canonical_topic(topic)
+        with sqlite3.connect(self.db_path) as conn:
+            before = conn.total_changes
+            conn.executemany('INSERT OR IGNORE INTO subscriptions (topic, recipient) VALUES (?, ?)',
+                             [(topic, recipient) for recipient in dict.fromkeys(recipients)])
+            conn.commit()
+            return conn.total_changes - before
+    
+    def unsubscribe(self, topic: str, recipients: Optional[List[str]] = None) -> int:
+        """Remove recipients' subscriptions to a topic (all of them if recipients is None).
+        
+        Returns:
+            Number of subscriptions removed
+        """
+        topic = canonical_topic(topic)
+        with sqlite3.connect(self.db_path) as conn:
+            if recipients is None:
+                cursor = conn.execute('DELETE FROM subscriptions WHERE topic = ?', (topic,))
+            else:
+                cursor = conn.executemany('DELETE FROM subscriptions WHERE topic = ? AND recipient = ?',
+                                          [(topic, recipient) for recipient in recipients])
+            conn.commit()
+            return cursor.rowcount
+    
+    def get_subscribers(self, topic: str) -> List[str]:
+        """Get the recipients subscribed to a topic."""
+        with sqlite3.connect(self.db_path) as conn:
+            return [row[0] for row in conn.execute(
+                'SELECT recipient FROM subscriptions WHERE topic = ? ORDER BY recipient', (canonical_topic(topic),))]
+    
+    def get_subscriptions(self, recipient: str) -> List[str]:
+        """Get the (canonical) topics a recipient is subscribed to."""
+        with sqlite3.connect(self.db_path) as conn:
+            return [row[0] for row in conn.execute(
+                'SELECT topic FROM subscriptions WHERE recipient = ? ORDER BY topic', (recipient,))]
+    
+    # Fan-out to many recipients
+    
+    def _load_fanout(self, conn: sqlite3.Connection, topic: str, updates: List[Dict],
+                     recipients: Optional[List[str]]) -> Tuple[Dict[str, Dict], str, Tuple]:
+        """Load updates (and recipients) into temp tables for set-based fan-out queries.
+        
+        Returns:
+            (updates by hash, SQL source of the recipients, parameters of that source);
+            without explicit recipients the source is the topic's subscribers
+        """
+        by_hash: Dict[str, Dict] = {}
+        for update in updates:
+            by_hash.setdefault(self._generate_update_hash(update), update)
+        conn.execute('''
+            CREATE TEMP TABLE IF NOT EXISTS fanout_updates (
+                update_hash TEXT PRIMARY KEY, title TEXT, url TEXT, full_content TEXT
+            )
+        ''')
+        conn.execute('DELETE FROM temp.fanout_updates')
+        conn.executemany('INSERT INTO temp.fanout_updates VALUES (?, ?, ?, ?)', [
+            (update_hash, update.get('title', ''), update.get('url', ''), json.dumps(update))
+            for update_hash, update in by_hash.items()])
+        if recipients is None:
+            return by_hash, '(SELECT recipient FROM subscriptions WHERE topic = ?)', (topic,)
+        self._load_recipients(conn, recipients)
+        return by_hash, 'temp.fanout_recipients', ()
+    
+    @_operation("find_unseen_updates")
+    def find_unseen_updates(self, topic: str, updates: List[Dict], recipients: Optional[List[str]] = None,
+                            time_window_hours: int = 24) -> Dict[str, List[Dict]]:
+        """Find, for many recipients at once, which updates each has not been sent.
+        
+        One anti-join over (recipients x updates) instead of a query per recipient.
+        
+        Args:
+            topic: The topic of the updates
+            updates: Update dictionaries with title and url
+            recipients: Recipients to check (defaults to the topic's subscribers)
+            time_window_hours: How far back a sent (or claimed) update counts
+        
+        Returns:
+            Unseen updates per recipient; recipients who have seen everything are left out
+        """
+        if not updates:
+            return {}
+        topic = canonical_topic(topic)
+        with sqlite3.connect(self.db_path) as conn:
+            by_hash, source, source_params = self._load_fanout(conn, topic, updates, recipients)
+            rows = conn.execute('''
+                SELECT r.recipient, u.update_hash FROM {} AS r CROSS JOIN temp.fanout_updates AS u
+                WHERE NOT EXISTS (
+                    SELECT 1 FROM sent_updates AS s
+                    WHERE s.update_hash = u.update_hash AND s.topic = ? AND s.recipient = r.recipient
+                      AND s.sent_at >= datetime('now', '-{} hours')
+                )
+            '''.format(source, time_window_hours), source_params + (topic,)).fetchall()
+        order = {update_hash: i for i, update_hash in enumerate(by_hash)}
+        unseen: Dict[str, List[Dict]] = {}
+        for recipient, update_hash in sorted(rows, key=lambda row: order[row[1]]):
+            unseen.setdefault(recipient, []).append(by_hash[update_hash])
+        return unseen
+    
+    @_operation("claim_for_recipients")
+    def claim_for_recipients(self, topic: str, updates: List[Dict], recipients: Optional[List[str]] = None,
+                             time_window_hours: int = 24,
+                             claim_ttl_seconds: Optional[float] = None) -> Dict[str, Tuple[str, List[Dict]]]:
+        """Claim new updates for many recipients in one statement (see claim_new_updates).
+        
+        Args:
+            topic: The topic of the updates
+            updates: Update dictionaries with title and url
+            recipients: Recipients being notified (defaults to the topic's subscribers)
+            time_window_hours: How far back a sent update counts
+            claim_ttl_seconds: Pending claims older than this are treated as abandoned
+                (defaults to Config.CLAIM_TTL_SECONDS)
+        
+        Returns:
+            (claim_id, claimed_updates) per recipient that claimed anything; each
+            recipient gets its own claim to commit or release
+        """
+        if not updates:
+            return {}
+        topic = canonical_topic(topic)
+        claim_ttl_seconds = Config.CLAIM_TTL_SECONDS if claim_ttl_seconds is None else claim_ttl_seconds
+        claim_base = uuid.uuid4().hex
+        with sqlite3.connect(self.db_path) as conn:
+            by_hash, source, source_params = self._load_fanout(conn, topic, updates, recipients)
+            # "WHERE true" lets SQLite parse the upsert clause after a SELECT with a join
+            rows = conn.execute('''
+                INSERT INTO sent_updates
+                (update_hash, topic, title, url, recipient, full_content, state, claim_id)
+                SELECT u.update_hash, ?, u.title, u.url, r.recipient, u.full_content, 'pending',
+                       ? || ':' || r.recipient
+                FROM {} AS r CROSS JOIN temp.fanout_updates AS u
+                WHERE true
+                ON CONFLICT (update_hash, topic, recipient) DO UPDATE SET
+                    state = 'pending', claim_id = excluded.claim_id, sent_at = CURRENT_TIMESTAMP,
+                    title = excluded.title, url = excluded.url, full_content = excluded.full_content
+                WHERE sent_updates.sent_at < datetime('now', '-{} hours')
+                   OR (sent_updates.state = 'pending' AND sent_updates.sent_at < datetime('now', '{:+d} seconds'))
+                RETURNING recipient, update_hash
+            '''.format(source, time_window_hours, -int(claim_ttl_seconds)),
+                (topic, claim_base) + source_params).fetchall()
+            conn.commit()
+        order = {update_hash: i for i, update_hash in enumerate(by_hash)}
+        claims: Dict[str, Tuple[str, List[Dict]]] = {}
+        for recipient, update_hash in sorted(rows, key=lambda row: order[row[1]]):
+            claims.setdefault(recipient, (f"{claim_base}:{recipient}", []))[1].append(by_hash[update_hash])
+        return claims
+    
+    @_operation("commit_claims")
+    def commit_claims(self, claim_ids: List[str]) -> int:
+        """Commit many claims in one transaction (see commit_claim).
+        
+        Returns:
+            Number of updates committed
+        """
+        with sqlite3.connect(self.db_path) as conn:
+            cursor = conn.executemany('''
+                UPDATE sent_updates SET state = 'committed', sent_at = CURRENT_TIMESTAMP
+                WHERE claim_id = ? AND state = 'pending'
+            ''', [(claim_id,) for claim_id in claim_ids])
+            conn.commit()
+            return cursor.rowcount
+    
+    @_operation("record_notifications")
+    def record_notifications(self, topic: str, notifications: Dict[str, Dict]):
+        """Mark notifications to many recipients as sent in one transaction.
+        
+        Args:
+            topic: The topic of the notifications
+            notifications: Notification data per recipient
+        """
+        topic = canonical_topic(topic)
+        sent_rows, history_rows, update_rows = [], [], []
+        # Recipients notified about the same update objects share their hashes
+        hashes: Dict[tuple, Tuple[str, str]] = {}
+        for recipient, notification_data in notifications.items():
+            data = json.dumps(notification_data)
+            relevant_updates = notification_data.get('relevant_updates', [])
+            key = tuple(id(update) for update in relevant_updates)
+            if key not in hashes:
+                hashes[key] = (self._generate_idempotency_key(topic, notification_data),
+                               self._generate_notification_hash(notification_data))
+            idempotency_key, notification_hash = hashes[key]
+            claim_id = notification_data.get('claim_id')
+            sent_rows.append((idempotency_key, topic, notification_hash, data, recipient, claim_id))
+            history_rows.append((topic, notification_hash, data, recipient, claim_id))
+            if notification_data.get('claim_id'):
+                # Claimed updates are already in sent_updates
+                continue
+            for update in relevant_updates:
+                update_rows.append((self._generate_update_hash(update), topic, update.get('title', ''),
+                                    update.get('url', ''), recipient, json.dumps(update)))
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executemany('''
+                INSERT OR IGNORE INTO sent_notifications
+                (idempotency_key, topic, notification_hash, notification_data, recipient, claim_id)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', sent_rows)
+            conn.executemany('''
+                INSERT INTO notification_history
+                (topic, notification_hash, notification_data, recipient, claim_id)
+                VALUES (?, ?, ?, ?, ?)
+            ''', history_rows)
+            conn.executemany('''
+                INSERT OR IGNORE INTO sent_updates (update_hash, topic, title, url, recipient, full_content)
+                VALUES (?, ?, ?, ?, ?, ?)
+            ''', update_rows)
+            conn.commit()
+    
+    @_operation("get_recent_notifications")
+    def get_recent_notifications(self, topic: Optional[str] = None, days: int = 7) -> List[Dict]:
         """Get recent notifications for a topic.
         
         Args:
-            topic: The topic to get notifications for
+            topic: The topic to get notifications for (None for all topics)
             days: Number of days to look back
             
         Returns:
-            List of recent notifications
+            List of recent notifications, newest first
         """
+        topic_filter, params = "", ()
+        if topic is not None:
+            topic_filter, params = "topic = ? AND ", (canonical_topic(topic),)
         with sqlite3.connect(self.db_path) as conn:
             cursor = conn.execute('''
                 SELECT notification_data, sent_at, recipient
                 FROM notification_history 
-                WHERE topic = ? AND sent_at >= datetime('now', '-{} days')
+                WHERE {}sent_at >= datetime('now', '-{} days')
                 ORDER BY sent_at DESC
-            '''.format(days), (topic,))
+            '''.format(topic_filter, days), params)
             
             results = []
             for row in cursor.fetchall():
@@ -232,13 +792,15 @@ class NotificationMemory:
             
             return results
     
+    @_operation("get_sent_updates")
     def get_sent_updates(self, topic: str, days: int = 7) -> List[Dict]:
         """Get individual sent updates for a topic within a time range."""
+        topic = canonical_topic(topic)
         with sqlite3.connect(self.db_path) as conn:
             cursor = conn.execute('''
                 SELECT title, url, sent_at, recipient, full_content
                 FROM sent_updates 
-                WHERE topic = ? AND sent_at >= datetime('now', '-{} days')
+                WHERE topic = ? AND state != 'dropped' AND sent_at >= datetime('now', '-{} days')
                 ORDER BY sent_at DESC
             '''.format(days), (topic,))
             results: List[Dict] = []
@@ -252,6 +814,7 @@ class NotificationMemory:
                 })
             return results
     
+    @_operation("get_notification_stats")
     def get_notification_stats(self) -> Dict:
         """Get statistics about sent notifications.
         
@@ -263,7 +826,8 @@ class NotificationMemory:
             total = conn.execute('SELECT COUNT(*) FROM notification_history').fetchone()[0]
             # Total individual updates
             try:
-                total_updates = conn.execute('SELECT COUNT(*) FROM sent_updates').fetchone()[0]
+                total_updates = conn.execute(
+                    "SELECT COUNT(*) FROM sent_updates WHERE state != 'dropped'").fetchone()[0]
             except Exception:
                 total_updates = 0
             
@@ -288,6 +852,7 @@ class NotificationMemory:
                 'notifications_by_topic': dict(topics)
             }
     
+    @_operation("cleanup_old_notifications")
     def cleanup_old_notifications(self, days: int = 30):
         """Clean up old notifications from the history table.
         
@@ -303,6 +868,10 @@ class NotificationMemory:
                 DELETE FROM sent_updates 
                 WHERE sent_at < datetime('now', '-{} days')
             '''.format(days))
+            # Expired result fingerprints are never used again
+            conn.execute('''
+                DELETE FROM result_fingerprints WHERE checked_at < datetime('now', ?)
+            ''', (f"-{int(Config.RESULT_FINGERPRINT_TTL_SECONDS)} seconds",))
             conn.commit()
     
     def reset_memory(self):
@@ -314,6 +883,7 @@ class NotificationMemory:
                 conn.execute('DELETE FROM sent_updates')
             except Exception:
                 pass
+            conn.execute('DELETE FROM result_fingerprints')
             conn.commit()
 
 
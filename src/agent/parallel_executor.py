@@ -0,0 +1,95 @@
+"""
+Parallel tool execution for the Event Action Agent.
+
+Provides an AgentExecutor that runs the independent tool calls the model
+emits in a single step concurrently on a thread pool, instead of one after
+the other, and merges the observations back in the order they were emitted.
+"""
+
+import contextvars
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from langchain.agents import AgentExecutor
+from langchain_core.agents import AgentAction, AgentFinish, AgentStep
+from langchain_core.callbacks import CallbackManagerForChainRun
+from langchain_core.tools import BaseTool
+
+
+# Per-thread state of the step currently being taken
+_step_state = threading.local()
+
+_pools: Dict[Tuple[str, int], ThreadPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+def get_tool_pool(max_workers: int, name: str = "agent-tool") -> ThreadPoolExecutor:
+    """Get the shared thread pool with the given name and size.
+
+    Work that may outlive its caller (see LangChainAgent._handle_update_query)
+    uses its own name so it cannot starve the agent's tool pool.
+    """
+    with _pools_lock:
+        pool = _pools.get((name, max_workers))
+        if pool is None:
+            pool = _pools[(name, max_workers)] = ThreadPoolExecutor(
+                max_workers=max_workers, thread_name_prefix=name
+            )
+        return pool
+
+
+class ParallelAgentExecutor(AgentExecutor):
+    """AgentExecutor that dispatches the tool calls of one step concurrently.
+
+    Steps with a single tool call run inline exactly like AgentExecutor.
+    Observations of concurrent calls are yielded in the order the model
+    emitted the calls, so intermediate steps stay deterministic.
+    """
+
+    max_workers: int = 4
+    """Maximum number of tool calls run at the same time."""
+
+    def _iter_next_step(
+        self,
+        name_to_tool_map: Dict[str, BaseTool],
+        color_mapping: Dict[str, str],
+        inputs: Dict[str, str],
+        intermediate_steps: List[Tuple[AgentAction, str]],
+        run_manager: Optional[CallbackManagerForChainRun] = None,
+    ) -> Iterator[Union[AgentFinish, AgentAction, AgentStep]]:
+        # AgentExecutor yields every action of the step before performing any
+        # of them, so the action count is known by the first _perform_agent_action
+        previous_state = getattr(_step_state, "action_count", None)
+        _step_state.action_count = 0
+        pending: List[Future] = []
+        try:
+            for item in super()._iter_next_step(
+                name_to_tool_map, color_mapping, inputs, intermediate_steps, run_manager
+            ):
+                if isinstance(item, Future):
+                    pending.append(item)
+                    continue
+                if isinstance(item, AgentAction):
+                    _step_state.action_count += 1
+                yield item
+        finally:
+            _step_state.action_count = previous_state
+        for future in pending:
+            yield future.result()
+
+    def _perform_agent_action(
+        self,
+        name_to_tool_map: Dict[str, BaseTool],
+        color_mapping: Dict[str, str],
+        agent_action: AgentAction,
+        run_manager: Optional[CallbackManagerForChainRun] = None,
+    ) -> Union[AgentStep, Future]:
+        perform = super()._perform_agent_action
+        if (getattr(_step_state, "action_count", None) or 0) < 2:
+            return perform(name_to_tool_map, color_mapping, agent_action, run_manager)
+        # Copy the context so the active instrumentation trace follows the call
+        context = contextvars.copy_context()
+        return get_tool_pool(self.max_workers).submit(
+            context.run, perform, name_to_tool_map, color_mapping, agent_action, run_manager
+        )
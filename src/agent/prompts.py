@@ -31,3 +31,17 @@ IMPORTANT:
 - Keep it simple and clear
 
 Using Hugging Face with model: {model_name}"""
+    
+    @staticmethod
+    def get_action_plan_prompt() -> str:
+        """Get the prompt that turns event action text into a JSON plan."""
+        return """You convert monitoring event actions into JSON plans.
+
+The user message is an action such as "If any update in tax policy then send email to the user".
+Reply with a single JSON object and nothing else:
+{"topic": "<what to watch, a short noun phrase>",
+ "condition": "any_update",
+ "channel": "email",
+ "recipients": ["<email address>", ...]}
+
+Use "default" as the only recipient when no address is given."""
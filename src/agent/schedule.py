@@ -0,0 +1,269 @@
+"""
+Schedule parsing for the Event Action Agent.
+
+Turns an event's ``cron_job`` text into the next time the event should run.
+Both English schedules ("Every day at 12:00 AM", "Every Monday at 9 AM",
+"Every 15 minutes") and standard 5-field cron strings ("0 9 * * 1-5") are
+supported. Expressions are compiled once into a CompiledSchedule and cached
+by their normalized text, so computing next run times for many events that
+share a schedule never re-parses it.
+"""
+
+import bisect
+import calendar
+import re
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import FrozenSet, List, Optional, Sequence
+
+
+WEEKDAYS = {
+    "monday": 0, "tuesday": 1, "wednesday": 2, "thursday": 3, "friday": 4, "saturday": 5, "sunday": 6,
+    "mon": 0, "tue": 1, "wed": 2, "thu": 3, "fri": 4, "sat": 5, "sun": 6
+}
+MONTHS = {name.lower(): i for i, name in enumerate(calendar.month_abbr) if name}
+
+_TIME = r"(\d{1,2})(?::(\d{2}))?\s*(am|pm)?"
+_DAILY_RE = re.compile(r"^(?:every\s+day|daily)(?:\s+at\s+" + _TIME + r")?$")
+_WEEKDAYS_RE = re.compile(r"^every\s+(weekday|weekend\s*day|[a-z]+?)s?(?:\s+at\s+" + _TIME + r")?$")
+_INTERVAL_RE = re.compile(r"^every\s+(\d+\s+)?(minute|hour|day)s?$")
+_ALIASES = {"hourly": "every hour", "daily": "every day", "every week": "every monday", "weekly": "every monday"}
+
+# Cron names use Sunday = 0 (7 is also accepted); datetime.weekday() uses Monday = 0
+_CRON_WEEKDAYS = {"sun": 0, "mon": 1, "tue": 2, "wed": 3, "thu": 4, "fri": 5, "sat": 6}
+# A cron expression that matches no date within this many years never fires
+_CRON_SEARCH_YEARS = 8
+
+
+class CompiledSchedule(ABC):
+    """A parsed schedule that computes fire times without re-parsing."""
+
+    @abstractmethod
+    def next_after(self, after: datetime) -> Optional[datetime]:
+        """Get the first fire time strictly after a given (naive local) time."""
+
+
+class IntervalSchedule(CompiledSchedule):
+    """Fires every fixed interval, counted from the last run."""
+
+    def __init__(self, interval: timedelta):
+        self.interval = interval
+
+    def next_after(self, after: datetime) -> Optional[datetime]:
+        return after.replace(second=0, microsecond=0) + self.interval
+
+    def __repr__(self) -> str:
+        return f"IntervalSchedule({self.interval})"
+
+
+class TimeOfDaySchedule(CompiledSchedule):
+    """Fires at a fixed time of day on a set of weekdays."""
+
+    def __init__(self, hour: int, minute: int, weekdays: FrozenSet[int] = frozenset(range(7))):
+        self.hour = hour
+        self.minute = minute
+        self.weekdays = weekdays
+
+    def next_after(self, after: datetime) -> Optional[datetime]:
+        candidate = after.replace(hour=self.hour, minute=self.minute, second=0, microsecond=0)
+        if candidate <= after:
+            candidate += timedelta(days=1)
+        # At most six days to skip to an allowed weekday
+        while candidate.weekday() not in self.weekdays:
+            candidate += timedelta(days=1)
+        return candidate
+
+    def __repr__(self) -> str:
+        return f"TimeOfDaySchedule({self.hour:02d}:{self.minute:02d}, weekdays={sorted(self.weekdays)})"
+
+
+class CronSchedule(CompiledSchedule):
+    """Standard 5-field cron schedule (minute hour day-of-month month day-of-week)."""
+
+    def __init__(self, minutes: Sequence[int], hours: Sequence[int], days: Sequence[int],
+                 months: Sequence[int], weekdays: Sequence[int], days_restricted: bool = True,
+                 weekdays_restricted: bool = True):
+        self.minutes: List[int] = sorted(minutes)
+        self.hours: List[int] = sorted(hours)
+        self.days = frozenset(days)
+        self.months = frozenset(months)
+        # Stored as datetime.weekday() values (Monday = 0)
+        self.weekdays = frozenset((day - 1) % 7 for day in weekdays)
+        self.days_restricted = days_restricted
+        self.weekdays_restricted = weekdays_restricted
+
+    def _day_matches(self, day: datetime) -> bool:
+        if day.month not in self.months:
+            return False
+        in_days = day.day in self.days
+        in_weekdays = day.weekday() in self.weekdays
+        # Cron rule: when both fields are restricted, either one matching is enough
+        if self.days_restricted and self.weekdays_restricted:
+            return in_days or in_weekdays
+        return in_days and in_weekdays
+
+    def next_after(self, after: datetime) -> Optional[datetime]:
+        start = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        day = start.replace(hour=0, minute=0)
+        # First day: only times at or after start count
+        if self._day_matches(day):
+            fire = self._first_time_on(day, start.hour, start.minute)
+            if fire is not None:
+                return fire
+        limit = day + timedelta(days=366 * _CRON_SEARCH_YEARS)
+        day += timedelta(days=1)
+        while day < limit:
+            if day.month not in self.months:
+                # Skip the rest of the month in one step
+                day = (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+                continue
+            if self._day_matches(day):
+                return day.replace(hour=self.hours[0], minute=self.minutes[0])
+            day += timedelta(days=1)
+        return None
+
+    def _first_time_on(self, day: datetime, hour: int, minute: int) -> Optional[datetime]:
+        """Get the first matching time on a day at or after hour:minute."""
+        i = bisect.bisect_left(self.hours, hour)
+        if i == len(self.hours):
+            return None
+        if self.hours[i] == hour:
+            j = bisect.bisect_left(self.minutes, minute)
+            if j < len(self.minutes):
+                return day.replace(hour=hour, minute=self.minutes[j])
+            i += 1
+            if i == len(self.hours):
+                return None
+        return day.replace(hour=self.hours[i], minute=self.minutes[0])
+
+    def __repr__(self) -> str:
+        return f"CronSchedule(minutes={self.minutes}, hours={self.hours})"
+
+
+def _parse_time(hour_text: Optional[str], minute_text: Optional[str], meridiem: Optional[str]) -> Optional[tuple]:
+    """Parse the "H[:MM] [AM|PM]" part of an English schedule into (hour, minute)."""
+    if hour_text is None:
+        return 0, 0
+    hour, minute = int(hour_text), int(minute_text or 0)
+    if meridiem:
+        if not 1 <= hour <= 12:
+            return None
+        hour = hour % 12 + (12 if meridiem == "pm" else 0)
+    if hour > 23 or minute > 59:
+        return None
+    return hour, minute
+
+
+def _parse_cron_field(field: str, low: int, high: int, names: Optional[dict] = None) -> Optional[List[int]]:
+    """Expand one cron field ("*", "*/15", "1-5", "mon,wed", "0-30/10") into its values."""
+    values = set()
+    for part in field.split(","):
+        base, _, step_text = part.partition("/")
+        step = 1
+        if step_text:
+            if not step_text.isdigit() or int(step_text) < 1:
+                return None
+            step = int(step_text)
+        if base == "*":
+            start, end = low, high
+        else:
+            bounds = base.split("-")
+            if len(bounds) > 2:
+                return None
+            try:
+                numbers = [names[b] if names and b in names else int(b) for b in bounds]
+            except ValueError:
+                return None
+            start = numbers[0]
+            end = numbers[-1] if len(numbers) == 2 else (high if step_text else start)
+        if not low <= start <= end <= high:
+            return None
+        values.update(range(start, end + 1, step))
+    return sorted(values)
+
+
+def _compile_cron(fields: List[str]) -> Optional[CronSchedule]:
+    minutes = _parse_cron_field(fields[0], 0, 59)
+    hours = _parse_cron_field(fields[1], 0, 23)
+    days = _parse_cron_field(fields[2], 1, 31)
+    months = _parse_cron_field(fields[3], 1, 12, MONTHS)
+    weekdays = _parse_cron_field(fields[4], 0, 7, _CRON_WEEKDAYS)
+    if None in (minutes, hours, days, months, weekdays):
+        return None
+    return CronSchedule(minutes, hours, days, months, weekdays,
+                        days_restricted=not fields[2].startswith("*"),
+                        weekdays_restricted=not fields[4].startswith("*"))
+
+
+@lru_cache(maxsize=4096)
+def _compile(text: str) -> Optional[CompiledSchedule]:
+    """Compile a normalized schedule expression (cached)."""
+    text = _ALIASES.get(text, text)
+
+    fields = text.split(" ")
+    if len(fields) == 5 and re.fullmatch(r"[\d*/,\-]+", fields[0]):
+        return _compile_cron(fields)
+
+    match = _DAILY_RE.match(text)
+    if match and match.group(1) is not None:
+        time_of_day = _parse_time(*match.groups())
+        return TimeOfDaySchedule(*time_of_day) if time_of_day else None
+
+    match = _INTERVAL_RE.match(text)
+    if match:
+        count = int(match.group(1) or 1)
+        if count < 1:
+            return None
+        unit = {"minute": timedelta(minutes=1), "hour": timedelta(hours=1), "day": timedelta(days=1)}[match.group(2)]
+        return IntervalSchedule(unit * count)
+
+    match = _WEEKDAYS_RE.match(text)
+    if match:
+        name = match.group(1).replace(" ", "")
+        if name == "weekday":
+            weekdays = frozenset(range(5))
+        elif name == "weekendday":
+            weekdays = frozenset((5, 6))
+        elif name in WEEKDAYS:
+            weekdays = frozenset((WEEKDAYS[name],))
+        else:
+            return None
+        time_of_day = _parse_time(*match.groups()[1:])
+        return TimeOfDaySchedule(*time_of_day, weekdays=weekdays) if time_of_day else None
+
+    return None
+
+
+@lru_cache(maxsize=4096)
+def compile_schedule(cron_job: str) -> Optional[CompiledSchedule]:
+    """Compile a schedule expression, reusing the cached result for equal text.
+
+    Results are cached both by the exact text and by its normalized form, so
+    "Every day at 12:00 AM" and "every  day at 12:00 am" share one schedule.
+
+    Args:
+        cron_job: English schedule or 5-field cron string
+
+    Returns:
+        The compiled schedule, or None if the expression is not understood
+    """
+    return _compile(" ".join(cron_job.lower().split()))
+
+
+def next_run_time(cron_job: str, after: datetime) -> Optional[datetime]:
+    """Get the first run time of a schedule strictly after a given time.
+
+    Supports "Every day [at H[:MM] [AM|PM]]", "Every <weekday|weekday name> [at ...]",
+    "Every [N] minute(s)/hour(s)/day(s)", "hourly", "daily", "weekly" and 5-field
+    cron strings.
+
+    Args:
+        cron_job: The schedule text
+        after: Time to search from (naive local time)
+
+    Returns:
+        The next run time, or None if the schedule is not understood
+    """
+    schedule = compile_schedule(cron_job)
+    return schedule.next_after(after) if schedule else None
@@ -0,0 +1,232 @@
+"""
+Event Scheduler
+
+In-process scheduler that fires monitoring events at their next run time.
+Fire times are kept in a binary heap, so scheduling and firing an event is
+O(log n) regardless of how many events exist. A deterministic per-event
+jitter spreads events sharing a schedule ("Every day at 12:00 AM") over a
+window, and events missed while the process was down fire once on startup.
+"""
+
+import hashlib
+import heapq
+import json
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .action_plan import action_compiler, unsupported_reason
+from .config import Config
+from .event_store import EventStore
+from .metrics import SKIPPED_EVENTS
+
+
+def event_topic(event: Dict) -> str:
+    """Get the topic an event's action watches.
+
+    "If any update in tax policy then send email to the user" -> "tax policy"
+    """
+    plan = event.get("plan") or action_compiler.compile(event.get("action", ""))
+    return plan["topic"]
+
+
+def run_event_check(event: Dict) -> Dict:
+    """Run the checkIsMailneedtoSend flow for a fired event.
+
+    Events whose plan cannot be carried out (see action_plan.unsupported_reason)
+    are not checked.
+
+    Returns:
+        The parsed email decision
+    """
+    # Imported here so the scheduler can be used without loading LangChain
+    from .tools import checkIsMailneedtoSend
+    plan = event.get("plan") or action_compiler.compile(event["action"])
+    reason = unsupported_reason(plan)
+    if reason is not None:
+        SKIPPED_EVENTS.inc()
+        return {"should_send_email": False, "reasoning": reason, "event_analyzed": event}
+    event_data = {"topic": plan["topic"], "event_id": event["id"], "event_name": event["name"],
+                  "recipients": plan["recipients"]}
+    return json.loads(checkIsMailneedtoSend.invoke({"event_data": json.dumps(event_data)}))
+
+
+class EventScheduler:
+    """Fires events from an EventStore when their next run time arrives."""
+
+    def __init__(self, store: EventStore, run_event: Callable[[Dict], Any] = run_event_check,
+                 jitter: Optional[float] = None, catch_up: Optional[bool] = None,
+                 clock: Callable[[], float] = time.time,
+                 run_batch: Optional[Callable[[List[Dict]], Any]] = None):
+        """Initialize the scheduler and load every scheduled event.
+
+        Args:
+            store: Store the events come from; changes to it are picked up automatically
+            run_event: Called with each fired event
+            jitter: Maximum seconds an event is delayed past its run time (defaults to
+                Config.SCHEDULER_JITTER_SECONDS)
+            catch_up: Fire events whose run time passed while the scheduler was not
+                running (defaults to Config.SCHEDULER_CATCH_UP); otherwise skip them
+            clock: Returns the current time as a Unix timestamp
+            run_batch: Called once per tick with all due events instead of calling
+                run_event per event (e.g. BatchPlanner.run)
+        """
+        self.store = store
+        self.run_event = run_event
+        self.run_batch = run_batch
+        self.jitter = Config.SCHEDULER_JITTER_SECONDS if jitter is None else jitter
+        self.catch_up = Config.SCHEDULER_CATCH_UP if catch_up is None else catch_up
+        self.clock = clock
+        # (fire_at, event_id, generation); entries whose generation is no longer
+        # current are stale and skipped when popped (lazy deletion)
+        self._heap: List[Tuple[float, int, int]] = []
+        self._generations: Dict[int, int] = {}
+        self._cv = threading.Condition()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.fired = 0
+        self.failed = 0
+        self._load()
+        store.add_listener(self._on_store_change)
+
+    def _load(self):
+        """Build the heap from the store in O(n)."""
+        now = self.clock()
+        skipped = []
+        with self._cv:
+            for event in self.store.due_events(now=float("inf")):
+                if not self.catch_up and event["next_run_at"] <= now:
+                    skipped.append((event["id"], now, None))
+                    continue
+                self._generations[event["id"]] = 0
+                self._heap.append((self._fire_time(event), event["id"], 0))
+            heapq.heapify(self._heap)
+        # Skipped events move straight to their next future run time
+        for event in self.store.mark_runs(skipped):
+            self.schedule(event)
+
+    def _fire_time(self, event: Dict) -> float:
+        """Get the jittered fire time of an event's next run."""
+        if not self.jitter:
+            return event["next_run_at"]
+        # Deterministic per event and run, so restarts do not reshuffle the spread
+        digest = hashlib.blake2b(f"{event['id']}:{event['next_run_at']}".encode(), digest_size=4).digest()
+        return event["next_run_at"] + self.jitter * int.from_bytes(digest, "big") / 2 ** 32
+
+    def schedule(self, event: Dict):
+        """(Re)schedule an event at its next run time, replacing any earlier entry."""
+        with self._cv:
+            generation = self._generations.get(event["id"], -1) + 1
+            self._generations[event["id"]] = generation
+            if event.get("next_run_at") is None:
+                return
+            entry = (self._fire_time(event), event["id"], generation)
+            heapq.heappush(self._heap, entry)
+            if self._heap[0] is entry:
+                # New earliest event: wake the loop so it can shorten its sleep
+                self._cv.notify()
+
+    def unschedule(self, event_id: int):
+        """Stop firing an event."""
+        with self._cv:
+            if event_id in self._generations:
+                self._generations[event_id] += 1
+
+    def _on_store_change(self, kind: str, event: Dict):
+        if kind == "deleted":
+            self.unschedule(event["id"])
+        else:
+            self.schedule(event)
+
+    def __len__(self) -> int:
+        return len(self._generations)
+
+    def next_fire_time(self) -> Optional[float]:
+        """Get the time the next event fires, if any."""
+        with self._cv:
+            self._drop_stale()
+            return self._heap[0][0] if self._heap else None
+
+    def _drop_stale(self):
+        while self._heap and self._generations.get(self._heap[0][1]) != self._heap[0][2]:
+            heapq.heappop(self._heap)
+
+    def pop_due(self, now: Optional[float] = None) -> List[Dict]:
+        """Remove and return every event due at ``now``, earliest first."""
+        now = self.clock() if now is None else now
+        due = []
+        with self._cv:
+            while self._heap and self._heap[0][0] <= now:
+                _, event_id, generation = heapq.heappop(self._heap)
+                if self._generations.get(event_id) != generation:
+                    continue
+                try:
+                    due.append(self.store.get(event_id))
+                except KeyError:
+                    self._generations.pop(event_id, None)
+        return due
+
+    def tick(self, now: Optional[float] = None) -> int:
+        """Fire every due event, then advance each to its next run time.
+
+        Returns:
+            Number of events fired
+        """
+        now = self.clock() if now is None else now
+        due = self.pop_due(now)
+        if not due:
+            return 0
+        if self.run_batch is not None:
+            self._fire_batch(due)
+        else:
+            for event in due:
+                self._fire(event)
+        for event in self.store.mark_runs([(event["id"], now, None) for event in due]):
+            self.schedule(event)
+        return len(due)
+
+    def _fire(self, event: Dict):
+        try:
+            self.run_event(event)
+            self.fired += 1
+        except Exception as e:
+            self.failed += 1
+            print(f"Scheduled event {event['id']} ({event['name']}) failed: {e}")
+
+    def _fire_batch(self, events: List[Dict]):
+        try:
+            self.run_batch(events)
+            self.fired += len(events)
+        except Exception as e:
+            self.failed += len(events)
+            print(f"Scheduled batch of {len(events)} events failed: {e}")
+
+    # Background loop
+
+    def run_forever(self):
+        """Fire events as they come due until stop() is called."""
+        while not self._stop.is_set():
+            self.tick()
+            with self._cv:
+                next_fire = self.next_fire_time()
+                timeout = Config.SCHEDULER_MAX_SLEEP
+                if next_fire is not None:
+                    timeout = min(timeout, max(0.0, next_fire - self.clock()))
+                if timeout > 0 and not self._stop.is_set():
+                    self._cv.wait(timeout)
+
+    def start(self):
+        """Run the scheduler loop on a background thread."""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self.run_forever, name="event-scheduler", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None):
+        """Stop the background loop."""
+        self._stop.set()
+        with self._cv:
+            self._cv.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
@@ -0,0 +1,110 @@
+"""
+Search result cache for the Event Action Agent.
+
+A small thread-safe TTL cache for web search results. Concurrent lookups of
+the same key share a single in-flight search instead of each issuing their
+own, so the update-query tools and equivalent topics reuse one search.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from .config import Config
+from .metrics import SEARCH_CACHE_ENTRIES
+
+
+class SearchCache:
+    """TTL + LRU cache with single-flight loading."""
+
+    def __init__(self, ttl: float = 300.0, max_entries: int = 256):
+        """Initialize the cache.
+
+        Args:
+            ttl: Seconds a result stays fresh (0 disables caching)
+            max_entries: Maximum number of cached results
+        """
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Get a fresh cached value, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        """Store a value under key."""
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_or_fetch(self, key: Hashable, fetch: Callable[[], Any]) -> Any:
+        """Get the cached value for key, calling fetch once on a miss.
+
+        Callers that miss while another caller is already fetching the same
+        key wait for that result. Exceptions from fetch are not cached.
+        """
+        if self.ttl <= 0:
+            return fetch()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] >= time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+                self.misses += 1
+            else:
+                self.hits += 1
+        if not owner:
+            return future.result()
+        try:
+            value = fetch()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            self.put(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def clear(self):
+        """Drop all cached results."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# Global instance for easy access
+search_cache = SearchCache(ttl=Config.SEARCH_CACHE_TTL, max_entries=Config.SEARCH_CACHE_SIZE)
+SEARCH_CACHE_ENTRIES.set_function(lambda: len(search_cache))
@@ -0,0 +1,162 @@
+"""
+Local SMTP sink for tests and benchmarks.
+
+A small threaded SMTP server that accepts every message and keeps it in
+memory instead of relaying it. It speaks enough of RFC 5321 for smtplib
+(EHLO/HELO, MAIL, RCPT, DATA, RSET, NOOP, QUIT), counts connections so
+tests can check that delivery reuses them, and can be told to reject the
+next messages to exercise retries:
+
+    with LocalSMTPSink() as sink:
+        pool = SMTPPool(host=sink.host, port=sink.port)
+        ...
+        assert len(sink.messages) == 10
+        assert sink.connections == 1
+"""
+
+import socketserver
+import threading
+import time
+from email import message_from_bytes, policy
+from email.message import Message
+from typing import Dict, List, Optional, Tuple
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    """Handles one SMTP session."""
+
+    server: "_SMTPServer"
+
+    def reply(self, line: str):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        sink = self.server.sink
+        sink._connected()
+        self.reply("220 localhost Local SMTP sink ready")
+        sender: Optional[str] = None
+        recipients: List[str] = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command, _, argument = line.decode("utf-8", "replace").rstrip("\r\n").partition(" ")
+            command = command.upper()
+            if command == "EHLO":
+                self.reply("250-localhost")
+                self.reply("250-PIPELINING")
+                self.reply("250 8BITMIME")
+            elif command == "HELO":
+                self.reply("250 localhost")
+            elif command == "MAIL":
+                sender, recipients = argument.partition(":")[2].strip().strip("<>"), []
+                self.reply("250 OK")
+            elif command == "RCPT":
+                recipients.append(argument.partition(":")[2].strip().strip("<>"))
+                self.reply("250 OK")
+            elif command == "DATA":
+                if sender is None or not recipients:
+                    self.reply("503 Bad sequence of commands")
+                    continue
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                data = self._read_data()
+                self.reply(sink._accept(sender, recipients, data))
+                sender, recipients = None, []
+            elif command == "RSET":
+                sender, recipients = None, []
+                self.reply("250 OK")
+            elif command == "NOOP":
+                self.reply("250 OK")
+            elif command == "QUIT":
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+    def _read_data(self) -> bytes:
+        lines = []
+        while True:
+            line = self.rfile.readline()
+            if not line or line in (b".\r\n", b".\n"):
+                break
+            # Undo dot-stuffing
+            lines.append(line[1:] if line.startswith(b"..") else line)
+        return b"".join(lines)
+
+
+class _SMTPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address: Tuple[str, int], sink: "LocalSMTPSink"):
+        self.sink = sink
+        super().__init__(address, _SMTPHandler)
+
+
+class LocalSMTPSink:
+    """In-memory SMTP server running on a background thread."""
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0):
+        """Initialize the sink (call start() or use it as a context manager).
+
+        Args:
+            host: Interface to listen on
+            port: Port to listen on (0 picks a free port; see .port after start)
+            latency: Seconds to wait before answering each DATA, to imitate a real server
+        """
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.messages: List[Dict] = []
+        self.connections = 0
+        self._failures: List[str] = []
+        self._lock = threading.Lock()
+        self._server: Optional[_SMTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "LocalSMTPSink":
+        """Start listening."""
+        self._server = _SMTPServer((self.host, self.port), self)
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.1,), name="smtp-sink",
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop listening and close the server socket."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "LocalSMTPSink":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def fail_next(self, count: int = 1, reply: str = "451 Temporary local problem"):
+        """Reject the next messages with an SMTP reply (4xx is retried, 5xx is permanent)."""
+        with self._lock:
+            self._failures.extend([reply] * count)
+
+    def recipients(self) -> List[str]:
+        """Get the recipients of all accepted messages, in arrival order."""
+        with self._lock:
+            return [to for message in self.messages for to in message["to"]]
+
+    def _connected(self):
+        with self._lock:
+            self.connections += 1
+
+    def _accept(self, sender: str, recipients: List[str], data: bytes) -> str:
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            if self._failures:
+                return self._failures.pop(0)
+            message: Message = message_from_bytes(data, policy=policy.default)
+            self.messages.append({"from": sender, "to": list(recipients), "message": message,
+                                  "subject": str(message.get("Subject", ""))})
+            return "250 OK: queued"
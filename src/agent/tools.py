@@ -1,66 +1,64 @@
 import json
-from typing import List, Dict, Any
-from langchain.tools import tool
+from typing import List, Dict, Any, Optional
+from langchain_core.tools import tool
 from ddgs import DDGS
 from .notification_memory import notification_memory
-from datetime import datetime
+from .instrumentation import timed, dumps, loads
+from .search_cache import search_cache
+from .topics import canonical_topic
+from .limits import stage_limits
+from .delivery import get_delivery_service
+from .digest import get_digest_buffer
+from .email_content import create_email_content
+from .metrics import (SEARCHES, SEARCH_ERRORS, SEARCH_SECONDS, SEARCH_RESULTS, RELEVANT_RESULTS,
+                      RESULT_CHECKS, UPDATES)
 
 
-def create_email_content(topic: str, updates: List[Dict], recipient: str = "User") -> Dict[str, str]:
-    """Create email subject and body content for notifications.
+def _run_search(query: str, max_results: int) -> List[Dict[str, str]]:
+    """Run a DuckDuckGo text search and normalize the results."""
+    results = []
+    with stage_limits.limit("search"), timed("search.ddgs", query=query), SEARCH_SECONDS.time():
+        try:
+            with DDGS() as ddgs:
+                for r in ddgs.text(query, max_results=max_results):
+                    results.append({
+                        "title": r.get("title", ""),
+                        "url": r.get("href") or r.get("url", ""),
+                        "snippet": r.get("body", "")
+                    })
+        except Exception:
+            SEARCH_ERRORS.inc()
+            raise
+    return results
+
+
+def cached_search(query: str, max_results: int = 5, topic: Optional[str] = None) -> List[Dict[str, str]]:
+    """Search the web, sharing results between searches on the same canonical topic.
     
     Args:
-        topic: The topic of the updates
-        updates: List of update dictionaries with title, url, snippet
-        recipient: Name of the email recipient
+        query: The search query to run on a cache miss
+        max_results: Maximum number of search results
+        topic: Topic the results are cached under; searches for equivalent topics
+            share them. Without a topic the results are cached under the query
+            itself (case and whitespace normalized), since canonical keys drop
+            words that matter in a free-form search.
         
     Returns:
-        Dictionary with 'subject' and 'body' keys containing email content
+        List of result dictionaries with title, url and snippet
     """
-    if not updates:
-        return {
-            "subject": f"No new updates found for {topic}",
-            "body": f"Hello {recipient},\n\nNo new updates were found for the topic '{topic}' at this time.\n\nBest regards,\nEvent Action Agent"
-        }
+    if topic is not None:
+        key = ("topic", canonical_topic(topic), max_results)
+    else:
+        key = ("query", " ".join(query.lower().split()), max_results)
+    fetched = []
     
-    subject = f"🔔 {len(updates)} New Update{'s' if len(updates) > 1 else ''} on {topic.title()}"
-    current_date = datetime.now().strftime("%B %d, %Y at %I:%M %p")
-    
-    body_parts: List[str] = [
-        f"Hello {recipient},",
-        "",
-        f"We found {len(updates)} new update{'s' if len(updates) > 1 else ''} on '{topic}' as of {current_date}:",
-        "",
-        "📋 Updates Summary:",
-        ""
-    ]
-    
-    for i, update in enumerate(updates, 1):
-        title = update.get('title', 'No title available')
-        url = update.get('url', 'No URL available')
-        snippet = update.get('snippet', 'No description available')
-        if len(snippet) > 200:
-            snippet = snippet[:200] + "..."
-        body_parts.extend([
-            f"{i}. {title}",
-            f"   Link: {url}",
-            f"   Summary: {snippet}",
-            ""
-        ])
-    
-    body_parts.extend([
-        "---",
-        "",
-        "This is an automated notification from Event Action Agent.",
-        "",
-        "Best regards,",
-        "Event Action Agent"
-    ])
+    def fetch():
+        fetched.append(True)
+        return _run_search(query, max_results)
     
-    return {
-        "subject": subject,
-        "body": "\n".join(body_parts)
-    }
+    results = list(search_cache.get_or_fetch(key, fetch))
+    SEARCHES.labels(source="web" if fetched else "cache").inc()
+    return results
 
 
 @tool
@@ -75,19 +73,296 @@ def search_web(query: str, max_results: int = 5) -> str:
         JSON string containing search results with title, url, and snippet
     """
     try:
-        results = []
-        with DDGS() as ddgs:
-            for r in ddgs.text(query, max_results=max_results):
-                results.append({
-                    "title": r.get("title", ""),
-                    "url": r.get("href") or r.get("url", ""),
-                    "snippet": r.get("body", "")
-                })
-        return json.dumps(results, ensure_ascii=False, indent=2)
+        results = cached_search(query, max_results)
+        return dumps(results, ensure_ascii=False, indent=2)
     except Exception as e:
         return json.dumps({"error": f"Search failed: {str(e)}"})
 
 
+# Words in a search result that indicate a recent update
+RECENT_KEYWORDS = ["today", "yesterday", "latest", "new", "updated", "announced", "released", "published"]
+DATE_KEYWORDS = ["2024", "2025", "january", "february", "march", "april", "may", "june",
+                 "july", "august", "september", "october", "november", "december"]
+
+
+def update_search_query(topic: str) -> str:
+    """Get the web search query used to look for updates on a topic."""
+    return f"latest updates {topic} today recent changes"
+
+
+def find_relevant_updates(search_results: List[Dict]) -> List[Dict]:
+    """Keep the search results that look like recent updates.
+    
+    Args:
+        search_results: Result dictionaries with title, url and snippet
+        
+    Returns:
+        The results mentioning a recent-update keyword or a date
+    """
+    relevant_updates = []
+    for result in search_results:
+        title_lower = result["title"].lower()
+        snippet_lower = result["snippet"].lower()
+        
+        # Check for recent update indicators
+        has_recent_keywords = any(keyword in title_lower or keyword in snippet_lower 
+                                for keyword in RECENT_KEYWORDS)
+        has_date_keywords = any(keyword in title_lower or keyword in snippet_lower 
+                              for keyword in DATE_KEYWORDS)
+        
+        if has_recent_keywords or has_date_keywords:
+            relevant_updates.append(result)
+    SEARCH_RESULTS.inc(len(search_results))
+    RELEVANT_RESULTS.inc(len(relevant_updates))
+    return relevant_updates
+
+
+def _notification_result(topic: str, event: Dict, search_query: str, search_results: List[Dict],
+                         new_updates: List[Dict], already_sent_updates: List[Dict],
+                         claim_id: Optional[str] = None, email_content: Optional[Dict] = None) -> Dict:
+    """Build the notification data returned for one recipient."""
+    if new_updates:
+        return {
+            "should_send_email": True,
+            "reasoning": f"Found {len(new_updates)} new updates for '{topic}' ({len(already_sent_updates)} already sent)",
+            "topic_searched": topic,
+            "search_query": search_query,
+            "relevant_updates": new_updates,
+            "already_sent_updates": already_sent_updates,
+            "total_search_results": len(search_results),
+            "event_analyzed": event,
+            "email_content": email_content or create_email_content(topic, new_updates),
+            "claim_id": claim_id
+        }
+    
+    # All updates were already sent previously
+    return {
+        "should_send_email": False,
+        "reasoning": f"All {len(already_sent_updates)} updates for '{topic}' were already sent previously",
+        "topic_searched": topic,
+        "search_query": search_query,
+        "relevant_updates": [],
+        "already_sent_updates": already_sent_updates,
+        "total_search_results": len(search_results),
+        "event_analyzed": event,
+        "email_content": create_email_content(topic, already_sent_updates) if already_sent_updates else None
+    }
+
+
+def _no_updates_result(topic: str, event: Dict, search_query: str, search_results: List[Dict]) -> Dict:
+    return {
+        "should_send_email": False,
+        "reasoning": "No relevant updates found",
+        "topic_searched": topic,
+        "search_query": search_query,
+        "relevant_updates": [],
+        "already_sent_updates": [],
+        "total_search_results": len(search_results),
+        "event_analyzed": event,
+        "email_content": None
+    }
+
+
+def _unchanged_result(topic: str, event: Dict, search_query: str, search_results: List[Dict]) -> Dict:
+    return {
+        "should_send_email": False,
+        "reasoning": f"No new results for '{topic}' since the last check",
+        "topic_searched": topic,
+        "search_query": search_query,
+        "relevant_updates": [],
+        "already_sent_updates": [],
+        "total_search_results": len(search_results),
+        "event_analyzed": event,
+        "email_content": None
+    }
+
+
+def changed_results(topic: str, search_results: List[Dict], recipients: List[str]) -> List[Dict]:
+    """Get the search results some recipient was not checked against yet.
+    
+    See NotificationMemory.changed_results; an empty list for non-empty
+    search results means the check can be skipped.
+    """
+    changed = notification_memory.changed_results(topic, search_results, recipients)
+    if search_results:
+        change = "none" if not changed else "all" if len(changed) == len(search_results) else "partial"
+        RESULT_CHECKS.labels(change=change).inc()
+    return changed
+
+
+def settle_notifications(topic: str, notifications: Dict[str, Dict]):
+    """Settle the claims of notifications that will be sent, keyed by recipient.
+    
+    Updates are buffered for each recipient's digest or handed to the
+    delivery service (either commits the claim once the email is accepted);
+    when delivery is not configured the claims are committed right away.
+    """
+    claimed = {recipient: data for recipient, data in notifications.items() if data.get("claim_id")}
+    if not claimed:
+        return
+    delivery = get_delivery_service()
+    digest = get_digest_buffer() if delivery is not None else None
+    if digest is not None:
+        for recipient, data in claimed.items():
+            digest.add(recipient, topic, data["relevant_updates"], data["claim_id"])
+    elif delivery is not None:
+        for recipient, data in claimed.items():
+            delivery.submit(data, recipient=recipient)
+    else:
+        with stage_limits.limit("db"):
+            notification_memory.commit_claims([data["claim_id"] for data in claimed.values()])
+
+
+def decide_notification(topic: str, event: Dict, search_query: str, search_results: List[Dict],
+                        relevant_updates: List[Dict], recipient: Optional[str] = None,
+                        commit: bool = True) -> Dict:
+    """Decide whether to notify a recipient about a topic's relevant updates.
+    
+    Updates not yet sent to the recipient are claimed atomically through
+    notification memory (so concurrent checks of the same topic never both
+    send them); when any are claimed, the email is rendered and the
+    notification recorded.
+    
+    Args:
+        topic: The topic that was searched
+        event: The event being analyzed (echoed in the result)
+        search_query: The query the results came from
+        search_results: All search results
+        relevant_updates: The results that look like recent updates
+        recipient: Recipient to deduplicate and record for (defaults to "default")
+        commit: Settle the claim here (see settle_notifications); pass False to
+            commit or release ``claim_id`` yourself
+        
+    Returns:
+        Notification data with should_send_email, reasoning, email_content and,
+        when updates were claimed, claim_id
+    """
+    if not relevant_updates:
+        return _no_updates_result(topic, event, search_query, search_results)
+    
+    # Claim the updates that were not sent yet; the rest were already sent
+    recipient = recipient or "default"
+    with stage_limits.limit("db"):
+        claim_id, new_updates, already_sent_updates = notification_memory.claim_new_updates(
+            topic, relevant_updates, recipient=recipient)
+    
+    UPDATES.labels(status="new").inc(len(new_updates))
+    UPDATES.labels(status="already_sent").inc(len(already_sent_updates))
+    notification_data = _notification_result(topic, event, search_query, search_results, new_updates,
+                                             already_sent_updates, claim_id)
+    if new_updates:
+        with stage_limits.limit("db"):
+            notification_memory.mark_notification_sent(topic, notification_data, recipient=recipient)
+        if commit:
+            settle_notifications(topic, {recipient: notification_data})
+    return notification_data
+
+
+def decide_notifications(topic: str, events: Dict[str, Dict], search_query: str, search_results: List[Dict],
+                         relevant_updates: List[Dict], include_subscribers: bool = False,
+                         commit: bool = True) -> Dict[str, Dict]:
+    """Decide_notification for many recipients of one topic with set-based queries.
+    
+    Claiming, recording and committing take one statement each however many
+    recipients there are, and recipients who claimed the same updates share
+    one rendered email.
+    
+    Args:
+        topic: The topic that was searched
+        events: The event analyzed for each recipient (echoed in the results)
+        search_query: The query the results came from
+        search_results: All search results
+        relevant_updates: The results that look like recent updates
+        include_subscribers: Also notify the topic's subscribers (see
+            NotificationMemory.subscribe) that are not in events
+        commit: Settle the claims here (see settle_notifications)
+        
+    Returns:
+        Notification data per recipient
+    """
+    if include_subscribers:
+        events = _with_subscribers(topic, events)
+    if not relevant_updates:
+        return {recipient: _no_updates_result(topic, event, search_query, search_results)
+                for recipient, event in events.items()}
+    
+    with stage_limits.limit("db"):
+        claims = notification_memory.claim_for_recipients(topic, relevant_updates, recipients=list(events))
+    
+    results: Dict[str, Dict] = {}
+    rendered: Dict[tuple, Dict] = {}
+    for recipient, event in events.items():
+        claim_id, new_updates = claims.get(recipient, (None, []))
+        claimed = {id(update) for update in new_updates}
+        already_sent_updates = [update for update in relevant_updates if id(update) not in claimed]
+        UPDATES.labels(status="new").inc(len(new_updates))
+        UPDATES.labels(status="already_sent").inc(len(already_sent_updates))
+        email_content = None
+        if new_updates:
+            key = tuple(sorted(claimed))
+            email_content = rendered.get(key)
+            if email_content is None:
+                email_content = rendered[key] = create_email_content(topic, new_updates)
+        results[recipient] = _notification_result(topic, event, search_query, search_results, new_updates,
+                                                  already_sent_updates, claim_id, email_content)
+    
+    notified = {recipient: data for recipient, data in results.items() if data["should_send_email"]}
+    if notified:
+        with stage_limits.limit("db"):
+            notification_memory.record_notifications(topic, notified)
+        if commit:
+            settle_notifications(topic, notified)
+    return results
+
+
+def _with_subscribers(topic: str, events: Dict[str, Dict]) -> Dict[str, Dict]:
+    """Add the topic's subscribers that are not in events, each with an empty event."""
+    with stage_limits.limit("db"):
+        subscribers = notification_memory.get_subscribers(topic)
+    events = dict(events)
+    for subscriber in subscribers:
+        events.setdefault(subscriber, {"topic": topic, "event_ids": [], "recipient": subscriber})
+    return events
+
+
+def check_topic(topic: str, events: Dict[str, Dict], search_query: str, search_results: List[Dict],
+                include_subscribers: bool = False, commit: bool = True) -> Dict[str, Dict]:
+    """Check one topic's search results for many recipients, skipping what did not change.
+    
+    When every recipient was already checked against the same result set the
+    check stops after comparing fingerprints; otherwise relevance and
+    decide_notifications only run on the results that changed.
+    
+    Args:
+        topic: The topic that was searched
+        events: The event analyzed for each recipient (echoed in the results)
+        search_query: The query the results came from
+        search_results: All search results
+        include_subscribers: Also notify the topic's subscribers (see decide_notifications)
+        commit: Settle the claims here (see settle_notifications)
+        
+    Returns:
+        Notification data per recipient
+    """
+    if include_subscribers:
+        events = _with_subscribers(topic, events)
+    recipients = list(events)
+    changed = changed_results(topic, search_results, recipients)
+    if search_results and not changed:
+        return {recipient: _unchanged_result(topic, event, search_query, search_results)
+                for recipient, event in events.items()}
+    
+    relevant_updates = find_relevant_updates(changed)
+    results = decide_notifications(topic, events, search_query, search_results, relevant_updates, commit=False)
+    # Remember the results before settling: a delivery that fails releases its
+    # claim, which must also forget them, however soon it fails
+    with stage_limits.limit("db"):
+        notification_memory.remember_results(topic, search_results, recipients)
+    if commit:
+        settle_notifications(topic, results)
+    return results
+
+
 @tool
 def checkIsMailneedtoSend(event_data: str) -> str:
     """Check if an email needs to be sent based on event data by searching the web for updates.
@@ -95,13 +370,14 @@ def checkIsMailneedtoSend(event_data: str) -> str:
     
     Args:
         event_data: JSON string containing event information with topic to check for updates
+            (and optionally "recipients", defaulting to ["default"])
     
     Returns:
         JSON string with decision and reasoning about whether email should be sent
     """
     try:
         # Parse the event data
-        event = json.loads(event_data) if isinstance(event_data, str) else event_data
+        event = loads(event_data) if isinstance(event_data, str) else event_data
         
         # Extract the topic to search for
         topic = event.get("topic", "")
@@ -113,16 +389,9 @@ def checkIsMailneedtoSend(event_data: str) -> str:
             })
         
         # Search the web for recent updates on the topic
-        search_query = f"latest updates {topic} today recent changes"
+        search_query = update_search_query(topic)
         try:
-            with DDGS() as ddgs:
-                search_results = []
-                for r in ddgs.text(search_query, max_results=5):
-                    search_results.append({
-                        "title": r.get("title", ""),
-                        "url": r.get("href") or r.get("url", ""),
-                        "snippet": r.get("body", "")
-                    })
+            search_results = cached_search(search_query, 5, topic=topic)
         except Exception as search_error:
             return json.dumps({
                 "should_send_email": False,
@@ -130,77 +399,22 @@ def checkIsMailneedtoSend(event_data: str) -> str:
                 "event_analyzed": event
             })
         
-        # Analyze search results to determine if there are relevant updates
-        should_send = False
-        reasoning = "No relevant updates found"
-        relevant_updates = []
-        
-        # Check if any results contain recent update indicators
-        recent_keywords = ["today", "yesterday", "latest", "new", "updated", "announced", "released", "published"]
-        date_keywords = ["2024", "2025", "january", "february", "march", "april", "may", "june", 
-                        "july", "august", "september", "october", "november", "december"]
-        
-        for result in search_results:
-            title_lower = result["title"].lower()
-            snippet_lower = result["snippet"].lower()
-            
-            # Check for recent update indicators
-            has_recent_keywords = any(keyword in title_lower or keyword in snippet_lower 
-                                    for keyword in recent_keywords)
-            has_date_keywords = any(keyword in title_lower or keyword in snippet_lower 
-                                  for keyword in date_keywords)
-            
-            if has_recent_keywords or has_date_keywords:
-                relevant_updates.append(result)
-        
-        # If we found relevant updates, check notification memory
-        if relevant_updates:
-            # Filter out updates that were already sent
-            new_updates, already_sent_updates = notification_memory.filter_new_updates(topic, relevant_updates)
-            
-            if new_updates:
-                email_content = create_email_content(topic, new_updates)
-                notification_data = {
-                    "should_send_email": True,
-                    "reasoning": f"Found {len(new_updates)} new updates for '{topic}' ({len(already_sent_updates)} already sent)",
-                    "topic_searched": topic,
-                    "search_query": search_query,
-                    "relevant_updates": new_updates,
-                    "already_sent_updates": already_sent_updates,
-                    "total_search_results": len(search_results),
-                    "event_analyzed": event,
-                    "email_content": email_content
-                }
-                should_send = True
-                reasoning = f"Found {len(new_updates)} new updates for '{topic}' - notification will be sent"
-                notification_memory.mark_notification_sent(topic, notification_data)
-            else:
-                # All updates were already sent previously
-                email_content = create_email_content(topic, already_sent_updates) if already_sent_updates else None
-                notification_data = {
-                    "should_send_email": False,
-                    "reasoning": f"All {len(already_sent_updates)} updates for '{topic}' were already sent previously",
-                    "topic_searched": topic,
-                    "search_query": search_query,
-                    "relevant_updates": [],
-                    "already_sent_updates": already_sent_updates,
-                    "total_search_results": len(search_results),
-                    "event_analyzed": event,
-                    "email_content": email_content
-                }
+        # Check the results for each recipient of the event's plan (see check_topic)
+        recipients = event.get("recipients") or ["default"]
+        decisions = check_topic(topic, {recipient: event for recipient in recipients}, search_query, search_results)
+        if len(decisions) == 1:
+            notification_data = next(iter(decisions.values()))
         else:
             notification_data = {
-                "should_send_email": False,
-                "reasoning": reasoning,
+                "should_send_email": any(decision["should_send_email"] for decision in decisions.values()),
+                "reasoning": "; ".join(f"{recipient}: {decision['reasoning']}"
+                                       for recipient, decision in decisions.items()),
                 "topic_searched": topic,
                 "search_query": search_query,
-                "relevant_updates": relevant_updates,
-                "already_sent_updates": [],
-                "total_search_results": len(search_results),
                 "event_analyzed": event,
-                "email_content": None
+                "recipients": decisions
             }
         
-        return json.dumps(notification_data, ensure_ascii=False, indent=2)
+        return dumps(notification_data, ensure_ascii=False, indent=2)
     except Exception as e:
         return json.dumps({"error": f"Email check failed: {str(e)}"})
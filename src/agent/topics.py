@@ -0,0 +1,163 @@
+"""
+Topic canonicalization for the Event Action Agent.
+
+Maps free-text topics to canonical keys so that equivalent topics share
+searches, cache entries and notification memory rows. "tax policy",
+"tax policies" and "policy on tax" all become the key "policy tax":
+text is tokenized, lightly stemmed, mapped through a synonym table,
+stripped of stop words, then de-duplicated and sorted.
+"""
+
+import json
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .config import Config
+
+
+# Words that indicate a query is asking for updates
+UPDATE_KEYWORDS = frozenset(["update", "updates", "latest", "recent", "new", "changes"])
+
+# Words stripped by extract_topic (kept in the human-readable topic otherwise)
+QUERY_WORDS = frozenset(["there", "is", "any", "update", "updates", "in", "on", "about", "latest", "recent", "new"])
+
+# Words that never contribute to a canonical key
+STOP_WORDS = frozenset([
+    "a", "about", "all", "an", "and", "any", "are", "as", "at", "by", "change", "current", "for", "from",
+    "has", "have", "in", "into", "is", "it", "its", "latest", "new", "news", "of", "on", "or", "recent",
+    "the", "there", "this", "to", "today", "update", "was", "were", "what", "whats", "with"
+])
+
+# Synonyms applied when no synonym file is configured (stemmed phrase -> canonical phrase)
+DEFAULT_SYNONYMS = {
+    "taxation": "tax",
+    "govt": "government",
+    "artificial intelligence": "ai",
+    "machine learning": "ml",
+    "union budget": "budget",
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase alphanumeric tokens."""
+    return _TOKEN_RE.findall(text.lower())
+
+
+def stem(token: str) -> str:
+    """Lightly stem a token by removing plural suffixes.
+
+    Short tokens and words ending in "ss", "us" or "is" are left alone, and
+    the result is stable under repeated stemming.
+    """
+    if len(token) <= 4 or token.isdigit():
+        return token
+    if token.endswith("ies"):
+        return token[:-3] + "y"
+    if token.endswith("sses"):
+        return token[:-2]
+    if token.endswith(("xes", "ches", "shes", "zes")):
+        return token[:-2]
+    if token.endswith("s") and not token.endswith(("ss", "us", "is")):
+        return token[:-1]
+    return token
+
+
+class TopicCanonicalizer:
+    """Maps topics to canonical keys using stemming, stop words and synonyms."""
+
+    CACHE_SIZE = 4096
+
+    def __init__(self, synonyms: Optional[Dict[str, str]] = None, stop_words: Optional[Iterable[str]] = None):
+        """Initialize the canonicalizer.
+
+        Args:
+            synonyms: Phrase to canonical phrase mapping (defaults to DEFAULT_SYNONYMS)
+            stop_words: Words dropped from keys (defaults to STOP_WORDS)
+        """
+        self.stop_words = frozenset(stem(word) for word in (STOP_WORDS if stop_words is None else stop_words))
+        self._synonyms: Dict[Tuple[str, ...], Tuple[str, ...]] = {}
+        self._max_phrase = 1
+        for phrase, canonical in (DEFAULT_SYNONYMS if synonyms is None else synonyms).items():
+            self.add_synonym(phrase, canonical)
+        self._cache: Dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls) -> "TopicCanonicalizer":
+        """Create a canonicalizer using the synonym file from configuration, if any."""
+        if Config.TOPIC_SYNONYMS_PATH:
+            try:
+                with open(Config.TOPIC_SYNONYMS_PATH, encoding="utf-8") as f:
+                    return cls(synonyms=json.load(f))
+            except (OSError, ValueError) as e:
+                print(f"Could not load topic synonyms from {Config.TOPIC_SYNONYMS_PATH}: {e}")
+        return cls()
+
+    def add_synonym(self, phrase: str, canonical: str):
+        """Map a phrase (one or more words) to a canonical phrase."""
+        key = tuple(stem(token) for token in tokenize(phrase))
+        if not key:
+            return
+        self._synonyms[key] = tuple(stem(token) for token in tokenize(canonical))
+        self._max_phrase = max(self._max_phrase, len(key))
+        # Cached keys may no longer be valid
+        if hasattr(self, "_cache"):
+            with self._lock:
+                self._cache.clear()
+
+    def _apply_synonyms(self, tokens: List[str]) -> List[str]:
+        """Replace synonym phrases, preferring the longest match at each position."""
+        if not self._synonyms:
+            return tokens
+        result: List[str] = []
+        i = 0
+        while i < len(tokens):
+            for size in range(min(self._max_phrase, len(tokens) - i), 0, -1):
+                replacement = self._synonyms.get(tuple(tokens[i:i + size]))
+                if replacement is not None:
+                    result.extend(replacement)
+                    i += size
+                    break
+            else:
+                result.append(tokens[i])
+                i += 1
+        return result
+
+    def canonicalize(self, topic: str) -> str:
+        """Get the canonical key of a topic ("" if nothing meaningful remains)."""
+        cached = self._cache.get(topic)
+        if cached is not None:
+            return cached
+        tokens = self._apply_synonyms([stem(token) for token in tokenize(topic)])
+        key = " ".join(sorted({token for token in tokens if token not in self.stop_words}))
+        with self._lock:
+            if len(self._cache) >= self.CACHE_SIZE:
+                self._cache.clear()
+            self._cache[topic] = key
+        return key
+
+    def extract_topic(self, query: str) -> str:
+        """Extract the human-readable topic from an update query."""
+        topic_words = [word for word in query.lower().split() if word not in QUERY_WORDS]
+        return " ".join(topic_words) if topic_words else "general"
+
+    def is_update_query(self, query: str) -> bool:
+        """Check if the query is asking for updates.
+
+        Keywords are matched as substrings, as the agent always has, so
+        "renewable energy news" counts ("new").
+        """
+        query = query.lower()
+        return any(keyword in query for keyword in UPDATE_KEYWORDS)
+
+
+# Global instance for easy access
+topic_canonicalizer = TopicCanonicalizer.from_config()
+
+
+def canonical_topic(topic: str) -> str:
+    """Get the canonical key of a topic, falling back to the lowercased text."""
+    return topic_canonicalizer.canonicalize(topic) or topic.strip().lower()
@@ -0,0 +1,12 @@
+"""
+API Package for Event Action Agent.
+
+Provides the asyncio HTTP server for the /api/v1/events REST API and the
+long-running agent daemon (with its thin client).
+"""
+
+from .server import EventAPIServer
+from .daemon import AgentDaemon, DaemonClient, connect_daemon
+
+__version__ = "1.0.0"
+__all__ = ["EventAPIServer", "AgentDaemon", "DaemonClient", "connect_daemon"]
@@ -0,0 +1,354 @@
+"""
+Long-running agent daemon (``python main.py --serve``).
+
+Every ``python main.py ...`` invocation pays for interpreter start, the
+LangChain import, agent construction and fresh database connections before
+doing any work. The daemon pays for them once: it keeps agents, their HTTP
+clients, the search cache and the notification memory warm, and answers
+queries over a local Unix socket (``DAEMON_SOCKET``) and, optionally, HTTP
+(``DAEMON_PORT``). While it is running, the CLI forwards queries and memory
+commands to it through ``DaemonClient``, so a repeated query costs little
+more than its network calls.
+
+The daemon is an EventAPIServer, so it serves the events and subscriptions
+API and ``GET /metrics`` as well, plus these endpoints, which are only
+served on the Unix socket (the HTTP listener has no authentication, so it
+answers them with 403):
+
+    GET    /api/v1/daemon              daemon status (pid, uptime, queries served)
+    POST   /api/v1/query               run the agent {"query": ...}
+    GET    /api/v1/memory              notification memory statistics
+    GET    /api/v1/memory/recent       recent notifications (?topic=&days=)
+    POST   /api/v1/memory/reset        reset the notification memory
+
+This module must stay cheap to import: the CLI imports it to talk to the
+daemon, and LangChain is only loaded when the daemon builds its first agent.
+"""
+
+import asyncio
+import contextvars
+import functools
+import http.client
+import json
+import os
+import signal
+import socket
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+from ..agent.config import Config
+from ..agent.event_store import EventStore
+from ..agent.instrumentation import timing_registry
+from ..agent.notification_memory import NotificationMemory
+from .server import EventAPIServer, HTTPError, Request, Response
+
+
+# True while serving a connection on the Unix socket (each connection is served
+# in its own task, so setting it never leaks into HTTP connections)
+_on_unix_socket: contextvars.ContextVar[bool] = contextvars.ContextVar("on_unix_socket", default=False)
+
+class DaemonError(Exception):
+    """Raised by DaemonClient when the daemon answers with an error."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _default_agent_factory():
+    from ..agent.agent import LangChainAgent
+    return LangChainAgent()
+
+
+class AgentDaemon(EventAPIServer):
+    """Serves agent queries and memory commands from a warm process."""
+
+    def __init__(self, socket_path: Optional[str] = None, port: Optional[int] = None,
+                 agent_factory: Optional[Callable[[], Any]] = None, store: Optional[EventStore] = None,
+                 memory: Optional[NotificationMemory] = None, host: Optional[str] = None):
+        """Initialize the daemon.
+
+        Args:
+            socket_path: Unix socket to listen on (defaults to Config.DAEMON_SOCKET)
+            port: Also listen for HTTP on this port (defaults to Config.DAEMON_PORT;
+                None serves the Unix socket only)
+            agent_factory: Builds an agent (defaults to LangChainAgent())
+            store: Event store to serve (defaults to one at Config.EVENTS_DB_PATH)
+            memory: Notification memory to serve (defaults to the global one)
+            host: Interface for HTTP (defaults to Config.API_HOST)
+        """
+        super().__init__(store=store, host=host, port=0, memory=memory)
+        self.port = Config.DAEMON_PORT if port is None else port
+        self.socket_path = socket_path or Config.DAEMON_SOCKET
+        self.agent_factory = agent_factory or _default_agent_factory
+        self.started_at = time.time()
+        self.queries = 0
+        self.agents_created = 0
+        # Idle agents; a query checks one out so concurrent queries never share an agent
+        self._idle_agents: List[Any] = []
+        self._agents_lock = threading.Lock()
+        self._unix_server: Optional[asyncio.AbstractServer] = None
+        self.add_route("GET", r"/api/v1/daemon", self._unix_only(self.get_status))
+        self.add_route("POST", r"/api/v1/query", self._unix_only(self.run_query))
+        self.add_route("GET", r"/api/v1/memory", self._unix_only(self.get_memory_stats))
+        self.add_route("GET", r"/api/v1/memory/recent", self._unix_only(self.get_recent_notifications))
+        self.add_route("POST", r"/api/v1/memory/reset", self._unix_only(self.reset_memory))
+
+    @staticmethod
+    def _unix_only(handler):
+        """Wrap a handler so it only answers on the owner-only Unix socket."""
+        @functools.wraps(handler)
+        async def wrapper(request: Request, **kwargs) -> Response:
+            if not _on_unix_socket.get():
+                raise HTTPError(403, "Only available on the daemon's Unix socket")
+            return await handler(request, **kwargs)
+        return wrapper
+
+    # Agents
+
+    def _checkout_agent(self) -> Any:
+        with self._agents_lock:
+            if self._idle_agents:
+                return self._idle_agents.pop()
+        agent = self.agent_factory()
+        with self._agents_lock:
+            self.agents_created += 1
+        return agent
+
+    def _return_agent(self, agent: Any):
+        with self._agents_lock:
+            self._idle_agents.append(agent)
+
+    def warm_up(self):
+        """Build an agent and open the memory database before the first query arrives."""
+        self._return_agent(self._checkout_agent())
+        self.memory.get_notification_stats()
+
+    def _run_agent(self, query: str) -> Dict[str, Any]:
+        agent = self._checkout_agent()
+        try:
+            result = agent.run(query)
+            trace = getattr(agent, "last_trace", None)
+        finally:
+            self._return_agent(agent)
+        with self._agents_lock:
+            self.queries += 1
+        return {
+            "query": query,
+            "result": result,
+            "trace": trace.to_records() if hasattr(trace, "to_records") else None,
+            "histograms": timing_registry.get_histograms()
+        }
+
+    # Handlers
+
+    async def get_status(self, request: Request) -> Response:
+        return Response(200, {
+            "pid": os.getpid(),
+            "uptime_seconds": round(time.time() - self.started_at, 3),
+            "queries": self.queries,
+            "agents": self.agents_created,
+            "socket": self.socket_path,
+            "port": self.port
+        })
+
+    async def run_query(self, request: Request) -> Response:
+        data = request.json()
+        query = data.get("query") if isinstance(data, dict) else None
+        if not isinstance(query, str) or not query.strip():
+            raise HTTPError(400, "'query' must be a non-empty string")
+        return Response(200, await self._run_blocking(self._run_agent, query))
+
+    async def get_memory_stats(self, request: Request) -> Response:
+        return Response(200, await self._run_blocking(self.memory.get_notification_stats))
+
+    async def get_recent_notifications(self, request: Request) -> Response:
+        days = self._int_param(request, "days", 7, minimum=1)
+        notifications = await self._run_blocking(self.memory.get_recent_notifications,
+                                                 request.query.get("topic"), days)
+        return Response(200, {"notifications": notifications})
+
+    async def reset_memory(self, request: Request) -> Response:
+        await self._run_blocking(self.memory.reset_memory)
+        return Response(200, {"message": "Notification memory has been reset"})
+
+    # Lifecycle
+
+    async def _handle_unix_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        _on_unix_socket.set(True)
+        await self._handle_connection(reader, writer)
+
+    def _remove_stale_socket(self):
+        """Remove a socket left behind by a daemon that died, refusing to replace a live one."""
+        if not os.path.exists(self.socket_path):
+            return
+        if DaemonClient(self.socket_path, timeout=1).is_running():
+            raise RuntimeError(f"A daemon is already listening on {self.socket_path}")
+        os.unlink(self.socket_path)
+
+    async def start(self):
+        """Start listening on the Unix socket (and on HTTP if a port is set)."""
+        self._remove_stale_socket()
+        # Only the owner may send queries or reset the memory; the umask makes the
+        # socket private from the moment it is bound, not only after the chmod. The
+        # HTTP listener serves the events API but refuses those endpoints (see _unix_only)
+        previous_umask = os.umask(0o077)
+        try:
+            self._unix_server = await asyncio.start_unix_server(self._handle_unix_connection,
+                                                                path=self.socket_path)
+        finally:
+            os.umask(previous_umask)
+        os.chmod(self.socket_path, 0o600)
+        if self.port is not None:
+            await super().start()
+
+    async def serve_forever(self):
+        """Start listening (if needed) and serve until cancelled."""
+        if self._unix_server is None:
+            await self.start()
+        await self._unix_server.serve_forever()
+
+    async def stop(self):
+        """Stop listening and remove the socket."""
+        if self._unix_server is not None:
+            self._unix_server.close()
+            await self._unix_server.wait_closed()
+            self._unix_server = None
+            if os.path.exists(self.socket_path):
+                os.unlink(self.socket_path)
+        await super().stop()
+
+    async def _serve_until_signalled(self):
+        await self.start()
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, stop.set)
+        try:
+            await stop.wait()
+        finally:
+            await self.stop()
+
+    def run(self):
+        """Warm up and serve until SIGINT or SIGTERM (blocking)."""
+        print("🔥 Warming up agent...")
+        start = time.perf_counter()
+        try:
+            self.warm_up()
+        except Exception as e:
+            print(f"⚠️  Warm-up failed, agents will be built on the first query: {e}")
+        print(f"   Ready in {time.perf_counter() - start:.2f}s")
+        where = f"unix:{self.socket_path}"
+        if self.port is not None:
+            where += f" and http://{self.host}:{self.port}"
+        print(f"🛰️  Daemon {os.getpid()} listening on {where} (Ctrl+C to stop)")
+        asyncio.run(self._serve_until_signalled())
+        print(f"\n👋 Daemon stopped after {self.queries} queries.")
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTP connection over a Unix domain socket."""
+
+    def __init__(self, socket_path: str, timeout: Optional[float] = None):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class DaemonClient:
+    """Thin client for a running AgentDaemon."""
+
+    def __init__(self, socket_path: Optional[str] = None, timeout: Optional[float] = None):
+        """Initialize the client.
+
+        Args:
+            socket_path: Unix socket of the daemon (defaults to Config.DAEMON_SOCKET)
+            timeout: Seconds to wait for an answer (defaults to Config.DAEMON_TIMEOUT)
+        """
+        self.socket_path = socket_path or Config.DAEMON_SOCKET
+        self.timeout = Config.DAEMON_TIMEOUT if timeout is None else timeout
+
+    def request(self, method: str, path: str, body: Any = None) -> Any:
+        """Send a request to the daemon and decode its JSON answer.
+
+        Raises:
+            OSError: If the daemon cannot be reached
+            DaemonError: If the daemon answers with an error status
+        """
+        status, raw = self._send(method, path, body)
+        data = json.loads(raw or b"null")
+        if status >= 400:
+            raise DaemonError(status, (data or {}).get("error", f"HTTP {status}"))
+        return data
+
+    def _send(self, method: str, path: str, body: Any = None) -> Tuple[int, bytes]:
+        conn = _UnixHTTPConnection(self.socket_path, timeout=self.timeout)
+        try:
+            headers = {"Connection": "close"}
+            payload = None
+            if body is not None:
+                payload = json.dumps(body).encode("utf-8")
+                headers["Content-Type"] = "application/json"
+            conn.request(method, path, payload, headers)
+            response = conn.getresponse()
+            return response.status, response.read()
+        finally:
+            conn.close()
+
+    def is_running(self) -> bool:
+        """Check whether a daemon answers on the socket."""
+        try:
+            self.status()
+            return True
+        except (OSError, DaemonError, ValueError):
+            return False
+
+    def status(self) -> Dict[str, Any]:
+        """Get the daemon's pid, uptime and counters."""
+        return self.request("GET", "/api/v1/daemon")
+
+    def query(self, query: str) -> Dict[str, Any]:
+        """Run the agent in the daemon.
+
+        Returns:
+            Dictionary with query, result, trace (RunTrace records) and histograms
+        """
+        return self.request("POST", "/api/v1/query", {"query": query})
+
+    def memory_stats(self) -> Dict[str, Any]:
+        """Get the daemon's notification memory statistics."""
+        return self.request("GET", "/api/v1/memory")
+
+    def recent_notifications(self, topic: Optional[str] = None, days: int = 7) -> List[Dict]:
+        """Get recent notifications (for all topics if topic is None)."""
+        path = f"/api/v1/memory/recent?days={int(days)}"
+        if topic:
+            path += "&topic=" + quote(topic)
+        return self.request("GET", path)["notifications"]
+
+    def reset_memory(self):
+        """Reset the daemon's notification memory."""
+        self.request("POST", "/api/v1/memory/reset")
+
+    def metrics(self) -> str:
+        """Get the daemon's metrics in the Prometheus text format."""
+        status, raw = self._send("GET", "/metrics")
+        if status >= 400:
+            raise DaemonError(status, f"HTTP {status}")
+        return raw.decode("utf-8")
+
+
+def connect_daemon(socket_path: Optional[str] = None) -> Optional[DaemonClient]:
+    """Get a client for the daemon if one is running, otherwise None."""
+    client = DaemonClient(socket_path)
+    if not os.path.exists(client.socket_path):
+        return None
+    # Probe with a short timeout so a hung daemon does not stall the CLI
+    probe = DaemonClient(client.socket_path, timeout=2)
+    return client if probe.is_running() else None
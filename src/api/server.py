@@ -0,0 +1,349 @@
+"""
+Asyncio HTTP server for the Event Action Agent REST API.
+
+Implements the endpoints documented in docs/API_README.md on top of
+``asyncio.start_server`` (no web framework needed):
+
+    GET    /api/v1/events              list events (offset/limit pagination)
+    GET    /api/v1/events/{event_id}   get one event
+    POST   /api/v1/events              create one event, or many ({"events": [...]})
+    PUT    /api/v1/events/{event_id}   update an event
+    DELETE /api/v1/events/{event_id}   delete an event
+    GET    /api/v1/subscriptions       subscribers of ?topic= or topics of ?recipient=
+    POST   /api/v1/subscriptions       subscribe {"topic": ..., "recipients": [...]}
+    DELETE /api/v1/subscriptions       unsubscribe ?topic= (and optionally &recipient=)
+    GET    /metrics                    process metrics in the Prometheus text format
+
+GET responses carry an ETag and honour If-None-Match; PUT honours If-Match.
+Database writes run on a worker thread so the event loop stays responsive.
+"""
+
+import asyncio
+import functools
+import json
+import re
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Pattern, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from ..agent.config import Config
+from ..agent.event_store import EventConflictError, EventNotFoundError, EventStore
+from ..agent.metrics import CONTENT_TYPE, metrics
+from ..agent.notification_memory import NotificationMemory, notification_memory
+
+
+REASONS = {
+    200: "OK", 201: "Created", 204: "No Content", 304: "Not Modified", 400: "Bad Request",
+    403: "Forbidden", 404: "Not Found", 405: "Method Not Allowed", 412: "Precondition Failed", 413: "Payload Too Large",
+    500: "Internal Server Error"
+}
+
+
+class Request:
+    """A parsed HTTP request."""
+
+    def __init__(self, method: str, target: str, headers: Dict[str, str], body: bytes = b""):
+        parts = urlsplit(target)
+        self.method = method.upper()
+        self.path = parts.path.rstrip("/") or "/"
+        self.query = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        self.headers = {key.lower(): value for key, value in headers.items()}
+        self.body = body
+
+    def json(self) -> Any:
+        """Decode the request body as JSON."""
+        try:
+            return json.loads(self.body.decode("utf-8") or "null")
+        except (UnicodeDecodeError, ValueError) as e:
+            raise HTTPError(400, f"Invalid JSON body: {e}")
+
+
+class Response:
+    """An HTTP response with a JSON (or raw bytes) body."""
+
+    def __init__(self, status: int = 200, body: Any = None, headers: Optional[Dict[str, str]] = None,
+                 content_type: str = "application/json"):
+        self.status = status
+        self.headers = dict(headers or {})
+        if body is None:
+            self.body = b""
+        elif isinstance(body, bytes):
+            self.body = body
+        else:
+            self.body = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        if self.body:
+            self.headers.setdefault("Content-Type", content_type)
+
+    def encode(self, keep_alive: bool) -> bytes:
+        """Serialize the response for the wire."""
+        lines = [f"HTTP/1.1 {self.status} {REASONS.get(self.status, 'Unknown')}"]
+        headers = {**self.headers, "Content-Length": str(len(self.body)),
+                   "Connection": "keep-alive" if keep_alive else "close"}
+        lines.extend(f"{key}: {value}" for key, value in headers.items())
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + self.body
+
+
+class HTTPError(Exception):
+    """Raised by handlers to return an error response."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def _etag_matches(header: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match / If-Match header against an ETag."""
+    if not header:
+        return False
+    candidates = [value.strip() for value in header.split(",")]
+    return "*" in candidates or any(value[2:] == etag if value.startswith("W/") else value == etag
+                                    for value in candidates)
+
+
+Handler = Callable[..., Awaitable[Response]]
+
+
+class EventAPIServer:
+    """Asyncio HTTP server exposing the events REST API."""
+
+    def __init__(self, store: Optional[EventStore] = None, host: Optional[str] = None, port: Optional[int] = None,
+                 memory: Optional[NotificationMemory] = None):
+        """Initialize the server.
+
+        Args:
+            store: Event store to serve (defaults to one at Config.EVENTS_DB_PATH)
+            host: Interface to listen on (defaults to Config.API_HOST)
+            port: Port to listen on (defaults to Config.API_PORT, 0 picks a free port)
+            memory: Notification memory holding subscriptions (defaults to the global one)
+        """
+        self.store = store or EventStore()
+        self.memory = memory or notification_memory
+        self.host = host or Config.API_HOST
+        self.port = Config.API_PORT if port is None else port
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.routes: List[Tuple[str, Pattern, Handler]] = []
+        self.add_route("GET", r"/api/v1/events", self.list_events)
+        self.add_route("POST", r"/api/v1/events", self.create_events)
+        self.add_route("GET", r"/api/v1/events/(?P<event_id>\d+)", self.get_event)
+        self.add_route("PUT", r"/api/v1/events/(?P<event_id>\d+)", self.update_event)
+        self.add_route("DELETE", r"/api/v1/events/(?P<event_id>\d+)", self.delete_event)
+        self.add_route("GET", r"/api/v1/subscriptions", self.list_subscriptions)
+        self.add_route("POST", r"/api/v1/subscriptions", self.create_subscriptions)
+        self.add_route("DELETE", r"/api/v1/subscriptions", self.delete_subscriptions)
+        self.add_route("GET", r"/metrics", self.get_metrics)
+
+    def add_route(self, method: str, pattern: str, handler: Handler):
+        """Register an async handler for a method and a full-path regex."""
+        self.routes.append((method.upper(), re.compile(pattern + r"$"), handler))
+
+    async def _run_blocking(self, func: Callable, *args, **kwargs) -> Any:
+        """Run a blocking call on the default thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+
+    # Request dispatch
+
+    async def handle_request(self, request: Request) -> Response:
+        """Route a request to its handler and turn errors into JSON responses."""
+        allowed = []
+        for method, pattern, handler in self.routes:
+            match = pattern.match(request.path)
+            if not match:
+                continue
+            if method != request.method:
+                allowed.append(method)
+                continue
+            try:
+                return await handler(request, **match.groupdict())
+            except HTTPError as e:
+                return Response(e.status, {"error": e.message})
+            except EventNotFoundError as e:
+                return Response(404, {"error": f"Event {e.args[0]} not found"})
+            except EventConflictError:
+                return Response(412, {"error": "Event was modified since it was fetched"})
+            except ValueError as e:
+                return Response(400, {"error": str(e)})
+            except Exception as e:
+                return Response(500, {"error": f"Internal error: {e}"})
+        if allowed:
+            return Response(405, {"error": "Method not allowed"}, {"Allow": ", ".join(sorted(set(allowed)))})
+        return Response(404, {"error": "Not found"})
+
+    # Event handlers
+
+    @staticmethod
+    def _event_etag(event: Dict) -> str:
+        return f'"e{event["id"]}-v{event["version"]}"'
+
+    @staticmethod
+    def _int_param(request: Request, name: str, default: int, minimum: int = 0, maximum: Optional[int] = None) -> int:
+        try:
+            value = int(request.query.get(name, default))
+        except ValueError:
+            raise HTTPError(400, f"Query parameter '{name}' must be an integer")
+        if value < minimum or (maximum is not None and value > maximum):
+            raise HTTPError(400, f"Query parameter '{name}' must be between {minimum} and {maximum}")
+        return value
+
+    async def list_events(self, request: Request) -> Response:
+        offset = self._int_param(request, "offset", 0)
+        limit = self._int_param(request, "limit", 100, minimum=1, maximum=Config.API_MAX_PAGE_SIZE)
+        etag = f'"l{self.store.revision}-{offset}-{limit}"'
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(304, headers={"ETag": etag})
+        events, total = self.store.list_events(offset, limit)
+        next_offset = offset + limit if offset + limit < total else None
+        return Response(200, {
+            "events": [self.store.to_public(event) for event in events],
+            "total": total,
+            "offset": offset,
+            "limit": limit,
+            "next_offset": next_offset
+        }, {"ETag": etag})
+
+    async def get_event(self, request: Request, event_id: str) -> Response:
+        event = self.store.get(int(event_id))
+        etag = self._event_etag(event)
+        if _etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(304, headers={"ETag": etag})
+        return Response(200, {"event": self.store.to_public(event)}, {"ETag": etag})
+
+    async def create_events(self, request: Request) -> Response:
+        data = request.json()
+        if isinstance(data, list) or (isinstance(data, dict) and "events" in data):
+            items = data if isinstance(data, list) else data["events"]
+            if not isinstance(items, list) or not items:
+                raise HTTPError(400, "'events' must be a non-empty list")
+            events = await self._run_blocking(self.store.create_many, items)
+            return Response(201, {"events": [self.store.to_public(event) for event in events]})
+        event = await self._run_blocking(self.store.create, data)
+        return Response(201, {"event": self.store.to_public(event)},
+                        {"ETag": self._event_etag(event), "Location": f"/api/v1/events/{event['id']}"})
+
+    async def update_event(self, request: Request, event_id: str) -> Response:
+        if_match = request.headers.get("if-match")
+        # Checked by the store under its lock, so concurrent updates with the same ETag cannot both pass
+        precondition = (lambda current: _etag_matches(if_match, self._event_etag(current))) if if_match else None
+        event = await self._run_blocking(self.store.update, int(event_id), request.json(), precondition=precondition)
+        return Response(200, {"event": self.store.to_public(event)}, {"ETag": self._event_etag(event)})
+
+    async def delete_event(self, request: Request, event_id: str) -> Response:
+        event = await self._run_blocking(self.store.delete, int(event_id))
+        return Response(200, {"message": "Event deleted successfully", "event": self.store.to_public(event)})
+
+    # Subscription handlers
+
+    async def list_subscriptions(self, request: Request) -> Response:
+        if "topic" in request.query:
+            topic = request.query["topic"]
+            recipients = await self._run_blocking(self.memory.get_subscribers, topic)
+            return Response(200, {"topic": topic, "recipients": recipients})
+        if "recipient" in request.query:
+            recipient = request.query["recipient"]
+            topics = await self._run_blocking(self.memory.get_subscriptions, recipient)
+            return Response(200, {"recipient": recipient, "topics": topics})
+        raise HTTPError(400, "Query parameter 'topic' or 'recipient' is required")
+
+    async def create_subscriptions(self, request: Request) -> Response:
+        data = request.json()
+        if not isinstance(data, dict) or not isinstance(data.get("topic"), str) or not data["topic"].strip():
+            raise HTTPError(400, "'topic' must be a non-empty string")
+        recipients = data.get("recipients")
+        if not isinstance(recipients, list) or not recipients or not all(isinstance(r, str) for r in recipients):
+            raise HTTPError(400, "'recipients' must be a non-empty list of strings")
+        added = await self._run_blocking(self.memory.subscribe, data["topic"], recipients)
+        return Response(201, {"topic": data["topic"], "added": added})
+
+    async def delete_subscriptions(self, request: Request) -> Response:
+        topic = request.query.get("topic")
+        if not topic:
+            raise HTTPError(400, "Query parameter 'topic' is required")
+        recipient = request.query.get("recipient")
+        removed = await self._run_blocking(self.memory.unsubscribe, topic, [recipient] if recipient else None)
+        return Response(200, {"topic": topic, "removed": removed})
+
+    async def get_metrics(self, request: Request) -> Response:
+        return Response(200, metrics.render().encode("utf-8"), content_type=CONTENT_TYPE)
+
+    # Connection handling
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Request]:
+        """Read one request from the stream (None on a cleanly closed connection)."""
+        request_line = await reader.readline()
+        if not request_line:
+            return None
+        try:
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "Malformed request line")
+        headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            key, _, value = line.decode("latin-1").partition(":")
+            headers[key.strip().lower()] = value.strip()
+        content_length = headers.get("content-length") or "0"
+        if not (content_length.isascii() and content_length.isdigit()):
+            raise HTTPError(400, "Invalid Content-Length header")
+        length = int(content_length)
+        if length > Config.API_MAX_BODY_BYTES:
+            raise HTTPError(413, "Request body too large")
+        body = await reader.readexactly(length) if length else b""
+        return Request(method, target, headers, body)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serve requests on a connection until the client closes it."""
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HTTPError as e:
+                    writer.write(Response(e.status, {"error": e.message}).encode(keep_alive=False))
+                    await writer.drain()
+                    break
+                if request is None:
+                    break
+                keep_alive = request.headers.get("connection", "").lower() != "close"
+                response = await self.handle_request(request)
+                writer.write(response.encode(keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    # Lifecycle
+
+    async def start(self):
+        """Start listening."""
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def serve_forever(self):
+        """Start listening (if needed) and serve until cancelled."""
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self):
+        """Stop listening and wait for the server to close."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def run(self):
+        """Serve until interrupted (blocking)."""
+        print(f"🌐 Event API listening on http://{self.host}:{self.port}/api/v1/events")
+        try:
+            asyncio.run(self.serve_forever())
+        except KeyboardInterrupt:
+            print("\n👋 Event API stopped.")
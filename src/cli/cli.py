@@ -1,7 +1,24 @@
+import os
 import sys
-from typing import List
+import time
+from typing import List, Optional
 
-from ..agent import Config, LangChainAgent, notification_memory
+from ..agent import Config, notification_memory
+from ..agent.instrumentation import RunTrace, timing_registry
+
+
+def __getattr__(name):
+    # LangChainAgent is imported on first use so commands that do not run the
+    # agent skip loading LangChain
+    if name == "LangChainAgent":
+        from ..agent.agent import LangChainAgent
+        globals()["LangChainAgent"] = LangChainAgent
+        return LangChainAgent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _agent_class():
+    return globals().get("LangChainAgent") or __getattr__("LangChainAgent")
 
 
 class CLI:
@@ -9,6 +26,8 @@ class CLI:
     
     def __init__(self):
         self.config = Config()
+        # Client of a running --serve daemon that commands are forwarded to (None: run in this process)
+        self.daemon = None
         self.examples = [
             "latest AI developments in 2025",
             "new tax policies in India 2025", 
@@ -29,18 +48,37 @@ class CLI:
         print(f"   Base URL: {status['huggingface']['base_url']}")
         print(f"   Model: {status['huggingface']['model']}")
         print()
+        if self.daemon is not None:
+            daemon_status = self.daemon.status()
+            print(f"DAEMON: ✅ Running (pid {daemon_status['pid']}, up {daemon_status['uptime_seconds']:.0f}s, "
+                  f"{daemon_status['queries']} queries served)")
+        else:
+            print("DAEMON: ⏹️  Not running (start it with: python main.py --serve)")
+        print()
     
     def show_memory_status(self):
         """Display the notification memory status."""
         print("🧠 Notification Memory Status:")
         print("=" * 40)
-        stats = notification_memory.get_notification_stats()
+        if self.daemon is not None:
+            stats = self.daemon.memory_stats()
+        else:
+            stats = notification_memory.get_notification_stats()
         
         print(f"Total notifications: {stats['total_notifications']}")
         print(f"Recent notifications (7 days): {stats['recent_notifications']}")
         print(f"Notifications by topic: {stats['notifications_by_topic']}")
         print()
     
+    def show_metrics(self):
+        """Print the metrics in the Prometheus text format (the daemon's when one is running)."""
+        if self.daemon is not None:
+            print(self.daemon.metrics(), end="")
+            return
+        from ..agent.metrics import metrics
+        
+        print(metrics.render(), end="")
+    
     def show_examples(self):
         """Display available search examples."""
         print("🔍 Available example queries:")
@@ -62,40 +100,217 @@ class CLI:
         else:
             return self.examples[0]  # Default to first example
     
-    def run_agent(self, query: str):
-        """Run the agent with the given query."""
-        agent = LangChainAgent()
+    def run_agent(self, query: str, show_timings: bool = False):
+        """Run the agent with the given query (on the daemon when one is running)."""
+        if self.daemon is not None:
+            self._run_agent_on_daemon(query, show_timings)
+            return
+        
+        agent = _agent_class()()
         
         print(f"🔍 Query: {query}")
         print("🤖 AI Agent: Processing your request...")
         
         # Run the agent
         result = agent.run(query)
+        self._print_response(result)
+        
+        if show_timings:
+            self.show_timings(agent.last_trace)
+    
+    def _run_agent_on_daemon(self, query: str, show_timings: bool = False):
+        """Run the query on the --serve daemon, whose agent is already warm."""
+        print(f"🔍 Query: {query}")
+        print("🤖 AI Agent: Processing your request (daemon)...")
+        
+        response = self.daemon.query(query)
+        self._print_response(response["result"])
         
+        if show_timings:
+            trace = RunTrace.from_records(response["trace"]) if response.get("trace") else None
+            self.show_timings(trace, response.get("histograms"))
+    
+    def _print_response(self, result: str):
         print("\n" + "="*60)
         print("🤖 AI Response:")
         print("="*60)
         print(result)
     
+    def show_timings(self, trace: Optional[RunTrace], histograms: Optional[dict] = None):
+        """Display the per-stage timings of an agent run.
+        
+        Args:
+            trace: The run's trace
+            histograms: Stage histograms to show (defaults to all runs in this process)
+        """
+        print("\n⏱️  Timings:")
+        print("=" * 60)
+        if not isinstance(trace, RunTrace):
+            print("   No timings recorded.")
+            return
+        
+        total = trace.duration_ms or 0.0
+        print(f"   Run {trace.run_id}: {total:.1f} ms total")
+        print(f"   {'Stage':<36}{'Calls':>6}{'Total ms':>12}{'Share':>8}")
+        stages = sorted(trace.stage_totals().items(), key=lambda item: item[1]["total_ms"], reverse=True)
+        for stage, entry in stages:
+            share = (entry["total_ms"] / total * 100) if total else 0.0
+            print(f"   {stage:<36}{entry['count']:>6}{entry['total_ms']:>12.1f}{share:>7.1f}%")
+        
+        if histograms is None:
+            print("\n   Histograms (all runs in this process):")
+            histograms = timing_registry.get_histograms()
+        else:
+            print("\n   Histograms (all runs in the daemon):")
+        for stage, histogram in histograms.items():
+            print(f"   {stage:<36} n={histogram['count']:<5} p50={histogram['p50_ms']:.1f}ms "
+                  f"p99={histogram['p99_ms']:.1f}ms max={histogram['max_ms']:.1f}ms")
+    
+    def serve_api(self, port: Optional[int] = None):
+        """Serve the events REST API until interrupted."""
+        from ..api import EventAPIServer
+        EventAPIServer(port=port).run()
+    
+    def serve(self, port: Optional[int] = None):
+        """Run the agent daemon until interrupted; other CLI invocations forward to it.
+        
+        Args:
+            port: Also serve HTTP on this port (defaults to Config.DAEMON_PORT)
+        """
+        from ..api.daemon import AgentDaemon
+        
+        from ..agent.http_pool import close_http_clients
+        
+        daemon = AgentDaemon(port=port)
+        self._start_delivery()
+        try:
+            daemon.run()
+        finally:
+            self._stop_delivery()
+            close_http_clients()
+    
+    def _connect_daemon(self):
+        """Get a client for a running --serve daemon, or None to run in this process."""
+        # Checked before importing the client so commands start fast when no daemon runs
+        if not os.path.exists(Config.DAEMON_SOCKET):
+            return None
+        from ..api.daemon import connect_daemon
+        
+        return connect_daemon()
+    
+    def run_scheduler(self, enqueue: bool = False):
+        """Run the event scheduler in the foreground until interrupted.
+        
+        Args:
+            enqueue: Put due topic checks on the durable job queue for --worker
+                processes instead of running them in this process
+        """
+        from ..agent.batch_planner import BatchPlanner, group_by_topic
+        from ..agent.event_store import EventStore
+        from ..agent.scheduler import EventScheduler
+        
+        store = EventStore()
+        executor = None
+        if enqueue:
+            from ..agent.job_queue import JobQueue
+            queue = JobQueue()
+            
+            def run_batch(events):
+                for batch in group_by_topic(events):
+                    queue.enqueue("check_topic", batch.to_payload(), dedup_key=batch.dedup_key())
+            target = f"job queue at {queue.db_path}"
+        else:
+            from ..agent.event_executor import EventExecutor
+            executor = EventExecutor(BatchPlanner().run_topic)
+            
+            # Due events are checked together: one job (and one search) per unique topic per tick.
+            # submit_many blocks while the executor queue is full, which throttles the scheduler.
+            def run_batch(events):
+                executor.submit_many(group_by_topic(events))
+            target = f"{executor.workers} {executor.mode} workers"
+        scheduler = EventScheduler(store, run_batch=run_batch)
+        if not enqueue:
+            self._start_delivery()
+        print(f"⏰ Scheduler running with {len(scheduler)} scheduled events on {target} (Ctrl+C to stop)...")
+        try:
+            scheduler.run_forever()
+        except KeyboardInterrupt:
+            print(f"\n👋 Scheduler stopped after firing {scheduler.fired} events ({scheduler.failed} failed).")
+        finally:
+            if executor is not None:
+                executor.shutdown(wait=False)
+                metrics = executor.metrics()
+                print(f"   Jobs: {metrics['completed']} completed, {metrics['failed']} failed, "
+                      f"{metrics['queue_depth']} still queued; "
+                      f"p99 queue lag {metrics['lag_ms']['p99_ms'] or 0:.0f}ms")
+            self._stop_delivery()
+    
+    def run_worker(self):
+        """Process topic checks from the durable job queue until interrupted."""
+        from ..agent.batch_planner import BatchPlanner
+        from ..agent.job_queue import JobQueue, JobWorker
+        
+        queue = JobQueue()
+        worker = JobWorker(queue, {"check_topic": BatchPlanner().run_job})
+        self._start_delivery()
+        print(f"🛠️  Worker {worker.worker_id} polling {queue.db_path} (Ctrl+C to stop)...")
+        try:
+            worker.run_forever()
+        except KeyboardInterrupt:
+            stats = queue.stats()
+            print(f"\n👋 Worker stopped after {worker.processed} jobs ({worker.failed} failed). "
+                  f"Queue: {stats['queued']} queued, {stats['leased']} leased, {stats['dead']} dead.")
+        finally:
+            self._stop_delivery()
+    
+    def _start_delivery(self):
+        """Start email delivery if configured, sending digests buffered before a restart."""
+        from ..agent.digest import get_digest_buffer
+        
+        get_digest_buffer()
+    
+    def _stop_delivery(self, timeout: float = 30.0):
+        """Deliver queued emails (up to timeout seconds) and report delivery totals.
+        
+        Digest items whose window is still open stay buffered for the next run.
+        """
+        from ..agent.delivery import shutdown_delivery_service
+        from ..agent.digest import shutdown_digest_buffer
+        
+        shutdown_digest_buffer()
+        metrics = shutdown_delivery_service(timeout)
+        if metrics is not None:
+            print(f"   Emails: {metrics['delivered']} delivered, {metrics['failed']} failed, "
+                  f"{metrics['retried']} retries over {metrics['connections_opened']} SMTP connections")
+    
+    def _extract_flag(self, *names: str) -> bool:
+        """Remove a boolean flag from the command line arguments, returning whether it was present."""
+        found = False
+        for name in names:
+            while name in sys.argv[1:]:
+                sys.argv.remove(name)
+                found = True
+        return found
+    
     def reset_memory(self):
         """Reset the notification memory."""
         print("🧠 Resetting notification memory...")
-        notification_memory.reset_memory()
+        if self.daemon is not None:
+            self.daemon.reset_memory()
+        else:
+            notification_memory.reset_memory()
         print("✅ Notification memory has been reset.")
     
     def show_recent_notifications(self, topic: str = None, days: int = 7):
         """Show recent notifications."""
         if topic:
             print(f"📧 Recent notifications for '{topic}' (last {days} days):")
-            notifications = notification_memory.get_recent_notifications(topic, days)
         else:
             print(f"📧 Recent notifications (last {days} days):")
-            # Get notifications for all topics
-            stats = notification_memory.get_notification_stats()
-            notifications = []
-            for topic_name in stats['notifications_by_topic'].keys():
-                topic_notifications = notification_memory.get_recent_notifications(topic_name, days)
-                notifications.extend(topic_notifications)
+        if self.daemon is not None:
+            notifications = self.daemon.recent_notifications(topic, days)
+        else:
+            notifications = notification_memory.get_recent_notifications(topic, days)
         
         if not notifications:
             print("   No recent notifications found.")
@@ -119,12 +334,109 @@ class CLI:
                         print("         " + preview.replace("\n", "\n         "))
                 print()
     
+    def _extract_option(self, name: str, bare: Optional[str] = None) -> Optional[str]:
+        """Remove an option and its value from the command line arguments.
+        
+        Accepts ``name value`` and ``name=value``. If ``bare`` is given the option
+        may also appear without a value (returning ``bare``), and a separate value
+        is only taken when it is a number.
+        
+        Args:
+            name: Option name, e.g. "--profile-out"
+            bare: Value to return when the option has no value
+            
+        Returns:
+            The option's value, or None if the option is absent
+        """
+        args = sys.argv[1:]
+        for index, arg in enumerate(args):
+            if arg.startswith(f"{name}="):
+                del sys.argv[index + 1]
+                return arg.split("=", 1)[1]
+            if arg == name:
+                following = args[index + 1] if index + 1 < len(args) else None
+                takes_value = following is not None and (bare is None or following.isdigit())
+                del sys.argv[index + 1:index + (3 if takes_value else 2)]
+                if takes_value:
+                    return following
+                if bare is None:
+                    raise ValueError(f"{name} needs a value")
+                return bare
+        return None
+    
+    def _print_options(self):
+        """Print the available command line options."""
+        print("\n💡 Available options:")
+        print("   python main.py --status")
+        print("   python main.py --memory")
+        print("   python main.py --reset-memory")
+        print("   python main.py --recent [topic] [days]")
+        print("   python main.py --metrics")
+        print("   python main.py --api [port]")
+        print("   python main.py --serve [port]")
+        print("   python main.py --scheduler [--enqueue]")
+        print("   python main.py --worker")
+        print("   python main.py 'your query'")
+        print("   python main.py --timings 'your query'")
+        print("   python main.py --local 'your query'   # bypass a running daemon")
+        print("   python main.py --profile [--profile-out PATH] [--profile-memory [N]] 'your query'")
+    
     def run(self):
         """Main CLI execution method."""
-        # Check for special commands
-        if len(sys.argv) > 1:
-            command = sys.argv[1]
+        show_timings = self._extract_flag("--timings", "-t")
+        local = self._extract_flag("--local")
+        profile = self._extract_flag("--profile")
+        try:
+            profile_out = self._extract_option("--profile-out")
+            profile_memory = self._extract_option("--profile-memory", bare="25")
+            if profile_memory is not None and not profile_memory.isdigit():
+                raise ValueError("--profile-memory needs a number")
+        except ValueError as e:
+            print(f"❌ Error: {e}")
+            self._print_options()
+            sys.exit(2)
+        
+        writer = None
+        if Config.METRICS_TEXTFILE:
+            from ..agent.metrics import TextfileWriter
+            writer = TextfileWriter(Config.METRICS_TEXTFILE, Config.METRICS_TEXTFILE_INTERVAL)
+            writer.start()
+        try:
+            self._run_profiled(show_timings, local, profile or bool(profile_out) or bool(profile_memory),
+                               profile_out, int(profile_memory or 0))
+        finally:
+            if writer is not None:
+                # A forwarded command did no work here; leave the file to the daemon
+                writer.stop(write=self.daemon is None)
+    
+    def _run_profiled(self, show_timings: bool, local: bool, profile: bool, profile_out: Optional[str],
+                      profile_memory: int):
+        """Run the command, under the profiler if profiling was requested."""
+        if profile:
+            # Profile this process: the work must run here, not in a daemon
+            from .profiling import Profiler
             
+            if not profile_out:
+                stamp = time.strftime("%Y%m%d-%H%M%S")
+                profile_out = os.path.join(Config.PROFILE_DIR, f"profile-{stamp}")
+            profiler = Profiler(profile_out, sample_interval=Config.PROFILE_SAMPLE_INTERVAL_MS / 1000,
+                                memory_top=profile_memory)
+            with profiler:
+                self._run_command(show_timings, local=True)
+            profiler.print_summary()
+            return
+        
+        self._run_command(show_timings, local)
+    
+    def _run_command(self, show_timings: bool = False, local: bool = False):
+        """Run the command given on the command line."""
+        # Forward to a running daemon unless this command is a long-running process itself
+        command = sys.argv[1] if len(sys.argv) > 1 else None
+        if not local and command not in ("--serve", "--scheduler", "--worker", "--api"):
+            self.daemon = self._connect_daemon()
+        
+        # Check for special commands
+        if command is not None:
             if command in ["--status", "-s"]:
                 self.show_status()
                 return
@@ -133,10 +445,32 @@ class CLI:
                 self.show_memory_status()
                 return
             
+            elif command == "--metrics":
+                self.show_metrics()
+                return
+            
             elif command in ["--reset-memory", "-r"]:
                 self.reset_memory()
                 return
             
+            elif command == "--scheduler":
+                self.run_scheduler(enqueue="--enqueue" in sys.argv[2:])
+                return
+            
+            elif command == "--worker":
+                self.run_worker()
+                return
+            
+            elif command == "--api":
+                port = int(sys.argv[2]) if len(sys.argv) > 2 else None
+                self.serve_api(port)
+                return
+            
+            elif command == "--serve":
+                port = int(sys.argv[2]) if len(sys.argv) > 2 else None
+                self.serve(port)
+                return
+            
             elif command in ["--recent", "-rc"]:
                 topic = sys.argv[2] if len(sys.argv) > 2 else None
                 days = int(sys.argv[3]) if len(sys.argv) > 3 else 7
@@ -148,15 +482,10 @@ class CLI:
             user_query = self.get_user_query()
             
             # Run agent
-            self.run_agent(user_query)
+            self.run_agent(user_query, show_timings=show_timings)
                 
         except Exception as e:
             print(f"❌ Error: {e}")
-            print("\n💡 Available options:")
-            print("   python main.py --status")
-            print("   python main.py --memory")
-            print("   python main.py --reset-memory")
-            print("   python main.py --recent [topic] [days]")
-            print("   python main.py 'your query'")
+            self._print_options()
             print("\n📝 Set your HF_TOKEN in .env file or environment variable:")
             print("   HF_TOKEN=your_huggingface_token")
@@ -0,0 +1,217 @@
+"""
+Profiling support for the CLI (``--profile``).
+
+A ``Profiler`` wraps one CLI command and writes:
+
+    <prefix>.pstats          cProfile statistics from every thread
+                             (open with ``python -m pstats`` or snakeviz)
+    <prefix>.collapsed       wall-clock stack samples in collapsed format,
+                             one ``frame;frame;frame count`` line per stack
+                             (flamegraph.pl, speedscope, inferno)
+    <prefix>.tracemalloc.txt the top allocation sites, when memory profiling
+                             is requested
+
+cProfile is deterministic but only sees CPU work in Python functions. The
+sampler records where every thread is waiting, including network reads, sleeps
+and lock waits, so for an agent query that spends most of its time on LLM and
+search calls the collapsed stacks are usually the more useful view.
+
+Before Python 3.12 cProfile profiles one thread, so every thread started
+while profiling gets its own profiler. Python 3.12 moved cProfile onto
+sys.monitoring: one profiler then sees every thread, and a second one cannot
+be enabled, so a single process-wide profiler is used instead.
+"""
+
+import cProfile
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Dict, List, Optional
+
+# Seconds between stack samples
+DEFAULT_SAMPLE_INTERVAL = 0.005
+
+# Frames kept per allocation traceback in the tracemalloc report
+TRACEMALLOC_FRAMES = 25
+
+# Whether one cProfile profiler covers every thread (see the module docstring)
+PROCESS_WIDE_PROFILER = sys.version_info >= (3, 12)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Samples the stacks of all threads at a fixed interval on a background thread."""
+
+    def __init__(self, interval: float = DEFAULT_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack: List[str] = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, f"thread-{thread_id}"))
+                self.samples[";".join(reversed(stack))] += 1
+            self.sample_count += 1
+
+    def write_collapsed(self, path: str):
+        """Write the samples in collapsed-stack format, most frequent first."""
+        with open(path, "w") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class Profiler:
+    """Profile a block of code with cProfile, a stack sampler and optionally tracemalloc.
+
+    Before Python 3.12, threads started while the profiler is running get
+    their own cProfile profiler, and all of them are merged into one pstats
+    file. stop() disables them all, but a thread's profiling hook can only be
+    removed by that thread, so threads that outlive the profile (pool workers)
+    keep paying for it until they exit. From 3.12 on, one profiler covers
+    every thread and is removed completely.
+    """
+
+    def __init__(self, out_prefix: str, sample_interval: float = DEFAULT_SAMPLE_INTERVAL,
+                 memory_top: int = 0):
+        """Create a profiler.
+
+        Args:
+            out_prefix: Path prefix for the output files
+            sample_interval: Seconds between stack samples
+            memory_top: Number of allocation sites to report; 0 disables tracemalloc
+        """
+        self.out_prefix = out_prefix
+        self.memory_top = memory_top
+        self.sampler = StackSampler(sample_interval)
+        self.paths: Dict[str, str] = {}
+        self.wall_seconds = 0.0
+        self._profiles: List[cProfile.Profile] = []
+        self._profiles_lock = threading.Lock()
+        self._started = 0.0
+
+    def _profile_new_thread(self, *args):
+        # Installed with threading.setprofile: runs once at the start of each new
+        # thread and replaces itself with a cProfile profiler for that thread
+        profile = cProfile.Profile()
+        with self._profiles_lock:
+            self._profiles.append(profile)
+        profile.enable()
+
+    def start(self):
+        if self.memory_top:
+            tracemalloc.start(TRACEMALLOC_FRAMES)
+        # Start the sampler first so its own thread is not profiled (before 3.12)
+        self.sampler.start()
+        if not PROCESS_WIDE_PROFILER:
+            threading.setprofile(self._profile_new_thread)
+        main_profile = cProfile.Profile()
+        self._profiles.append(main_profile)
+        self._started = time.perf_counter()
+        main_profile.enable()
+
+    def stop(self) -> Dict[str, str]:
+        """Stop profiling and write the output files.
+
+        Returns:
+            Dict mapping each output kind (pstats, collapsed, tracemalloc) to its path
+        """
+        self._profiles[0].disable()
+        self.wall_seconds = time.perf_counter() - self._started
+        if not PROCESS_WIDE_PROFILER:
+            threading.setprofile(None)
+        with self._profiles_lock:
+            profiles = list(self._profiles)
+        for profile in profiles[1:]:
+            profile.disable()
+        self.sampler.stop()
+        # Snapshot allocations before building the reports below allocates more
+        snapshot = None
+        if self.memory_top:
+            snapshot = tracemalloc.take_snapshot()
+            traced = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+
+        directory = os.path.dirname(self.out_prefix)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        stats = pstats.Stats(profiles[0])
+        for profile in profiles[1:]:
+            stats.add(profile)
+        self.paths["pstats"] = f"{self.out_prefix}.pstats"
+        stats.dump_stats(self.paths["pstats"])
+
+        self.paths["collapsed"] = f"{self.out_prefix}.collapsed"
+        self.sampler.write_collapsed(self.paths["collapsed"])
+
+        if snapshot is not None:
+            self.paths["tracemalloc"] = f"{self.out_prefix}.tracemalloc.txt"
+            self._write_memory_report(self.paths["tracemalloc"], snapshot, *traced)
+        return self.paths
+
+    def _write_memory_report(self, path: str, snapshot: tracemalloc.Snapshot, current: int, peak: int):
+        snapshot = snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, cProfile.__file__),
+            tracemalloc.Filter(False, __file__)
+        ])
+        top = snapshot.statistics("lineno")[:self.memory_top]
+        with open(path, "w") as f:
+            f.write(f"Traced memory: current {current / 1e6:.2f} MB, peak {peak / 1e6:.2f} MB\n")
+            f.write(f"Top {len(top)} allocation sites still held at the end of the command:\n\n")
+            for index, stat in enumerate(top, 1):
+                frame = stat.traceback[0]
+                f.write(f"#{index}: {frame.filename}:{frame.lineno}: "
+                        f"{stat.size / 1024:.1f} KiB in {stat.count} blocks\n")
+            if top:
+                f.write("\nTraceback of the largest site:\n")
+                for line in top[0].traceback.format(most_recent_first=True):
+                    f.write(f"{line}\n")
+
+    def print_summary(self, top: int = 15):
+        """Print the output paths and the functions with the highest cumulative time."""
+        print(f"\n🔬 Profile ({self.wall_seconds:.2f}s wall, {self.sampler.sample_count} samples)")
+        print("=" * 40)
+        for kind, path in self.paths.items():
+            print(f"   {kind:<12} {path}")
+        if "pstats" in self.paths:
+            stats = pstats.Stats(self.paths["pstats"], stream=sys.stdout)
+            stats.sort_stats("cumulative").print_stats(top)
+
+    def __enter__(self) -> "Profiler":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Tests for compiling event actions into plans.
+"""
+
+import sys
+import os
+import tempfile
+import unittest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.agent.action_plan import ActionCompiler, make_plan, parse_action, unsupported_reason
+from src.agent.event_store import EventStore
+from src.agent.fake_llm import ScriptedChatModel
+
+
+LLM_PLAN = '{"topic": "stock market", "condition": "any_update", "channel": "email", "recipients": ["ops@example.com"]}'
+
+
+class TestActionPlan(unittest.TestCase):
+    """Test rule-based and LLM action compilation."""
+
+    def test_rule_based_plans(self):
+        """Test the action forms the rules understand."""
+        plan = parse_action("If any update in tax policy then send email to the user")
+        self.assertEqual(plan["topic"], "tax policy")
+        self.assertEqual(plan["topic_key"], "policy tax")
+        self.assertEqual(plan["channel"], "email")
+        self.assertEqual(plan["recipients"], ["default"])
+
+        plan = parse_action("Email alice@example.com when tax policy changes")
+        self.assertEqual(plan["topic"], "tax policy")
+        self.assertEqual(plan["recipients"], ["alice@example.com"])
+
+        self.assertIsNone(parse_action("Watch the stock market"))
+
+    def test_unsupported_channels_and_conditions(self):
+        """Test that channels and conditions the pipeline cannot carry out are kept and reported."""
+        self.assertIsNone(unsupported_reason(parse_action("If any update in tax policy then email me")))
+        plan = parse_action("If any update in tax policy then send an sms to the user")
+        self.assertEqual(plan["channel"], "sms")
+        self.assertIn("Channel 'sms'", unsupported_reason(plan))
+        plan = make_plan("stock market", condition="Price Drop", channel="Email", source="llm")
+        self.assertEqual((plan["condition"], plan["channel"]), ("price_drop", "email"))
+        self.assertIn("Condition 'price_drop'", unsupported_reason(plan))
+
+    def test_llm_called_once_per_action(self):
+        """Test that unreadable actions go to the LLM once and are then cached."""
+        compiler = ActionCompiler(llm=ScriptedChatModel(script=[LLM_PLAN]))
+        for _ in range(3):
+            plan = compiler.compile("Watch the stock market")
+        self.assertEqual(compiler.llm_calls, 1)
+        self.assertEqual(plan["topic"], "stock market")
+        self.assertEqual(plan["recipients"], ["ops@example.com"])
+        self.assertEqual(plan["source"], "llm")
+
+        # Readable actions never reach the LLM
+        compiler.compile("If any update in tax policy then send email to the user")
+        self.assertEqual(compiler.llm_calls, 1)
+
+    def test_fallback_without_llm(self):
+        """Test the best-effort plan when no LLM is available."""
+        plan = ActionCompiler(llm_factory=lambda: None).compile("If it rains then open umbrella")
+        self.assertEqual(plan["source"], "fallback")
+        self.assertEqual(plan["topic"], "it rains")
+
+    def test_llm_errors_are_retried(self):
+        """Test that a fallback plan standing in for a failed LLM call is not kept."""
+        class FlakyLLM:
+            calls = 0
+
+            def invoke(self, messages, config=None):
+                FlakyLLM.calls += 1
+                if FlakyLLM.calls == 1:
+                    raise ConnectionError("provider unavailable")
+                return ScriptedChatModel(script=[LLM_PLAN]).invoke(messages)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, "events.db")
+            compiler = ActionCompiler(llm=FlakyLLM())
+            store = EventStore(db_path, compiler=compiler)
+            event = store.create({"name": "Stocks", "action": "Watch the stock market", "cron_job": "Every hour"})
+            self.assertEqual(event["plan"]["source"], "fallback")
+            self.assertFalse(compiler.is_current(event["plan"]))
+            store.close()
+
+            # The stored fallback plan is compiled again, and this time the LLM answers
+            store = EventStore(db_path, compiler=compiler)
+            self.assertEqual(store.get(event["id"])["plan"]["source"], "llm")
+            self.assertEqual(compiler.llm_calls, 2)
+            store.close()
+        compiler.compile("Watch the stock market")
+        self.assertEqual(compiler.llm_calls, 2)
+
+    def test_plans_persist_with_events(self):
+        """Test that plans are stored with events and reused after a restart."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, "events.db")
+            compiler = ActionCompiler(llm=ScriptedChatModel(script=[LLM_PLAN]))
+            store = EventStore(db_path, compiler=compiler)
+            event = store.create({"name": "Stocks", "action": "Watch the stock market", "cron_job": "Every hour"})
+            self.assertEqual(event["plan"]["topic"], "stock market")
+
+            updated = store.update(event["id"], {"action": "If any update in tax policy then email me"}, partial=True)
+            self.assertEqual(updated["plan"]["topic"], "tax policy")
+            store.update(event["id"], {"action": "Watch the stock market"}, partial=True)
+            store.close()
+
+            # A fresh compiler would need the LLM again; the stored plan avoids it
+            compiler = ActionCompiler(llm=ScriptedChatModel(script=["not json"]))
+            store = EventStore(db_path, compiler=compiler)
+            self.assertEqual(store.get(event["id"])["plan"]["topic"], "stock market")
+            self.assertEqual(compiler.llm_calls, 0)
+            store.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
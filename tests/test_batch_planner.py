@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Tests for the tick-level batch planner.
+"""
+
+import sys
+import os
+import json
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.agent.action_plan import action_compiler
+from src.agent.batch_planner import BatchPlanner, TopicBatch, group_by_topic
+from src.agent.event_executor import EventExecutor
+from src.agent.notification_memory import NotificationMemory
+
+
+def make_event(event_id, action):
+    return {"id": event_id, "name": f"Event {event_id}", "action": action,
+            "plan": action_compiler.compile(action)}
+
+
+EVENTS = [
+    make_event(1, "If any update in tax policy then send email to the user"),
+    make_event(2, "If any update in tax policies then send email to alice@example.com"),
+    make_event(3, "When budget changes then email bob@example.com"),
+    make_event(4, "Email alice@example.com when tax policy changes"),
+    make_event(5, "If any update in budget then send email to the user"),
+]
+
+
+class TestBatchPlanner(unittest.TestCase):
+    """Test topic grouping, single search per topic and recipient fan-out."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.memory = NotificationMemory(os.path.join(self.tmp_dir.name, "memory.db"))
+        self.memory_patch = patch("src.agent.tools.notification_memory", self.memory)
+        self.memory_patch.start()
+        self.queries = []
+
+    def tearDown(self):
+        self.memory_patch.stop()
+        self.tmp_dir.cleanup()
+
+    def fake_search(self, query, topic):
+        self.queries.append(query)
+        return [{"title": f"Latest {topic} news", "url": f"https://example.com/{topic.replace(' ', '-')}",
+                 "snippet": "Announced today"}]
+
+    def test_group_by_topic(self):
+        """Test that equivalent topics share one batch."""
+        batches = group_by_topic(EVENTS)
+        self.assertEqual([batch.topic_key for batch in batches], ["policy tax", "budget"])
+        self.assertEqual(batches[0].recipients(), {"default": [1], "alice@example.com": [2, 4]})
+
+    def test_unsupported_plans_are_skipped(self):
+        """Test that events asking for another channel or condition are not emailed."""
+        slack = make_event(6, "If any update in solar power then send a slack message to the user")
+        self.assertEqual(slack["plan"]["channel"], "slack")
+        threshold = {**make_event(7, "If any update in wind power then send email to the user")}
+        threshold["plan"] = {**threshold["plan"], "condition": "price_drop"}
+        batches = group_by_topic(EVENTS + [slack, threshold])
+        self.assertEqual([batch.topic_key for batch in batches], ["policy tax", "budget"])
+
+    def test_one_search_per_topic(self):
+        """Test that searches scale with topics and notifications with recipients."""
+        planner = BatchPlanner(search=self.fake_search)
+        results = planner.run(EVENTS)
+
+        self.assertEqual(len(self.queries), 2)
+        self.assertEqual(planner.searches, 2)
+        sent = {(r["topic_searched"], r["recipient"]): r["should_send_email"] for r in results}
+        self.assertEqual(sent, {
+            ("tax policy", "default"): True,
+            ("tax policy", "alice@example.com"): True,
+            ("budget", "bob@example.com"): True,
+            ("budget", "default"): True,
+        })
+
+        # The same results are not sent to the same recipient twice
+        results = planner.run(EVENTS)
+        self.assertFalse(any(r["should_send_email"] for r in results))
+
+    def test_topic_jobs_on_executor(self):
+        """Test running one executor job per topic batch."""
+        planner = BatchPlanner(search=self.fake_search)
+        results = []
+        executor = EventExecutor(planner.run_topic, workers=2, queue_size=4,
+                                 on_result=lambda batch, result: results.extend(result))
+        executor.submit_many(group_by_topic(EVENTS))
+        executor.join()
+        executor.shutdown()
+        self.assertEqual(len(self.queries), 2)
+        self.assertEqual(len(results), 4)
+
+    def test_job_payload_round_trip(self):
+        """Test that a batch survives the job queue and keeps a stable dedup key."""
+        batch = group_by_topic(EVENTS)[0]
+        restored = TopicBatch.from_payload(json.loads(json.dumps(batch.to_payload())))
+        self.assertEqual(restored.recipients(), batch.recipients())
+        self.assertEqual(restored.dedup_key(), batch.dedup_key())
+
+        results = BatchPlanner(search=self.fake_search).run_job(batch.to_payload())
+        self.assertEqual(len(results), 2)
+
+    def test_search_failure(self):
+        """Test that a failed search is reported for every recipient of the topic."""
+        def failing_search(query, topic):
+            raise RuntimeError("offline")
+
+        results = BatchPlanner(search=failing_search).run(EVENTS[:2])
+        self.assertEqual(len(results), 2)
+        self.assertTrue(all("offline" in r["reasoning"] for r in results))
+
+
+if __name__ == "__main__":
+    unittest.main()
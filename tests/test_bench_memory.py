@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Smoke test for the notification memory benchmark.
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+import unittest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_memory import OPERATIONS, bench_size, make_update
+from src.agent.notification_memory import NotificationMemory
+
+
+class TestMemoryBenchmark(unittest.TestCase):
+    """Test seeding and measuring on a small store."""
+
+    def test_small_run(self):
+        """Test that seeded rows are real history and every operation is measured."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, "memory.db")
+            result = bench_size(db_path, updates=500, topics=10, recipients=3, days=60, repeat=5,
+                                scan_repeat=2, seed_value=1)
+
+            self.assertEqual(result["seed"]["notifications"], 100)
+            self.assertEqual(sorted(result["operations"]), sorted(OPERATIONS))
+            for stats in result["operations"].values():
+                self.assertGreater(stats["p50_ms"], 0)
+                self.assertLessEqual(stats["p50_ms"], stats["p99_ms"])
+
+            # Seeded updates are recognised by the memory's own hashing
+            memory = NotificationMemory(db_path)
+            with sqlite3.connect(db_path) as conn:
+                topic, title = conn.execute("SELECT topic, title FROM sent_updates LIMIT 1").fetchone()
+            update = next(make_update(t, i) for t in range(10) for i in range(50)
+                          if make_update(t, i)["title"] == title)
+            _, already_sent = memory.filter_new_updates(topic, [update], time_window_hours=24 * 365)
+            self.assertEqual(already_sent, [update])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Smoke test for the end-to-end pipeline benchmark.
+"""
+
+import sys
+import os
+import unittest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_pipeline import run_level
+
+
+class TestPipelineBenchmark(unittest.TestCase):
+    """Test both workloads at a small scale without latency."""
+
+    def test_workloads_notify_and_deliver(self):
+        """Test that every query is notified, delivered and traced."""
+        for workload in ("agent", "update"):
+            with self.subTest(workload=workload):
+                run = run_level(workload, concurrency=2, queries=4, llm_latency=0, search_latency=0, smtp=True)
+                self.assertEqual(run["notifications"], 4)
+                self.assertEqual(run["emails_delivered"], 4)
+                self.assertIn("tool.search_web", run["stages"])
+                self.assertEqual("llm" in run["stages"], workload == "agent")
+                self.assertGreater(run["peak_traced_mb"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+Tests for the long-running agent daemon and the CLI's thin client mode.
+"""
+
+import sys
+import os
+import asyncio
+import tempfile
+import threading
+import time
+import unittest
+from io import StringIO
+from unittest.mock import patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.agent.event_store import EventStore
+from src.agent.instrumentation import RunTrace, trace_run
+from src.agent.notification_memory import NotificationMemory
+from src.api.daemon import AgentDaemon, DaemonClient, DaemonError, connect_daemon
+from src.cli import CLI
+
+
+class FakeAgent:
+    """Stands in for LangChainAgent: answers instantly and records a trace."""
+
+    def run(self, query):
+        with trace_run("agent", registry=None, query=query) as trace:
+            self.last_trace = trace
+            trace.add_span("llm", time.perf_counter(), 1.5)
+        return f"Answer to {query}"
+
+
+class TestAgentDaemon(unittest.TestCase):
+    """Test serving queries and memory commands over the Unix socket."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.tmp_dir.name, "daemon.sock")
+        self.memory = NotificationMemory(os.path.join(self.tmp_dir.name, "memory.db"))
+        self.store = EventStore(os.path.join(self.tmp_dir.name, "events.db"))
+        self.daemon = self.make_daemon()
+        self.loop = asyncio.new_event_loop()
+        self.loop.run_until_complete(self.daemon.start())
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self.client = DaemonClient(self.socket_path, timeout=5)
+
+    def tearDown(self):
+        asyncio.run_coroutine_threadsafe(self.daemon.stop(), self.loop).result(5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+        self.loop.close()
+        self.store.close()
+        self.tmp_dir.cleanup()
+
+    def make_daemon(self):
+        return AgentDaemon(socket_path=self.socket_path, agent_factory=FakeAgent, store=self.store,
+                           memory=self.memory)
+
+    def test_queries_reuse_a_warm_agent(self):
+        """Test that repeated queries are answered by the same agent."""
+        first = self.client.query("tax policy updates")
+        second = self.client.query("ai news")
+        self.assertEqual(first["result"], "Answer to tax policy updates")
+        self.assertEqual(second["result"], "Answer to ai news")
+        self.assertEqual(self.daemon.agents_created, 1)
+        self.assertEqual(self.client.status()["queries"], 2)
+
+        trace = RunTrace.from_records(second["trace"])
+        self.assertEqual(trace.stage_totals(), {"llm": {"count": 1, "total_ms": 1.5}})
+        self.assertIsNotNone(trace.duration_ms)
+
+        with self.assertRaises(DaemonError) as error:
+            self.client.request("POST", "/api/v1/query", {"query": ""})
+        self.assertEqual(error.exception.status, 400)
+
+    def test_memory_commands(self):
+        """Test memory statistics, recent notifications and reset through the daemon."""
+        self.memory.mark_notification_sent("tax policy", {
+            "topic_searched": "tax policy",
+            "relevant_updates": [{"title": "Update", "url": "http://example.com"}]
+        })
+        self.assertEqual(self.client.memory_stats()["total_notifications"], 1)
+        self.assertEqual(len(self.client.recent_notifications("tax policy")), 1)
+        self.assertEqual(len(self.client.recent_notifications()), 1)
+        self.assertEqual(self.client.recent_notifications("ai news"), [])
+        self.client.reset_memory()
+        self.assertEqual(self.memory.get_notification_stats()["total_notifications"], 0)
+
+    def test_metrics(self):
+        """Test that the daemon's metrics are exposed to the CLI."""
+        metrics = self.client.metrics()
+        self.assertIn("# TYPE event_agent_queries counter", metrics)
+        with patch("src.agent.config.Config.DAEMON_SOCKET", self.socket_path), \
+                patch("sys.argv", ["main.py", "--metrics"]), \
+                patch("sys.stdout", new=StringIO()) as fake_output:
+            CLI().run()
+        self.assertIn("event_agent_queries_total", fake_output.getvalue())
+
+    def test_socket_ownership(self):
+        """Test that a live daemon is detected and its socket is not taken over."""
+        self.assertIsNotNone(connect_daemon(self.socket_path))
+        with self.assertRaises(RuntimeError):
+            asyncio.run(self.make_daemon().start())
+
+    def test_socket_is_private_when_bound(self):
+        """Test that the socket is created owner-only, before it is chmod-ed."""
+        self.assertEqual(os.stat(self.socket_path).st_mode & 0o777, 0o600)
+        socket_path = os.path.join(self.tmp_dir.name, "private.sock")
+        daemon = AgentDaemon(socket_path=socket_path, agent_factory=FakeAgent, store=self.store,
+                             memory=self.memory)
+        modes = []
+
+        async def check():
+            with patch("src.api.daemon.os.chmod", side_effect=lambda path, mode: modes.append(
+                    os.stat(path).st_mode & 0o777)):
+                await daemon.start()
+            await daemon.stop()
+
+        previous_umask = os.umask(0o022)
+        try:
+            asyncio.run(check())
+            self.assertEqual(os.umask(0o022), 0o022)
+        finally:
+            os.umask(previous_umask)
+        # No group or other permissions even before the chmod
+        self.assertEqual(len(modes), 1)
+        self.assertEqual(modes[0] & 0o077, 0)
+
+    def test_http_refuses_daemon_endpoints(self):
+        """Test that queries and memory commands are only served on the Unix socket."""
+        daemon = AgentDaemon(socket_path=os.path.join(self.tmp_dir.name, "http.sock"), port=0,
+                             agent_factory=FakeAgent, store=self.store, memory=self.memory, host="127.0.0.1")
+        statuses = {}
+
+        async def check():
+            await daemon.start()
+            try:
+                for method, path in (("POST", "/api/v1/query"), ("POST", "/api/v1/memory/reset"),
+                                     ("GET", "/api/v1/daemon"), ("GET", "/api/v1/events")):
+                    reader, writer = await asyncio.open_connection("127.0.0.1", daemon.port)
+                    body = b'{"query": "tax"}'
+                    writer.write(f"{method} {path} HTTP/1.1\r\nContent-Length: {len(body)}\r\n"
+                                 f"Connection: close\r\n\r\n".encode() + body)
+                    statuses[path] = int((await reader.readline()).split()[1])
+                    writer.close()
+            finally:
+                await daemon.stop()
+
+        asyncio.run(check())
+        self.assertEqual(statuses, {"/api/v1/query": 403, "/api/v1/memory/reset": 403,
+                                    "/api/v1/daemon": 403, "/api/v1/events": 200})
+        self.assertEqual(daemon.queries, 0)
+        self.assertEqual(self.client.query("tax")["result"], "Answer to tax")
+
+    def test_cli_forwards_to_daemon(self):
+        """Test that CLI commands run on the daemon while it is running."""
+        with patch("src.agent.config.Config.DAEMON_SOCKET", self.socket_path), \
+                patch("src.cli.cli.LangChainAgent") as local_agent, \
+                patch("sys.argv", ["main.py", "--timings", "tax policy updates"]), \
+                patch("sys.stdout", new=StringIO()) as fake_output:
+            CLI().run()
+        output = fake_output.getvalue()
+        self.assertIn("Answer to tax policy updates", output)
+        self.assertIn("Histograms (all runs in the daemon)", output)
+        local_agent.assert_not_called()
+
+        with patch("src.agent.config.Config.DAEMON_SOCKET", self.socket_path), \
+                patch("src.cli.cli.LangChainAgent") as local_agent, \
+                patch("sys.argv", ["main.py", "--local", "tax policy updates"]), \
+                patch("sys.stdout", new=StringIO()):
+            CLI().run()
+        local_agent.assert_called_once()
+
+
+class TestStaleSocket(unittest.TestCase):
+    """Test recovering from a daemon that died without removing its socket."""
+
+    def test_stale_socket_is_replaced(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            socket_path = os.path.join(tmp_dir, "daemon.sock")
+            open(socket_path, "w").close()
+            self.assertIsNone(connect_daemon(socket_path))
+
+            store = EventStore(os.path.join(tmp_dir, "events.db"))
+            daemon = AgentDaemon(socket_path=socket_path, agent_factory=FakeAgent, store=store,
+                                 memory=NotificationMemory(os.path.join(tmp_dir, "memory.db")))
+
+            async def check():
+                await daemon.start()
+                try:
+                    status = await asyncio.to_thread(DaemonClient(socket_path, timeout=5).status)
+                finally:
+                    await daemon.stop()
+                return status
+
+            self.assertEqual(asyncio.run(check())["queries"], 0)
+            self.assertFalse(os.path.exists(socket_path))
+            store.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
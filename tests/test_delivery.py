@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Tests for pooled SMTP delivery against the local SMTP sink.
+"""
+
+import sys
+import os
+import smtplib
+import tempfile
+import unittest
+from io import StringIO
+from unittest.mock import MagicMock, patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.agent.delivery import DeliveryService, SMTPPool, build_email, send_pipelined
+from src.agent.notification_memory import NotificationMemory
+from src.agent.smtp_sink import LocalSMTPSink
+from src.agent.tools import create_email_content
+
+
+def make_notification(memory, topic, n, recipient="a@example.com"):
+    updates = [{"title": f"{topic} update {n}", "url": f"http://example.com/{topic}/{n}"}]
+    claim_id, claimed, _ = memory.claim_new_updates(topic, updates, recipient=recipient)
+    return {"should_send_email": True, "topic_searched": topic, "relevant_updates": claimed,
+            "email_content": create_email_content(topic, claimed), "claim_id": claim_id}
+
+
+class TestDelivery(unittest.TestCase):
+    """Test batching, connection reuse, retries and claim settlement."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.memory = NotificationMemory(os.path.join(self.tmp_dir.name, "memory.db"))
+        self.sink = LocalSMTPSink().start()
+
+    def tearDown(self):
+        self.sink.stop()
+        self.tmp_dir.cleanup()
+
+    def make_service(self, **kwargs):
+        pool = SMTPPool(host=self.sink.host, port=self.sink.port, username="", size=kwargs.pop("size", 2))
+        options = {"memory": self.memory, "backoff_base": 0.01, "backoff_max": 0.05}
+        options.update(kwargs)
+        return DeliveryService(pool, **options)
+
+    def test_pipelined_send_reports_each_message(self):
+        """Test that one connection sends many messages with a result for each."""
+        messages = [build_email({"email_content": {"subject": f"Update {i}", "body": ".hidden\nbody"}},
+                                f"user{i}@example.com", "agent@example.com") for i in range(5)]
+        self.sink.fail_next(1, "550 No such user")
+        smtp = smtplib.SMTP(self.sink.host, self.sink.port)
+        smtp.ehlo()
+        results = send_pipelined(smtp, messages)
+        smtp.quit()
+        self.assertEqual([accepted for accepted, _, _ in results], [False, True, True, True, True])
+        self.assertEqual(results[0][1], 550)
+        self.assertEqual([m["subject"] for m in self.sink.messages], ["Update 1", "Update 2", "Update 3", "Update 4"])
+        # Dot-stuffing is undone by the server
+        self.assertTrue(self.sink.messages[0]["message"].get_content().startswith(".hidden"))
+
+    def test_delivery_reuses_connections_and_commits_claims(self):
+        """Test that many emails share a few connections and commit their claims."""
+        service = self.make_service()
+        notifications = [make_notification(self.memory, "tax policy", i) for i in range(40)]
+        for notification in notifications:
+            self.assertTrue(service.submit(notification, recipient="a@example.com"))
+        self.assertTrue(service.flush(timeout=10))
+        service.shutdown()
+
+        self.assertEqual(len(self.sink.messages), 40)
+        self.assertLessEqual(self.sink.connections, 2)
+        self.assertEqual(service.metrics()["delivered"], 40)
+        # Committed updates are not claimable again
+        claim_id, _, _ = self.memory.claim_new_updates(
+            "tax policy", notifications[0]["relevant_updates"], recipient="a@example.com")
+        self.assertIsNone(claim_id)
+
+    def test_temporary_failure_is_retried(self):
+        """Test that 4xx replies are retried in the background until accepted."""
+        service = self.make_service()
+        self.sink.fail_next(2)
+        notification = make_notification(self.memory, "tax policy", 1)
+        service.submit(notification, recipient="a@example.com")
+        self.assertTrue(service.flush(timeout=10))
+        service.shutdown()
+        metrics = service.metrics()
+        self.assertEqual((metrics["delivered"], metrics["retried"], metrics["failed"]), (1, 2, 0))
+        self.assertEqual(len(self.sink.messages), 1)
+
+    def test_permanent_failure_releases_claim(self):
+        """Test that a 5xx reply gives up and makes the updates claimable again."""
+        service = self.make_service()
+        self.sink.fail_next(1, "550 Mailbox unavailable")
+        notification = make_notification(self.memory, "tax policy", 1)
+        service.submit(notification, recipient="a@example.com")
+        self.assertTrue(service.flush(timeout=10))
+        service.shutdown()
+        self.assertEqual(service.metrics()["failed"], 1)
+        claim_id, claimed, _ = self.memory.claim_new_updates(
+            "tax policy", notification["relevant_updates"], recipient="a@example.com")
+        self.assertIsNotNone(claim_id)
+        self.assertEqual(claimed, notification["relevant_updates"])
+
+    def test_recipient_without_address_is_dropped(self):
+        """Test that updates for a recipient without an address are not claimed again."""
+        service = self.make_service()
+        notification = make_notification(self.memory, "tax policy", 1, recipient="default")
+        self.memory.mark_notification_sent("tax policy", notification)
+        with patch("src.agent.config.Config.EMAIL_DEFAULT_TO", None), \
+                patch("sys.stdout", new_callable=StringIO) as output:
+            self.assertFalse(service.submit(notification, recipient="default"))
+        service.shutdown()
+        self.assertEqual(output.getvalue(), "")
+        self.assertEqual(service.metrics()["undeliverable"], 1)
+        claim_id, _, already_sent = self.memory.claim_new_updates(
+            "tax policy", notification["relevant_updates"])
+        self.assertIsNone(claim_id)
+        self.assertEqual(already_sent, notification["relevant_updates"])
+        self.assertEqual(self.memory.get_recent_notifications("tax policy"), [])
+        self.assertEqual(self.memory.get_sent_updates("tax policy"), [])
+
+    def test_unreachable_server_gives_up_after_max_attempts(self):
+        """Test that connection errors are retried, then the claim is released."""
+        port = self.sink.port
+        self.sink.stop()
+        pool = SMTPPool(host="127.0.0.1", port=port, username="", size=1, timeout=1)
+        service = DeliveryService(pool, memory=self.memory, max_attempts=3, backoff_base=0.01)
+        notification = make_notification(self.memory, "tax policy", 1)
+        service.submit(notification, recipient="a@example.com")
+        self.assertTrue(service.flush(timeout=10))
+        service.shutdown()
+        metrics = service.metrics()
+        self.assertEqual((metrics["failed"], metrics["retried"]), (1, 2))
+        self.assertIsNotNone(self.memory.claim_new_updates(
+            "tax policy", notification["relevant_updates"], recipient="a@example.com")[0])
+
+    def test_unexpected_error_releases_claims_and_keeps_worker(self):
+        """Test that an unexpected error fails the batch without stopping the worker."""
+        service = self.make_service(workers=1)
+        notification = make_notification(self.memory, "tax policy", 1)
+        with patch("src.agent.delivery.send_pipelined", side_effect=RuntimeError("boom")), \
+                patch("sys.stdout", new=StringIO()):
+            service.submit(notification, recipient="a@example.com")
+            self.assertTrue(service.flush(timeout=10))
+        self.assertEqual(service.metrics()["failed"], 1)
+        self.assertIsNotNone(self.memory.claim_new_updates(
+            "tax policy", notification["relevant_updates"], recipient="a@example.com")[0])
+
+        service.submit(make_notification(self.memory, "tax policy", 2), recipient="a@example.com")
+        self.assertTrue(service.flush(timeout=10))
+        service.shutdown()
+        self.assertEqual(service.metrics()["delivered"], 1)
+
+    def test_refusal_without_error_reply(self):
+        """Test that a refused message is reported even if no reply is an error."""
+        smtp = MagicMock()
+        smtp.has_extn.return_value = True
+        message = build_email({"email_content": {"subject": "s", "body": "b"}}, "a@example.com", "agent@example.com")
+        # DATA got 250 instead of 354, so no reply says why the message was refused
+        smtp.getreply.side_effect = [(250, b"ok"), (250, b"ok"), (250, b"ok")]
+        self.assertEqual(send_pipelined(smtp, [message]), [(False, 250, "ok")])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Tests for per-recipient digest buffering.
+"""
+
+import sys
+import os
+import tempfile
+import unittest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.agent.delivery import DeliveryService, SMTPPool
+from src.agent.digest import DigestBuffer
+from src.agent.email_content import create_digest_content, create_email_content
+from src.agent.notification_memory import NotificationMemory
+from src.agent.smtp_sink import LocalSMTPSink
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def updates_for(topic, count=1):
+    return [{"title": f"{topic} update {i}", "url": f"http://example.com/{topic}/{i}"} for i in range(count)]
+
+
+class TestDigestContent(unittest.TestCase):
+    """Test rendering several topics into one email."""
+
+    def test_digest_merges_topics(self):
+        """Test that sections are grouped per topic with duplicates dropped."""
+        content = create_digest_content([
+            ("tax policy", updates_for("tax", 2)),
+            ("ai news", updates_for("ai", 1)),
+            ("tax policy", updates_for("tax", 3))
+        ])
+        self.assertEqual(content["subject"], "🔔 4 New Updates on 2 Topics")
+        self.assertIn("📋 Tax Policy (3 updates):", content["body"])
+        self.assertIn("📋 Ai News (1 update):", content["body"])
+        self.assertLess(content["body"].index("Tax Policy"), content["body"].index("Ai News"))
+
+    def test_single_topic_digest_matches_regular_email(self):
+        """Test that a digest of one topic is the usual per-topic email."""
+        digest = create_digest_content([("tax policy", updates_for("tax", 2))])
+        self.assertEqual(digest["subject"], create_email_content("tax policy", updates_for("tax", 2))["subject"])
+
+
+class TestDigestBuffer(unittest.TestCase):
+    """Test windows, durability and delivery of digests."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, "memory.db")
+        self.memory = NotificationMemory(self.db_path)
+        self.clock = FakeClock()
+        self.buffer = self.make_buffer()
+
+    def tearDown(self):
+        self.buffer.close()
+        self.tmp_dir.cleanup()
+
+    def make_buffer(self):
+        return DigestBuffer(self.db_path, window_seconds=60, memory=self.memory, clock=self.clock)
+
+    def add(self, recipient, topic):
+        updates = updates_for(topic)
+        claim_id, claimed, _ = self.memory.claim_new_updates(topic, updates, recipient=recipient)
+        return self.buffer.add(recipient, topic, claimed, claim_id)
+
+    def test_items_join_the_recipient_window(self):
+        """Test that a recipient's items share the window opened by the first one."""
+        self.assertEqual(self.add("a@example.com", "tax policy"), 1060)
+        self.clock.now += 30
+        self.assertEqual(self.add("a@example.com", "ai news"), 1060)
+        self.assertEqual(self.add("b@example.com", "tax policy"), 1090)
+
+        self.assertEqual(self.buffer.take_due(), [])
+        self.clock.now = 1060
+        digests = self.buffer.take_due()
+        self.assertEqual([d["recipient"] for d in digests], ["a@example.com"])
+        self.assertEqual([topic for topic, _ in digests[0]["sections"]], ["tax policy", "ai news"])
+        self.assertEqual(len(digests[0]["claim_ids"]), 2)
+        self.assertEqual(self.buffer.pending(), {"b@example.com": 1})
+        self.assertEqual(self.buffer.next_due_at(), 1090)
+
+    def test_buffer_survives_restart(self):
+        """Test that buffered items are still there for a new process."""
+        self.add("a@example.com", "tax policy")
+        self.buffer.close()
+        self.buffer = self.make_buffer()
+        self.clock.now += 60
+        self.assertEqual(len(self.buffer.take_due()), 1)
+
+    def test_buffered_claims_are_not_taken_over(self):
+        """Test that the claim of a buffered item outlives the window."""
+        self.buffer.window_seconds = 3600
+        self.add("a@example.com", "tax policy")
+        claim_id, _, _ = self.memory.claim_new_updates("tax policy", updates_for("tax policy"),
+                                                       recipient="a@example.com", claim_ttl_seconds=60)
+        self.assertIsNone(claim_id)
+
+    def test_flush_sends_one_email_per_recipient(self):
+        """Test that due digests are delivered as one email and their claims committed."""
+        for topic in ("tax policy", "ai news", "climate"):
+            self.add("a@example.com", topic)
+        self.clock.now += 60
+        with LocalSMTPSink() as sink:
+            delivery = DeliveryService(SMTPPool(host=sink.host, port=sink.port, username="", size=1),
+                                       memory=self.memory)
+            self.assertEqual(self.buffer.flush_due(delivery), 1)
+            self.assertTrue(delivery.flush(timeout=10))
+            delivery.shutdown()
+        self.assertEqual([m["subject"] for m in sink.messages], ["🔔 3 New Updates on 3 Topics"])
+        self.assertEqual(self.buffer.pending(), {})
+        claim_id, _, _ = self.memory.claim_new_updates("ai news", updates_for("ai news"), recipient="a@example.com")
+        self.assertIsNone(claim_id)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Tests for the bounded event executor and stage limits.
+"""
+
+import sys
+import os
+import threading
+import time
+import unittest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.agent.event_executor import EventExecutor
+from src.agent.limits import StageLimits
+
+
+def square(x):
+    return x * x
+
+
+class TestEventExecutor(unittest.TestCase):
+    """Test job execution, backpressure and metrics."""
+
+    def test_runs_jobs(self):
+        """Test that every job runs and results are reported."""
+        results = {}
+        executor = EventExecutor(square, workers=3, queue_size=10,
+                                 on_result=lambda job, result: results.__setitem__(job, result))
+        self.assertEqual(executor.submit_many(range(20)), 20)
+        executor.join()
+        executor.shutdown()
+        self.assertEqual(results, {i: i * i for i in range(20)})
+        metrics = executor.metrics()
+        self.assertEqual(metrics["completed"], 20)
+        self.assertEqual(metrics["queue_depth"], 0)
+        self.assertEqual(metrics["lag_ms"]["count"], 20)
+
+    def test_backpressure(self):
+        """Test that a full queue blocks or rejects the producer instead of growing."""
+        release = threading.Event()
+        executor = EventExecutor(lambda job: release.wait(5), workers=1, queue_size=2)
+        self.assertTrue(executor.submit(1))
+        # Wait for the worker to take the first job, then fill the queue
+        deadline = time.time() + 2
+        while executor.in_flight == 0 and time.time() < deadline:
+            time.sleep(0.01)
+        self.assertTrue(executor.try_submit(2))
+        self.assertTrue(executor.try_submit(3))
+        self.assertFalse(executor.try_submit(4))
+        self.assertFalse(executor.submit(5, timeout=0.05))
+
+        metrics = executor.metrics()
+        self.assertEqual(metrics["queue_depth"], 2)
+        self.assertEqual(metrics["rejected"], 2)
+        self.assertGreater(metrics["oldest_wait_seconds"], 0)
+
+        release.set()
+        executor.join()
+        executor.shutdown()
+        self.assertEqual(executor.completed, 3)
+
+    def test_failures_are_counted(self):
+        """Test that a failing job does not stop the worker."""
+        executor = EventExecutor(lambda job: 1 / job, workers=1, queue_size=5)
+        executor.submit_many([0, 1, 2])
+        executor.join()
+        executor.shutdown()
+        self.assertEqual((executor.completed, executor.failed), (2, 1))
+
+    def test_process_mode(self):
+        """Test running jobs on a process pool."""
+        results = []
+        executor = EventExecutor(square, workers=2, queue_size=4, mode="process",
+                                 on_result=lambda job, result: results.append(result))
+        executor.submit_many(range(6))
+        executor.join()
+        executor.shutdown()
+        self.assertEqual(sorted(results), [0, 1, 4, 9, 16, 25])
+
+
+class TestStageLimits(unittest.TestCase):
+    """Test per-stage concurrency limits."""
+
+    def test_limit_caps_concurrency(self):
+        """Test that no more than the limit run at once."""
+        limits = StageLimits({"search": 2})
+        peak = []
+        lock = threading.Lock()
+
+        def work():
+            with limits.limit("search"):
+                with lock:
+                    peak.append(limits.snapshot()["search"]["active"])
+                time.sleep(0.02)
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertLessEqual(max(peak), 2)
+        self.assertGreater(limits.snapshot()["search"]["wait_seconds"], 0)
+
+        # Unlimited stages pass straight through
+        with limits.limit("llm"):
+            pass
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Tests for the event store and the events REST API server.
+"""
+
+import sys
+import os
+import asyncio
+import http.client
+import json
+import tempfile
+import threading
+import time
+import unittest
+from datetime import datetime
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.agent.event_store import EventConflictError, EventNotFoundError, EventStore
+from src.agent.notification_memory import NotificationMemory
+from src.api.server import EventAPIServer, HTTPError, Request
+
+
+SAMPLE_EVENT = {
+    "name": "Event 1",
+    "action": "If any update in tax policy then send email to the user",
+    "cron_job": "Every day at 12:00 AM"
+}
+
+
+class TestEventStore(unittest.TestCase):
+    """Test the SQLite-backed event store."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, "events.db")
+        self.store = EventStore(self.db_path)
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp_dir.cleanup()
+
+    def test_crud(self):
+        """Test create, get, update and delete."""
+        event = self.store.create(SAMPLE_EVENT)
+        self.assertEqual(self.store.get(event["id"])["name"], "Event 1")
+        next_run = datetime.fromtimestamp(event["next_run_at"])
+        self.assertEqual((next_run.hour, next_run.minute), (0, 0))
+
+        updated = self.store.update(event["id"], {**SAMPLE_EVENT, "cron_job": "Every hour"})
+        self.assertEqual(updated["version"], 2)
+        self.assertLess(updated["next_run_at"], time.time() + 3601)
+
+        self.store.delete(event["id"])
+        with self.assertRaises(EventNotFoundError):
+            self.store.get(event["id"])
+
+    def test_concurrent_conditional_updates(self):
+        """Test that only one of several updates based on the same version succeeds."""
+        event = self.store.create(SAMPLE_EVENT)
+        barrier = threading.Barrier(8)
+        outcomes = []
+
+        def update(i):
+            barrier.wait()
+            try:
+                self.store.update(event["id"], {**SAMPLE_EVENT, "name": f"Name {i}"},
+                                  precondition=lambda current: current["version"] == event["version"])
+                outcomes.append("updated")
+            except EventConflictError:
+                outcomes.append("conflict")
+
+        threads = [threading.Thread(target=update, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(outcomes), ["conflict"] * 7 + ["updated"])
+        self.assertEqual(self.store.get(event["id"])["version"], 2)
+
+    def test_persistence_and_pagination(self):
+        """Test that events survive a reopen and page in id order."""
+        self.store.create_many([{**SAMPLE_EVENT, "name": f"Event {i}"} for i in range(25)])
+        self.store.close()
+
+        self.store = EventStore(self.db_path)
+        page, total = self.store.list_events(offset=20, limit=10)
+        self.assertEqual(total, 25)
+        self.assertEqual([event["name"] for event in page], [f"Event {i}" for i in range(20, 25)])
+
+    def test_bulk_create_is_atomic(self):
+        """Test that one invalid item rejects the whole batch."""
+        with self.assertRaises(ValueError):
+            self.store.create_many([SAMPLE_EVENT, {"name": "missing fields"}])
+        self.assertEqual(self.store.count(), 0)
+
+    def test_due_events(self):
+        """Test the next-run index."""
+        hourly = self.store.create({**SAMPLE_EVENT, "cron_job": "Every hour"})
+        self.store.create(SAMPLE_EVENT)
+
+        self.assertEqual(self.store.due_events(now=time.time()), [])
+        due = self.store.due_events(now=hourly["next_run_at"])
+        self.assertEqual([event["id"] for event in due], [hourly["id"]])
+
+        self.store.mark_run(hourly["id"], run_at=hourly["next_run_at"])
+        self.assertEqual(self.store.due_events(now=hourly["next_run_at"]), [])
+
+
+class TestEventAPIServer(unittest.TestCase):
+    """Test the REST API handlers and a real socket round trip."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = EventStore(os.path.join(self.tmp_dir.name, "events.db"))
+        self.memory = NotificationMemory(os.path.join(self.tmp_dir.name, "memory.db"))
+        self.server = EventAPIServer(self.store, host="127.0.0.1", port=0, memory=self.memory)
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp_dir.cleanup()
+
+    def request(self, method, target, body=None, headers=None):
+        raw = json.dumps(body).encode() if body is not None else b""
+        response = asyncio.run(self.server.handle_request(Request(method, target, headers or {}, raw)))
+        return response.status, json.loads(response.body) if response.body else None, response.headers
+
+    def test_subscriptions(self):
+        """Test subscribing, listing and unsubscribing recipients."""
+        status, body, _ = self.request("POST", "/api/v1/subscriptions",
+                                       {"topic": "tax policy", "recipients": ["a@example.com", "b@example.com"]})
+        self.assertEqual((status, body["added"]), (201, 2))
+        status, body, _ = self.request("GET", "/api/v1/subscriptions?topic=tax%20policies")
+        self.assertEqual(body["recipients"], ["a@example.com", "b@example.com"])
+        status, body, _ = self.request("GET", "/api/v1/subscriptions?recipient=a@example.com")
+        self.assertEqual(body["topics"], ["policy tax"])
+        status, body, _ = self.request("DELETE", "/api/v1/subscriptions?topic=tax%20policy&recipient=a@example.com")
+        self.assertEqual(body["removed"], 1)
+        self.assertEqual(self.memory.get_subscribers("tax policy"), ["b@example.com"])
+        self.assertEqual(self.request("POST", "/api/v1/subscriptions", {"topic": "tax"})[0], 400)
+        self.assertEqual(self.request("GET", "/api/v1/subscriptions")[0], 400)
+
+    def test_event_lifecycle(self):
+        """Test the documented endpoints."""
+        status, body, headers = self.request("POST", "/api/v1/events", SAMPLE_EVENT)
+        self.assertEqual(status, 201)
+        event_id = body["event"]["id"]
+        self.assertEqual(body["event"]["action"], SAMPLE_EVENT["action"])
+
+        status, body, headers = self.request("GET", f"/api/v1/events/{event_id}")
+        self.assertEqual(status, 200)
+        etag = headers["ETag"]
+
+        status, body, _ = self.request("GET", f"/api/v1/events/{event_id}", headers={"If-None-Match": etag})
+        self.assertEqual(status, 304)
+
+        status, body, _ = self.request("PUT", f"/api/v1/events/{event_id}", {**SAMPLE_EVENT, "name": "Renamed"},
+                                       headers={"If-Match": etag})
+        self.assertEqual(status, 200)
+        self.assertEqual(body["event"]["name"], "Renamed")
+
+        status, _, _ = self.request("PUT", f"/api/v1/events/{event_id}", SAMPLE_EVENT, headers={"If-Match": etag})
+        self.assertEqual(status, 412)
+
+        status, body, _ = self.request("DELETE", f"/api/v1/events/{event_id}")
+        self.assertEqual(status, 200)
+        self.assertEqual(body["message"], "Event deleted successfully")
+
+        status, _, _ = self.request("GET", f"/api/v1/events/{event_id}")
+        self.assertEqual(status, 404)
+
+    def test_bulk_create_and_pagination(self):
+        """Test bulk creation, pages and conditional list requests."""
+        status, body, _ = self.request("POST", "/api/v1/events",
+                                       {"events": [{**SAMPLE_EVENT, "name": f"E{i}"} for i in range(5)]})
+        self.assertEqual(status, 201)
+        self.assertEqual(len(body["events"]), 5)
+
+        status, body, headers = self.request("GET", "/api/v1/events?offset=2&limit=2")
+        self.assertEqual([event["name"] for event in body["events"]], ["E2", "E3"])
+        self.assertEqual(body["total"], 5)
+        self.assertEqual(body["next_offset"], 4)
+
+        status, _, _ = self.request("GET", "/api/v1/events?offset=2&limit=2",
+                                    headers={"If-None-Match": headers["ETag"]})
+        self.assertEqual(status, 304)
+
+        self.request("POST", "/api/v1/events", SAMPLE_EVENT)
+        status, _, _ = self.request("GET", "/api/v1/events?offset=2&limit=2",
+                                    headers={"If-None-Match": headers["ETag"]})
+        self.assertEqual(status, 200)
+
+    def test_errors(self):
+        """Test validation, routing and method errors."""
+        self.assertEqual(self.request("POST", "/api/v1/events", {"name": "x"})[0], 400)
+        self.assertEqual(self.request("GET", "/api/v1/events?limit=0")[0], 400)
+        self.assertEqual(self.request("GET", "/api/v1/nothing")[0], 404)
+        self.assertEqual(self.request("PATCH", "/api/v1/events")[0], 405)
+
+    def test_invalid_content_length(self):
+        """Test that malformed, negative and oversized Content-Length headers are rejected."""
+        async def read(length):
+            reader = asyncio.StreamReader()
+            reader.feed_data(f"POST /api/v1/events HTTP/1.1\r\nContent-Length: {length}\r\n\r\n".encode())
+            reader.feed_eof()
+            try:
+                await self.server._read_request(reader)
+            except HTTPError as e:
+                return e.status
+
+        for length, status in (("abc", 400), ("-1", 400), ("1e3", 400), (str(10 ** 12), 413)):
+            with self.subTest(length=length):
+                self.assertEqual(asyncio.run(read(length)), status)
+
+    def test_socket_round_trip(self):
+        """Test serving real HTTP requests over a keep-alive connection."""
+        loop = asyncio.new_event_loop()
+        loop.run_until_complete(self.server.start())
+        thread = threading.Thread(target=loop.run_forever, daemon=True)
+        thread.start()
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", self.server.port, timeout=5)
+            conn.request("POST", "/api/v1/events", json.dumps(SAMPLE_EVENT), {"Content-Type": "application/json"})
+            response = conn.getresponse()
+            self.assertEqual(response.status, 201)
+            event_id = json.loads(response.read())["event"]["id"]
+
+            conn.request("GET", f"/api/v1/events/{event_id}")
+            response = conn.getresponse()
+            self.assertEqual(response.status, 200)
+            self.assertEqual(json.loads(response.read())["event"]["name"], "Event 1")
+            conn.close()
+        finally:
+            asyncio.run_coroutine_threadsafe(self.server.stop(), loop).result(5)
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(5)
+            loop.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Tests for the offline scripted chat model.
+"""
+
+import sys
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.messages import AIMessage, HumanMessage
+
+from src.agent.agent import LangChainAgent
+from src.agent.fake_llm import ScriptedChatModel, update_flow_script
+from src.agent.notification_memory import NotificationMemory
+from src.agent.search_cache import SearchCache
+from tests.test_config import mock_ddgs_context
+
+
+class TestScriptedChatModel(unittest.TestCase):
+    """Test the scripted chat model and running the agent loop offline."""
+
+    def setUp(self):
+        """Use a throwaway notification memory and search cache for the tools."""
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        memory = NotificationMemory(os.path.join(self.tmp_dir.name, "memory.db"))
+        self.patches = [
+            patch("src.agent.tools.notification_memory", memory),
+            patch("src.agent.tools.search_cache", SearchCache()),
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        self.tmp_dir.cleanup()
+
+    def test_turn_selection(self):
+        """Test that the turn follows the number of AI messages so far."""
+        model = ScriptedChatModel(script=[[{"name": "search_web", "args": {"query": "x"}}], "answer"])
+
+        first = model.invoke([HumanMessage(content="hi")])
+        self.assertEqual(first.tool_calls[0]["name"], "search_web")
+
+        second = model.invoke([HumanMessage(content="hi"), AIMessage(content="")])
+        self.assertEqual(second.content, "answer")
+
+        # Exhausted scripts repeat the last turn
+        third = model.invoke([HumanMessage(content="hi"), AIMessage(content=""), AIMessage(content="")])
+        self.assertEqual(third.content, "answer")
+
+    def test_agent_runs_without_token(self):
+        """Test that the agent loop runs end to end on the scripted model."""
+        model = ScriptedChatModel(script=update_flow_script("tax policy", answer="All done."))
+        with patch("src.agent.config.Config.HF_TOKEN", None):
+            agent = LangChainAgent(llm=model)
+        agent.executor.verbose = False
+
+        with mock_ddgs_context():
+            result = agent.executor.invoke({"input": "summarize tax policy"})
+
+        self.assertEqual(result["output"], "All done.")
+        tools_called = [step[0].tool for step in result["intermediate_steps"]]
+        self.assertEqual(tools_called, ["search_web", "checkIsMailneedtoSend"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Tests for subscriptions and set-based fan-out to many recipients.
+"""
+
+import sys
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.agent.notification_memory import NotificationMemory
+from src.agent.tools import decide_notifications
+
+
+UPDATES = [
+    {"title": "Tax Update 1", "url": "http://example1.com"},
+    {"title": "Tax Update 2", "url": "http://example2.com"}
+]
+
+
+class TestFanOut(unittest.TestCase):
+    """Test bulk unseen queries, bulk claims and subscriber fan-out."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.memory = NotificationMemory(os.path.join(self.tmp_dir.name, "memory.db"))
+        self.memory_patch = patch("src.agent.tools.notification_memory", self.memory)
+        self.memory_patch.start()
+
+    def tearDown(self):
+        self.memory_patch.stop()
+        self.tmp_dir.cleanup()
+
+    def test_subscriptions(self):
+        """Test that subscriptions are kept per canonical topic."""
+        self.assertEqual(self.memory.subscribe("tax policy", ["b", "a", "a"]), 2)
+        self.assertEqual(self.memory.subscribe("tax policies", ["a", "c"]), 1)
+        self.assertEqual(self.memory.get_subscribers("policy on tax"), ["a", "b", "c"])
+        self.assertEqual(self.memory.get_subscriptions("a"), ["policy tax"])
+        self.assertEqual(self.memory.unsubscribe("tax policy", ["a"]), 1)
+        self.assertEqual(self.memory.unsubscribe("tax policy"), 2)
+        self.assertEqual(self.memory.get_subscribers("tax policy"), [])
+
+    def test_find_unseen_updates(self):
+        """Test that each recipient gets only the updates it was not sent."""
+        self.memory.mark_notification_sent("tax policy", {"relevant_updates": UPDATES[:1]}, recipient="a")
+        unseen = self.memory.find_unseen_updates("tax policy", UPDATES, recipients=["a", "b"])
+        self.assertEqual(unseen, {"a": UPDATES[1:], "b": UPDATES})
+        self.memory.subscribe("tax policy", ["a"])
+        self.assertEqual(self.memory.find_unseen_updates("tax policy", UPDATES), {"a": UPDATES[1:]})
+
+    def test_claim_for_recipients(self):
+        """Test that a bulk claim gives each recipient its own claim."""
+        claims = self.memory.claim_for_recipients("tax policy", UPDATES, recipients=["a", "b"])
+        self.assertEqual(sorted(claims), ["a", "b"])
+        self.assertNotEqual(claims["a"][0], claims["b"][0])
+        self.assertEqual(claims["a"][1], UPDATES)
+        # Pending claims hide the updates from a second claim
+        self.assertEqual(self.memory.claim_for_recipients("tax policy", UPDATES, recipients=["a", "b"]), {})
+        self.assertEqual(self.memory.release_claim(claims["a"][0]), 2)
+        self.assertEqual(self.memory.commit_claims([claims["b"][0]]), 2)
+        again = self.memory.claim_for_recipients("tax policy", UPDATES, recipients=["a", "b"])
+        self.assertEqual(list(again), ["a"])
+
+    def test_decide_notifications_for_many_subscribers(self):
+        """Test that thousands of subscribers are notified once each."""
+        subscribers = [f"user{i}@example.com" for i in range(2000)]
+        self.memory.subscribe("tax policy", subscribers)
+        self.memory.mark_notification_sent("tax policy", {"relevant_updates": UPDATES}, recipient=subscribers[0])
+        events = {"default": {"topic": "tax policy", "event_ids": [1], "recipient": "default"}}
+
+        results = decide_notifications("tax policy", events, "query", UPDATES, UPDATES, include_subscribers=True)
+        self.assertEqual(len(results), 2001)
+        self.assertFalse(results[subscribers[0]]["should_send_email"])
+        self.assertTrue(results["default"]["should_send_email"])
+        self.assertEqual(results[subscribers[1]]["relevant_updates"], UPDATES)
+        # Recipients with the same new updates share one rendered email
+        self.assertIs(results[subscribers[1]]["email_content"], results[subscribers[2]]["email_content"])
+
+        again = decide_notifications("tax policy", events, "query", UPDATES, UPDATES, include_subscribers=True)
+        self.assertFalse(any(result["should_send_email"] for result in again.values()))
+        self.assertEqual(self.memory.get_notification_stats()["total_notifications"], 2001)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared keep-alive HTTP clients used for LLM calls.
+"""
+
+import sys
+import os
+import json
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.agent import http_pool
+from src.agent.agent import LangChainAgent
+
+
+COMPLETION = {
+    "id": "chatcmpl-1",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "test-model",
+    "choices": [{"index": 0, "message": {"role": "assistant", "content": "pong"}, "finish_reason": "stop"}],
+    "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+}
+
+
+class CompletionHandler(BaseHTTPRequestHandler):
+    """Answers every chat completion request with COMPLETION over keep-alive HTTP/1.1."""
+
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.connections += 1
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = json.dumps(COMPLETION).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestHTTPPool(unittest.TestCase):
+    """Test that LLM clients share one pool of kept-alive connections."""
+
+    def setUp(self):
+        http_pool.close_http_clients()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), CompletionHandler)
+        self.server.connections = 0
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        base_url = f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+        self.patches = [
+            patch("src.agent.config.Config.HF_TOKEN", "test-token"),
+            patch("src.agent.config.Config.HF_BASE_URL", base_url)
+        ]
+        for p in self.patches:
+            p.start()
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        http_pool.close_http_clients()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def test_agents_share_clients(self):
+        """Test that every agent gets the same sync and async clients."""
+        first, second = LangChainAgent(), LangChainAgent()
+        self.assertIs(first.llm.http_client, second.llm.http_client)
+        self.assertIs(first.llm.http_client, http_pool.get_http_client())
+        self.assertIs(first.llm.http_async_client, http_pool.get_async_http_client())
+
+    def test_connections_are_reused(self):
+        """Test that calls from several agents go over one kept-alive connection."""
+        agents = [LangChainAgent(), LangChainAgent()]
+        for _ in range(3):
+            for agent in agents:
+                self.assertEqual(agent.llm.invoke("ping").content, "pong")
+        self.assertEqual(self.server.connections, 1)
+
+    def test_pool_settings(self):
+        """Test that pool size and timeouts come from the configuration."""
+        with patch("src.agent.config.Config.LLM_HTTP_MAX_CONNECTIONS", 3), \
+                patch("src.agent.config.Config.LLM_HTTP_CONNECT_TIMEOUT", 2.5):
+            client = http_pool.get_http_client()
+        self.assertEqual(client._transport._pool._max_connections, 3)
+        self.assertEqual(client.timeout.connect, 2.5)
+        self.assertEqual(client._transport._pool._http2, http_pool.http2_available())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Tests that CLI startup does not load LangChain or the search client.
+"""
+
+import sys
+import os
+import subprocess
+import unittest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_import import HEAVY_MODULES, PROJECT_ROOT
+
+
+def loaded_heavy_modules(code: str):
+    """Run code in a fresh interpreter and return the heavy modules it loaded."""
+    script = f"import sys\n{code}\nprint(' '.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", script], cwd=PROJECT_ROOT,
+                            capture_output=True, text=True, check=True)
+    return result.stdout.split()
+
+
+class TestLazyImports(unittest.TestCase):
+    """Test that heavy dependencies are loaded only when used."""
+
+    def test_cli_import_is_light(self):
+        """Test that importing the CLI loads none of the heavy modules."""
+        self.assertEqual(loaded_heavy_modules("import src.cli"), [])
+
+    def test_package_import_is_light(self):
+        """Test that importing the packages loads none of the heavy modules."""
+        self.assertEqual(loaded_heavy_modules("import src\nfrom src.agent import Config, notification_memory"), [])
+
+    def test_daemon_client_import_is_light(self):
+        """Test that the CLI can talk to a running daemon without loading the heavy modules."""
+        self.assertEqual(loaded_heavy_modules("import src.api.daemon"), [])
+
+    def test_agent_is_loaded_on_first_access(self):
+        """Test that the lazy package attributes still resolve."""
+        loaded = loaded_heavy_modules("from src.agent import LangChainAgent, search_web")
+        self.assertIn("langchain_core", loaded)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Tests for the per-stage timing instrumentation.
+"""
+
+import sys
+import os
+import json
+import tempfile
+import unittest
+from io import StringIO
+from unittest.mock import patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.agent.instrumentation import (
+    LatencyHistogram, TimingRegistry, current_trace, dumps, loads, timed, trace_run
+)
+from src.agent.notification_memory import NotificationMemory
+from src.cli import CLI
+
+
+class TestInstrumentation(unittest.TestCase):
+    """Test trace recording and histogram aggregation."""
+
+    def test_timed_is_noop_without_trace(self):
+        """Test that timing outside a trace records nothing."""
+        self.assertIsNone(current_trace())
+        with timed("noop"):
+            pass
+        self.assertIsNone(current_trace())
+
+    def test_trace_records_spans(self):
+        """Test that stages inside a trace are recorded."""
+        registry = TimingRegistry()
+        with trace_run("test", registry=registry, query="q") as trace:
+            with timed("stage.a"):
+                pass
+            with timed("stage.a"):
+                pass
+            data = loads(dumps({"x": 1}))
+
+        self.assertEqual(data, {"x": 1})
+        totals = trace.stage_totals()
+        self.assertEqual(totals["stage.a"]["count"], 2)
+        self.assertIn("json.encode", totals)
+        self.assertIn("json.decode", totals)
+        self.assertIsNotNone(trace.duration_ms)
+
+        histograms = registry.get_histograms()
+        self.assertEqual(histograms["stage.a"]["count"], 2)
+        self.assertEqual(histograms["run.test"]["count"], 1)
+
+    def test_trace_jsonl(self):
+        """Test the JSON lines export of a trace."""
+        with trace_run("test", registry=None) as trace:
+            with timed("stage.a", detail="x"):
+                pass
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "trace.jsonl")
+            trace.write_jsonl(path)
+            with open(path) as f:
+                records = [json.loads(line) for line in f]
+
+        self.assertEqual(records[0]["type"], "span")
+        self.assertEqual(records[0]["stage"], "stage.a")
+        self.assertEqual(records[0]["attrs"], {"detail": "x"})
+        self.assertEqual(records[-1]["type"], "run")
+        self.assertEqual(records[-1]["run_id"], trace.run_id)
+
+    def test_memory_operations_are_traced(self):
+        """Test that NotificationMemory operations show up as stages."""
+        with tempfile.TemporaryDirectory() as tmp:
+            memory = NotificationMemory(os.path.join(tmp, "memory.db"))
+            with trace_run("test", registry=None) as trace:
+                memory.filter_new_updates("topic", [{"title": "t", "url": "u"}])
+                memory.get_notification_stats()
+
+        totals = trace.stage_totals()
+        self.assertIn("memory.filter_new_updates", totals)
+        self.assertIn("memory.get_notification_stats", totals)
+
+    def test_histogram_percentiles(self):
+        """Test histogram percentile estimates stay within observed bounds."""
+        histogram = LatencyHistogram()
+        for value in range(1, 101):
+            histogram.observe(float(value))
+
+        summary = histogram.to_dict()
+        self.assertEqual(summary["count"], 100)
+        self.assertEqual(summary["min_ms"], 1.0)
+        self.assertEqual(summary["max_ms"], 100.0)
+        self.assertTrue(25 <= summary["p50_ms"] <= 100)
+        self.assertTrue(summary["p50_ms"] <= summary["p99_ms"] <= 100)
+
+    def test_cli_show_timings(self):
+        """Test the CLI timings display."""
+        with trace_run("agent") as trace:
+            with timed("tool.search_web"):
+                pass
+
+        with patch('sys.stdout', new=StringIO()) as fake_output:
+            CLI().show_timings(trace)
+            output = fake_output.getvalue()
+
+        self.assertIn("Timings", output)
+        self.assertIn("tool.search_web", output)
+
+    def test_cli_timings_flag(self):
+        """Test that --timings is stripped from the query arguments."""
+        cli = CLI()
+        with patch('sys.argv', ['main.py', '--timings', 'test', 'query']):
+            self.assertTrue(cli._extract_flag("--timings", "-t"))
+            self.assertEqual(cli.get_user_query(), "test query")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Tests for the durable SQLite job queue.
+"""
+
+import sys
+import os
+import tempfile
+import threading
+import unittest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.agent.job_queue import JobQueue, JobWorker
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class TestJobQueue(unittest.TestCase):
+    """Test claiming, leases, retries and dead-lettering."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, "jobs.db")
+        self.clock = FakeClock()
+        self.queue = self.make_queue()
+
+    def tearDown(self):
+        self.queue.close()
+        self.tmp_dir.cleanup()
+
+    def make_queue(self):
+        return JobQueue(self.db_path, lease_seconds=60, max_attempts=3, backoff_base=10, backoff_max=25,
+                        clock=self.clock)
+
+    def test_claim_and_ack(self):
+        """Test that a job is claimed once and acked."""
+        job_id = self.queue.enqueue("check_topic", {"topic": "tax"})
+        # A second job with the same dedup key is ignored
+        self.assertIsNotNone(self.queue.enqueue("check_topic", {"topic": "tax"}, run_at=2000, dedup_key="k"))
+        self.assertIsNone(self.queue.enqueue("check_topic", {}, dedup_key="k"))
+
+        jobs = self.queue.claim("w1")
+        self.assertEqual([(job["id"], job["payload"], job["attempts"]) for job in jobs],
+                         [(job_id, {"topic": "tax"}, 1)])
+        self.assertEqual(self.queue.claim("w2"), [])
+        self.assertTrue(self.queue.ack(job_id, "w1"))
+        self.assertEqual(self.queue.stats()["done"], 1)
+        # The job scheduled for later becomes the next wake-up time
+        self.assertEqual(self.queue.next_run_at(), 2000)
+
+    def test_expired_lease_is_reclaimed(self):
+        """Test that a crashed worker's job goes to another worker."""
+        job_id = self.queue.enqueue("check_topic", {})
+        self.queue.claim("crashed")
+        self.clock.now += 61
+        jobs = self.queue.claim("w2")
+        self.assertEqual([job["id"] for job in jobs], [job_id])
+        self.assertEqual(jobs[0]["attempts"], 2)
+        # The original owner lost its lease and cannot ack
+        self.assertFalse(self.queue.ack(job_id, "crashed"))
+        self.assertTrue(self.queue.ack(job_id, "w2"))
+
+    def test_retry_backoff_and_dead_letter(self):
+        """Test exponential backoff between attempts and dead-lettering at the limit."""
+        job_id = self.queue.enqueue("check_topic", {})
+        self.queue.claim("w1")
+        self.assertEqual(self.queue.fail(job_id, "w1", "boom"), "queued")
+        self.assertEqual(self.queue.get(job_id)["run_at"], self.clock.now + 10)
+
+        self.clock.now += 10
+        self.queue.claim("w1")
+        self.assertEqual(self.queue.fail(job_id, "w1", "boom"), "queued")
+        self.assertEqual(self.queue.get(job_id)["run_at"], self.clock.now + 20)
+
+        self.clock.now += 20
+        self.queue.claim("w1")
+        self.assertEqual(self.queue.fail(job_id, "w1", "boom again"), "dead")
+        dead = self.queue.dead_letters()
+        self.assertEqual([(job["id"], job["last_error"]) for job in dead], [(job_id, "boom again")])
+
+        self.assertTrue(self.queue.requeue_dead(job_id))
+        self.assertEqual(len(self.queue.claim("w1")), 1)
+
+    def test_concurrent_workers_never_share_a_job(self):
+        """Test that claims from many queue connections are exclusive."""
+        for i in range(200):
+            self.queue.enqueue("check_topic", {"n": i})
+        claimed = []
+        lock = threading.Lock()
+
+        def work(name):
+            queue = self.make_queue()
+            while True:
+                jobs = queue.claim(name, limit=7)
+                if not jobs:
+                    break
+                with lock:
+                    claimed.extend(job["id"] for job in jobs)
+            queue.close()
+
+        threads = [threading.Thread(target=work, args=(f"w{i}",)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(claimed), 200)
+        self.assertEqual(len(set(claimed)), 200)
+
+    def test_worker_dispatch(self):
+        """Test that the worker runs handlers, acks successes and retries failures."""
+        seen = []
+        self.queue.enqueue("ok", {"n": 1})
+        self.queue.enqueue("broken", {"n": 2})
+        self.queue.enqueue("unknown", {"n": 3})
+
+        def broken(payload):
+            raise RuntimeError("handler failed")
+
+        worker = JobWorker(self.queue, {"ok": seen.append, "broken": broken}, worker_id="w", batch_size=10)
+        self.assertEqual(worker.run_once(), 3)
+        self.assertEqual(seen, [{"n": 1}])
+        self.assertEqual((worker.processed, worker.failed), (1, 2))
+        self.assertEqual(self.queue.stats()["queued"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Smoke test for the synthetic load generator.
+"""
+
+import sys
+import os
+import random
+import unittest
+from collections import Counter
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.loadgen import ChurningSearch, bottleneck, make_events, recipients_for, run_load, topic_names
+from src.agent.action_plan import action_compiler
+from src.agent.topics import canonical_topic
+
+
+class TestLoadGenerator(unittest.TestCase):
+    """Test the synthetic workload and a small replay."""
+
+    def test_events_overlap_on_topics(self):
+        """Test that phrasings share canonical topics and popular topics collect more events."""
+        topics = topic_names(20)
+        self.assertEqual(len({canonical_topic(topic) for topic in topics}), 20)
+        events = make_events(200, topics, 3, random.Random(1))
+        plans = [action_compiler.compile(event["action"]) for event in events]
+        keys = Counter(plan["topic_key"] for plan in plans)
+        self.assertLessEqual(len(keys), 20)
+        self.assertEqual(keys.most_common(1)[0][0], canonical_topic(topics[0]))
+        for plan in plans:
+            index = [canonical_topic(topic) for topic in topics].index(plan["topic_key"])
+            self.assertIn(plan["recipients"][0], recipients_for(index, 3))
+
+    def test_churn(self):
+        """Test that new results push older ones out of the top results."""
+        search = ChurningSearch(["solar subsidy"], random.Random(0), max_results=5)
+        before = search.search("q", "solar subsidies")
+        search.advance(2)
+        after = search.search("q", "solar subsidy")
+        self.assertEqual(len(after), 5)
+        self.assertEqual(after[2:], before[:3])
+
+    def test_replay(self):
+        """Test that ticks fire events, notify recipients and account for the workers' time."""
+        quiet = run_load(events=80, topics=10, recipients=2, updates_per_tick=0, ticks=4, workers=2)
+        churning = run_load(events=80, topics=10, recipients=2, updates_per_tick=20, ticks=4, workers=2)
+        for run in (quiet, churning):
+            self.assertGreater(run["events_fired"], 80)
+            self.assertEqual(run["searches"], run["topic_checks"])
+            self.assertGreater(run["notifications"], 0)
+            self.assertEqual(set(run["stages"]), {"search", "sqlite", "rendering", "other"})
+            self.assertIsInstance(bottleneck(run), str)
+        self.assertEqual(quiet["events_fired"], churning["events_fired"])
+        self.assertGreater(churning["new_updates"], quiet["new_updates"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Tests for the metrics registry and the instrumented hot paths.
+"""
+
+import sys
+import os
+import asyncio
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+from benchmarks.fakes import offline_tools
+from src.agent.agent import LangChainAgent
+from src.agent.callbacks import _token_usage
+from src.agent.fake_llm import ScriptedChatModel, update_flow_script
+from src.agent.limits import StageLimits
+from src.agent.metrics import CONTENT_TYPE, Metric, MetricsRegistry, metrics
+from src.api.server import EventAPIServer, Request
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    """Test metric types and the Prometheus text format."""
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_render(self):
+        """Test the exposition of every metric type."""
+        counter = self.registry.counter("jobs", "Jobs run", ["status"])
+        counter.labels(status="ok").inc()
+        counter.labels(status="ok").inc(2)
+        counter.labels(status='a "b"\n').inc()
+        gauge = self.registry.gauge("depth", "Queue depth")
+        gauge.inc(5)
+        gauge.dec(2)
+        histogram = self.registry.histogram("latency_seconds", "Latency", buckets=[0.1, 1])
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(5)
+
+        self.assertEqual(self.registry.render(), "\n".join([
+            "# HELP jobs Jobs run",
+            "# TYPE jobs counter",
+            'jobs_total{status="a \\"b\\"\\n"} 1',
+            'jobs_total{status="ok"} 3',
+            "# HELP depth Queue depth",
+            "# TYPE depth gauge",
+            "depth 3",
+            "# HELP latency_seconds Latency",
+            "# TYPE latency_seconds histogram",
+            'latency_seconds_bucket{le="0.1"} 1',
+            'latency_seconds_bucket{le="1"} 2',
+            'latency_seconds_bucket{le="+Inf"} 3',
+            "latency_seconds_sum 5.55",
+            "latency_seconds_count 3",
+        ]) + "\n")
+
+    def test_unlabeled_metrics_start_at_zero(self):
+        """Test that an unused unlabeled metric is exposed as zero."""
+        self.registry.counter("unused", "Never incremented")
+        self.assertEqual(self.registry.get_sample_value("unused_total"), 0)
+        self.assertIsNone(self.registry.get_sample_value("missing_total"))
+
+    def test_timer_and_reset(self):
+        """Test timing with a decorator and resetting values in place."""
+        histogram = self.registry.histogram("call_seconds", "Call time", ["name"])
+        timed = histogram.labels(name="f").time()(lambda: 42)
+        self.assertEqual(timed(), 42)
+        with histogram.labels(name="g").time():
+            pass
+        self.assertEqual(self.registry.get_sample_value("call_seconds_count", {"name": "f"}), 1)
+
+        self.registry.reset()
+        self.assertEqual(self.registry.get_sample_value("call_seconds_count", {"name": "f"}), 0)
+        timed()
+        self.assertEqual(self.registry.get_sample_value("call_seconds_count", {"name": "f"}), 1)
+
+    def test_registration(self):
+        """Test that registering a name again returns the same metric unless it differs."""
+        counter = self.registry.counter("events", "Events")
+        self.assertIs(self.registry.counter("events", "Events"), counter)
+        with self.assertRaises(ValueError):
+            self.registry.gauge("events", "Events")
+        with self.assertRaises(ValueError):
+            counter.inc(-1)
+        with self.assertRaises(ValueError):
+            self.registry.counter("labelled", "Labelled", ["kind"]).inc()
+
+    def test_metrics_must_implement_new_value(self):
+        """Test that a metric class without _new_value cannot be instantiated."""
+        class Incomplete(Metric):
+            kind = "counter"
+
+        with self.assertRaises(TypeError):
+            Incomplete("incomplete", "Incomplete")
+
+    def test_gauge_function_and_textfile(self):
+        """Test callback gauges and the atomic text file."""
+        self.registry.gauge("items", "Items").set_function(lambda: 7)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "metrics", "agent.prom")
+            self.registry.write_textfile(path)
+            with open(path) as f:
+                self.assertIn("items 7\n", f.read())
+            self.assertEqual(os.listdir(os.path.dirname(path)), ["agent.prom"])
+
+
+class TestInstrumentation(unittest.TestCase):
+    """Test that agent runs update the global metrics."""
+
+    def setUp(self):
+        metrics.reset()
+
+    def value(self, name, **labels):
+        return metrics.get_sample_value(name, labels) or 0
+
+    def test_update_query(self):
+        """Test search, relevance, dedup, database and email metrics of an update query."""
+        with offline_tools():
+            agent = LangChainAgent(llm=ScriptedChatModel(script=["Done."]))
+            agent.run("any updates on metrics topic?")
+            agent.run("any updates on metrics topic?")
+
+        self.assertEqual(self.value("event_agent_queries_total"), 2)
+        self.assertEqual(self.value("event_agent_query_seconds_count"), 2)
+        self.assertEqual(self.value("event_agent_queries_in_flight"), 0)
+        self.assertEqual(self.value("event_agent_searches_total", source="web") +
+                         self.value("event_agent_searches_total", source="cache"), 4)
+        # The second query sees the same results, so it stops at the fingerprint check
+        self.assertEqual(self.value("event_agent_result_checks_total", change="all"), 1)
+        self.assertEqual(self.value("event_agent_result_checks_total", change="none"), 1)
+        self.assertEqual(self.value("event_agent_search_results_total"), 5)
+        self.assertEqual(self.value("event_agent_relevant_results_total"), 5)
+        self.assertEqual(self.value("event_agent_updates_total", status="new"), 5)
+        self.assertEqual(self.value("event_agent_updates_total", status="already_sent"), 0)
+        self.assertEqual(self.value("event_agent_emails_rendered_total", kind="topic"), 1)
+        self.assertEqual(self.value("event_agent_db_query_seconds_count", operation="claim_for_recipients"), 1)
+
+    def test_llm_calls(self):
+        """Test that LLM calls of the agent are counted."""
+        with offline_tools():
+            agent = LangChainAgent(llm=ScriptedChatModel(script=update_flow_script("llm metrics")))
+            agent.run("summarize llm metrics")
+        self.assertEqual(self.value("event_agent_llm_calls_total", status="ok"), 2)
+        self.assertEqual(self.value("event_agent_llm_seconds_count"), 2)
+
+    def test_llm_calls_are_stage_limited(self):
+        """Test that every LLM call of the agent holds a slot of the "llm" stage limit."""
+        limits = StageLimits({"llm": 1})
+        with offline_tools(), patch("src.agent.agent.stage_limits", limits), \
+                patch.object(limits, "limit", wraps=limits.limit) as limit:
+            agent = LangChainAgent(llm=ScriptedChatModel(script=update_flow_script("llm metrics")))
+            agent.run("summarize llm metrics")
+        self.assertEqual([call.args for call in limit.call_args_list], [("llm",), ("llm",)])
+        self.assertEqual(limits.active["llm"], 0)
+
+    def test_token_usage(self):
+        """Test reading token counts from usage metadata and from the OpenAI llm_output."""
+        message = AIMessage(content="hi", usage_metadata={"input_tokens": 12, "output_tokens": 3,
+                                                          "total_tokens": 15})
+        result = LLMResult(generations=[[ChatGeneration(message=message)]])
+        self.assertEqual(_token_usage(result), {"prompt": 12, "completion": 3})
+        result = LLMResult(generations=[[ChatGeneration(message=AIMessage(content="hi"))]],
+                           llm_output={"token_usage": {"prompt_tokens": 4, "completion_tokens": 1}})
+        self.assertEqual(_token_usage(result), {"prompt": 4, "completion": 1})
+
+
+class TestMetricsEndpoint(unittest.TestCase):
+    """Test GET /metrics on the API server."""
+
+    def test_metrics_endpoint(self):
+        """Test that /metrics returns the registry in the Prometheus text format."""
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            from src.agent.event_store import EventStore
+            store = EventStore(os.path.join(tmp_dir, "events.db"))
+            server = EventAPIServer(store, host="127.0.0.1", port=0)
+            response = asyncio.run(server.handle_request(Request("GET", "/metrics", {})))
+            store.close()
+        self.assertEqual(response.status, 200)
+        self.assertEqual(response.headers["Content-Type"], CONTENT_TYPE)
+        body = response.body.decode("utf-8")
+        self.assertIn("# TYPE event_agent_searches counter", body)
+        self.assertIn("# TYPE event_agent_db_query_seconds histogram", body)
+
+
+if __name__ == '__main__':
+    unittest.main()
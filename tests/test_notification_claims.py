@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Tests for atomic claiming of new updates in notification memory.
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.agent.notification_memory import NotificationMemory
+
+
+UPDATES = [
+    {"title": "Tax Update 1", "url": "http://example1.com"},
+    {"title": "Tax Update 2", "url": "http://example2.com"}
+]
+
+
+class TestNotificationClaims(unittest.TestCase):
+    """Test claim, commit and release of updates."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, "memory.db")
+        self.memory = NotificationMemory(self.db_path)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_claim_and_commit(self):
+        """Test that committed updates count as sent."""
+        claim_id, claimed, already_sent = self.memory.claim_new_updates("tax policy", UPDATES)
+        self.assertIsNotNone(claim_id)
+        self.assertEqual((claimed, already_sent), (UPDATES, []))
+        self.assertEqual(self.memory.commit_claim(claim_id), 2)
+
+        claim_id, claimed, already_sent = self.memory.claim_new_updates("tax policies", UPDATES + [
+            {"title": "Tax Update 3", "url": "http://example3.com"}])
+        self.assertEqual([update["title"] for update in claimed], ["Tax Update 3"])
+        self.assertEqual(already_sent, UPDATES)
+        # Claims are per recipient
+        _, claimed, _ = self.memory.claim_new_updates("tax policy", UPDATES, recipient="a@example.com")
+        self.assertEqual(claimed, UPDATES)
+
+    def test_pending_claim_blocks_others_until_released(self):
+        """Test that a pending claim hides updates until it is released."""
+        claim_id, _, _ = self.memory.claim_new_updates("tax policy", UPDATES)
+        other_id, claimed, already_sent = self.memory.claim_new_updates("tax policy", UPDATES)
+        self.assertIsNone(other_id)
+        self.assertEqual((claimed, already_sent), ([], UPDATES))
+
+        self.assertEqual(self.memory.release_claim(claim_id), 2)
+        other_id, claimed, _ = self.memory.claim_new_updates("tax policy", UPDATES)
+        self.assertIsNotNone(other_id)
+        self.assertEqual(claimed, UPDATES)
+        # The released claim can no longer be committed
+        self.assertEqual(self.memory.commit_claim(claim_id), 0)
+
+    def test_abandoned_claim_can_be_taken_over(self):
+        """Test that a pending claim older than the TTL is claimable again."""
+        claim_id, _, _ = self.memory.claim_new_updates("tax policy", UPDATES)
+        other_id, claimed, _ = self.memory.claim_new_updates("tax policy", UPDATES, claim_ttl_seconds=-1)
+        self.assertIsNotNone(other_id)
+        self.assertEqual(claimed, UPDATES)
+        self.assertEqual(self.memory.commit_claim(claim_id), 0)
+        self.assertEqual(self.memory.commit_claim(other_id), 2)
+
+    def test_concurrent_claims_are_exclusive(self):
+        """Test that only one of many concurrent checks claims each update."""
+        updates = [{"title": f"Update {i}", "url": f"http://example.com/{i}"} for i in range(50)]
+        claimed_titles = []
+        lock = threading.Lock()
+        barrier = threading.Barrier(8)
+
+        def check():
+            memory = NotificationMemory(self.db_path)
+            barrier.wait()
+            _, claimed, _ = memory.claim_new_updates("tax policy", updates)
+            with lock:
+                claimed_titles.extend(update["title"] for update in claimed)
+
+        threads = [threading.Thread(target=check) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(claimed_titles), sorted(update["title"] for update in updates))
+
+    def test_released_claim_is_not_in_history(self):
+        """Test that notifications recorded under a released claim are removed."""
+        claim_id, claimed, _ = self.memory.claim_new_updates("tax policy", UPDATES)
+        self.memory.mark_notification_sent("tax policy", {"relevant_updates": claimed, "claim_id": claim_id})
+        claims = self.memory.claim_for_recipients("tax policy", UPDATES, recipients=["a", "b"])
+        self.memory.record_notifications("tax policy", {
+            recipient: {"relevant_updates": updates, "claim_id": claim}
+            for recipient, (claim, updates) in claims.items()})
+        self.assertEqual(self.memory.get_notification_stats()["total_notifications"], 3)
+
+        self.memory.release_claim(claim_id)
+        self.memory.release_claim(claims["a"][0])
+        self.memory.commit_claim(claims["b"][0])
+        recent = self.memory.get_recent_notifications("tax policy")
+        self.assertEqual([notification["recipient"] for notification in recent], ["b"])
+        self.assertEqual(self.memory.get_notification_stats()["total_notifications"], 1)
+
+    def test_migration_adds_claim_columns(self):
+        """Test that a version 3 database gets claim ids on its notification tables."""
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute('DROP TABLE sent_notifications')
+            conn.execute('''
+                CREATE TABLE sent_notifications (
+                    idempotency_key TEXT PRIMARY KEY, topic TEXT NOT NULL, notification_hash TEXT NOT NULL,
+                    sent_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, notification_data TEXT,
+                    recipient TEXT DEFAULT 'default'
+                )
+            ''')
+            conn.execute('PRAGMA user_version = 3')
+        memory = NotificationMemory(self.db_path)
+        memory.mark_notification_sent("tax policy", {"relevant_updates": UPDATES, "claim_id": "c1"})
+        memory.release_claim("c1")
+        self.assertEqual(memory.get_notification_stats()["total_notifications"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
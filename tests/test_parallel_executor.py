@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Tests for concurrent execution of tool calls within one agent step.
+"""
+
+import sys
+import os
+import time
+import unittest
+from unittest.mock import patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain.agents import create_tool_calling_agent
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.tools import tool
+
+from src.agent.agent import LangChainAgent
+from src.agent.fake_llm import ScriptedChatModel
+from src.agent.parallel_executor import ParallelAgentExecutor
+
+
+@tool
+def slow_a(value: str) -> str:
+    """Slow tool A."""
+    time.sleep(0.2)
+    return f"a:{value}"
+
+
+@tool
+def slow_b(value: str) -> str:
+    """Slow tool B."""
+    time.sleep(0.1)
+    return f"b:{value}"
+
+
+def _build_executor(script):
+    """Build a ParallelAgentExecutor over the slow tools."""
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", "test"),
+        ("human", "{input}"),
+        MessagesPlaceholder(variable_name="agent_scratchpad"),
+    ])
+    tools = [slow_a, slow_b]
+    agent = create_tool_calling_agent(ScriptedChatModel(script=script), tools, prompt)
+    return ParallelAgentExecutor(agent=agent, tools=tools, return_intermediate_steps=True)
+
+
+class TestParallelAgentExecutor(unittest.TestCase):
+    """Test the parallel agent executor."""
+
+    def test_tool_calls_run_concurrently(self):
+        """Test that tool calls from one step overlap and keep their order."""
+        executor = _build_executor([
+            [{"name": "slow_a", "args": {"value": "1"}}, {"name": "slow_b", "args": {"value": "2"}}],
+            "done"
+        ])
+
+        start = time.perf_counter()
+        result = executor.invoke({"input": "go"})
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(result["output"], "done")
+        steps = result["intermediate_steps"]
+        self.assertEqual([step[0].tool for step in steps], ["slow_a", "slow_b"])
+        self.assertEqual([step[1] for step in steps], ["a:1", "b:2"])
+        # Sequential execution would take at least 0.3s
+        self.assertLess(elapsed, 0.28)
+
+    def test_single_tool_call_steps(self):
+        """Test that consecutive single-call steps still run in sequence."""
+        executor = _build_executor([
+            [{"name": "slow_b", "args": {"value": "1"}}],
+            [{"name": "slow_b", "args": {"value": "2"}}],
+            "done"
+        ])
+
+        result = executor.invoke({"input": "go"})
+
+        self.assertEqual([step[1] for step in result["intermediate_steps"]], ["b:1", "b:2"])
+
+    def test_agent_uses_parallel_executor(self):
+        """Test that LangChainAgent selects the executor from configuration."""
+        model = ScriptedChatModel(script=["done"])
+        agent = LangChainAgent(llm=model)
+        self.assertIsInstance(agent.executor, ParallelAgentExecutor)
+
+        with patch("src.agent.config.Config.PARALLEL_TOOL_CALLS", False):
+            agent = LangChainAgent(llm=model)
+        self.assertNotIsInstance(agent.executor, ParallelAgentExecutor)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Tests for the CLI profiling mode (--profile).
+"""
+
+import sys
+import os
+import cProfile
+import pstats
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from io import StringIO
+from unittest.mock import patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.cli import CLI
+from src.cli.profiling import Profiler
+
+
+def busy_worker(seconds: float):
+    """Spin on the CPU for the given number of seconds."""
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(range(100))
+
+
+retained = []
+
+
+def allocate_blocks():
+    """Allocate memory that is still held when profiling stops."""
+    retained.append([bytearray(1024) for _ in range(2000)])
+
+
+class TestProfiler(unittest.TestCase):
+    """Test the profiler's output files."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.prefix = os.path.join(self.directory, "nested", "run")
+
+    def tearDown(self):
+        retained.clear()
+        shutil.rmtree(self.directory)
+
+    def test_profiles_threads(self):
+        """Test that work on a thread started during profiling is in both outputs."""
+        with Profiler(self.prefix, sample_interval=0.001) as profiler:
+            worker = threading.Thread(target=busy_worker, args=(0.2,))
+            worker.start()
+            worker.join()
+
+        stats = pstats.Stats(profiler.paths["pstats"])
+        self.assertIn("busy_worker", {name for _, _, name in stats.stats})
+
+        with open(profiler.paths["collapsed"]) as f:
+            lines = f.read().splitlines()
+        self.assertGreater(profiler.sampler.sample_count, 0)
+        stacks = {}
+        for line in lines:
+            stack, count = line.rsplit(" ", 1)
+            stacks[stack] = int(count)
+        worker_samples = sum(count for stack, count in stacks.items() if "busy_worker" in stack)
+        self.assertGreater(worker_samples, 0)
+        self.assertFalse(any("profile-sampler" in stack for stack in stacks))
+
+    def test_stop_disables_every_profiler(self):
+        """Test that profilers of threads that outlive the profile are disabled too."""
+        disabled = []
+
+        class RecordingProfile(cProfile.Profile):
+            def disable(self):
+                disabled.append(self)
+                super().disable()
+
+        started, finish = threading.Event(), threading.Event()
+
+        def pool_worker():
+            started.set()
+            finish.wait()
+
+        with patch("src.cli.profiling.cProfile.Profile", RecordingProfile), \
+                patch("src.cli.profiling.PROCESS_WIDE_PROFILER", False):
+            with Profiler(self.prefix) as profiler:
+                worker = threading.Thread(target=pool_worker)
+                worker.start()
+                started.wait()
+        finish.set()
+        worker.join()
+        self.assertEqual(len(profiler._profiles), 2)
+        self.assertTrue(all(profile in disabled for profile in profiler._profiles))
+        self.assertIsNone(threading.getprofile())
+
+    def test_process_wide_profiler(self):
+        """Test that a single profiler is used when cProfile covers every thread (3.12+)."""
+        with patch("src.cli.profiling.PROCESS_WIDE_PROFILER", True):
+            with Profiler(self.prefix) as profiler:
+                self.assertIsNone(threading.getprofile())
+                worker = threading.Thread(target=busy_worker, args=(0.01,))
+                worker.start()
+                worker.join()
+        self.assertEqual(len(profiler._profiles), 1)
+        self.assertTrue(os.path.exists(profiler.paths["pstats"]))
+
+    def test_memory_report(self):
+        """Test that the tracemalloc report lists the largest allocation site."""
+        with Profiler(self.prefix, memory_top=5) as profiler:
+            allocate_blocks()
+
+        with open(profiler.paths["tracemalloc"]) as f:
+            report = f.read()
+        first_site = report.splitlines()[3]
+        self.assertTrue(first_site.startswith("#1: "))
+        self.assertIn("test_profiling.py", first_site)
+
+    def test_no_memory_report_by_default(self):
+        """Test that tracemalloc is only used when asked for."""
+        with Profiler(self.prefix) as profiler:
+            busy_worker(0.01)
+        self.assertNotIn("tracemalloc", profiler.paths)
+        self.assertEqual(sorted(os.listdir(os.path.dirname(self.prefix))), ["run.collapsed", "run.pstats"])
+
+
+class TestCLIProfiling(unittest.TestCase):
+    """Test the --profile command line options."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cli = CLI()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_extract_option(self):
+        """Test the option value forms."""
+        with patch('sys.argv', ['main.py', '--profile-out', 'a/b', '--profile-memory', 'query']):
+            self.assertEqual(self.cli._extract_option("--profile-out"), "a/b")
+            self.assertEqual(self.cli._extract_option("--profile-memory", bare="25"), "25")
+            self.assertIsNone(self.cli._extract_option("--missing"))
+            self.assertEqual(sys.argv, ['main.py', 'query'])
+        with patch('sys.argv', ['main.py', '--profile-memory', '10', '--profile-out=x', 'query']):
+            self.assertEqual(self.cli._extract_option("--profile-memory", bare="25"), "10")
+            self.assertEqual(self.cli._extract_option("--profile-out"), "x")
+            self.assertEqual(sys.argv, ['main.py', 'query'])
+
+    def test_missing_option_value(self):
+        """Test that an option without its value prints the options and exits non-zero."""
+        for argv in (['main.py', '--profile-out'], ['main.py', '--profile-memory=lots', '--memory']):
+            with self.subTest(argv=argv), patch('sys.argv', argv), \
+                    patch('sys.stdout', new=StringIO()) as fake_output:
+                with self.assertRaises(SystemExit) as raised:
+                    self.cli.run()
+                self.assertEqual(raised.exception.code, 2)
+                self.assertIn("❌ Error: --profile", fake_output.getvalue())
+                self.assertIn("Available options", fake_output.getvalue())
+
+    def test_profile_command(self):
+        """Test that a profiled command runs locally and writes every output file."""
+        prefix = os.path.join(self.directory, "memory")
+        argv = ['main.py', '--profile', '--profile-out', prefix, '--profile-memory=3', '--memory']
+        with patch('sys.argv', argv), patch.object(self.cli, '_connect_daemon') as connect, \
+                patch('sys.stdout', new=StringIO()) as fake_output:
+            self.cli.run()
+            output = fake_output.getvalue()
+
+        connect.assert_not_called()
+        self.assertIn("Notification Memory Status", output)
+        self.assertIn("Profile", output)
+        self.assertIn("show_memory_status", output)
+        for suffix in (".pstats", ".collapsed", ".tracemalloc.txt"):
+            self.assertTrue(os.path.exists(prefix + suffix))
+
+    def test_default_output_directory(self):
+        """Test that profiles go to PROFILE_DIR when no path is given."""
+        with patch('sys.argv', ['main.py', '--profile', '--recent']), \
+                patch('src.agent.config.Config.PROFILE_DIR', self.directory), \
+                patch('sys.stdout', new=StringIO()):
+            self.cli.run()
+        files = os.listdir(self.directory)
+        self.assertEqual(len(files), 2)
+        self.assertTrue(all(name.startswith("profile-") for name in files))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Tests for skipping topic checks whose search results did not change.
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.agent import tools
+from src.agent.notification_memory import NotificationMemory
+from src.agent.tools import check_topic
+
+
+RESULTS = [
+    {"title": f"Solar news {i}", "url": f"http://example.com/{i}", "snippet": "The latest subsidy update"}
+    for i in range(5)
+]
+
+
+def events_for(*recipients):
+    return {recipient: {"topic": "solar subsidy", "event_ids": [1], "recipient": recipient}
+            for recipient in recipients}
+
+
+class TestResultFingerprints(unittest.TestCase):
+    """Test changed_results/remember_results and check_topic."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.memory = NotificationMemory(os.path.join(self.tmp_dir.name, "memory.db"))
+        self.memory_patch = patch("src.agent.tools.notification_memory", self.memory)
+        self.memory_patch.start()
+
+    def tearDown(self):
+        self.memory_patch.stop()
+        self.tmp_dir.cleanup()
+
+    def check(self, results, *recipients, commit=True):
+        with patch.object(tools, "find_relevant_updates", wraps=tools.find_relevant_updates) as relevance:
+            decisions = check_topic("solar subsidy", events_for(*recipients), "query", results, commit=commit)
+        checked = relevance.call_args[0][0] if relevance.called else None
+        return decisions, checked
+
+    def test_unchanged_results_are_skipped(self):
+        """Test that the same results in any order stop at the fingerprint."""
+        decisions, checked = self.check(RESULTS, "a", "b")
+        self.assertEqual(checked, RESULTS)
+        self.assertTrue(all(decision["should_send_email"] for decision in decisions.values()))
+
+        with patch.object(self.memory, "claim_for_recipients") as claim:
+            decisions, checked = self.check(list(reversed(RESULTS)), "b", "a")
+        self.assertIsNone(checked)
+        claim.assert_not_called()
+        self.assertEqual(decisions["a"]["reasoning"], "No new results for 'solar subsidy' since the last check")
+        self.assertFalse(decisions["b"]["should_send_email"])
+
+    def test_only_changed_results_are_processed(self):
+        """Test that a partly changed result set only checks and sends the new results."""
+        self.check(RESULTS, "a")
+        fresh = {"title": "Solar news 5", "url": "http://example.com/5", "snippet": "Released today"}
+        edited = {**RESULTS[1], "snippet": "Updated figures"}
+        results = [fresh, RESULTS[0], edited] + RESULTS[2:4]
+        decisions, checked = self.check(results, "a")
+        self.assertEqual(checked, [fresh, edited])
+        # The edited result has the same title and url, so it was already sent
+        self.assertEqual(decisions["a"]["relevant_updates"], [fresh])
+        self.assertEqual(decisions["a"]["already_sent_updates"], [edited])
+
+    def test_new_recipient_gets_a_full_check(self):
+        """Test that a recipient not checked before is sent every result."""
+        self.check(RESULTS, "a")
+        decisions, checked = self.check(RESULTS, "a", "b")
+        self.assertEqual(checked, RESULTS)
+        self.assertFalse(decisions["a"]["should_send_email"])
+        self.assertEqual(decisions["b"]["relevant_updates"], RESULTS)
+
+    def test_released_claims_are_checked_again(self):
+        """Test that releasing a claim makes the next check process the results again."""
+        decisions, _ = self.check(RESULTS, "a", commit=False)
+        self.memory.release_claim(decisions["a"]["claim_id"])
+        decisions, checked = self.check(RESULTS, "a")
+        self.assertEqual(checked, RESULTS)
+        self.assertTrue(decisions["a"]["should_send_email"])
+
+    def test_failed_delivery_before_the_check_returns(self):
+        """Test that a delivery failing while the check settles its claims is checked again."""
+        class FailingDelivery:
+            def submit(delivery, data, recipient=None):
+                self.memory.release_claim(data["claim_id"])
+
+        with patch("src.agent.tools.get_delivery_service", return_value=FailingDelivery()), \
+                patch("src.agent.tools.get_digest_buffer", return_value=None):
+            decisions, _ = self.check(RESULTS, "a")
+        self.assertTrue(decisions["a"]["should_send_email"])
+        decisions, checked = self.check(RESULTS, "a")
+        self.assertEqual(checked, RESULTS)
+        self.assertTrue(decisions["a"]["should_send_email"])
+
+    def test_fingerprints_are_shared_through_the_database(self):
+        """Test that another process's memory on the same database skips the same results."""
+        self.check(RESULTS, "a", "b")
+        other = NotificationMemory(self.memory.db_path)
+        self.assertEqual(other.changed_results("solar subsidy", RESULTS, ["a", "b"]), [])
+        self.assertEqual(other.changed_results("solar subsidy", RESULTS[:4], ["a"]), [])
+        self.assertEqual(other.changed_results("solar subsidy", RESULTS, ["a", "c"]), RESULTS)
+
+    def test_expiry(self):
+        """Test that remembered result sets are trusted only for the configured time."""
+        self.memory.remember_results("solar subsidy", RESULTS, ["a"])
+        self.assertEqual(self.memory.changed_results("solar subsidies", RESULTS, ["a"]), [])
+        with patch("src.agent.config.Config.RESULT_FINGERPRINT_TTL_SECONDS", 0):
+            self.assertEqual(self.memory.changed_results("solar subsidy", RESULTS, ["a"]), RESULTS)
+        with sqlite3.connect(self.memory.db_path) as conn:
+            conn.execute("UPDATE result_fingerprints SET checked_at = datetime('now', '-2 hours')")
+        self.assertEqual(self.memory.changed_results("solar subsidy", RESULTS, ["a"]), RESULTS)
+        self.memory.cleanup_old_notifications()
+        self.memory.remember_results("solar subsidy", RESULTS, ["a"])
+        self.assertEqual(self.memory.changed_results("solar subsidy", RESULTS, ["a"]), [])
+        self.memory.reset_memory()
+        self.assertEqual(self.memory.changed_results("solar subsidy", RESULTS, ["a"]), RESULTS)
+
+
+if __name__ == '__main__':
+    unittest.main()
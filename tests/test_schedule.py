@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Tests for compiled event schedules (English and 5-field cron).
+"""
+
+import sys
+import os
+import unittest
+from datetime import datetime
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.agent.schedule import CompiledSchedule, compile_schedule, next_run_time
+
+
+# Monday 2026-10-19 10:30:15
+NOW = datetime(2026, 10, 19, 10, 30, 15)
+
+
+class TestSchedule(unittest.TestCase):
+    """Test schedule compilation and next run times."""
+
+    def test_english_schedules(self):
+        """Test the English forms events are written in."""
+        cases = {
+            "Every day at 12:00 AM": datetime(2026, 10, 20, 0, 0),
+            "Every day at 9:15 PM": datetime(2026, 10, 19, 21, 15),
+            "Every 15 minutes": datetime(2026, 10, 19, 10, 45),
+            "Every hour": datetime(2026, 10, 19, 11, 30),
+            "hourly": datetime(2026, 10, 19, 11, 30),
+            "Every Monday at 9 AM": datetime(2026, 10, 26, 9, 0),
+            "Every weekday at 8am": datetime(2026, 10, 20, 8, 0),
+            "weekly": datetime(2026, 10, 26, 0, 0),
+        }
+        for expression, expected in cases.items():
+            with self.subTest(expression=expression):
+                self.assertEqual(next_run_time(expression, NOW), expected)
+
+    def test_cron_schedules(self):
+        """Test 5-field cron strings."""
+        cases = {
+            "0 9 * * 1-5": datetime(2026, 10, 20, 9, 0),
+            "*/15 * * * *": datetime(2026, 10, 19, 10, 45),
+            "30 10 * * *": datetime(2026, 10, 20, 10, 30),
+            "0 0 1 jan *": datetime(2027, 1, 1, 0, 0),
+            "0 0 29 2 *": datetime(2028, 2, 29, 0, 0),
+            # Day-of-month and day-of-week both restricted: either matches
+            "0 0 13 * fri": datetime(2026, 10, 23, 0, 0),
+            "0 12 * * sun": datetime(2026, 10, 25, 12, 0),
+            "0 12 * * 7": datetime(2026, 10, 25, 12, 0),
+        }
+        for expression, expected in cases.items():
+            with self.subTest(expression=expression):
+                self.assertEqual(next_run_time(expression, NOW), expected)
+
+    def test_invalid_schedules(self):
+        """Test that unknown or impossible schedules never fire."""
+        for expression in ["bogus", "every day at 13 pm", "61 * * * *", "0 0 31 4 *", "every fortnight"]:
+            with self.subTest(expression=expression):
+                self.assertIsNone(next_run_time(expression, NOW))
+
+    def test_compiled_schedules_are_cached(self):
+        """Test that equivalent expressions share one compiled schedule."""
+        schedule = compile_schedule("Every day at 12:00 AM")
+        self.assertIs(compile_schedule("every  day at 12:00 am"), schedule)
+        self.assertIs(compile_schedule("Every day at 12:00 AM"), schedule)
+
+    def test_schedules_must_implement_next_after(self):
+        """Test that a schedule class without next_after cannot be instantiated."""
+        class Incomplete(CompiledSchedule):
+            pass
+
+        with self.assertRaises(TypeError):
+            Incomplete()
+
+
+if __name__ == "__main__":
+    unittest.main()
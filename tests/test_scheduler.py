@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Tests for the heap-based event scheduler.
+"""
+
+import sys
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.agent.event_store import EventStore
+from src.agent.notification_memory import NotificationMemory
+from src.agent.scheduler import EventScheduler, event_topic, run_event_check
+
+
+HOURLY = {"name": "Hourly", "action": "If any update in tax policy then send email to the user",
+          "cron_job": "Every hour"}
+
+
+class TestEventScheduler(unittest.TestCase):
+    """Test scheduling, firing, jitter and catch-up."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, "events.db")
+        self.store = EventStore(self.db_path)
+        self.fired = []
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp_dir.cleanup()
+
+    def make_scheduler(self, **kwargs):
+        kwargs.setdefault("jitter", 0)
+        return EventScheduler(self.store, run_event=self.fired.append, **kwargs)
+
+    def test_fires_due_events_and_reschedules(self):
+        """Test that due events fire once and move to their next run."""
+        event = self.store.create(HOURLY)
+        scheduler = self.make_scheduler()
+
+        self.assertEqual(scheduler.tick(now=event["next_run_at"] - 1), 0)
+        self.assertEqual(scheduler.tick(now=event["next_run_at"]), 1)
+        self.assertEqual([e["id"] for e in self.fired], [event["id"]])
+
+        next_run = self.store.get(event["id"])["next_run_at"]
+        self.assertAlmostEqual(next_run - event["next_run_at"], 3600, delta=1)
+        self.assertEqual(scheduler.next_fire_time(), next_run)
+
+    def test_store_changes_are_picked_up(self):
+        """Test that created, updated and deleted events reschedule."""
+        scheduler = self.make_scheduler()
+        event = self.store.create(HOURLY)
+        self.assertEqual(scheduler.next_fire_time(), event["next_run_at"])
+
+        updated = self.store.update(event["id"], {**HOURLY, "cron_job": "Every 2 hours"})
+        self.assertEqual(scheduler.next_fire_time(), updated["next_run_at"])
+
+        self.store.delete(event["id"])
+        self.assertIsNone(scheduler.next_fire_time())
+        self.assertEqual(scheduler.tick(now=updated["next_run_at"] + 1), 0)
+
+    def test_jitter_spreads_events(self):
+        """Test that events with the same run time get distinct fire times within the window."""
+        events = self.store.create_many([HOURLY] * 50)
+        scheduler = self.make_scheduler(jitter=60)
+
+        fire_times = sorted(entry[0] for entry in scheduler._heap)
+        base = events[0]["next_run_at"]
+        self.assertTrue(all(base <= t < base + 60 for t in fire_times))
+        self.assertGreater(len(set(fire_times)), 40)
+
+    def test_catch_up_after_downtime(self):
+        """Test that a run missed while down fires once on startup."""
+        event = self.store.create(HOURLY)
+        # Pretend the process was down for three intervals
+        later = event["next_run_at"] + 3 * 3600 + 10
+
+        scheduler = self.make_scheduler(clock=lambda: later)
+        self.assertEqual(scheduler.tick(), 1)
+        self.assertEqual(scheduler.tick(), 0)
+        self.assertGreater(self.store.get(event["id"])["next_run_at"], later)
+
+    def test_skip_missed_runs(self):
+        """Test that missed runs are skipped when catch-up is off."""
+        event = self.store.create(HOURLY)
+        later = event["next_run_at"] + 10
+
+        scheduler = self.make_scheduler(clock=lambda: later, catch_up=False)
+        self.assertEqual(scheduler.tick(), 0)
+        self.assertEqual(self.fired, [])
+        self.assertGreater(self.store.get(event["id"])["next_run_at"], later)
+
+    def test_background_loop(self):
+        """Test the background thread fires events as they come due."""
+        scheduler = self.make_scheduler()
+        scheduler.start()
+        try:
+            event = self.store.create(HOURLY)
+            self.store.mark_run(event["id"], run_at=time.time() - 10, next_run_at=time.time() + 0.1)
+            scheduler.schedule(self.store.get(event["id"]))
+            deadline = time.time() + 3
+            while not self.fired and time.time() < deadline:
+                time.sleep(0.02)
+        finally:
+            scheduler.stop(timeout=2)
+        self.assertEqual(len(self.fired), 1)
+
+    def test_event_topic(self):
+        """Test extracting the watched topic from an action."""
+        self.assertEqual(event_topic({"action": HOURLY["action"]}), "tax policy")
+        self.assertEqual(event_topic({"action": "When new budget is announced then mail me"}),
+                         "budget")
+
+    def test_run_event_check_uses_plan_recipients(self):
+        """Test that a fired event is checked for its plan's recipients and skipped if unsupported."""
+        memory = NotificationMemory(os.path.join(self.tmp_dir.name, "memory.db"))
+        results = [{"title": "Tax update", "url": "http://example.com/tax", "snippet": "Announced today"}]
+        event = self.store.create({**HOURLY, "action": "If any update in tax policy then email "
+                                                     "alice@example.com and bob@example.com"})
+        with patch("src.agent.tools.notification_memory", memory), \
+                patch("src.agent.tools.cached_search", return_value=results), \
+                patch("src.agent.tools.get_delivery_service", return_value=None):
+            decision = run_event_check(event)
+            self.assertTrue(decision["should_send_email"])
+            self.assertEqual(set(decision["recipients"]), {"alice@example.com", "bob@example.com"})
+            self.assertEqual({n["recipient"] for n in memory.get_recent_notifications("tax policy")},
+                             {"alice@example.com", "bob@example.com"})
+
+            slack = self.store.create({**HOURLY, "action": "If any update in tax policy then send a slack message"})
+            decision = run_event_check(slack)
+        self.assertFalse(decision["should_send_email"])
+        self.assertIn("Channel 'slack'", decision["reasoning"])
+
+
+if __name__ == "__main__":
+    unittest.main()
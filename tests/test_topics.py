@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Tests for topic canonicalization and the shared search cache.
+"""
+
+import sys
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.agent.notification_memory import NotificationMemory
+from src.agent.search_cache import SearchCache
+from src.agent.tools import cached_search
+from src.agent.topics import TopicCanonicalizer, canonical_topic, stem
+
+
+class TestTopicCanonicalizer(unittest.TestCase):
+    """Test canonical topic keys."""
+
+    def test_equivalent_topics_share_a_key(self):
+        """Test that plural, reordered and padded phrasings collapse."""
+        key = canonical_topic("tax policy")
+        self.assertEqual(key, "policy tax")
+        for variant in ["tax policies", "policy on tax", "Tax Policy updates", "latest updates on TAX policy"]:
+            self.assertEqual(canonical_topic(variant), key, variant)
+
+    def test_different_topics_stay_apart(self):
+        """Test that distinct topics keep distinct keys."""
+        self.assertNotEqual(canonical_topic("topic 1"), canonical_topic("topic 2"))
+        self.assertNotEqual(canonical_topic("tax policy"), canonical_topic("budget policy"))
+
+    def test_canonicalize_is_idempotent(self):
+        """Test that canonical keys map to themselves."""
+        for topic in ["tax policies", "new budget announcements", "artificial intelligence research"]:
+            key = canonical_topic(topic)
+            self.assertEqual(canonical_topic(key), key)
+
+    def test_stem(self):
+        """Test the light stemmer."""
+        self.assertEqual(stem("policies"), "policy")
+        self.assertEqual(stem("taxes"), "tax")
+        self.assertEqual(stem("budgets"), "budget")
+        self.assertEqual(stem("news"), "news")
+        self.assertEqual(stem("status"), "status")
+        self.assertEqual(stem(stem("analyses")), stem("analyses"))
+
+    def test_synonyms(self):
+        """Test default and custom synonym mappings."""
+        self.assertEqual(canonical_topic("artificial intelligence"), canonical_topic("AI"))
+
+        canonicalizer = TopicCanonicalizer(synonyms={"levy": "tax"})
+        self.assertEqual(canonicalizer.canonicalize("levy policy"), canonicalizer.canonicalize("tax policy"))
+
+    def test_update_query_detection(self):
+        """Test that update keywords are matched as substrings."""
+        canonicalizer = TopicCanonicalizer()
+        self.assertTrue(canonicalizer.is_update_query("any updates in tax policy"))
+        self.assertTrue(canonicalizer.is_update_query("Latest on GST"))
+        self.assertTrue(canonicalizer.is_update_query("renewable energy news"))
+        self.assertFalse(canonicalizer.is_update_query("what is the capital of France"))
+        self.assertEqual(canonicalizer.extract_topic("There is any update in tax policy"), "tax policy")
+
+
+class TestCanonicalMemory(unittest.TestCase):
+    """Test that notification memory stores canonical topics."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, "memory.db")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_equivalent_topics_share_memory(self):
+        """Test that an update sent for one phrasing is deduplicated for another."""
+        memory = NotificationMemory(self.db_path)
+        update = {"title": "Tax Update", "url": "http://tax.com"}
+        memory.mark_notification_sent("tax policies", {"relevant_updates": [update]})
+
+        new_updates, already_sent = memory.filter_new_updates("policy on tax", [update])
+
+        self.assertEqual(new_updates, [])
+        self.assertEqual(already_sent, [update])
+        self.assertEqual(memory.get_notification_stats()["notifications_by_topic"], {"policy tax": 1})
+        self.assertEqual(len(memory.get_recent_notifications("Tax Policy")), 1)
+
+    def test_existing_topics_are_migrated(self):
+        """Test that rows written before canonical keys are rewritten on open."""
+        NotificationMemory(self.db_path)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.execute("INSERT INTO notification_history (topic, notification_hash, notification_data) "
+                         "VALUES ('tax policies', 'h', '{}')")
+            conn.execute("PRAGMA user_version = 0")
+
+        memory = NotificationMemory(self.db_path)
+
+        self.assertEqual(memory.get_notification_stats()["notifications_by_topic"], {"policy tax": 1})
+
+
+class TestSearchCache(unittest.TestCase):
+    """Test the search result cache."""
+
+    def test_hit_and_expiry(self):
+        """Test that cached values are reused until they expire."""
+        cache = SearchCache(ttl=0.05)
+        calls = []
+        fetch = lambda: calls.append(1) or len(calls)
+
+        self.assertEqual(cache.get_or_fetch("k", fetch), 1)
+        self.assertEqual(cache.get_or_fetch("k", fetch), 1)
+        time.sleep(0.06)
+        self.assertEqual(cache.get_or_fetch("k", fetch), 2)
+
+    def test_concurrent_misses_share_one_fetch(self):
+        """Test single-flight loading of the same key."""
+        cache = SearchCache(ttl=60)
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            time.sleep(0.1)
+            return "result"
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get_or_fetch("k", fetch)))
+                   for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, ["result"] * 4)
+        self.assertEqual(len(calls), 1)
+
+    def test_errors_are_not_cached(self):
+        """Test that a failed fetch is retried on the next lookup."""
+        cache = SearchCache(ttl=60)
+
+        def failing():
+            raise RuntimeError("search failed")
+
+        with self.assertRaises(RuntimeError):
+            cache.get_or_fetch("k", failing)
+        self.assertEqual(cache.get_or_fetch("k", lambda: "ok"), "ok")
+
+    def test_cache_keys(self):
+        """Test that topic searches share canonical keys and free-form queries do not."""
+        queries = []
+
+        def run_search(query, max_results):
+            queries.append(query)
+            return [{"title": query, "url": "", "snippet": ""}]
+
+        with patch("src.agent.tools.search_cache", SearchCache(ttl=60)), \
+                patch("src.agent.tools._run_search", side_effect=run_search):
+            cached_search("latest updates tax policy today", topic="tax policy")
+            cached_search("latest updates tax policies today", topic="policy on tax")
+            cached_search("tax policy news")
+            cached_search("new tax policy")
+            cached_search("  New TAX policy ")
+        self.assertEqual(queries, ["latest updates tax policy today", "tax policy news", "new tax policy"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Tests for the direct update-query fast path.
+"""
+
+import sys
+import os
+import json
+import time
+import unittest
+from unittest.mock import patch, MagicMock
+
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.agent.agent import LangChainAgent
+from src.agent.fake_llm import ScriptedChatModel
+from src.agent.parallel_executor import get_tool_pool
+
+
+def _slow_tool(delay, output):
+    """Build a tool stand-in whose invoke sleeps before returning output."""
+    mock_tool = MagicMock()
+
+    def invoke(*args, **kwargs):
+        time.sleep(delay)
+        return output
+
+    mock_tool.invoke.side_effect = invoke
+    return mock_tool
+
+
+EMAIL_RESULT = json.dumps({
+    "should_send_email": True,
+    "reasoning": "Found 1 new updates for 'tax policy'",
+    "email_content": {"subject": "1 New Update", "body": "Hello"}
+})
+
+
+class TestUpdateQueryFastPath(unittest.TestCase):
+    """Test concurrency and the deadline of the update-query path."""
+
+    def setUp(self):
+        """Set up an agent on the scripted model."""
+        self.agent = LangChainAgent(llm=ScriptedChatModel(script=["unused"]))
+
+    def test_tools_run_concurrently(self):
+        """Test that search and email check overlap."""
+        search = _slow_tool(0.2, '[{"title": "Tax"}]')
+        email = _slow_tool(0.2, EMAIL_RESULT)
+
+        with patch("src.agent.agent.search_web", search), patch("src.agent.agent.checkIsMailneedtoSend", email):
+            start = time.perf_counter()
+            response = self.agent._handle_update_query("tax policy updates")
+            elapsed = time.perf_counter() - start
+
+        self.assertLess(elapsed, 0.35)
+        self.assertIn("Will send email", response)
+        self.assertIn('"title": "Tax"', response)
+        self.assertIn("1 New Update", response)
+
+    def test_deadline_returns_partial_output(self):
+        """Test that a slow email check is reported as pending."""
+        search = _slow_tool(0.0, '[{"title": "Tax"}]')
+        email = _slow_tool(0.5, EMAIL_RESULT)
+
+        with patch("src.agent.agent.search_web", search), \
+                patch("src.agent.agent.checkIsMailneedtoSend", email), \
+                patch("src.agent.config.Config.UPDATE_QUERY_DEADLINE", 0.1):
+            start = time.perf_counter()
+            response = self.agent._handle_update_query("tax policy updates")
+            elapsed = time.perf_counter() - start
+
+        self.assertLess(elapsed, 0.4)
+        self.assertIn('"title": "Tax"', response)
+        self.assertIn("Email decision pending", response)
+
+    def test_deadline_omits_slow_search(self):
+        """Test that a slow search is omitted while the email decision is shown."""
+        search = _slow_tool(0.5, '[{"title": "Tax"}]')
+        email = _slow_tool(0.0, EMAIL_RESULT)
+
+        with patch("src.agent.agent.search_web", search), \
+                patch("src.agent.agent.checkIsMailneedtoSend", email), \
+                patch("src.agent.config.Config.UPDATE_QUERY_DEADLINE", 0.1):
+            response = self.agent._handle_update_query("tax policy updates")
+
+        self.assertIn("results omitted", response)
+        self.assertIn("Will send email", response)
+
+    def test_stragglers_do_not_block_tool_pool(self):
+        """Test that queued calls are cancelled at the deadline and the tool pool stays free."""
+        search = _slow_tool(0.5, '[{"title": "Tax"}]')
+        email = _slow_tool(0.0, EMAIL_RESULT)
+
+        with patch("src.agent.agent.search_web", search), \
+                patch("src.agent.agent.checkIsMailneedtoSend", email), \
+                patch("src.agent.config.Config.TOOL_MAX_WORKERS", 1), \
+                patch("src.agent.config.Config.UPDATE_QUERY_DEADLINE", 0.1):
+            response = self.agent._handle_update_query("tax policy updates")
+            # The search still holds the only update worker, but agent tool calls run
+            self.assertEqual(get_tool_pool(1).submit(lambda: "ran").result(timeout=0.2), "ran")
+
+        self.assertIn("did not start", response)
+        email.invoke.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()